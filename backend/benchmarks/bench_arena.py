@@ -0,0 +1,119 @@
+"""
+Royale arena tick cost at full load.
+
+Fills a ``--grid`` board with ``--snakes`` bots (respawned as they die) and
+runs ``--ticks`` ticks, reporting:
+
+  * LiveArena.step with nobody watching (occupancy-grid collisions)
+  * the same run with one spectator, including encoding the JSON delta
+  * the collision check done by scanning every body instead, timed on the
+    same boards (the cost the occupancy grid avoids)
+
+against the ``--rate`` ticks/s budget. Bot steering is not timed.
+
+    uv run python -m benchmarks.bench_arena --snakes 500 --grid 500 --ticks 400
+"""
+import argparse
+import random
+import time
+
+from src.game.arena import ARENA_TOPIC, Arena, ArenaFull, LiveArena
+from src.game.engine import DELTAS, OPPOSITES
+from src.realtime.hub import Subscription
+
+
+def steer(arena: Arena, rng: random.Random):
+    """Wander, turning away from walls and bodies right in front."""
+    size, occupied = arena.grid_size, arena.occupied
+    for snake in arena.snakes.values():
+        head = snake.body[0]
+        hx, hy = head % size, head // size
+        dx, dy = DELTAS[snake.direction]
+        x, y = hx + dx, hy + dy
+        blocked = not (0 <= x < size and 0 <= y < size) or occupied[y * size + x]
+        if not blocked and rng.random() > 0.05:
+            continue
+        for direction in rng.sample(tuple(DELTAS), 4):
+            if direction == OPPOSITES[snake.direction]:
+                continue
+            dx, dy = DELTAS[direction]
+            x, y = hx + dx, hy + dy
+            if 0 <= x < size and 0 <= y < size and not occupied[y * size + x]:
+                arena.set_direction(snake.id, direction)
+                break
+
+
+def scan_collisions(arena: Arena) -> int:
+    """Collision check without the grid: every next head against every body."""
+    size, hits = arena.grid_size, 0
+    bodies = [snake.body for snake in arena.snakes.values()]
+    for snake in arena.snakes.values():
+        dx, dy = DELTAS[snake.next_direction]
+        head = snake.body[0]
+        cell = (head // size + dy) * size + head % size + dx
+        hits += any(cell in body for body in bodies)
+    return hits
+
+
+def refill(live: LiveArena, snakes: int, joined: list):
+    while len(live.arena.snakes) < snakes:
+        try:
+            live.join(f"bot{joined[0]}", f"Bot {joined[0]}")
+        except ArenaFull:
+            return
+        joined[0] += 1
+
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+def run(args, spectate: bool) -> tuple:
+    """One seeded run; the board evolves the same way with or without a spectator."""
+    live = LiveArena(Arena(args.grid, args.food, seed=0), max_snakes=args.snakes)
+    subscription = Subscription(maxsize=args.ticks + 1)
+    if spectate:
+        live.hub.subscribe(subscription, ARENA_TOPIC)
+    rng, joined = random.Random(0), [0]
+    refill(live, args.snakes, joined)
+
+    times, scans, deaths, lengths = [], [], 0, []
+    for tick in range(args.ticks):
+        steer(live.arena, rng)
+        if not spectate and tick % args.scan_every == 0:
+            began = time.perf_counter()
+            scan_collisions(live.arena)
+            scans.append(time.perf_counter() - began)
+        began = time.perf_counter()
+        result = live.step()
+        if spectate:
+            subscription.queue.get_nowait()[2].text()
+        times.append(time.perf_counter() - began)
+        deaths += len(result.died)
+        lengths.append(sum(len(s.body) for s in live.arena.snakes.values()) / max(1, len(live.arena.snakes)))
+        refill(live, args.snakes, joined)
+    return times, scans, deaths, sum(lengths) / len(lengths)
+
+
+def main(args):
+    budget = 1000 / args.rate
+    times, scans, deaths, length = run(args, spectate=False)
+    spectated, _, _, _ = run(args, spectate=True)
+    print(f"snakes={args.snakes} grid={args.grid}x{args.grid} ticks={args.ticks} deaths={deaths}"
+          f" avg length={length:.1f} budget={budget:.1f}ms/tick ({args.rate}/s)")
+    print(f"{'tick':<24} {'p50':>8} {'p99':>8} {'max ticks/s':>12}")
+    for name, samples in (("step", times), ("step + json delta", spectated), ("body scan (collisions)", scans)):
+        p50 = percentile(samples, 0.5)
+        print(f"{name:<24} {p50:>6.2f}ms {percentile(samples, 0.99):>6.2f}ms {1000 / p50:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snakes", type=int, default=500)
+    parser.add_argument("--grid", type=int, default=500)
+    parser.add_argument("--food", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=400)
+    parser.add_argument("--rate", type=int, default=20)
+    parser.add_argument("--scan-every", type=int, default=20)
+    main(parser.parse_args())
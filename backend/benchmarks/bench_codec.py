@@ -0,0 +1,65 @@
+"""
+Encode/decode cost and size of game frames: JSON vs the binary codec.
+
+"pydantic" is the REST path today (validate an ActiveGame, dump JSON),
+"json" is json.dumps of the plain dict, "binary" is src.game.codec.
+
+    uv run python -m benchmarks.bench_codec
+"""
+import json
+import time
+
+from src.game import codec
+from src.models import schemas
+
+REPEAT = 2000
+
+
+def serpentine(length: int, grid: int = 20) -> list:
+    return [
+        {"x": (i % grid if (i // grid) % 2 == 0 else grid - 1 - i % grid), "y": i // grid}
+        for i in range(length)
+    ]
+
+
+def per_call_us(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT * 1e6
+
+
+def main():
+    print(f"{'length':>6} {'format':>8} {'bytes':>7} {'encode us':>10} {'decode us':>10}")
+    for length in (3, 50, 200, 400):
+        state = {
+            "id": "7e481f5e-84c8-4d23-b694-f78cf15b46b3",
+            "playerId": "3caf8ff1-1251-4802-95a5-ce355d5391d0",
+            "playerName": "user1",
+            "score": length * 10,
+            "mode": "walls",
+            "snake": serpentine(length),
+            "food": {"x": 1, "y": 1},
+            "direction": "left",
+            "isActive": True,
+        }
+        as_json = json.dumps(state)
+        binary = codec.encode_snapshot(state)
+        rows = {
+            "pydantic": (
+                len(schemas.ActiveGame.model_validate(state).model_dump_json(by_alias=True)),
+                per_call_us(lambda: schemas.ActiveGame.model_validate(state).model_dump_json(by_alias=True)),
+                per_call_us(lambda: schemas.ActiveGame.model_validate_json(as_json)),
+            ),
+            "json": (len(as_json), per_call_us(lambda: json.dumps(state)), per_call_us(lambda: json.loads(as_json))),
+            "binary": (len(binary), per_call_us(lambda: codec.encode_snapshot(state)), per_call_us(lambda: codec.decode(binary))),
+        }
+        for name, (size, encode_us, decode_us) in rows.items():
+            print(f"{length:>6} {name:>8} {size:>7} {encode_us:>10.1f} {decode_us:>10.1f}")
+
+    delta = {"type": "delta", "id": "7e481f5e-84c8-4d23-b694-f78cf15b46b3", "tick": 1234, "head": {"x": 3, "y": 4}, "grow": False}
+    print(f"\ndelta: json {len(json.dumps(delta, separators=(',', ':')))} bytes, binary {len(codec.encode_delta(delta))} bytes")
+
+
+if __name__ == "__main__":
+    main()
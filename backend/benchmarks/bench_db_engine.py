@@ -0,0 +1,114 @@
+"""
+Mixed read/write load: the old engine setup vs build_engine's tuning.
+
+  * baseline - create_async_engine with pool_pre_ping=True and library
+               defaults (rollback journal on SQLite, ping on every checkout)
+  * tuned    - src.db.session.build_engine with the current Settings
+
+Each run seeds ``--rows`` leaderboard rows into a fresh database, then runs
+``--readers`` tasks reading keyset pages and ``--writers`` tasks submitting
+scores for ``--seconds``. Reports throughput and latency percentiles.
+
+    uv run python -m benchmarks.bench_db_engine --rows 100000 --readers 16 --writers 4
+    uv run python -m benchmarks.bench_db_engine --url postgresql+asyncpg://user:pw@localhost/bench
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.db.base import Base
+from src.db.repository import DatabaseRepository
+from src.db.session import build_engine
+from src.leaderboard.cache import ResponseCache
+from src.leaderboard.index import LeaderboardIndex
+from src.models import db as models
+
+
+def baseline_engine(url: str):
+    connect_args = {"check_same_thread": False} if "sqlite" in url else {}
+    return create_async_engine(url, connect_args=connect_args, pool_pre_ping=True)
+
+
+async def seed(engine, rows: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(delete(models.LeaderboardEntry))
+    rng = random.Random(rows)
+    batch = [{"username": f"player{i % 1000}", "score": rng.randrange(100000), "mode": "walls"} for i in range(rows)]
+    async with engine.begin() as conn:
+        for start in range(0, rows, 5000):
+            await conn.execute(insert(models.LeaderboardEntry), batch[start:start + 5000])
+
+
+def percentile(samples: list, p: float) -> float:
+    if not samples:
+        return float("nan")
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+async def run(name: str, engine, args):
+    await seed(engine, args.rows)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    index, cache = LeaderboardIndex(), ResponseCache()  # index left cold: reads go to SQL
+    stop = time.perf_counter() + args.seconds
+    reads: list = []
+    writes: list = []
+    errors = 0
+
+    async def reader(seed: int):
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                async with session_factory() as session:
+                    await DatabaseRepository(session, index, cache).get_leaderboard_page(
+                        "walls", 50, (rng.randrange(100000), "")
+                    )
+                reads.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    async def writer(seed: int):
+        nonlocal errors
+        rng = random.Random(-seed)
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                async with session_factory() as session:
+                    await DatabaseRepository(session, index, cache).add_score("bench", rng.randrange(100000), "walls")
+                writes.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(reader(i) for i in range(args.readers)), *(writer(i) for i in range(args.writers)))
+    await engine.dispose()
+    print(f"{name:<9} {len(reads) / args.seconds:>8.0f} {percentile(reads, 0.5):>8.2f} {percentile(reads, 0.99):>8.2f}"
+          f" {len(writes) / args.seconds:>9.0f} {percentile(writes, 0.5):>8.2f} {percentile(writes, 0.99):>8.2f}"
+          f" {errors:>7}")
+
+
+async def main(args):
+    directory = tempfile.mkdtemp()
+    print(f"rows={args.rows} readers={args.readers} writers={args.writers} seconds={args.seconds}")
+    print(f"{'engine':<9} {'reads/s':>8} {'r p50':>8} {'r p99':>8} {'writes/s':>9} {'w p50':>8} {'w p99':>8} {'errors':>7}")
+    for name, factory in (("baseline", baseline_engine), ("tuned", build_engine)):
+        url = args.url or f"sqlite+aiosqlite:///{os.path.join(directory, name + '.db')}"
+        await run(name, factory(url), args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--url", help="database URL (defaults to temporary SQLite files)")
+    asyncio.run(main(parser.parse_args()))
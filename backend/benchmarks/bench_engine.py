@@ -0,0 +1,80 @@
+"""
+Game engine throughput, in game-ticks per second.
+
+Creates N concurrent games, feeds each a pseudo-random direction change every
+few ticks, and times tick_all() on the scalar GameEngine and (if NumPy is
+installed) the structure-of-arrays VectorizedEngine. Finished games are
+replaced so the population stays at N for the whole run.
+
+    uv run python -m benchmarks.bench_engine --games 5000 --ticks 200
+    uv run --extra sim python -m benchmarks.bench_engine --games 50000 --backend numpy
+"""
+import argparse
+import importlib.util
+import random
+import time
+
+from src.game.engine import GameEngine
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+
+def make_engine(backend: str, games: int):
+    if backend == "numpy":
+        from src.game.vectorized import VectorizedEngine
+        return VectorizedEngine(capacity=games, seed=0)
+    return GameEngine()
+
+
+def live_games(engine) -> int:
+    if isinstance(engine, GameEngine):
+        return sum(1 for game in engine.games.values() if not game.is_game_over)
+    return int(engine.alive.sum())
+
+
+def run(backend: str, games: int, ticks: int, mode: str) -> float:
+    engine = make_engine(backend, games)
+    rng = random.Random(0)
+    ids = [engine.create_game(mode) for _ in range(games)]
+    positions = {game_id: i for i, game_id in enumerate(ids)}
+
+    stepped = 0
+    elapsed = 0.0
+    for tick in range(ticks):
+        # Input handling is outside the timed section; only tick_all is measured
+        for i in range(tick % 4, games, 4):
+            engine.set_direction(ids[i], rng.choice(DIRECTIONS))
+        stepped += live_games(engine)
+
+        start = time.perf_counter()
+        ended = engine.tick_all()
+        elapsed += time.perf_counter() - start
+
+        for game_id in ended:
+            engine.remove(game_id)
+            i = positions.pop(game_id)
+            ids[i] = engine.create_game(mode)
+            positions[ids[i]] = i
+    return stepped / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--backend", choices=("scalar", "numpy", "both"), default="both")
+    args = parser.parse_args()
+
+    backends = ["scalar", "numpy"] if args.backend == "both" else [args.backend]
+    if "numpy" in backends and importlib.util.find_spec("numpy") is None:
+        print("numpy not installed; skipping the vectorized backend")
+        backends.remove("numpy")
+
+    for backend in backends:
+        for mode in ("walls", "passthrough"):
+            rate = run(backend, args.games, args.ticks, mode)
+            print(f"{backend:>7} {mode:>12}: {rate:,.0f} game-ticks/s ({args.games} games)")
+
+
+if __name__ == "__main__":
+    main()
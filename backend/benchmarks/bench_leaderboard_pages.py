@@ -0,0 +1,117 @@
+"""
+Leaderboard page latency vs table size.
+
+Seeds a throwaway SQLite file with N leaderboard rows per size and times a
+page read at the top, middle and bottom of the table through:
+
+  * offset  - the naive LIMIT/OFFSET query, for comparison
+  * keyset  - DatabaseRepository.get_leaderboard_page on the SQL path
+  * index   - the same call served from the in-memory LeaderboardIndex
+
+Keyset and index latency should stay flat as N grows; offset grows with depth.
+
+    uv run python -m benchmarks.bench_leaderboard_pages --sizes 10000,100000,1000000
+    uv run python -m benchmarks.bench_leaderboard_pages --sizes 10000000 --no-index
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.db.base import Base
+from src.db.repository import DatabaseRepository
+from src.leaderboard.index import LeaderboardIndex
+from src.models import db as models
+
+PAGE_SIZE = 50
+REPEAT = 20
+
+
+def seed(path: str, rows: int):
+    conn = sqlite3.connect(path)
+    now = datetime.now(timezone.utc).isoformat(" ")
+    rng = random.Random(rows)
+    batch = []
+    for _ in range(rows):
+        batch.append((str(uuid.UUID(int=rng.getrandbits(128))), f"player{rng.randrange(10000)}",
+                      rng.randrange(100000), "walls", now))
+        if len(batch) == 50000:
+            conn.executemany("INSERT INTO leaderboard (id, username, score, mode, date) VALUES (?, ?, ?, ?, ?)", batch)
+            batch.clear()
+    if batch:
+        conn.executemany("INSERT INTO leaderboard (id, username, score, mode, date) VALUES (?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+async def timed(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        await fn()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+async def bench_size(rows: int, with_index: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        seed(path, rows)
+
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+        async with Session() as session:
+            sql_repo = DatabaseRepository(session, LeaderboardIndex())
+            index = LeaderboardIndex()
+            index_repo = DatabaseRepository(session, index)
+            if with_index:
+                await index_repo.warm_leaderboard_index()
+
+            entry = models.LeaderboardEntry
+            results = {}
+            for label, depth in (("top", 0), ("middle", rows // 2), ("bottom", rows - PAGE_SIZE)):
+                # Find the cursor at this depth once, outside the timed section
+                stmt = select(entry.score, entry.id).where(entry.mode == "walls")
+                stmt = stmt.order_by(desc(entry.score), entry.id).offset(max(depth - 1, 0)).limit(1)
+                cursor = tuple((await session.execute(stmt)).one()) if depth else None
+
+                async def offset_page():
+                    stmt = select(entry).where(entry.mode == "walls").order_by(desc(entry.score), entry.id)
+                    await session.execute(stmt.offset(depth).limit(PAGE_SIZE))
+
+                row = {
+                    "offset": await timed(offset_page),
+                    "keyset": await timed(lambda: sql_repo.get_leaderboard_page("walls", PAGE_SIZE, cursor)),
+                }
+                if with_index:
+                    row["index"] = await timed(lambda: index_repo.get_leaderboard_page("walls", PAGE_SIZE, cursor))
+                results[label] = row
+        await engine.dispose()
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--no-index", action="store_true", help="skip the in-memory index (saves RAM at 10M rows)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'depth':>7} {'offset ms':>10} {'keyset ms':>10} {'index ms':>10}")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        results = await bench_size(rows, not args.no_index)
+        for depth, row in results.items():
+            index_ms = f"{row['index']:10.3f}" if "index" in row else f"{'-':>10}"
+            print(f"{rows:>10} {depth:>7} {row['offset']:10.3f} {row['keyset']:10.3f} {index_ms}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
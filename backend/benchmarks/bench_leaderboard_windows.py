@@ -0,0 +1,116 @@
+"""
+Day and week leaderboards: a date-range filter on the leaderboard vs
+merging the per-day buckets.
+
+For each of ``--history`` (a comma-separated list of total row counts) a
+SQLite file is seeded with that many scores spread over the past year, of
+which ``--recent`` fall in the current week, and the buckets are rebuilt
+and compacted to ``--bucket-size``. Then, best of ``--repeat``, one page of
+``--limit`` for each window:
+
+  * scan    - WHERE date >= <window start> ORDER BY score DESC, id over
+              the leaderboard, which has no index that serves both
+  * buckets - DatabaseRepository.get_window_page
+
+The bucket column should stay flat as the history grows; the scan should not.
+
+    uv run python -m benchmarks.bench_leaderboard_windows --history 100000,1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, time as clock, timedelta, timezone
+
+from sqlalchemy import desc, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.db.migrations import migrate
+from src.db.repository import DatabaseRepository
+from src.leaderboard.cache import ResponseCache
+from src.leaderboard.index import LeaderboardIndex
+from src.leaderboard.windows import BucketCompactor, rebuild_buckets, today, week_start
+from src.models import db as models
+
+entry = models.LeaderboardEntry
+
+
+async def seed(engine, history: int, recent: int):
+    await migrate(engine)
+    rng = random.Random(13)
+    now = datetime.now(timezone.utc)
+    monday = datetime.combine(week_start(today()), clock(), timezone.utc)
+    span = (now - monday).total_seconds() or 1
+    async with engine.begin() as conn:
+        for start in range(0, history, 5000):
+            rows = []
+            for i in range(start, min(history, start + 5000)):
+                if i < recent:
+                    moment = monday + timedelta(seconds=rng.uniform(0, span))
+                else:
+                    moment = monday - timedelta(seconds=rng.uniform(1, 365 * 86400))
+                rows.append({
+                    "id": f"{i:09d}", "username": f"player{rng.randrange(5000)}", "score": rng.randrange(10_000),
+                    "mode": rng.choice(("walls", "passthrough")), "date": moment,
+                })
+            await conn.execute(insert(entry), rows)
+        await conn.run_sync(rebuild_buckets, today())
+
+
+def scan(window: str):
+    since = today() if window == "day" else week_start(today())
+    return (
+        select(entry.id, entry.username, entry.score, entry.mode, entry.date)
+        .where(entry.mode == "walls", entry.date >= datetime.combine(since, clock(), timezone.utc))
+        .order_by(desc(entry.score), entry.id)
+    )
+
+
+async def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - began)
+    return best
+
+
+async def run(args, history: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "windows.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    await seed(engine, history, min(args.recent, history))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    await BucketCompactor(sessions, bucket_size=args.bucket_size).compact()
+    timings = {}
+    async with sessions() as session:
+        repo = DatabaseRepository(session, LeaderboardIndex(), ResponseCache())
+        for window in ("day", "week"):
+            stmt = scan(window).limit(args.limit)
+            scanned = [row.id for row in await session.execute(stmt)]
+            assert scanned == [row.id for row in await repo.get_window_page("walls", window, args.limit)]
+            timings[window] = (
+                await best_of(args.repeat, lambda: session.execute(stmt)),
+                await best_of(args.repeat, lambda: repo.get_window_page("walls", window, args.limit)),
+            )
+    await engine.dispose()
+    return timings
+
+
+async def main(args):
+    print(f"recent={args.recent} limit={args.limit} bucket_size={args.bucket_size}")
+    print(f"\n{'history':>10} {'window':<7} {'scan':>10} {'buckets':>10}")
+    for history in (int(n) for n in args.history.split(",")):
+        for window, (scanned, bucketed) in (await run(args, history)).items():
+            print(f"{history:>10} {window:<7} {scanned * 1000:>8.2f}ms {bucketed * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", default="10000,100000,1000000")
+    parser.add_argument("--recent", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--bucket-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""
+Lobby reads: the active_games table vs the in-memory game registry.
+
+A SQLite file is seeded with ``--games`` running games (snakes of
+``--length`` segments) plus ``--finished`` games already over, and the
+registry is warmed from it. Then:
+
+  * table    - GET /api/games/active as it was: every active row, bodies
+               and all, through DatabaseRepository.get_active_games
+  * summary  - the registry's warm-up read: summary columns of active rows
+               through the partial index
+  * page     - one lobby page of ``--limit`` from the registry, first page
+               and deep (a cursor half way down), best of ``--repeat``
+
+followed by what keeping the registry current costs per tick and per
+heartbeat: applying a lobby frame that changes ``--updates`` scores, a
+heartbeat snapshot of every game, and an expiry pass.
+
+    uv run python -m benchmarks.bench_lobby --games 100000 --limit 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.api.serialize import lobby_json
+from src.db.migrations import migrate
+from src.db.repository import DatabaseRepository
+from src.game.lobby import GameRegistry
+from src.models import db as models
+
+
+async def seed(engine, games: int, finished: int, length: int):
+    await migrate(engine)
+    rng = random.Random(3)
+    async with engine.begin() as conn:
+        for start in range(0, games + finished, 5000):
+            await conn.execute(insert(models.ActiveGame), [{
+                "id": f"{i:08d}", "player_id": f"u{i}", "player_name": f"player{i}", "score": rng.randrange(500),
+                "mode": rng.choice(("walls", "passthrough")), "snake": [{"x": 5, "y": j % 20} for j in range(length)],
+                "food": {"x": 1, "y": 1}, "direction": "up", "is_active": i < games,
+            } for i in range(start, min(games + finished, start + 5000))])
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - began)
+    return best
+
+
+async def timed(fn) -> tuple:
+    began = time.perf_counter()
+    result = await fn()
+    return time.perf_counter() - began, result
+
+
+async def main(args):
+    path = os.path.join(tempfile.mkdtemp(), "lobby.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    await seed(engine, args.games, args.finished, args.length)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    print(f"games={args.games} finished={args.finished} length={args.length} limit={args.limit}")
+
+    async with sessions() as session:
+        table, rows = await timed(DatabaseRepository(session).get_active_games)
+    registry = GameRegistry(sessions)
+    summary, _ = await timed(registry.warm)
+    assert registry.count() == len(rows) == args.games
+
+    ranked = registry.page(None, args.games)
+    middle = ranked[len(ranked) // 2]
+    cursor = (-middle["score"], middle["id"])
+    first = best_of(args.repeat, lambda: lobby_json(registry.page(None, args.limit)))
+    deep = best_of(args.repeat, lambda: lobby_json(registry.page(None, args.limit, cursor)))
+    by_mode = best_of(args.repeat, lambda: lobby_json(registry.page("walls", args.limit, cursor)))
+
+    print(f"{'read':<22} {'time':>10}")
+    print(f"{'table (all rows)':<22} {table * 1000:>8.1f}ms")
+    print(f"{'summary (warm-up)':<22} {summary * 1000:>8.1f}ms")
+    print(f"{'page, first':<22} {first * 1e6:>8.1f}µs")
+    print(f"{'page, deep':<22} {deep * 1e6:>8.1f}µs")
+    print(f"{'page, deep, one mode':<22} {by_mode * 1e6:>8.1f}µs")
+
+    rng = random.Random(5)
+    frame = {"type": "lobby", "updated": [
+        {"id": game["id"], "score": game["score"] + 1, "length": game["length"] + 1}
+        for game in rng.sample(ranked, args.updates)
+    ]}
+    snapshot = {"type": "snapshot", "games": registry.page(None, args.games)}
+    update = best_of(1, lambda: registry.apply(frame))
+    heartbeat = best_of(1, lambda: registry.apply(snapshot))
+    expiry = best_of(1, registry.expire)
+    print(f"\n{'upkeep':<22} {'time':>10}")
+    print(f"{f'tick, {args.updates} scores':<22} {update * 1000:>8.2f}ms")
+    print(f"{'heartbeat snapshot':<22} {heartbeat * 1000:>8.2f}ms")
+    print(f"{'expiry, none stale':<22} {expiry * 1000:>8.2f}ms")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--finished", type=int, default=100_000)
+    parser.add_argument("--length", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,125 @@
+"""
+Leaderboard latency during a login storm.
+
+Runs the app in-process against a throwaway SQLite file, then samples
+GET /api/leaderboard latency three ways:
+
+  * idle    - no login traffic
+  * inline  - bcrypt on the event loop (the old behaviour), under a storm
+  * pool    - the PasswordHasher worker pool, under the same storm
+
+The storm is ``--concurrency`` clients logging in back to back. With the
+pool, leaderboard p99 should stay close to idle; logins beyond the queue
+limit get a fast 503 instead of stalling everything else.
+
+    uv run python -m benchmarks.bench_login_storm --concurrency 64 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.api.routes import get_password_hasher
+from src.db.base import Base
+from src.db.session import get_db
+from src.main import app
+from src.utils.password import PasswordHasher
+
+EMAIL, PASSWORD = "storm@example.com", "password123"
+
+
+class InlineHasher(PasswordHasher):
+    """Hashes on the calling thread, i.e. blocking the event loop."""
+
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+
+def use(hasher: PasswordHasher):
+    # Dependency overrides are introspected, so no default arguments here
+    return lambda: hasher
+
+
+def percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def sample_leaderboard(client: AsyncClient, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/leaderboard")
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+
+
+async def login_loop(client: AsyncClient, stop: asyncio.Event, statuses: dict):
+    while not stop.is_set():
+        response = await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 503:
+            await asyncio.sleep(float(response.headers["retry-after"]) / 10)
+
+
+async def run(client: AsyncClient, concurrency: int, seconds: float):
+    stop = asyncio.Event()
+    samples: list = []
+    statuses: dict = {}
+    tasks = [asyncio.create_task(sample_leaderboard(client, stop, samples))]
+    tasks += [asyncio.create_task(login_loop(client, stop, statuses)) for _ in range(concurrency)]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return samples, statuses
+
+
+async def main(args):
+    path = os.path.join(tempfile.mkdtemp(), "storm.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"check_same_thread": False})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    hashers = {
+        "inline": InlineHasher(args.rounds, args.workers, args.max_pending),
+        "pool": PasswordHasher(args.rounds, args.workers, args.max_pending),
+    }
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        app.dependency_overrides[get_password_hasher] = use(hashers["pool"])
+        await client.post("/api/auth/signup", json={"username": "storm", "email": EMAIL, "password": PASSWORD})
+
+        print(f"rounds={args.rounds} workers={args.workers} max_pending={args.max_pending} "
+              f"concurrency={args.concurrency}")
+        print(f"{'scenario':<8} {'samples':>8} {'p50 ms':>8} {'p99 ms':>8}  login statuses")
+        for name in ("idle", "inline", "pool"):
+            app.dependency_overrides[get_password_hasher] = use(hashers.get(name, hashers["pool"]))
+            concurrency = 0 if name == "idle" else args.concurrency
+            samples, statuses = await run(client, concurrency, args.seconds)
+            print(f"{name:<8} {len(samples):>8} {statistics.median(samples):>8.2f} "
+                  f"{percentile(samples, 0.99):>8.2f}  {dict(sorted(statuses.items()))}")
+
+    for hasher in hashers.values():
+        hasher.shutdown()
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,121 @@
+"""
+Per-request cost of the metrics instrumentation.
+
+Runs the app in-process against a throwaway SQLite file with metrics
+switched off, then calls it straight through ASGI (no HTTP client in the
+way, so the fixed cost is as large a share of each request as it can be)
+for a few representative requests:
+
+  * leaderboard - GET /api/leaderboard served from the response cache
+  * me          - GET /api/auth/me, token check plus the user cache
+  * active      - GET /api/games/active, one SQL query
+  * game        - GET /api/games/{id} for a missing game, two SQL queries
+
+Requests alternate one by one between the bare app and the same app
+wrapped in MetricsMiddleware with the engine's SQL and pool hooks
+installed, so drift in the machine's speed hits both alike, and the
+medians are compared. The target is under 2% added per request.
+
+    uv run python -m benchmarks.bench_metrics --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ["METRICS_ENABLED"] = "false"
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'metrics.db')}")
+os.environ.setdefault("ARENA_ENABLED", "false")
+os.environ.setdefault("GAME_LOG_ENABLED", "false")
+
+from src.auth.sessions import issue_token
+from src.db.repository import DatabaseRepository
+from src.db.session import SessionLocal, engine
+from src.main import app
+from src.metrics.asgi import MetricsMiddleware
+from src.metrics.sql import instrument_engine
+from src.models import schemas
+from src.utils.password import hash_password
+
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1e6
+
+
+async def call(asgi, path: str, headers: list) -> int:
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": headers,
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await asgi(scope, receive, send)
+    return status
+
+
+async def seed(scores: int) -> list:
+    async with SessionLocal() as session:
+        repo = DatabaseRepository(session)
+        user = await repo.create_user(
+            schemas.UserCreate(email="bench@snake.game", username="bench", password="x"), hash_password("x", 4)
+        )
+        for i in range(scores):
+            await repo.add_score(f"player{i}", i * 10, "walls")
+    return [(b"authorization", f"Bearer {issue_token(user.id)}".encode())]
+
+
+async def timed(asgi, path: str, headers: list) -> float:
+    began = time.perf_counter()
+    status = await call(asgi, path, headers)
+    elapsed = time.perf_counter() - began
+    assert status in (200, 404), (path, status)
+    return elapsed
+
+
+async def main(args):
+    async with app.router.lifespan_context(app):
+        auth = await seed(args.scores)
+        requests = {
+            "leaderboard": ("/api/leaderboard?mode=walls", []),
+            "me": ("/api/auth/me", auth),
+            "active": ("/api/games/active", []),
+            "game": ("/api/games/missing", []),
+        }
+        wrapped = MetricsMiddleware(app)
+        print(f"requests={args.requests} per variant")
+        print(f"{'request':<12} {'off p50':>9} {'on p50':>9} {'added':>8} {'overhead':>9}")
+        for name, (path, headers) in requests.items():
+            # Warm caches and the first-request setup outside the timings
+            for _ in range(50):
+                await timed(wrapped, path, headers)
+            off, on = [], []
+            for _ in range(args.requests):
+                off.append(await timed(app, path, headers))
+                # Hooks go in and out between requests, outside the timings
+                remove = instrument_engine(engine)
+                on.append(await timed(wrapped, path, headers))
+                remove()
+            base, instrumented = percentile(off, 0.5), percentile(on, 0.5)
+            print(f"{name:<12} {base:>7.1f}µs {instrumented:>7.1f}µs {instrumented - base:>6.1f}µs "
+                  f"{(instrumented - base) / base:>8.2%}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--scores", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,103 @@
+"""
+Per-tick persistence cost: rewriting each game's JSON row vs appending to the move log.
+
+  * rewrite - one UPDATE of active_games per game per tick, re-serializing
+              the whole snake (what a naive save of the live state does)
+  * log     - one batched MoveEvent insert per tick via save_game_state,
+              plus a snapshot every ``--snapshot-interval`` ticks
+
+Both run ``--games`` games for ``--ticks`` ticks against a fresh SQLite
+file, at each snake length in ``--lengths``. Reports milliseconds per tick
+and how much the database file (plus WAL) grew.
+
+    uv run python -m benchmarks.bench_move_log --games 50 --ticks 200 --lengths 3 100 400
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.db.base import Base
+from src.db.repository import DatabaseRepository
+from src.db.session import build_engine
+from src.game.engine import SnakeGame
+from src.game.movelog import GameStart, MoveEvent, SnapshotRecord, game_columns
+from src.models import db as models
+
+
+def long_game(length: int, seed: int) -> SnakeGame:
+    """A passthrough game whose snake has been grown to ``length`` cells in a serpentine."""
+    size = max(20, int(length ** 0.5) + 4)
+    game = SnakeGame("passthrough", grid_size=size, seed=seed)
+    cells = []
+    for y in range(size):
+        row = range(size) if y % 2 == 0 else range(size - 1, -1, -1)
+        cells.extend(y * size + x for x in row)
+    body = list(reversed(cells[:length]))
+    state = game.state()
+    state.update(body=body, direction="right" if (length - 1) // size % 2 == 0 else "left")
+    state["food"] = next(c for c in range(size * size) if c not in set(body))
+    return SnakeGame.from_state("passthrough", state)
+
+
+async def run(name: str, path: str, args, length: int):
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    games = {f"game-{i}": long_game(length, i) for i in range(args.games)}
+    async with session_factory() as session:
+        await DatabaseRepository(session).create_game_records(
+            [GameStart(gid, "p", "P", "passthrough", 0, g.state()) for gid, g in games.items()]
+        )
+
+    start_size = os.path.getsize(path)
+    started = time.perf_counter()
+    for tick in range(1, args.ticks + 1):
+        events, snapshots = [], []
+        for game_id, game in games.items():
+            # Keep length constant so every tick measures the same snake size
+            game.body.pop()
+            game.body.appendleft(game.body[0])
+            events.append(MoveEvent(game_id, tick, game.direction, False, None))
+            if tick % args.snapshot_interval == 0:
+                snapshots.append(SnapshotRecord(game_id, tick, game.state()))
+        async with session_factory() as session:
+            if name == "rewrite":
+                for game_id, game in games.items():
+                    columns = game_columns("passthrough", game.state())
+                    await session.execute(
+                        update(models.ActiveGame).where(models.ActiveGame.id == game_id).values(**columns)
+                    )
+                await session.commit()
+            else:
+                await DatabaseRepository(session).save_game_state(events, snapshots)
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    written = os.path.getsize(path) - start_size
+    wal = path + "-wal"
+    if os.path.exists(wal):
+        written += os.path.getsize(wal)
+    print(f"{length:>7} {name:<8} {elapsed / args.ticks * 1000:>10.2f} {written / 1024:>10.0f}")
+
+
+async def main(args):
+    directory = tempfile.mkdtemp()
+    print(f"games={args.games} ticks={args.ticks} snapshot_interval={args.snapshot_interval}")
+    print(f"{'length':>7} {'mode':<8} {'ms/tick':>10} {'grew KiB':>10}")
+    for length in args.lengths:
+        for name in ("rewrite", "log"):
+            await run(name, os.path.join(directory, f"{name}-{length}.db"), args, length)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--snapshot-interval", type=int, default=200)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[3, 100, 400])
+    asyncio.run(main(parser.parse_args()))
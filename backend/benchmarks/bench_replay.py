@@ -0,0 +1,101 @@
+"""
+Replay size and seek latency.
+
+Plays ``--games`` seeded passthrough games of up to ``--ticks`` ticks on a
+``--grid`` board with a greedy bot (heads for food, avoids its own body),
+encodes each as a replay at every keyframe interval in ``--intervals`` and
+reports:
+
+  * bytes per 1k ticks, against the same log as JSON event rows
+  * seek latency to random ticks through ReplayStore (one chunk read and
+    at most one interval of replay), against simulating from tick 0
+
+    uv run python -m benchmarks.bench_replay --games 20 --ticks 5000 --intervals 64 256 1024
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from src.game.engine import DELTAS, OPPOSITES, SnakeGame
+from src.game.movelog import event_for, rebuild
+from src.game.replay import ReplayStore, encode_replay
+
+
+def bot_game(seed: int, ticks: int, grid: int):
+    game = SnakeGame("passthrough", grid_size=grid, seed=seed)
+    start, events = game.state(), []
+    size = game.grid_size
+    rng = random.Random(seed)
+    for tick in range(1, ticks + 1):
+        head = game.body[0]
+        hx, hy = head % size, head // size
+        fx, fy = game.food % size, game.food // size
+        options = []
+        for direction, (dx, dy) in DELTAS.items():
+            if direction == OPPOSITES[game.direction]:
+                continue
+            x, y = (hx + dx) % size, (hy + dy) % size
+            cell = y * size + x
+            if game.occupied[cell] and cell != game.body[-1]:
+                continue
+            distance = min(abs(x - fx), size - abs(x - fx)) + min(abs(y - fy), size - abs(y - fy))
+            options.append((distance, rng.random(), direction))
+        if options:
+            game.set_direction(min(options)[2])
+        ate = game.move()
+        events.append(event_for("bench", tick, game, ate))
+        if game.is_game_over:
+            break
+    return start, events
+
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+def main(args):
+    games = [bot_game(seed, args.ticks, args.grid) for seed in range(args.games)]
+    total_ticks = sum(len(events) for _, events in games)
+    json_bytes = sum(
+        len(json.dumps([{"tick": e.tick, "direction": e.direction, "ate": e.ate, "food": e.food} for e in events]))
+        for _, events in games
+    )
+    print(f"games={args.games} ticks={total_ticks} (avg {total_ticks // args.games}/game)")
+    print(f"json event rows: {json_bytes / total_ticks * 1000:>8.0f} B per 1k ticks")
+    print(f"{'interval':>8} {'B/1k ticks':>11} {'seek p50':>9} {'seek p99':>9} {'from-0 p50':>11} {'from-0 p99':>11}")
+
+    store = ReplayStore(tempfile.mkdtemp())
+    rng = random.Random(0)
+    for interval in args.intervals:
+        size = 0
+        for i, (start, events) in enumerate(games):
+            data = encode_replay("passthrough", start, events, seed=i, keyframe_interval=interval)
+            size += len(data)
+            store.save(f"game-{i}", data)
+
+        seeks, full = [], []
+        for _ in range(args.seeks):
+            i = rng.randrange(len(games))
+            start, events = games[i]
+            tick = rng.randrange(len(events) + 1)
+            began = time.perf_counter()
+            store.seek(f"game-{i}", tick)
+            seeks.append(time.perf_counter() - began)
+            began = time.perf_counter()
+            rebuild("passthrough", start, events[:tick])
+            full.append(time.perf_counter() - began)
+        print(f"{interval:>8} {size / total_ticks * 1000:>11.0f} {percentile(seeks, 0.5):>7.3f}ms"
+              f" {percentile(seeks, 0.99):>7.3f}ms {percentile(full, 0.5):>9.3f}ms {percentile(full, 0.99):>9.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=5000)
+    parser.add_argument("--grid", type=int, default=64)
+    parser.add_argument("--intervals", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--seeks", type=int, default=500)
+    main(parser.parse_args())
@@ -0,0 +1,99 @@
+"""
+Score submission throughput: one commit per score vs write-behind batches.
+
+Runs ``--clients`` concurrent submitters against a throwaway SQLite file
+(or ``--url``), each posting ``--scores`` scores, through:
+
+  * direct   - DatabaseRepository.add_score, one INSERT + commit each
+  * flush    - ScoreIngestor, acknowledging after the batch commits
+  * enqueue  - ScoreIngestor, acknowledging on enqueue
+
+Reports scores/s and per-submission p50/p99 acknowledgement latency.
+
+    uv run python -m benchmarks.bench_score_ingest --clients 200 --scores 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.db.base import Base
+from src.db.repository import DatabaseRepository
+from src.leaderboard.index import LeaderboardIndex
+from src.leaderboard.ingest import ScoreIngestor
+from src.models import db as models
+
+
+async def direct_client(session_factory, index, scores, latencies):
+    for score in scores:
+        start = time.perf_counter()
+        async with session_factory() as session:
+            await DatabaseRepository(session, index).add_score("bench", score, "walls")
+        latencies.append(time.perf_counter() - start)
+
+
+async def ingest_client(ingestor: ScoreIngestor, scores, latencies):
+    for score in scores:
+        start = time.perf_counter()
+        submission = await ingestor.submit("bench", score, "walls")
+        if ingestor.ack == "flush":
+            await submission.flushed
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(name: str, url: str, args) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    index = LeaderboardIndex()
+    index.load([])
+    rng = random.Random(0)
+    workload = [[rng.randrange(100000) for _ in range(args.scores)] for _ in range(args.clients)]
+    latencies: list = []
+
+    start = time.perf_counter()
+    if name == "direct":
+        await asyncio.gather(*(direct_client(session_factory, index, scores, latencies) for scores in workload))
+    else:
+        ingestor = ScoreIngestor(session_factory, index, batch_size=args.batch_size,
+                                 flush_interval=args.interval, ack=name)
+        ingestor.start()
+        await asyncio.gather(*(ingest_client(ingestor, scores, latencies) for scores in workload))
+        await ingestor.stop()
+    elapsed = time.perf_counter() - start
+
+    async with session_factory() as session:
+        stored = (await session.execute(select(func.count()).select_from(models.LeaderboardEntry))).scalar()
+    await engine.dispose()
+    assert stored == args.clients * args.scores, stored
+
+    latencies.sort()
+    print(f"{name:<8} {stored / elapsed:>10.0f} {statistics.median(latencies) * 1000:>9.2f} "
+          f"{latencies[int(len(latencies) * 0.99)] * 1000:>9.2f}")
+
+
+async def main(args):
+    url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'ingest.db')}"
+    print(f"clients={args.clients} scores={args.scores} batch={args.batch_size} interval={args.interval}s")
+    print(f"{'mode':<8} {'scores/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for name in args.modes.split(","):
+        await run(name, url, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--scores", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--modes", default="direct,flush,enqueue")
+    parser.add_argument("--url", help="database URL (defaults to a temporary SQLite file)")
+    asyncio.run(main(parser.parse_args()))
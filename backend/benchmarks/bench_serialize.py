@@ -0,0 +1,136 @@
+"""
+List endpoint bodies: ORM objects through Pydantic models vs the fast path.
+
+  * models - the old route path: select ORM entities, validate each into
+             schemas.LeaderboardEntry / schemas.ActiveGame (from_attributes),
+             validate the list again as response_model does, then dump JSON
+  * fast   - DatabaseRepository's column selects into tuples / dicts and
+             src.api.serialize's TypedDict adapters
+
+Each size seeds a fresh SQLite file with ``n`` leaderboard rows and ``n``
+active games, checks both paths produce the same bytes, then reports rows/s
+for the query plus serialization and for serialization alone.
+
+    uv run python -m benchmarks.bench_serialize --sizes 1000 100000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.api.serialize import active_games_json, leaderboard_json
+from src.db.base import Base
+from src.db.repository import DatabaseRepository
+from src.leaderboard.cache import ResponseCache
+from src.leaderboard.index import LeaderboardIndex
+from src.models import db as models
+from src.models import schemas
+
+leaderboard_adapter = TypeAdapter(List[schemas.LeaderboardEntry])
+games_adapter = TypeAdapter(List[schemas.ActiveGame])
+
+
+async def seed(engine, rows: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for start in range(0, rows, 5000):
+            batch = range(start, min(rows, start + 5000))
+            await conn.execute(insert(models.LeaderboardEntry), [
+                {"id": f"{i:08d}", "username": f"player{i % 1000}", "score": i % 5000, "mode": "walls"} for i in batch
+            ])
+            await conn.execute(insert(models.ActiveGame), [{
+                "id": f"{i:08d}", "player_id": f"u{i}", "player_name": f"player{i}", "score": i % 50,
+                "mode": "walls", "snake": [{"x": 5, "y": 5 + j} for j in range(5)], "food": {"x": 1, "y": 1},
+                "direction": "up", "is_active": True,
+            } for i in batch])
+
+
+async def leaderboard_models(session) -> bytes:
+    result = await session.execute(select(models.LeaderboardEntry).order_by(
+        models.LeaderboardEntry.score.desc(), models.LeaderboardEntry.id))
+    entries = result.scalars().all()
+    return leaderboard_adapter.dump_json(leaderboard_adapter.validate_python(entries, from_attributes=True))
+
+
+async def leaderboard_fast(repo) -> bytes:
+    return leaderboard_json(await repo.get_leaderboard_sql())
+
+
+async def games_models(session) -> bytes:
+    result = await session.execute(select(models.ActiveGame).where(models.ActiveGame.is_active == True))
+    games = [schemas.ActiveGame.model_validate(game) for game in result.scalars().all()]
+    return games_adapter.dump_json(games_adapter.validate_python(games, from_attributes=True), by_alias=True)
+
+
+async def games_fast(repo) -> bytes:
+    return active_games_json(await repo.get_active_games())
+
+
+async def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - began)
+    return best
+
+
+async def run(size: int, repeat: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'serialize.db')}")
+    await seed(engine, size)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def fresh(fn, use_repo: bool):
+        # A new session each time, so the ORM path pays for its identity map as a request would
+        async with sessions() as session:
+            repo = DatabaseRepository(session, LeaderboardIndex(), ResponseCache())
+            return await fn(repo if use_repo else session)
+
+    for name, old, new in (("leaderboard", leaderboard_models, leaderboard_fast), ("games", games_models, games_fast)):
+        assert await fresh(old, False) == await fresh(new, True), name
+        async with sessions() as session:
+            repo = DatabaseRepository(session, LeaderboardIndex(), ResponseCache())
+            timings = {
+                "models": await best_of(repeat, lambda: fresh(old, False)),
+                "fast": await best_of(repeat, lambda: fresh(new, True)),
+            }
+            if name == "leaderboard":
+                entries = (await session.execute(select(models.LeaderboardEntry))).scalars().all()
+                rows = await repo.get_leaderboard_sql()
+                encode_old = lambda: leaderboard_adapter.dump_json(
+                    leaderboard_adapter.validate_python(entries, from_attributes=True))
+                encode_new = lambda: leaderboard_json(rows)
+            else:
+                games = [schemas.ActiveGame.model_validate(g) for g in
+                         (await session.execute(select(models.ActiveGame))).scalars().all()]
+                dicts = await repo.get_active_games()
+                encode_old = lambda: games_adapter.dump_json(
+                    games_adapter.validate_python(games, from_attributes=True), by_alias=True)
+                encode_new = lambda: active_games_json(dicts)
+
+            async def sync(fn):
+                fn()
+            encode = {"models": await best_of(repeat, lambda: sync(encode_old)),
+                      "fast": await best_of(repeat, lambda: sync(encode_new))}
+        for variant in ("models", "fast"):
+            print(f"{size:>8} {name:<12} {variant:<7} {size / timings[variant]:>12.0f} {size / encode[variant]:>14.0f}")
+    await engine.dispose()
+
+
+async def main(args):
+    print(f"{'rows':>8} {'endpoint':<12} {'path':<7} {'rows/s':>12} {'encode rows/s':>14}")
+    for size in args.sizes:
+        await run(size, args.repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,105 @@
+"""
+Rooms per core: how many server-run games fit in the tick budget.
+
+For each shard count in ``--shards``, starts a ShardedRooms and adds games
+``--step`` at a time (a ``--watch`` share of them with a spectator, so
+their deltas go through the shared-memory rings), letting each level run
+for ``--settle`` seconds. It stops at the first level where the busiest
+shard spends more than ``--max-load`` of the tick interval ticking, or has
+started skipping ticks. It also reports the same limit for ticking
+in-process with LiveGames, which is what a single uvicorn worker
+gets today.
+
+    uv run python -m benchmarks.bench_shards --shards 1 2 4 --interval 0.15 --step 2000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from src.game.live import LiveGames, game_topic
+from src.game.shards import ShardedRooms
+from src.realtime.hub import Subscription
+
+
+def in_process(args) -> int:
+    live = LiveGames()
+    subscription = Subscription(maxsize=10 ** 6)
+    rooms = 0
+    while True:
+        for i in range(args.step):
+            live.start_game(f"p{rooms + i}", "Bench", "passthrough", seed=rooms + i)
+        rooms += args.step
+        for game_id in list(live.engine.games)[: int(rooms * args.watch)]:
+            live.hub.subscribe(subscription, game_topic(game_id))
+        samples = []
+        for _ in range(20):
+            began = time.perf_counter()
+            live.step()
+            samples.append(time.perf_counter() - began)
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()[2].text()
+        if sorted(samples)[len(samples) // 2] > args.max_load * args.interval:
+            return rooms - args.step
+        if rooms >= args.limit:
+            return rooms
+
+
+async def sharded(args, shards: int) -> tuple:
+    rooms = ShardedRooms(shards, interval=args.interval)
+    rooms.start()
+    subscription = Subscription(maxsize=10 ** 6)
+    sustained, stats = 0, []
+    try:
+        target = 0
+        while target < args.limit:
+            target += args.step
+            try:
+                while len(rooms.placement) < target:
+                    watched = len(rooms.placement) * args.watch
+                    game_ids = await asyncio.gather(*(
+                        rooms.start_game("bench", "Bench", "passthrough")
+                        for _ in range(min(1000, target - len(rooms.placement)))
+                    ))
+                    for game_id in game_ids[: int(len(rooms.placement) * args.watch - watched)]:
+                        rooms.hub.subscribe(subscription, game_topic(game_id))
+                skipped = sum(s["skipped"] for s in await rooms.stats())
+            except asyncio.TimeoutError:
+                # Shards too busy to take more games
+                break
+            deadline = time.perf_counter() + args.settle
+            while time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()[2].text()
+            stats = await rooms.stats()
+            if max(s["load"] for s in stats) > args.max_load or sum(s["skipped"] for s in stats) > skipped:
+                break
+            sustained = target
+    finally:
+        await rooms.stop()
+    return sustained, stats
+
+
+def main(args):
+    cores = os.cpu_count() or 1
+    print(f"cores={cores} interval={args.interval * 1000:.0f}ms max load={args.max_load:.0%} watched={args.watch:.0%}")
+    print(f"{'runner':<12} {'rooms':>7} {'rooms/core':>11}  shard loads at the limit")
+    rooms = in_process(args)
+    print(f"{'in-process':<12} {rooms:>7} {rooms:>11}")
+    for shards in args.shards:
+        rooms, stats = asyncio.run(sharded(args, shards))
+        loads = " ".join(f"{s['load']:.2f}" for s in stats)
+        print(f"{'shards x' + str(shards):<12} {rooms:>7} {rooms // min(shards, cores):>11}  {loads}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--interval", type=float, default=0.15)
+    parser.add_argument("--step", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=200000)
+    parser.add_argument("--watch", type=float, default=0.1)
+    parser.add_argument("--settle", type=float, default=2.0)
+    parser.add_argument("--max-load", type=float, default=0.8)
+    main(parser.parse_args())
@@ -0,0 +1,158 @@
+"""
+Cold start: time from a fresh interpreter to the first answered request.
+
+Each run is a new ``python -X importtime`` process against a database that
+already holds the current schema and ``--scores`` leaderboard rows, so it
+sees what a scaled-from-zero replica sees:
+
+  * create_all - the old startup: Base.metadata.create_all on every boot
+  * migrate    - src.db.migrations.migrate, one version read when current
+
+It reports the import of src.main, the lifespan startup (and the schema
+step within it, with the statements it ran) and the first GET
+/api/leaderboard, as medians over ``--runs``, followed by the slowest
+imports by cumulative time from the last run's ``-X importtime`` output.
+
+    uv run python -m benchmarks.bench_startup --runs 5
+    uv run python -m benchmarks.bench_startup --url postgresql+asyncpg://user:pw@localhost/bench
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+async def child(variant: str):
+    """Runs in the measured process; prints its timings as JSON."""
+    began = time.perf_counter()
+    from httpx import ASGITransport, AsyncClient
+    from sqlalchemy import event
+
+    import src.main
+    from src.db.base import Base
+    imported = time.perf_counter()
+
+    async def create_all(engine):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    prepare_schema = create_all if variant == "create_all" else src.main.migrate
+    schema, statements = 0.0, []
+
+    async def timed(engine):
+        nonlocal schema
+        count = lambda *args: statements.append(args[2])
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        began = time.perf_counter()
+        await prepare_schema(engine)
+        schema = time.perf_counter() - began
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    src.main.migrate = timed
+
+    app = src.main.app
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            response = await client.get("/api/leaderboard?mode=walls&limit=10")
+        answered = time.perf_counter()
+        assert response.status_code == 200, response.text
+    print(json.dumps({
+        "import": imported - began, "schema": schema, "statements": len(statements), "startup": started - imported, "first": answered - started,
+    }))
+
+
+def prepare(url: str, scores: int):
+    """Bring the database to the current schema and seed it, in a process of its own."""
+    script = (
+        "import asyncio\n"
+        "from sqlalchemy import delete, insert\n"
+        "from src.db.migrations import migrate\n"
+        "from src.db.session import engine\n"
+        "from src.models import db as models\n"
+        "async def main():\n"
+        "    await migrate(engine)\n"
+        "    async with engine.begin() as conn:\n"
+        "        await conn.execute(delete(models.LeaderboardEntry))\n"
+        f"        for start in range(0, {scores}, 5000):\n"
+        "            await conn.execute(insert(models.LeaderboardEntry), [\n"
+        "                {'username': f'p{i}', 'score': i, 'mode': 'walls'}\n"
+        f"                for i in range(start, min({scores}, start + 5000))])\n"
+        "    await engine.dispose()\n"
+        "asyncio.run(main())\n"
+    )
+    subprocess.run([sys.executable, "-c", script], env=environment(url), check=True)
+
+
+def environment(url: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=url, ARENA_ENABLED="false", GAME_LOG_ENABLED="false")
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return env
+
+
+def run_child(url: str, variant: str) -> tuple:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "benchmarks.bench_startup", "--child", variant],
+        env=environment(url), capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def main_imports(importtime: str, count: int) -> list:
+    """The modules src.main imports directly, slowest first, as (cumulative µs, name)."""
+    children = []
+    for line in importtime.splitlines():
+        own, _, rest = line.removeprefix("import time:").partition("|")
+        cumulative, _, name = rest.partition("|")
+        if not own.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            # -X importtime lists a module after everything it imported
+            if name.strip() == "src.main":
+                return sorted(children, reverse=True)[:count]
+            children = []
+    return []
+
+
+def main(args):
+    url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+    prepare(url, args.scores)
+    print(f"runs={args.runs} scores={args.scores}")
+    print(f"{'variant':<11} {'import':>9} {'schema':>9} {'queries':>8} {'startup':>9} {'first req':>10} {'total':>9}")
+    importtime = ""
+    for variant in ("create_all", "migrate"):
+        timings = []
+        for _ in range(args.runs):
+            measured, importtime = run_child(url, variant)
+            timings.append(measured)
+        median = {key: statistics.median(t[key] for t in timings) * 1000 for key in timings[0]}
+        total = median["import"] + median["startup"] + median["first"]
+        print(f"{variant:<11} {median['import']:>7.1f}ms {median['schema']:>7.1f}ms "
+              f"{timings[0]['statements']:>8} {median['startup']:>7.1f}ms "
+              f"{median['first']:>8.1f}ms {total:>7.1f}ms")
+
+    print("\nslowest imports of src.main (-X importtime, cumulative):")
+    for cumulative, name in main_imports(importtime, args.top):
+        print(f"  {cumulative / 1000:>7.1f}ms {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scores", type=int, default=10000)
+    parser.add_argument("--url", help="database to start against (default: a fresh SQLite file)")
+    parser.add_argument("--top", type=int, default=12, help="imports to list")
+    parser.add_argument("--child", choices=("create_all", "migrate"), help=argparse.SUPPRESS)
+    parsed = parser.parse_args()
+    if parsed.child:
+        asyncio.run(child(parsed.child))
+    else:
+        main(parsed)
@@ -0,0 +1,154 @@
+"""
+SPA catch-all: the old per-request filesystem handler vs the indexed site.
+
+  * legacy  - the previous main.py: StaticFiles mounted on /assets and a
+              catch-all doing os.path.join + isfile + FileResponse
+  * indexed - src.web.static.StaticSite, scanned once, precompressed
+              variants picked per Accept-Encoding, small files in memory
+
+Both serve the same generated build (index.html, a large JS bundle and a
+CSS file under assets/, favicon, robots.txt) run through
+``src.web.static.compress``. Requests go straight through ASGI with a
+browser's headers, and each kind is repeated ``--requests`` times:
+
+  * index       - GET / (first visit)
+  * route       - GET /leaderboard, a client-side route
+  * bundle, css - hashed assets
+  * revalidate  - GET / with the If-None-Match a browser would send back
+
+Reports requests/s and response body bytes per request.
+
+    uv run python -m benchmarks.bench_static --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+
+from src.web.static import StaticSite, compress
+
+BROWSER = [(b"accept-encoding", b"gzip, deflate, br, zstd"), (b"accept", b"*/*")]
+
+
+def build_site(directory: str):
+    """A Vite-like build: a few hundred KB of JS, some CSS and small files."""
+    rng = random.Random(7)
+    words = ["const", "function", "return", "snake", "useState", "props", "=>", "{", "}", "(", ")", ";", "grid"]
+    os.makedirs(os.path.join(directory, "assets"))
+    with open(os.path.join(directory, "index.html"), "w") as f:
+        f.write('<!doctype html><html lang="en"><head><meta charset="UTF-8"><title>Snake Royale</title>'
+                '<script type="module" src="/assets/index-a1b2c3d4.js"></script>'
+                '<link rel="stylesheet" href="/assets/index-e5f6a7b8.css"></head>'
+                '<body><div id="root"></div></body></html>' + "\n" * 40)
+    with open(os.path.join(directory, "assets", "index-a1b2c3d4.js"), "w") as f:
+        f.write(" ".join(rng.choice(words) + str(rng.randrange(50)) for _ in range(80_000)))
+    with open(os.path.join(directory, "assets", "index-e5f6a7b8.css"), "w") as f:
+        f.write("".join(f".c{i}{{margin:{i % 16}px;color:#{rng.randrange(1 << 24):06x}}}\n" for i in range(3000)))
+    with open(os.path.join(directory, "favicon.ico"), "wb") as f:
+        f.write(rng.randbytes(15_000))
+    with open(os.path.join(directory, "robots.txt"), "w") as f:
+        f.write("User-agent: *\nAllow: /\n")
+    compress(directory)
+
+
+def legacy_app(static_dir: str) -> FastAPI:
+    app = FastAPI()
+    app.mount("/assets", StaticFiles(directory=os.path.join(static_dir, "assets")), name="assets")
+
+    @app.get("/{full_path:path}")
+    async def serve_react_app(full_path: str):
+        if full_path.startswith("api/"):
+            raise HTTPException(status_code=404, detail="Not Found")
+        file_path = os.path.join(static_dir, full_path)
+        if os.path.isfile(file_path):
+            return FileResponse(file_path)
+        return FileResponse(os.path.join(static_dir, "index.html"))
+
+    return app
+
+
+def indexed_app(static_dir: str) -> FastAPI:
+    app = FastAPI()
+    site = StaticSite.scan(static_dir)
+
+    @app.get("/{full_path:path}")
+    async def serve_react_app(full_path: str, request: Request):
+        if full_path.startswith("api/"):
+            raise HTTPException(status_code=404, detail="Not Found")
+        headers = request.headers
+        return site.respond(full_path, headers.get("accept-encoding"), headers.get("if-none-match"))
+
+    return app
+
+
+async def call(app, path: str, headers: list) -> tuple:
+    """(status, body bytes, response headers) for one GET straight through ASGI."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": headers, "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status, size, response_headers = 0, 0, {}
+    requested, done = False, asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # File responses listen for a disconnect while they stream
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, size, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = {k.decode().lower(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, size, response_headers
+
+
+async def measure(app, path: str, headers: list, requests: int) -> tuple:
+    status, size, _ = await call(app, path, headers)
+    assert status in (200, 304), (path, status)
+    began = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path, headers)
+    return requests / (time.perf_counter() - began), size
+
+
+async def main(args):
+    directory = tempfile.mkdtemp()
+    build_site(directory)
+    apps = {"legacy": legacy_app(directory), "indexed": indexed_app(directory)}
+    print(f"requests={args.requests} per kind")
+    print(f"{'kind':<11} {'variant':<8} {'req/s':>9} {'bytes/req':>10}")
+    for kind, path in (("index", "/"), ("route", "/leaderboard"), ("bundle", "/assets/index-a1b2c3d4.js"),
+                       ("css", "/assets/index-e5f6a7b8.css"), ("revalidate", "/")):
+        for name, app in apps.items():
+            headers = list(BROWSER)
+            if kind == "revalidate":
+                _, _, first = await call(app, path, headers)
+                headers.append((b"if-none-match", first.get("etag", "").encode()))
+            rate, size = await measure(app, path, headers, args.requests)
+            print(f"{kind:<11} {name:<8} {rate:>9.0f} {size:>10}")
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
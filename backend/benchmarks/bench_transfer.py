@@ -0,0 +1,92 @@
+"""
+Export and import speed of src.db.transfer, and the memory they hold.
+
+Seeds ``--rows`` leaderboard rows into a fresh SQLite file (in batches, so
+seeding itself stays small), then for each format exports the table and
+imports it into another fresh database. Reports rows/s, the size on disk
+and the process's peak RSS after each step; with streaming the peak should
+not move as ``--rows`` grows.
+
+    uv run python -m benchmarks.bench_transfer --rows 1000000
+    uv run python -m benchmarks.bench_transfer --target postgresql+asyncpg://user:pw@localhost/bench
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db.base import Base
+from src.db.transfer import export_database, import_database
+from src.models import db as models
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def size_mb(directory: str) -> float:
+    return sum(entry.stat().st_size for entry in os.scandir(directory)) / 1e6
+
+
+async def seed(engine, rows: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    rng = random.Random(rows)
+    async with engine.begin() as conn:
+        for start in range(0, rows, 5000):
+            await conn.execute(insert(models.LeaderboardEntry), [
+                {"id": f"{i:012d}", "username": f"player{i % 1000}", "score": rng.randrange(100000), "mode": "walls"}
+                for i in range(start, min(rows, start + 5000))
+            ])
+
+
+async def main(args):
+    workdir = tempfile.mkdtemp()
+    source = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'source.db')}")
+    await seed(source, args.rows)
+    print(f"rows={args.rows} seeded, peak rss {peak_rss_mb():.0f} MB")
+    print(f"{'variant':<12} {'step':<7} {'seconds':>8} {'rows/s':>10} {'MB':>8} {'peak rss':>9}")
+
+    variants = [(fmt, compressed) for fmt in ("csv", "jsonl") for compressed in (False, True)]
+    for fmt, compressed in variants:
+        name = fmt + (".gz" if compressed else "")
+        directory = os.path.join(workdir, name)
+        began = time.perf_counter()
+        await export_database(source, directory, fmt, compressed, names=["leaderboard"],
+                              chunk_size=args.chunk_size, part_rows=args.part_rows)
+        elapsed = time.perf_counter() - began
+        print(f"{name:<12} {'export':<7} {elapsed:>8.2f} {args.rows / elapsed:>10.0f} "
+              f"{size_mb(directory):>8.1f} {peak_rss_mb():>6.0f} MB")
+
+        url = args.target or f"sqlite+aiosqlite:///{os.path.join(workdir, name + '.db')}"
+        target = create_async_engine(url)
+        if args.target:
+            async with target.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(delete(models.LeaderboardEntry))
+        began = time.perf_counter()
+        await import_database(target, directory, names=["leaderboard"])
+        elapsed = time.perf_counter() - began
+        print(f"{name:<12} {'import':<7} {elapsed:>8.2f} {args.rows / elapsed:>10.0f} "
+              f"{'':>8} {peak_rss_mb():>6.0f} MB")
+        await target.dispose()
+
+    await source.dispose()
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--part-rows", type=int, default=1_000_000)
+    parser.add_argument("--target", help="import into this database instead of fresh SQLite files")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,139 @@
+"""
+Per-player views: GROUP BY over the leaderboard vs the user_stats aggregate.
+
+A SQLite file is seeded with ``--scores`` submissions from ``--players``
+players and user_stats is rebuilt from it (timed: that is the backfill a
+migration runs). Then, best of ``--repeat``:
+
+  * players page - each player once at their best, top ``--limit``:
+                   GROUP BY username over the mode vs one index range on
+                   user_stats
+  * my stats     - one player's best/count/total/last per mode: aggregate
+                   their rows vs read their user_stats rows
+
+and what the aggregate costs on the write path: ``insert_scores`` batches
+of ``--batch`` rows with and without the user_stats upsert.
+
+    uv run python -m benchmarks.bench_user_stats --scores 200000 --players 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import desc, func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.db.migrations import migrate
+from src.db.repository import DatabaseRepository
+from src.leaderboard.cache import ResponseCache
+from src.leaderboard.index import LeaderboardIndex, RankedEntry
+from src.leaderboard.stats import rebuild
+from src.models import db as models
+
+entry = models.LeaderboardEntry
+
+
+async def seed(engine, scores: int, players: int):
+    await migrate(engine)
+    rng = random.Random(11)
+    began = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    async with engine.begin() as conn:
+        for start in range(0, scores, 5000):
+            await conn.execute(insert(entry), [{
+                "id": f"{i:09d}", "username": f"player{rng.randrange(players)}", "score": rng.randrange(10_000),
+                "mode": rng.choice(("walls", "passthrough")), "date": began + timedelta(seconds=i),
+            } for i in range(start, min(scores, start + 5000))])
+
+
+async def players_grouped(session, limit: int):
+    best = func.max(entry.score).label("best")
+    stmt = (
+        select(entry.username, best, func.count(), func.sum(entry.score), func.max(entry.date))
+        .where(entry.mode == "walls").group_by(entry.username).order_by(desc(best), entry.username).limit(limit)
+    )
+    return (await session.execute(stmt)).all()
+
+
+async def my_stats_grouped(session, username: str):
+    stmt = (
+        select(entry.mode, func.max(entry.score), func.count(), func.sum(entry.score), func.max(entry.date))
+        .where(entry.username == username).group_by(entry.mode)
+    )
+    return (await session.execute(stmt)).all()
+
+
+async def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - began)
+    return best
+
+
+def batch(size: int, players: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        RankedEntry(str(uuid4()), f"player{random.randrange(players)}", random.randrange(10_000), "walls", now)
+        for _ in range(size)
+    ]
+
+
+async def main(args):
+    path = os.path.join(tempfile.mkdtemp(), "stats.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    await seed(engine, args.scores, args.players)
+    began = time.perf_counter()
+    await rebuild(engine)
+    backfill = time.perf_counter() - began
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    print(f"scores={args.scores} players={args.players} limit={args.limit}")
+    print(f"backfill: {backfill * 1000:.0f}ms ({args.scores / backfill:,.0f} rows/s)")
+
+    async with sessions() as session:
+        repo = DatabaseRepository(session, LeaderboardIndex(), ResponseCache())
+        assert [row[0] for row in await players_grouped(session, args.limit)] == \
+            [row["username"] for row in await repo.get_players_page("walls", args.limit)]
+        timings = {
+            "players page": (
+                await best_of(args.repeat, lambda: players_grouped(session, args.limit)),
+                await best_of(args.repeat, lambda: repo.get_players_page("walls", args.limit)),
+            ),
+            "my stats": (
+                await best_of(args.repeat, lambda: my_stats_grouped(session, "player7")),
+                await best_of(args.repeat, lambda: repo.get_user_stats("player7")),
+            ),
+        }
+    print(f"\n{'read':<14} {'group by':>10} {'user_stats':>11}")
+    for name, (grouped, aggregate) in timings.items():
+        print(f"{name:<14} {grouped * 1000:>8.2f}ms {aggregate * 1000:>9.2f}ms")
+
+    async def insert_plain():
+        async with sessions() as session:
+            await session.execute(insert(entry), [row._asdict() for row in batch(args.batch, args.players)])
+            await session.commit()
+
+    async def insert_with_stats():
+        async with sessions() as session:
+            await DatabaseRepository(session, LeaderboardIndex(), ResponseCache()).insert_scores(
+                batch(args.batch, args.players))
+
+    plain = await best_of(args.repeat // 4 or 1, insert_plain)
+    with_stats = await best_of(args.repeat // 4 or 1, insert_with_stats)
+    print(f"\nwrite, {args.batch} rows: {plain * 1000:.2f}ms plain, {with_stats * 1000:.2f}ms with user_stats")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scores", type=int, default=200_000)
+    parser.add_argument("--players", type=int, default=5_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
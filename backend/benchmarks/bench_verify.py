@@ -0,0 +1,89 @@
+"""
+Score verification throughput: verified games per second, per core.
+
+Plays ``--games`` seeded games the way the browser does (Mulberry32 food,
+logged turns) with a greedy bot, then re-simulates all of them:
+
+  * inline - ``simulate`` in this process, one game after another
+  * pool   - ``ScoreVerifier.check`` for every game at once, with each
+             worker count in ``--workers`` (worker start-up excluded)
+
+    uv run python -m benchmarks.bench_verify --games 400 --workers 1 2 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from src.game.engine import DELTAS, OPPOSITES, Mulberry32, SnakeGame
+from src.game.verify import simulate
+from src.leaderboard.verifier import ScoreVerifier
+
+
+def bot_game(seed: int, mode: str) -> tuple:
+    game = SnakeGame(mode, rng=Mulberry32(seed))
+    size = game.grid_size
+    rng = random.Random(seed)
+    inputs, ticks = [], 0
+    while not game.is_game_over and ticks < 20000:
+        head = game.body[0]
+        hx, hy = head % size, head // size
+        fx, fy = game.food % size, game.food // size
+        options = []
+        for direction, (dx, dy) in DELTAS.items():
+            if direction == OPPOSITES[game.direction]:
+                continue
+            x, y = hx + dx, hy + dy
+            if mode == "passthrough":
+                x, y = x % size, y % size
+            elif not (0 <= x < size and 0 <= y < size):
+                continue
+            if game.occupied[y * size + x] and y * size + x != game.body[-1]:
+                continue
+            options.append((abs(x - fx) + abs(y - fy), rng.random(), direction))
+        if options:
+            direction = min(options)[2]
+            if direction != game.next_direction and game.set_direction(direction):
+                inputs.append((ticks, direction))
+        game.move()
+        ticks += 1
+    return mode, seed, inputs, ticks, game.score
+
+
+async def pool(games: list, workers: int) -> float:
+    verifier = ScoreVerifier(None, workers=workers, timeout=30.0, max_ticks=10 ** 6)
+    # Start the worker processes before timing
+    await asyncio.gather(*(verifier.check(*games[i]) for i in range(workers)))
+    started = time.perf_counter()
+    verdicts = await asyncio.gather(*(verifier.check(*game) for game in games))
+    elapsed = time.perf_counter() - started
+    await verifier.stop()
+    assert all(v.ok for v in verdicts)
+    return elapsed
+
+
+def main(args):
+    games = [bot_game(seed, "passthrough" if seed % 2 else "walls") for seed in range(args.games)]
+    ticks = sum(game[3] for game in games)
+    cores = os.cpu_count() or 1
+    print(f"games={len(games)} ticks={ticks} (avg {ticks // len(games)}/game) cores={cores}")
+    print(f"{'runner':<10} {'games/s':>9} {'ticks/s':>11} {'games/s/core':>13}")
+
+    started = time.perf_counter()
+    assert all(simulate(*game).ok for game in games)
+    elapsed = time.perf_counter() - started
+    print(f"{'inline':<10} {len(games) / elapsed:>9.0f} {ticks / elapsed:>11.0f} {len(games) / elapsed:>13.0f}")
+
+    for workers in args.workers:
+        elapsed = asyncio.run(pool(games, workers))
+        used = min(workers, cores)
+        print(f"{'pool x' + str(workers):<10} {len(games) / elapsed:>9.0f} {ticks / elapsed:>11.0f}"
+              f" {len(games) / elapsed / used:>13.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    main(parser.parse_args())
@@ -0,0 +1,352 @@
+"""
+Load test: seeded database, concurrent clients, saved and compared results.
+
+Seeds a throwaway SQLite file (or an empty database at ``--url``) with
+``--users`` accounts, ``--scores`` leaderboard rows and ``--games`` active
+games, then runs each scenario for ``--duration`` seconds with
+``--concurrency`` clients against either
+
+  * asgi     - the app in this process, through httpx's ASGI transport
+  * uvicorn  - a real ``uvicorn src.main:app`` on localhost (``--workers``)
+
+Scenarios (``--scenarios``, comma separated):
+
+  * signup             POST /api/auth/signup with fresh accounts
+  * login              POST /api/auth/login as seeded users
+  * leaderboard_read   GET /api/leaderboard, all modes and per mode
+  * leaderboard_write  POST /api/leaderboard as seeded users (bare scores)
+  * spectate           GET /api/games/active and /api/games/{id}
+
+Reports requests, throughput and p50/p95/p99 per scenario. ``--output``
+saves them as JSON; ``--baseline`` compares against an earlier file and
+exits 1 if any scenario's p95 rose, or its throughput fell, by more than
+``--threshold``. Client choices are drawn from ``--seed``, so two runs
+issue the same mix of requests.
+
+    uv run python -m benchmarks.load --output base.json
+    uv run python -m benchmarks.load --target uvicorn --workers 2 --baseline base.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+SCENARIOS = ("signup", "login", "leaderboard_read", "leaderboard_write", "spectate")
+MODES = ("walls", "passthrough")
+PASSWORD = "password123"
+CHUNK = 10_000
+
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000 if samples else 0.0
+
+
+def configure(args):
+    """
+    Settings for the app under test. They have to be in the environment
+    before ``src`` is first imported, and a uvicorn child inherits them.
+    """
+    os.environ["DATABASE_URL"] = args.url
+    # Bare score submissions; re-simulating them is benchmarked in bench_verify
+    os.environ["SCORE_VERIFICATION_REQUIRED"] = "false"
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+
+async def seed(args) -> dict:
+    """Bulk-insert the fixture rows; returns the ids the clients pick from."""
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from src.db.base import Base
+    from src.game.engine import SnakeGame
+    from src.game.movelog import game_columns
+    from src.models import db as models
+    from src.utils.password import hash_password
+
+    rng = random.Random(args.seed)
+    engine = create_async_engine(args.url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if (await conn.execute(select(func.count()).select_from(models.User))).scalar():
+            raise SystemExit(f"{args.url} already has users; load tests need an empty database")
+
+    began = time.perf_counter()
+    # Every seeded user shares one password, so there is only one hash to compute
+    hashed = hash_password(PASSWORD, int(os.environ.get("BCRYPT_ROUNDS", 12)))
+    now = datetime.now(timezone.utc)
+    users = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(args.users)]
+    games = []
+    async with engine.begin() as conn:
+        for start in range(0, args.users, CHUNK):
+            await conn.execute(insert(models.User), [
+                {"id": user_id, "username": f"user{i}", "email": f"user{i}@example.com", "password": hashed,
+                 "created_at": now}
+                for i, user_id in enumerate(users[start:start + CHUNK], start)
+            ])
+        for start in range(0, args.scores, CHUNK):
+            await conn.execute(insert(models.LeaderboardEntry), [
+                {"id": str(uuid.UUID(int=rng.getrandbits(128))), "username": f"user{rng.randrange(max(args.users, 1))}",
+                 "score": rng.randrange(0, 5000, 10), "mode": rng.choice(MODES), "date": now}
+                for _ in range(min(CHUNK, args.scores - start))
+            ])
+        # Server-run games as GameRecorder leaves them: a row plus the opening snapshot
+        for start in range(0, args.games, CHUNK):
+            rows, snapshots = [], []
+            for i in range(start, min(start + CHUNK, args.games)):
+                game_id, mode = str(uuid.UUID(int=rng.getrandbits(128))), rng.choice(MODES)
+                state = SnakeGame(mode, seed=i).state()
+                rows.append({"id": game_id, "player_id": users[i % len(users)] if users else "load",
+                             "player_name": f"user{i}", "is_active": True, "seed": i, **game_columns(mode, state)})
+                snapshots.append({"game_id": game_id, "tick": 0, "state": state})
+                games.append(game_id)
+            await conn.execute(insert(models.ActiveGame), rows)
+            await conn.execute(insert(models.GameSnapshot), snapshots)
+    await engine.dispose()
+    print(f"seeded {args.users} users, {args.scores} scores, {args.games} games in {time.perf_counter() - began:.1f}s")
+    return {"users": users, "games": games}
+
+
+class Scenario:
+    """Builds one request at a time for a client; ``expect`` is the success status."""
+
+    def __init__(self, name: str, fixtures: dict, rng: random.Random, client_id: int):
+        self.name = name
+        self.fixtures = fixtures
+        self.rng = rng
+        self.client_id = client_id
+        self.sent = 0
+        self._tokens: dict = {}
+
+    def _user(self) -> int:
+        return self.rng.randrange(len(self.fixtures["users"]))
+
+    def _auth(self, user: int) -> dict:
+        from src.auth.sessions import issue_token
+
+        token = self._tokens.get(user)
+        if token is None:
+            token = self._tokens[user] = issue_token(self.fixtures["users"][user])
+        return {"Authorization": f"Bearer {token}"}
+
+    def next(self) -> tuple:
+        """(method, path, json body, headers, expected status)"""
+        self.sent += 1
+        if self.name == "signup":
+            email = f"new-{self.fixtures['run']}-{self.client_id}-{self.sent}@example.com"
+            return "POST", "/api/auth/signup", {"email": email, "username": "Newcomer", "password": PASSWORD}, {}, 201
+        if self.name == "login":
+            body = {"email": f"user{self._user()}@example.com", "password": PASSWORD}
+            return "POST", "/api/auth/login", body, {}, 200
+        if self.name == "leaderboard_read":
+            mode = self.rng.choice((None,) + MODES)
+            return "GET", "/api/leaderboard" + (f"?mode={mode}" if mode else ""), None, {}, 200
+        if self.name == "leaderboard_write":
+            body = {"score": self.rng.randrange(0, 5000, 10), "mode": self.rng.choice(MODES)}
+            return "POST", "/api/leaderboard", body, self._auth(self._user()), 200
+        if self.rng.random() < 0.5 or not self.fixtures["games"]:
+            return "GET", "/api/games/active", None, {}, 200
+        return "GET", f"/api/games/{self.rng.choice(self.fixtures['games'])}", None, {}, 200
+
+
+async def client_loop(client: httpx.AsyncClient, scenario: Scenario, deadline: float, result: dict):
+    while time.perf_counter() < deadline:
+        method, path, body, headers, expect = scenario.next()
+        began = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body, headers=headers)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - began
+        result["statuses"][str(status)] = result["statuses"].get(str(status), 0) + 1
+        if status == expect:
+            result["latencies"].append(elapsed)
+        else:
+            result["errors"] += 1
+            if status == 503:
+                # Shed load (bcrypt or verifier queue full): back off as the server asks
+                await asyncio.sleep(float(response.headers.get("retry-after", 1)) / 10)
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, fixtures: dict, args) -> dict:
+    result = {"latencies": [], "errors": 0, "statuses": {}}
+    deadline = time.perf_counter() + args.duration
+    began = time.perf_counter()
+    await asyncio.gather(*(
+        client_loop(client, Scenario(name, fixtures, random.Random(f"{args.seed}:{name}:{i}"), i), deadline, result)
+        for i in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - began
+    latencies = result.pop("latencies")
+    return {
+        "requests": len(latencies),
+        "errors": result["errors"],
+        "throughput": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "statuses": dict(sorted(result["statuses"].items())),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def start_uvicorn(args) -> tuple:
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url) as probe:
+        for _ in range(300):
+            if process.poll() is not None:
+                raise SystemExit(f"uvicorn exited with {process.returncode}")
+            try:
+                await probe.get("/api/games/active")
+                return process, base_url
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    process.terminate()
+    raise SystemExit("uvicorn did not start within 30s")
+
+
+async def run_all(args, fixtures: dict) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(30.0)
+    results = {}
+    if args.target == "asgi":
+        from src.main import app
+
+        # Run startup (index warm-up, ingestor, verifier) as a real server would
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=timeout) as client:
+                for name in args.scenarios:
+                    results[name] = await run_scenario(client, name, fixtures, args)
+                    report(name, results[name])
+        return results
+
+    process, base_url = await start_uvicorn(args)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+            for name in args.scenarios:
+                results[name] = await run_scenario(client, name, fixtures, args)
+                report(name, results[name])
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return results
+
+
+def report(name: str, result: dict):
+    print(f"{name:<18} {result['requests']:>8} {result['errors']:>7} {result['throughput']:>9.1f} "
+          f"{result['p50']:>8.2f} {result['p95']:>8.2f} {result['p99']:>8.2f}  {result['statuses']}")
+
+
+def compare(document: dict, baseline: dict, threshold: float) -> list:
+    """Scenarios whose p95 or throughput moved the wrong way by more than ``threshold``."""
+    regressions = []
+    meta = {"target", "workers", "users", "scores", "games", "concurrency", "duration", "bcrypt_rounds", "database", "cpus"}
+    differs = sorted(key for key in meta if baseline["meta"].get(key) != document["meta"].get(key))
+    if differs:
+        print(f"\nwarning: baseline was run with different {', '.join(differs)}")
+    print(f"\n{'vs baseline':<18} {'req/s':>9} {'p95 ms':>9}")
+    for name, result in document["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        throughput = result["throughput"] / before["throughput"] - 1 if before["throughput"] else 0.0
+        p95 = result["p95"] / before["p95"] - 1 if before["p95"] else 0.0
+        regressed = throughput < -threshold or p95 > threshold
+        print(f"{name:<18} {throughput:>+9.1%} {p95:>+9.1%}{'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(args):
+    if not args.url:
+        args.url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}"
+    configure(args)
+    fixtures = asyncio.run(seed(args))
+    fixtures["run"] = uuid.uuid4().hex[:8]
+    if "leaderboard_write" in args.scenarios or "login" in args.scenarios:
+        if not fixtures["users"]:
+            raise SystemExit("login and leaderboard_write need --users > 0")
+
+    print(f"target={args.target} concurrency={args.concurrency} duration={args.duration}s")
+    print(f"{'scenario':<18} {'requests':>8} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    results = asyncio.run(run_all(args, fixtures))
+
+    document = {
+        "meta": {
+            "target": args.target,
+            "workers": args.workers if args.target == "uvicorn" else 1,
+            "users": args.users,
+            "scores": args.scores,
+            "games": args.games,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+            "bcrypt_rounds": int(os.environ.get("BCRYPT_ROUNDS", 12)),
+            "database": args.url.split(":", 1)[0],
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "started": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"\nsaved {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(document, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--url", help="empty database to seed (default: a throwaway SQLite file)")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--scores", type=int, default=100_000)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--scenarios", type=lambda s: [n for n in s.split(",") if n], default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bcrypt-rounds", type=int, help="work factor for seeded and new accounts")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved by an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    main(args)
@@ -1,27 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from typing import Optional, List, Literal
+from . import serialize
 from ..db.session import get_db
 from ..db.repository import DatabaseRepository
 from ..models import schemas
-from ..utils.password import hash_password, verify_password
+from ..game import codec
+from ..game.engine import GRID_SIZE
+from ..game.movelog import MoveEvent
+from ..game import replay
+from ..config import settings
+from ..game.arena import ArenaFull, LiveArena, live_arena
+from ..game.live import LiveGames, live_games
+from ..game.shards import ShardedRooms, room_scheduler
+from ..game.lobby import GameRegistry, game_registry
+from ..game.replay import ReplayStore, replay_store
+from ..utils.password import HasherBusy, PasswordHasher, password_hasher
+from ..leaderboard.ingest import ScoreIngestor, record_score, score_ingestor
+from ..leaderboard.verifier import ScoreVerifier, VerifierBusy, score_verifier
+from ..leaderboard.cache import ResponseCache, etag_matches, leaderboard_cache
+from ..leaderboard.index import sort_key
+from ..leaderboard.windows import Window, today
+from ..auth.sessions import TokenError, issue_token, read_token, revoked_tokens, user_cache
 
 router = APIRouter()
 
 def get_repository(session: AsyncSession = Depends(get_db)) -> DatabaseRepository:
     return DatabaseRepository(session)
 
+def get_leaderboard_cache() -> ResponseCache:
+    return leaderboard_cache
+
+def get_score_ingestor() -> ScoreIngestor:
+    return score_ingestor
+
+def get_password_hasher() -> PasswordHasher:
+    return password_hasher
+
+def get_score_verifier() -> ScoreVerifier:
+    return score_verifier
+
+def get_replay_store() -> ReplayStore:
+    return replay_store
+
+def get_arena() -> LiveArena:
+    return live_arena
+
+def get_game_registry() -> GameRegistry:
+    return game_registry
+
+# Server-run games, ticked in this process or spread over shard workers
+Rooms = LiveGames | ShardedRooms
+
+def get_live_games() -> Rooms:
+    return room_scheduler if settings.GAME_SHARDS else live_games
+
+def hasher_busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+
 # Authentication Endpoints
 @router.post("/auth/signup", status_code=201, response_model=dict)
 async def signup(
     user_data: schemas.UserCreate,
-    repo: DatabaseRepository = Depends(get_repository)
+    repo: DatabaseRepository = Depends(get_repository),
+    hasher: PasswordHasher = Depends(get_password_hasher)
 ):
     """Create a new user account"""
+    if hasher.saturated:
+        raise hasher_busy()
+    # Cheap duplicate check first so taken emails don't cost a bcrypt round
+    if await repo.get_user_by_email(user_data.email):
+        raise HTTPException(status_code=409, detail="Email already registered")
+    # Don't hold a pooled connection while waiting on bcrypt
+    await repo.release()
+    try:
+        hashed_password = await hasher.hash(user_data.password)
+    except HasherBusy:
+        raise hasher_busy()
     try:
-        db_user = await repo.create_user(user_data)
+        db_user = await repo.create_user(user_data, hashed_password)
         user = schemas.User.model_validate(db_user)
-        return {"success": True, "user": user}
+        user_cache.put(user.id, user)
+        return {"success": True, "user": user, "token": issue_token(user.id)}
     except ValueError as e:
         # Email already registered
         raise HTTPException(status_code=409, detail=str(e))
@@ -31,52 +94,99 @@ async def signup(
 @router.post("/auth/login", response_model=dict)
 async def login(
     credentials: schemas.UserLogin,
-    repo: DatabaseRepository = Depends(get_repository)
+    repo: DatabaseRepository = Depends(get_repository),
+    hasher: PasswordHasher = Depends(get_password_hasher)
 ):
     """Authenticate user and return success with user data"""
+    if hasher.saturated:
+        raise hasher_busy()
     db_user = await repo.get_user_by_email(credentials.email)
     
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not verify_password(credentials.password, db_user.password):
+    # Don't hold a pooled connection while waiting on bcrypt
+    await repo.release()
+    try:
+        valid = await hasher.verify(credentials.password, db_user.password)
+    except HasherBusy:
+        raise hasher_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    if hasher.needs_rehash(db_user.password):
+        # Work factor changed since this hash was made; upgrade it while we
+        # have the plain password. Under load this simply waits for a later login.
+        try:
+            await repo.update_password(db_user, await hasher.hash(credentials.password))
+        except HasherBusy:
+            pass
+    
     user = schemas.User.model_validate(db_user)
-    return {"success": True, "user": user}
+    user_cache.put(user.id, user)
+    return {"success": True, "user": user, "token": issue_token(user.id)}
+
 
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return token.strip()
 
 @router.post("/auth/logout")
-async def logout():
+async def logout(authorization: Optional[str] = Header(None)):
+    token = bearer_token(authorization)
+    if token:
+        try:
+            claims = read_token(token)
+        except TokenError:
+            pass
+        else:
+            revoked_tokens.add(claims["jti"], claims["exp"])
+            user_cache.invalidate(claims["sub"])
     return {"success": True}
 
 # Auth Dependency for other endpoints
+DEMO_USER_EMAIL = "demo@snake.game"
+
 async def get_current_user_dep(
     authorization: Optional[str] = Header(None),
     repo: DatabaseRepository = Depends(get_repository)
-):
+) -> Optional[schemas.User]:
+    """
+    Resolve the session token to a user. The signature is checked in memory
+    and the user normally comes from ``user_cache``; only a cache miss
+    queries the database.
+    """
     if not authorization:
-        # Default to demo user if no header (Mock behavior for dev)
-        # Note: We need to ensure the demo user exists or handle None
-        # In this refactor, we rely on the client sending credentials or use a simpler check.
-        # But to keep existing frontend working which might not send headers initially?
-        # Let's try to fetch a known demo user if verification fails or no header?
-        # Given "Best Practices", we should really enforce auth.
-        # But to avoid breaking frontend immediately if it's relying on loose auth:
-        passengers = await repo.get_user_by_email("demo@snake.game")
-        if passengers:
-             return passengers
-        return None
+        # Dev convenience: header-less requests act as the demo user, if one exists
+        user = user_cache.get(DEMO_USER_EMAIL)
+        if user is None:
+            db_user = await repo.get_user_by_email(DEMO_USER_EMAIL)
+            if not db_user:
+                return None
+            user = schemas.User.model_validate(db_user)
+            user_cache.put(DEMO_USER_EMAIL, user)
+        return user
 
+    token = bearer_token(authorization)
+    if token is None:
+        return None
     try:
-        scheme, token = authorization.split()
-        if scheme.lower() != 'bearer':
-            return None
-        # In this mock setup, the token is the email
-        return await repo.get_user_by_email(token)
-    except Exception:
+        claims = read_token(token)
+    except TokenError:
         return None
 
+    user_id = claims["sub"]
+    user = user_cache.get(user_id)
+    if user is None:
+        db_user = await repo.get_user_by_id(user_id)
+        if not db_user:
+            return None
+        user = schemas.User.model_validate(db_user)
+        user_cache.put(user_id, user)
+    return user
+
 @router.get("/auth/me", response_model=schemas.User)
 async def me(user = Depends(get_current_user_dep)):
     if not user:
@@ -84,42 +194,377 @@ async def me(user = Depends(get_current_user_dep)):
     return user
 
 
+@router.get("/users/me/stats", response_model=List[schemas.PlayerStats])
+async def my_stats(
+    user = Depends(get_current_user_dep),
+    repo: DatabaseRepository = Depends(get_repository)
+):
+    """Best score, games played, total score and last played, per mode played."""
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return Response(serialize.players_json(await repo.get_user_stats(user.username)), media_type="application/json")
+
+
 # Leaderboard Endpoints
+MAX_PAGE_SIZE = 1000
+
+def parse_cursor(cursor: str) -> tuple[int, str]:
+    """Cursors are '<score>:<id>' of the last entry on the previous page."""
+    score, sep, entry_id = cursor.partition(":")
+    try:
+        if not sep or not entry_id:
+            raise ValueError(cursor)
+        return int(score), entry_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/leaderboard", response_model=List[schemas.LeaderboardEntry])
-async def get_leaderboard(mode: Optional[str] = None, repo: DatabaseRepository = Depends(get_repository)):
-    return await repo.get_leaderboard(mode)
+async def get_leaderboard(
+    mode: Optional[Literal['passthrough', 'walls', 'royale']] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    around: Optional[Literal["me"]] = None,
+    window: Window = "all",
+    authorization: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    repo: DatabaseRepository = Depends(get_repository),
+    cache: ResponseCache = Depends(get_leaderboard_cache)
+):
+    """
+    Leaderboard reads are answered from serialized bytes cached per query
+    until the next score in that mode, with a strong ETag for 304s.
+    ``around=me`` is per-user and always built fresh.
+
+    ``window=day|week`` ranks only this UTC day's or ISO week's scores,
+    merged from per-day buckets rather than filtering the whole table.
+    """
+    if around == "me":
+        if after is not None:
+            raise HTTPException(status_code=400, detail="'after' cannot be combined with 'around'")
+        if window != "all":
+            raise HTTPException(status_code=400, detail="'around' is only available for window=all")
+        user = await get_current_user_dep(authorization, repo)
+        if not user:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        entries = await repo.get_leaderboard_around(mode, user.username, limit or MAX_PAGE_SIZE)
+        return Response(serialize.leaderboard_json(entries), media_type="application/json")
+
+    if window == "all":
+        key = (mode, limit, after)
+    else:
+        # A new day starts a new window even when no score has arrived since
+        key = (mode, limit, after, window, today())
+    cached = cache.get(mode, key)
+    if cached is None:
+        # Read the version before querying: a score landing mid-query makes this entry stale at once
+        version = cache.version(mode)
+        headers = {}
+        if limit is None and after is None and window == "all":
+            entries = await repo.get_leaderboard(mode)
+        else:
+            page_size = limit or MAX_PAGE_SIZE
+            cursor = parse_cursor(after) if after is not None else None
+            if window == "all":
+                entries = await repo.get_leaderboard_page(mode, page_size, cursor)
+            else:
+                entries = await repo.get_window_page(mode, window, page_size, cursor)
+            if len(entries) == page_size:
+                last = entries[-1]
+                headers["X-Next-Cursor"] = f"{last.score}:{last.id}"
+        body = serialize.leaderboard_json(entries)
+        cached = cache.put(key, version, body, headers)
+
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache", **cached.headers}
+    if etag_matches(if_none_match, cached.etag):
+        cache.record_not_modified(cached)
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+@router.get("/leaderboard/players", response_model=List[schemas.PlayerStats])
+async def get_players_leaderboard(
+    mode: Literal['passthrough', 'walls', 'royale'],
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    repo: DatabaseRepository = Depends(get_repository),
+    cache: ResponseCache = Depends(get_leaderboard_cache)
+):
+    """
+    Each player once, at their best score, from the per-player aggregates.
+    Cached and revalidated like the leaderboard itself.
+    """
+    key = ("players", mode, limit, after)
+    cached = cache.get(mode, key)
+    if cached is None:
+        version = cache.version(mode)
+        players = await repo.get_players_page(mode, limit, parse_cursor(after) if after is not None else None)
+        headers = {}
+        if len(players) == limit:
+            last = players[-1]
+            headers["X-Next-Cursor"] = f"{last['bestScore']}:{last['username']}"
+        cached = cache.put(key, version, serialize.players_json(players), headers)
 
-@router.post("/leaderboard", response_model=dict)
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache", **cached.headers}
+    if etag_matches(if_none_match, cached.etag):
+        cache.record_not_modified(cached)
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+@router.get("/leaderboard/cache", response_model=dict)
+async def leaderboard_cache_stats(cache: ResponseCache = Depends(get_leaderboard_cache)):
+    """Hit ratio and bytes saved by the leaderboard response cache."""
+    return cache.stats()
+
+@router.post("/leaderboard", response_model=dict, responses={202: {"description": "Queued for verification"}})
 async def submit_score(
     submission: schemas.ScoreSubmission, 
+    response: Response,
     user = Depends(get_current_user_dep),
-    repo: DatabaseRepository = Depends(get_repository)
+    repo: DatabaseRepository = Depends(get_repository),
+    ingestor: ScoreIngestor = Depends(get_score_ingestor),
+    verifier: ScoreVerifier = Depends(get_score_verifier)
 ):
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    rank = await repo.add_score(user.username, submission.score, submission.mode)
-    return {"success": True, "rank": rank}
+    # Refused here rather than by the verifier, so an oversized game is never queued or sent to a worker
+    if submission.ticks > verifier.max_ticks or len(submission.inputs) > verifier.max_ticks:
+        raise HTTPException(status_code=422, detail="Score rejected: game too long")
+
+    if submission.seed is None:
+        if verifier.required:
+            raise HTTPException(status_code=422, detail="Scores must be submitted with their seed and input log")
+        rank = await record_score(repo, ingestor, user.username, submission.score, submission.mode)
+        return {"success": True, "rank": rank}
+
+    if not verifier.running:
+        # No background queue (e.g. tests): verify inline, still off the event loop
+        verdict = await verifier.check(submission.mode, submission.seed, submission.inputs,
+                                       submission.ticks, submission.score)
+        if not verdict.ok:
+            raise HTTPException(status_code=422, detail=f"Score rejected: {verdict.reason}")
+        rank = await record_score(repo, ingestor, user.username, submission.score, submission.mode)
+        return {"success": True, "status": "verified", "rank": rank}
+
+    try:
+        verification = verifier.submit(user.username, submission.mode, submission.score,
+                                       submission.seed, submission.ticks, submission.inputs)
+    except VerifierBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+    response.status_code = 202
+    return {"success": True, "status": "pending", "verificationId": verification.id}
+
+@router.get("/leaderboard/verifications/{verification_id}", response_model=dict)
+async def get_verification(
+    verification_id: str,
+    user = Depends(get_current_user_dep),
+    verifier: ScoreVerifier = Depends(get_score_verifier)
+):
+    verification = verifier.get(verification_id)
+    if not verification or not user or verification.username != user.username:
+        raise HTTPException(status_code=404, detail="Verification not found")
+    return verification.result()
 
 # Spectator/Game Endpoints
+def wants_binary(accept: Optional[str]) -> bool:
+    """Clients opt in to the compact game encoding with Accept: application/x-snake-frame."""
+    return accept is not None and codec.MEDIA_TYPE in accept
+
 @router.get("/games/active", response_model=List[schemas.ActiveGame])
-async def get_active_games(repo: DatabaseRepository = Depends(get_repository)):
-    return await repo.get_active_games()
+async def get_active_games(
+    accept: Optional[str] = Header(None),
+    repo: DatabaseRepository = Depends(get_repository)
+):
+    games = await repo.get_active_games()
+    if wants_binary(accept):
+        return Response(codec.encode_game_list(games), media_type=codec.MEDIA_TYPE, headers={"Vary": "Accept"})
+    return Response(serialize.active_games_json(games), media_type="application/json", headers={"Vary": "Accept"})
+
+@router.get("/games/lobby", response_model=List[schemas.LobbyGame])
+async def get_lobby(
+    mode: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    registry: GameRegistry = Depends(get_game_registry)
+):
+    """
+    Running games, highest score first, from the in-memory registry: no
+    database read and no board state. Pages continue from X-Next-Cursor.
+    """
+    games = registry.page(mode, limit, sort_key(*parse_cursor(after)) if after is not None else None)
+    headers = {}
+    if len(games) == limit:
+        last = games[-1]
+        headers["X-Next-Cursor"] = f"{last['score']}:{last['id']}"
+    return Response(serialize.lobby_json(games), media_type="application/json", headers=headers)
+
+@router.post("/games/start", response_model=dict, responses={409: {"description": "Already playing"}})
+async def start_live_game(
+    start: schemas.LiveGameStart,
+    user = Depends(get_current_user_dep),
+    live: Rooms = Depends(get_live_games)
+):
+    """Start a game ticked by the server; spectators follow it on /ws/games/{gameId}."""
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    if live.game_of(user.id) is not None:
+        raise HTTPException(status_code=409, detail="Already playing")
+    return {"gameId": await live.open_game(user.id, user.username, start.mode)}
+
+@router.post("/games/{game_id}/turn", response_model=dict)
+async def turn_live_game(
+    game_id: str,
+    turn: schemas.GameTurn,
+    user = Depends(get_current_user_dep),
+    live: Rooms = Depends(get_live_games)
+):
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    if live.owner(game_id) != user.id:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return {"accepted": live.set_direction(game_id, turn.direction)}
+
+@router.post("/games/{game_id}/abandon", response_model=dict)
+async def abandon_live_game(
+    game_id: str,
+    user = Depends(get_current_user_dep),
+    live: Rooms = Depends(get_live_games)
+):
+    """End a server-run game at the next tick, so its player can start another."""
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    if live.owner(game_id) != user.id:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return {"success": live.abandon(game_id)}
 
 @router.get("/games/{game_id}", response_model=schemas.ActiveGame)
-async def get_game(game_id: str, repo: DatabaseRepository = Depends(get_repository)):
+async def get_game(
+    game_id: str,
+    response: Response,
+    accept: Optional[str] = Header(None),
+    repo: DatabaseRepository = Depends(get_repository)
+):
     game = await repo.get_game(game_id)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
+    response.headers["Vary"] = "Accept"
+    if wants_binary(accept):
+        body = codec.encode_snapshot(game.model_dump(mode="json", by_alias=True))
+        return Response(body, media_type=codec.MEDIA_TYPE, headers={"Vary": "Accept"})
     return game
 
+@router.get("/games/{game_id}/replay", response_model=schemas.ReplayFrame)
+async def get_replay(
+    game_id: str,
+    tick: Optional[int] = Query(None, ge=0),
+    store: ReplayStore = Depends(get_replay_store)
+):
+    """
+    Without ``tick``, the whole replay file (Range requests let a client
+    fetch the header and then single chunks). With ``tick``, the game state
+    at that tick, rebuilt server-side from the nearest keyframe.
+    """
+    if not store.exists(game_id):
+        raise HTTPException(status_code=404, detail="Replay not found")
+    if tick is None:
+        return FileResponse(store.path(game_id), media_type=replay.MEDIA_TYPE)
+    header, game = await asyncio.to_thread(store.seek, game_id, tick)
+    return schemas.ReplayFrame(
+        id=game_id,
+        mode=header.mode,
+        seed=header.seed,
+        tick=min(tick, header.ticks),
+        ticks=header.ticks,
+        keyframe_interval=header.keyframe_interval,
+        final_score=header.score,
+        score=game.score,
+        snake=game.snake_points(),
+        food=game.point(game.food) if game.food >= 0 else None,
+        direction=game.direction,
+        is_over=game.is_game_over,
+    )
+
 @router.post("/games/save", response_model=dict)
 async def save_game(
     save_data: schemas.GameStateSave, 
     user = Depends(get_current_user_dep),
-    repo: DatabaseRepository = Depends(get_repository)
+    repo: DatabaseRepository = Depends(get_repository),
+    live: Rooms = Depends(get_live_games)
 ):
     if not user:
          raise HTTPException(status_code=401, detail="Unauthorized")
-    await repo.save_game_state(save_data.score, save_data.mode)
+    if save_data.game_id is None or not save_data.events:
+        # Purely client-side games have no server record to append to
+        return {"success": True}
+
+    game = await repo.get_game(save_data.game_id)
+    if not game or game.player_id != user.id:
+        raise HTTPException(status_code=404, detail="Game not found")
+    if live.owner(save_data.game_id) is not None:
+        # The recorder writes the log of a game the server is running; nothing else may
+        raise HTTPException(status_code=409, detail="Game is running on the server")
+    head = await repo.get_game_head(save_data.game_id, game.mode)
+    if head is None:
+        raise HTTPException(status_code=422, detail="Game has no move log")
+    last_tick, replayed = head
+    if save_data.events[0].tick <= last_tick:
+        raise HTTPException(status_code=409, detail="Ticks already recorded")
+
+    # Replay the posted moves before storing them: a log that doesn't replay breaks every read of the game
+    events = []
+    for expected, event in enumerate(save_data.events, start=last_tick + 1):
+        if event.tick != expected:
+            raise HTTPException(status_code=422, detail=f"Expected tick {expected}, got {event.tick}")
+        food = None
+        if event.ate:
+            food = -1
+            if event.food is not None:
+                if not (0 <= event.food.x < GRID_SIZE and 0 <= event.food.y < GRID_SIZE):
+                    raise HTTPException(status_code=422, detail=f"Food at tick {event.tick} is off the grid")
+                food = event.food.y * GRID_SIZE + event.food.x
+        try:
+            replayed.replay_move(event.direction, food)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=f"Tick {event.tick}: {exc}")
+        events.append(MoveEvent(save_data.game_id, event.tick, event.direction, event.ate, food))
+    try:
+        await repo.save_game_state(events)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Ticks already recorded")
     return {"success": True}
+
+# Royale arena
+@router.get("/arena", response_model=dict)
+async def get_arena_state(arena: LiveArena = Depends(get_arena)):
+    """The whole board; /ws/arena streams the same snapshot followed by per-tick deltas."""
+    return Response(content=arena.snapshot_frame().text(), media_type="application/json")
+
+@router.post("/arena/join", response_model=schemas.ArenaJoin, responses={503: {"description": "Arena is full"}})
+async def join_arena(
+    user = Depends(get_current_user_dep),
+    arena: LiveArena = Depends(get_arena)
+):
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    try:
+        snake = arena.join(user.id, user.username)
+    except ArenaFull:
+        raise HTTPException(status_code=503, detail="Arena is full", headers={"Retry-After": "1"})
+    return schemas.ArenaJoin(
+        snake_id=snake.id,
+        grid=arena.arena.grid_size,
+        snake=[arena.arena.point(cell) for cell in snake.body],
+        direction=snake.direction,
+    )
+
+@router.post("/arena/turn", response_model=dict)
+async def turn_in_arena(
+    turn: schemas.ArenaTurn,
+    user = Depends(get_current_user_dep),
+    arena: LiveArena = Depends(get_arena)
+):
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    accepted = arena.turn(user.id, turn.direction)
+    if accepted is None:
+        raise HTTPException(status_code=404, detail="No snake in the arena")
+    return {"accepted": accepted}
@@ -0,0 +1,83 @@
+"""
+JSON bodies for the list endpoints, built without a Pydantic model per row.
+
+The repository hands back leaderboard rows as ``RankedEntry`` tuples and
+games as dicts already keyed by the API's field names. The TypedDicts here
+mirror ``schemas.LeaderboardEntry``, ``schemas.ActiveGame``,
+``schemas.LobbyGame`` and ``schemas.PlayerStats`` field for field (aliases
+included), so ``TypeAdapter.dump_json`` writes the same bytes the
+``response_model`` path would, in one pass in pydantic-core and without
+validating data that came from our own database.
+"""
+from datetime import datetime
+from typing import Iterable, List, TypedDict
+
+from pydantic import TypeAdapter
+
+from ..leaderboard.index import RankedEntry
+
+
+class LeaderboardRow(TypedDict):
+    id: str
+    username: str
+    score: int
+    mode: str
+    date: datetime
+
+
+class PointRow(TypedDict):
+    x: int
+    y: int
+
+
+# Keys are the wire names: TypedDict fields can't carry aliases of their own
+ActiveGameRow = TypedDict("ActiveGameRow", {
+    "id": str,
+    "playerId": str,
+    "playerName": str,
+    "score": int,
+    "mode": str,
+    "snake": List[PointRow],
+    "food": PointRow,
+    "direction": str,
+    "isActive": bool,
+})
+
+LobbyRow = TypedDict("LobbyRow", {
+    "id": str,
+    "playerName": str,
+    "mode": str,
+    "score": int,
+    "length": int,
+})
+
+PlayerStatsRow = TypedDict("PlayerStatsRow", {
+    "username": str,
+    "mode": str,
+    "bestScore": int,
+    "gamesPlayed": int,
+    "totalScore": int,
+    "lastPlayed": datetime,
+})
+
+_leaderboard = TypeAdapter(List[LeaderboardRow])
+_games = TypeAdapter(List[ActiveGameRow])
+_lobby = TypeAdapter(List[LobbyRow])
+_players = TypeAdapter(List[PlayerStatsRow])
+
+
+def leaderboard_json(entries: Iterable[RankedEntry]) -> bytes:
+    fields = RankedEntry._fields
+    return _leaderboard.dump_json([dict(zip(fields, entry)) for entry in entries])
+
+
+def active_games_json(games: List[dict]) -> bytes:
+    return _games.dump_json(games)
+
+
+def lobby_json(games: List[dict]) -> bytes:
+    return _lobby.dump_json(games)
+
+
+def players_json(players: List[dict]) -> bytes:
+    return _players.dump_json(players)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+
+from ..db.repository import DatabaseRepository
+from ..game import codec
+from ..game.arena import ARENA_TOPIC, LiveArena
+from ..game.live import LOBBY_TOPIC, game_topic
+from ..models import schemas
+from ..realtime.hub import Frame, Subscription
+from .routes import Rooms, get_arena, get_live_games, get_repository
+
+router = APIRouter()
+
+GAME_NOT_FOUND = 4404
+
+async def accept(websocket: WebSocket) -> bool:
+    """Accept the socket, choosing binary frames if the client offers our subprotocol."""
+    binary = codec.SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=codec.SUBPROTOCOL if binary else None)
+    return binary
+
+
+async def send_frame(websocket: WebSocket, frame: Frame, binary: bool):
+    if binary and frame.has_binary:
+        await websocket.send_bytes(frame.binary())
+    else:
+        await websocket.send_text(frame.text())
+
+
+async def resync_frame(live: Rooms | LiveArena, topic: str) -> Frame | None:
+    if topic == LOBBY_TOPIC:
+        return await live.fetch_lobby_frame()
+    if topic == ARENA_TOPIC:
+        return live.snapshot_frame()
+    return await live.fetch_snapshot_frame(topic.removeprefix("game:"))
+
+
+async def send_frames(websocket: WebSocket, live: Rooms | LiveArena, subscription: Subscription, binary: bool):
+    """
+    Forward hub frames to the socket.
+
+    A topic that lagged is resynchronised with a fresh snapshot, and deltas
+    the snapshot already covers are skipped.
+    """
+    snapshot_ticks: dict[str, int] = {}
+    while True:
+        topic, tick, frame = await subscription.get()
+        for lagged in list(subscription.resync):
+            subscription.resync.discard(lagged)
+            snapshot = await resync_frame(live, lagged)
+            if snapshot is not None:
+                snapshot_ticks[lagged] = live.tick
+                await send_frame(websocket, snapshot, binary)
+        if tick <= snapshot_ticks.get(topic, -1):
+            continue
+        await send_frame(websocket, frame, binary)
+
+
+async def stream(websocket: WebSocket, live: Rooms | LiveArena, subscription: Subscription, binary: bool, multiplexed: bool):
+    sender = asyncio.create_task(send_frames(websocket, live, subscription, binary))
+    try:
+        while True:
+            message = await websocket.receive_text()
+            if not multiplexed:
+                continue
+            # Lobby sockets may also follow individual games:
+            # {"subscribe": "<game id>"} / {"unsubscribe": "<game id>"}
+            try:
+                command = json.loads(message)
+            except ValueError:
+                continue
+            if not isinstance(command, dict):
+                continue
+            if "subscribe" in command:
+                topic = game_topic(str(command["subscribe"]))
+                snapshot = await live.fetch_snapshot_frame(str(command["subscribe"]))
+                if snapshot is None:
+                    error = {"type": "error", "id": command["subscribe"], "detail": "Game not found"}
+                    await websocket.send_text(json.dumps(error))
+                    continue
+                live.hub.subscribe(subscription, topic)
+                await send_frame(websocket, snapshot, binary)
+            elif "unsubscribe" in command:
+                live.hub.unsubscribe(subscription, game_topic(str(command["unsubscribe"])))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        live.hub.unsubscribe(subscription)
+
+
+@router.websocket("/ws/games")
+async def watch_lobby(websocket: WebSocket, live: Rooms = Depends(get_live_games)):
+    """
+    Lobby feed: a snapshot of running games, then one batched frame per tick.
+
+    Lobby frames are always JSON text; followed games use the negotiated format.
+    """
+    binary = await accept(websocket)
+    subscription = Subscription()
+    live.hub.subscribe(subscription, LOBBY_TOPIC)
+    await send_frame(websocket, await live.fetch_lobby_frame(), binary)
+    await stream(websocket, live, subscription, binary, multiplexed=True)
+
+
+@router.websocket("/ws/games/{game_id}")
+async def watch_game(
+    websocket: WebSocket,
+    game_id: str,
+    live: Rooms = Depends(get_live_games),
+    repo: DatabaseRepository = Depends(get_repository),
+):
+    """One game: a full snapshot, then a small delta per tick."""
+    binary = await accept(websocket)
+    snapshot = await live.fetch_snapshot_frame(game_id)
+    if snapshot is None:
+        # Not running on this server; send whatever was last stored and stop
+        game = await repo.get_game(game_id)
+        if not game:
+            await websocket.close(code=GAME_NOT_FOUND)
+            return
+        state = schemas.ActiveGame.model_validate(game).model_dump(mode="json", by_alias=True)
+        await send_frame(websocket, Frame({"type": "snapshot", "tick": 0, **state}, codec.encode), binary)
+        await websocket.close()
+        return
+
+    subscription = Subscription()
+    live.hub.subscribe(subscription, game_topic(game_id))
+    await send_frame(websocket, snapshot, binary)
+    await stream(websocket, live, subscription, binary, multiplexed=False)
+
+
+@router.websocket("/ws/arena")
+async def watch_arena(websocket: WebSocket, arena: LiveArena = Depends(get_arena)):
+    """The royale board: a full snapshot, then one delta per tick for every snake. JSON only."""
+    await websocket.accept()
+    subscription = Subscription()
+    arena.hub.subscribe(subscription, ARENA_TOPIC)
+    await send_frame(websocket, arena.snapshot_frame(), False)
+    await stream(websocket, arena, subscription, False, multiplexed=False)
@@ -0,0 +1,149 @@
+"""
+Stateless session tokens and the per-process user cache behind them.
+
+A token is ``<payload>.<signature>``: base64url JSON claims (``sub`` user
+id, ``exp`` unix expiry, ``jti`` token id) and an HMAC-SHA256 of that
+payload keyed with ``settings.SECRET_KEY``. Verifying one needs no database
+access; the user it names comes from ``user_cache`` and only falls through
+to the database on a miss.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from ..config import settings
+from ..models import schemas
+
+
+class TokenError(Exception):
+    """The token is malformed, forged, expired or revoked."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str, key: str) -> str:
+    return _b64encode(hmac.new(key.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_token(user_id: str, ttl: Optional[int] = None, key: Optional[str] = None) -> str:
+    claims = {
+        "sub": user_id,
+        "exp": int(time.time()) + (settings.SESSION_TTL if ttl is None else ttl),
+        "jti": secrets.token_hex(8),
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload, key or settings.SECRET_KEY)}"
+
+
+def read_token(token: str, key: Optional[str] = None) -> dict:
+    """Return the claims of a valid token, or raise ``TokenError``."""
+    payload, sep, signature = token.partition(".")
+    if not sep:
+        raise TokenError("malformed token")
+    if not hmac.compare_digest(signature, _sign(payload, key or settings.SECRET_KEY)):
+        raise TokenError("bad signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise TokenError("malformed token") from e
+    if not isinstance(claims, dict) or not {"sub", "exp", "jti"} <= claims.keys():
+        raise TokenError("malformed token")
+    if claims["exp"] <= time.time():
+        raise TokenError("token expired")
+    if claims["jti"] in revoked_tokens:
+        raise TokenError("token revoked")
+    return claims
+
+
+class RevokedTokens:
+    """
+    Token ids logged out before expiry; each is forgotten once it would have expired anyway.
+
+    Held in this process only: with several workers a logout is honoured by
+    the one that handled it, and after a restart logged-out tokens are
+    accepted again until they expire.
+    """
+
+    def __init__(self):
+        self._expiry: Dict[str, float] = {}
+
+    def add(self, jti: str, exp: float):
+        now = time.time()
+        if len(self._expiry) > 1024:
+            self._expiry = {k: v for k, v in self._expiry.items() if v > now}
+        self._expiry[jti] = exp
+
+    def __contains__(self, jti: str) -> bool:
+        exp = self._expiry.get(jti)
+        if exp is None:
+            return False
+        if exp <= time.time():
+            del self._expiry[jti]
+            return False
+        return True
+
+    def clear(self):
+        self._expiry.clear()
+
+
+class UserCache:
+    """
+    Small LRU of authenticated users with a time-to-live, so a burst of
+    requests from one session costs a single user query.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple[float, schemas.User]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[schemas.User]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, user: schemas.User):
+        self._entries[key] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+revoked_tokens = RevokedTokens()
+user_cache = UserCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
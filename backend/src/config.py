@@ -1,10 +1,116 @@
+import secrets
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from pydantic import field_validator
+from pydantic import Field, field_validator
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///./snake_royale.db"
-    SECRET_KEY: str = "secret"
+    # Signs session tokens. Unset, each process makes up its own: tokens stop
+    # working on restart and are not accepted by other workers, so deployments
+    # must set it
+    SECRET_KEY: str = Field(default_factory=lambda: secrets.token_urlsafe(32))
+    # Connection pool (ignored for in-memory SQLite). Pooled connections are
+    # pinged on checkout only after sitting idle this long; -1 disables pings.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_PING_AFTER_IDLE: float = 30.0
+    # asyncpg prepared statement caches (set to 0 behind pgbouncer in transaction mode)
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    # SQLite connection pragmas
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Serve leaderboard reads and ranks from the in-process index
+    LEADERBOARD_INDEX_ENABLED: bool = True
+    # Day and week leaderboards: every score is also kept in its UTC day's
+    # bucket. Every LEADERBOARD_COMPACT_INTERVAL seconds buckets before the
+    # current week are dropped and each day is trimmed to its best
+    # LEADERBOARD_BUCKET_SIZE scores per mode.
+    LEADERBOARD_BUCKET_SIZE: int = 1000
+    LEADERBOARD_COMPACT_INTERVAL: float = 600.0
+    # bcrypt work factor; existing hashes are upgraded on the next login
+    BCRYPT_ROUNDS: int = 12
+    # Threads dedicated to bcrypt (leave a core for the event loop), and how
+    # many calls may run or wait before signup/login answer 503
+    BCRYPT_WORKERS: int = 2
+    BCRYPT_MAX_PENDING: int = 32
+    # Lifetime of session tokens signed with SECRET_KEY, in seconds
+    SESSION_TTL: int = 7 * 24 * 3600
+    # Authenticated users kept in memory so token checks skip the database
+    USER_CACHE_SIZE: int = 4096
+    USER_CACHE_TTL: float = 60.0
+    # Write-behind score ingestion: batches are flushed at SCORE_BATCH_SIZE rows
+    # or SCORE_FLUSH_INTERVAL seconds. SCORE_ACK="flush" answers once the row is
+    # committed; "enqueue" answers immediately with an estimated rank.
+    SCORE_INGEST_ENABLED: bool = True
+    SCORE_BATCH_SIZE: int = 500
+    SCORE_FLUSH_INTERVAL: float = 0.05
+    SCORE_ACK: Literal["flush", "enqueue"] = "flush"
+    SCORE_QUEUE_SIZE: int = 10000
+    # Scores only count once their seed and input log re-simulate to the same
+    # result. Re-simulation runs in SCORE_VERIFY_WORKERS processes, each game
+    # limited to SCORE_VERIFY_TIMEOUT seconds and SCORE_VERIFY_MAX_TICKS moves;
+    # beyond SCORE_VERIFY_MAX_PENDING queued games submissions answer 503.
+    SCORE_VERIFICATION_REQUIRED: bool = True
+    SCORE_VERIFY_WORKERS: int = 2
+    SCORE_VERIFY_MAX_PENDING: int = 1000
+    SCORE_VERIFY_TIMEOUT: float = 2.0
+    SCORE_VERIFY_MAX_TICKS: int = 100_000
+    # Seconds between server-side game ticks (matches the client's base speed)
+    GAME_TICK_INTERVAL: float = 0.15
+    # A server-run game that gets no turn for GAME_IDLE_TIMEOUT seconds is
+    # ended, so a closed tab doesn't keep a snake ticking forever
+    GAME_IDLE_TIMEOUT: float = 60.0
+    # Tick server-run games in GAME_SHARDS worker processes (0: in the API
+    # process). Games move off a shard whose ticks take more than
+    # GAME_SHARD_OVERLOAD of the tick interval, checked every
+    # GAME_SHARD_REBALANCE_INTERVAL seconds. Frames come back through a
+    # shared-memory ring of GAME_SHARD_RING_SLOTS ticks per shard, each at
+    # most GAME_SHARD_SLOT_SIZE bytes. Sharded games are not written to the
+    # move log below: they can't be replayed or resumed after a restart, and
+    # startup warns when both are enabled.
+    GAME_SHARDS: int = 0
+    GAME_SHARD_OVERLOAD: float = 0.75
+    GAME_SHARD_REBALANCE_INTERVAL: float = 5.0
+    GAME_SHARD_RING_SLOTS: int = 256
+    GAME_SHARD_SLOT_SIZE: int = 256 * 1024
+    # Lobby registry of running games: refreshed from the rooms every
+    # GAME_REGISTRY_HEARTBEAT_INTERVAL seconds; a game not heard from for
+    # GAME_REGISTRY_TTL seconds is dropped and marked inactive in the database
+    GAME_REGISTRY_TTL: float = 30.0
+    GAME_REGISTRY_HEARTBEAT_INTERVAL: float = 5.0
+    # Move log for server-run games: a snapshot every GAME_SNAPSHOT_INTERVAL
+    # ticks, buffered events written every GAME_LOG_FLUSH_INTERVAL seconds,
+    # finished games compacted every GAME_LOG_COMPACT_INTERVAL seconds
+    GAME_LOG_ENABLED: bool = True
+    GAME_SNAPSHOT_INTERVAL: int = 200
+    GAME_LOG_FLUSH_INTERVAL: float = 1.0
+    GAME_LOG_COMPACT_INTERVAL: float = 300.0
+    # Finished games are archived as replay files under REPLAY_DIR, with a
+    # keyframe every REPLAY_KEYFRAME_INTERVAL ticks bounding the cost of a seek
+    REPLAY_DIR: str = "replays"
+    REPLAY_KEYFRAME_INTERVAL: int = 256
+    # Royale arena: up to ARENA_MAX_SNAKES players on one ARENA_GRID_SIZE
+    # board kept stocked with ARENA_FOOD food, ticking every ARENA_TICK_INTERVAL
+    ARENA_ENABLED: bool = True
+    ARENA_GRID_SIZE: int = 500
+    ARENA_FOOD: int = 2000
+    ARENA_MAX_SNAKES: int = 500
+    ARENA_TICK_INTERVAL: float = 0.05
+    # Request, query, bcrypt and tick timings served at /metrics in the
+    # Prometheus text format. Off removes the middleware and SQL hooks.
+    METRICS_ENABLED: bool = True
+    # Built frontend served for every non-API path, indexed once at startup.
+    # Files up to STATIC_MEMORY_MAX_BYTES (and their .br/.gz variants) are
+    # held in memory; larger ones are sent from disk.
+    STATIC_DIR: str = "static"
+    STATIC_MEMORY_MAX_BYTES: int = 64 * 1024
     
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -0,0 +1,201 @@
+"""
+Versioned schema migrations, recorded in a ``schema_version`` table.
+
+Startup calls ``migrate(engine)``. When the recorded version is already
+``HEAD`` that is the whole cost: one single-row read, no reflection and no
+DDL. Otherwise:
+
+  * an empty database gets ``create_all`` for the current models and is
+    stamped with every version at once;
+  * anything else (an older deploy, or a database that predates this table)
+    runs the steps after its version, in order, each in its own transaction
+    with the version row that records it.
+
+Steps check what is there before changing it, so a database created by
+``create_all`` at any point in the past upgrades cleanly from version 0.
+On Postgres an advisory lock keeps replicas booting together from running
+the same step twice.
+
+Adding a step: append ``(version, description, function)`` to ``STEPS``;
+the function receives a synchronous ``Connection``.
+
+    python -m src.db.migrations            # upgrade DATABASE_URL
+    python -m src.db.migrations --current  # print its version
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Column, Connection, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..leaderboard.stats import rebuild_user_stats
+from ..leaderboard.windows import rebuild_buckets, today
+from ..models import db as models
+from .base import Base
+
+logger = logging.getLogger(__name__)
+
+# Kept out of Base.metadata: create_all/drop_all in tests never touch it
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+# Arbitrary constant shared by every replica
+_LOCK_KEY = 0x536E616B
+
+
+def _create_tables(*tables: Table) -> Callable[[Connection], None]:
+    def step(conn: Connection):
+        Base.metadata.create_all(conn, tables=list(tables), checkfirst=True)
+    return step
+
+
+def _create_indexes(*names: str) -> Callable[[Connection], None]:
+    def step(conn: Connection):
+        for index in _indexes(names):
+            index.create(conn, checkfirst=True)
+    return step
+
+
+def _indexes(names) -> list:
+    found = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+    return [found[name] for name in names]
+
+
+def _add_column(table: Table, name: str) -> Callable[[Connection], None]:
+    def step(conn: Connection):
+        if name in {column["name"] for column in inspect(conn).get_columns(table.name)}:
+            return
+        column = table.c[name]
+        kind = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {kind}"))
+    return step
+
+
+def _user_stats(conn: Connection):
+    _create_tables(models.UserStats.__table__)(conn)
+    rebuild_user_stats(conn)
+
+
+def _leaderboard_buckets(conn: Connection):
+    _create_tables(models.LeaderboardBucket.__table__)(conn)
+    rebuild_buckets(conn, today())
+
+
+STEPS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "users, leaderboard and active_games",
+     _create_tables(models.User.__table__, models.LeaderboardEntry.__table__, models.ActiveGame.__table__)),
+    (2, "leaderboard username and (mode, score, id) indexes",
+     _create_indexes("ix_leaderboard_username", "ix_leaderboard_mode_score_id")),
+    (3, "game move log", _create_tables(models.GameEvent.__table__, models.GameSnapshot.__table__)),
+    (4, "active_games.seed", _add_column(models.ActiveGame.__table__, "seed")),
+    (5, "partial index on running active_games", _create_indexes("ix_active_games_running")),
+    (6, "user_stats, backfilled from the leaderboard", _user_stats),
+    (7, "leaderboard_buckets, backfilled with this week's scores", _leaderboard_buckets),
+]
+
+HEAD = STEPS[-1][0]
+
+
+def _record(conn: Connection, version: int, description: str):
+    conn.execute(schema_version.insert().values(
+        version=version, description=description, applied_at=datetime.now(timezone.utc)
+    ))
+
+
+def _lock(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        # Held until the transaction ends
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+
+
+def _read_version(conn: Connection) -> Optional[int]:
+    """Recorded version, or None when the table does not exist (yet)."""
+    if not inspect(conn).has_table(schema_version.name):
+        return None
+    latest = select(schema_version.c.version).order_by(schema_version.c.version.desc()).limit(1)
+    return conn.execute(latest).scalar() or 0
+
+
+def _upgrade(conn: Connection, step: Tuple[int, str, Callable[[Connection], None]]) -> int:
+    """
+    Apply ``step`` unless another process already has. Runs inside a
+    transaction; returns the version now recorded.
+    """
+    _lock(conn)
+    current = _read_version(conn)
+    if current is None:
+        if not inspect(conn).get_table_names():
+            # Empty database: build the current schema outright
+            Base.metadata.create_all(conn)
+            schema_version.create(conn)
+            for version, description, _ in STEPS:
+                _record(conn, version, description)
+            logger.info("Created schema at version %d", HEAD)
+            return HEAD
+        schema_version.create(conn)
+        current = 0
+    version, description, apply = step
+    if current >= version:
+        return current
+    apply(conn)
+    _record(conn, version, description)
+    logger.info("Migrated schema to version %d: %s", version, description)
+    return version
+
+
+async def current_version(engine: AsyncEngine) -> Optional[int]:
+    """Version recorded in the database, None if it has never been migrated."""
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                select(schema_version.c.version).order_by(schema_version.c.version.desc()).limit(1)
+            )
+            return result.scalar() or 0
+    except DBAPIError:
+        # No schema_version table
+        return None
+
+
+async def migrate(engine: AsyncEngine) -> Optional[int]:
+    """Bring the database up to ``HEAD``; returns the version it started at (None if unversioned)."""
+    started = await current_version(engine)
+    if started == HEAD:
+        return started
+    if started is not None and started > HEAD:
+        raise RuntimeError(f"Database schema version {started} is newer than this build ({HEAD})")
+    version = started or 0
+    for step in STEPS:
+        if step[0] <= version:
+            continue
+        async with engine.begin() as conn:
+            version = await conn.run_sync(_upgrade, step)
+    return started
+
+
+async def main(args):
+    from .session import engine
+
+    try:
+        if args.current:
+            print(await current_version(engine))
+        else:
+            before = await migrate(engine)
+            print(f"{before} -> {HEAD}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--current", action="store_true", help="print the recorded version and exit")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main(parser.parse_args()))
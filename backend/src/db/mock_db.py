@@ -1,7 +1,9 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from uuid import uuid4
 from ..models import schemas
+from ..game.engine import SnakeGame
+from ..game.movelog import MoveEvent, SnapshotRecord, game_columns, rebuild
 
 class MockDatabase:
     _instance = None
@@ -12,6 +14,8 @@ class MockDatabase:
             cls._instance.users = {}  # email -> User + password
             cls._instance.leaderboard = []
             cls._instance.active_games = []
+            cls._instance.game_events = {}  # game id -> [MoveEvent]
+            cls._instance.game_snapshots = {}  # game id -> [SnapshotRecord]
             cls._instance._initialize_demo_data()
         return cls._instance
 
@@ -64,7 +68,7 @@ class MockDatabase:
     async def get_user_by_email(self, email: str) -> Optional[dict]:
         return self.users.get(email)
 
-    async def create_user(self, user_create: schemas.UserCreate) -> schemas.User:
+    async def create_user(self, user_create: schemas.UserCreate, hashed_password: str) -> schemas.User:
         if user_create.email in self.users:
             raise ValueError("Email already registered")
         
@@ -73,7 +77,7 @@ class MockDatabase:
             "id": user_id,
             "username": user_create.username,
             "email": user_create.email,
-            "password": user_create.password,
+            "password": hashed_password,
             "createdAt": datetime.now()
         }
         self.users[user_create.email] = user_data
@@ -101,8 +105,23 @@ class MockDatabase:
                 return i + 1
         return len(sorted_scores)
 
-    async def get_active_games(self) -> List[schemas.ActiveGame]:
-        return [g for g in self.active_games if g.is_active]
+    async def get_active_games(self) -> List[dict]:
+        return [g.model_dump(by_alias=True) for g in self.active_games if g.is_active]
+
+    async def get_running_game_summaries(self) -> List[dict]:
+        return [
+            {"id": g.id, "playerName": g.player_name, "mode": g.mode, "score": g.score, "length": len(g.snake)}
+            for g in self.active_games if g.is_active
+        ]
+
+    async def deactivate_games(self, game_ids: List[str]) -> int:
+        expired = set(game_ids)
+        changed = 0
+        for i, game in enumerate(self.active_games):
+            if game.is_active and game.id in expired:
+                self.active_games[i] = game.model_copy(update={"is_active": False})
+                changed += 1
+        return changed
 
     async def get_game(self, game_id: str) -> Optional[schemas.ActiveGame]:
         for game in self.active_games:
@@ -110,8 +129,37 @@ class MockDatabase:
                 return game
         return None
 
-    # Helper to simulate saving game state (just a stub in the mock)
-    async def save_game_state(self, score: int, mode: str):
-        pass
+    async def get_game_head(self, game_id: str, mode: str) -> Optional[Tuple[int, SnakeGame]]:
+        snapshots = self.game_snapshots.get(game_id)
+        if not snapshots:
+            return None
+        latest = max(snapshots, key=lambda s: s.tick)
+        tail = sorted((e for e in self.game_events.get(game_id, []) if e.tick > latest.tick), key=lambda e: e.tick)
+        return (tail[-1].tick if tail else latest.tick), rebuild(mode, latest.state, tail)
+
+    async def save_game_state(self, events: List[MoveEvent], snapshots: List[SnapshotRecord] = ()):
+        for event in events:
+            log = self.game_events.setdefault(event.game_id, [])
+            if any(e.tick == event.tick for e in log):
+                raise ValueError(f"Tick {event.tick} already recorded for {event.game_id}")
+            log.append(event)
+        for snapshot in snapshots:
+            self.game_snapshots.setdefault(snapshot.game_id, []).append(snapshot)
+            for i, game in enumerate(self.active_games):
+                if game.id == snapshot.game_id:
+                    self.active_games[i] = game.model_copy(update={
+                        "is_active": not snapshot.state["over"],
+                        **game_columns(game.mode, snapshot.state),
+                    })
+
+    async def compact_finished_games(self) -> int:
+        finished = {g.id for g in self.active_games if not g.is_active}
+        removed = 0
+        for game_id in finished & self.game_snapshots.keys():
+            snapshots = sorted(self.game_snapshots[game_id], key=lambda s: s.tick)
+            if len(snapshots) > 2:
+                removed += len(snapshots) - 2
+                self.game_snapshots[game_id] = [snapshots[0], snapshots[-1]]
+        return removed
 
 db = MockDatabase()
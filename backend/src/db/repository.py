@@ -1,20 +1,58 @@
-from sqlalchemy import select, desc, func
+from sqlalchemy import and_, delete, desc, func, insert, or_, select, true, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from ..models import db as models
 from ..models import schemas
-from ..utils.password import hash_password
-from datetime import datetime
+from ..leaderboard.index import LeaderboardIndex, RankedEntry, leaderboard_index, sort_key
+from ..leaderboard.cache import ResponseCache, leaderboard_cache
+from ..leaderboard import stats, windows
+from ..game.engine import SnakeGame
+from ..game.movelog import GameLog, GameStart, MoveEvent, SnapshotRecord, game_columns, rebuild
+from datetime import date, datetime, timezone
+from uuid import uuid4
+import logging
+
+# Leaderboard reads select these straight into RankedEntry tuples rather than ORM objects
+_entry = models.LeaderboardEntry
+RANKED_COLUMNS = (_entry.id, _entry.username, _entry.score, _entry.mode, _entry.date)
+# ...and active games into dicts keyed by the API's field names
+_game = models.ActiveGame
+GAME_COLUMNS = (
+    _game.id, _game.player_id, _game.player_name, _game.score, _game.mode,
+    _game.snake, _game.food, _game.direction, _game.is_active,
+)
+GAME_FIELDS = ("id", "playerId", "playerName", "score", "mode", "snake", "food", "direction", "isActive")
+# ...and per-player aggregates likewise
+_stats = models.UserStats
+STATS_COLUMNS = (
+    _stats.username, _stats.mode, _stats.best_score, _stats.games_played, _stats.total_score, _stats.last_played,
+)
+STATS_FIELDS = ("username", "mode", "bestScore", "gamesPlayed", "totalScore", "lastPlayed")
+# Lobby summaries, as LiveGames.summary builds them
+SUMMARY_FIELDS = ("id", "playerName", "mode", "score", "length")
+
+logger = logging.getLogger(__name__)
 
 class DatabaseRepository:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        index: LeaderboardIndex = leaderboard_index,
+        cache: ResponseCache = leaderboard_cache,
+    ):
         self.session = session
+        self.index = index
+        self.cache = cache
 
     async def get_user_by_email(self, email: str) -> models.User | None:
         stmt = select(models.User).where(models.User.email == email)
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def create_user(self, user_create: schemas.UserCreate) -> models.User:
+    async def get_user_by_id(self, user_id: str) -> models.User | None:
+        return await self.session.get(models.User, user_id)
+
+    async def create_user(self, user_create: schemas.UserCreate, hashed_password: str) -> models.User:
         existing = await self.get_user_by_email(user_create.email)
         if existing:
             raise ValueError("Email already registered")
@@ -22,7 +60,7 @@ class DatabaseRepository:
         new_user = models.User(
             username=user_create.username,
             email=user_create.email,
-            password=hash_password(user_create.password)
+            password=hashed_password
         )
         self.session.add(new_user)
         try:
@@ -33,24 +71,199 @@ class DatabaseRepository:
             raise
         return new_user
 
+    async def release(self):
+        """Hand the connection back to the pool before slow non-database work."""
+        await self.session.close()
+
+    async def update_password(self, user: models.User, hashed_password: str):
+        user.password = hashed_password
+        self.session.add(user)
+        await self.session.commit()
+
     async def get_leaderboard(self, mode: str = None):
-        stmt = select(models.LeaderboardEntry)
+        if self.index.ready:
+            return self.index.top(mode)
+        return await self.get_leaderboard_sql(mode)
+
+    async def get_leaderboard_sql(self, mode: str = None, limit: int | None = None) -> list[RankedEntry]:
+        stmt = select(*RANKED_COLUMNS)
         if mode:
             stmt = stmt.where(models.LeaderboardEntry.mode == mode)
-        stmt = stmt.order_by(desc(models.LeaderboardEntry.score))
+        stmt = stmt.order_by(desc(models.LeaderboardEntry.score), models.LeaderboardEntry.id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return [RankedEntry(*row) for row in result]
+
+    async def get_leaderboard_page(
+        self, mode: str | None, limit: int, after: tuple[int, str] | None = None
+    ) -> list[RankedEntry]:
+        """
+        One page of the leaderboard in (score DESC, id) order.
+
+        ``after`` is the (score, id) of the last row of the previous page.
+        Uses keyset pagination, so a page costs the same at any depth.
+        """
+        if self.index.ready:
+            if after is None:
+                return self.index.top(mode, limit=limit)
+            return self.index.after(mode, sort_key(*after), limit)
+
+        entry = models.LeaderboardEntry
+        stmt = select(*RANKED_COLUMNS)
+        if mode:
+            stmt = stmt.where(entry.mode == mode)
+        if after is not None:
+            score, entry_id = after
+            # The redundant score <= bound gives the planner an index range to seek to
+            stmt = stmt.where(entry.score <= score, or_(entry.score < score, entry.id > entry_id))
+        stmt = stmt.order_by(desc(entry.score), entry.id).limit(limit)
+        result = await self.session.execute(stmt)
+        return [RankedEntry(*row) for row in result]
+
+    async def get_leaderboard_around(self, mode: str | None, username: str, limit: int) -> list[RankedEntry]:
+        """
+        A window of ``limit`` rows centred on the user's best entry.
+
+        Returns an empty list when the user has no entries.
+        """
+        entry = models.LeaderboardEntry
+        stmt = select(*RANKED_COLUMNS).where(entry.username == username)
+        if mode:
+            stmt = stmt.where(entry.mode == mode)
+        stmt = stmt.order_by(desc(entry.score), entry.id).limit(1)
+        row = (await self.session.execute(stmt)).first()
+        if row is None:
+            return []
+        anchor = RankedEntry(*row)
+        before_count = (limit - 1) // 2
+
+        if self.index.ready:
+            key = sort_key(anchor.score, anchor.id)
+            before = self.index.before(mode, key, before_count)
+            after = self.index.after(mode, key, limit - len(before) - 1)
+            return before + [anchor] + after
+
+        stmt = select(*RANKED_COLUMNS)
+        if mode:
+            stmt = stmt.where(entry.mode == mode)
+        stmt = stmt.where(
+            entry.score >= anchor.score, or_(entry.score > anchor.score, entry.id < anchor.id)
+        ).order_by(entry.score, desc(entry.id)).limit(before_count)
+        before = [RankedEntry(*row) for row in reversed((await self.session.execute(stmt)).all())]
+        after = await self.get_leaderboard_page(mode, limit - len(before) - 1, (anchor.score, anchor.id))
+        return before + [anchor] + list(after)
 
     async def add_score(self, username: str, score: int, mode: str) -> int:
         entry = models.LeaderboardEntry(
+            id=str(uuid4()),
             username=username,
             score=score,
-            mode=mode
+            mode=mode,
+            date=datetime.now(timezone.utc),
         )
         self.session.add(entry)
+        await self._record_stats([(username, mode, score, entry.date)])
+        await self._record_buckets([RankedEntry(entry.id, username, score, mode, entry.date)])
         await self.session.commit()
-        
-        # Calculate rank
+        self.cache.bump(mode)
+
+        if self.index.ready:
+            self.index.add(RankedEntry(entry.id, entry.username, entry.score, entry.mode, entry.date))
+            return self.index.rank_of_score(mode, score)
+        return await self.get_rank_sql(mode, score)
+
+    async def insert_scores(self, entries: list[RankedEntry]):
+        """
+        Write many leaderboard rows in one multi-row INSERT and commit.
+
+        Used by the write-behind ingestor, which has already put the entries
+        in the index.
+        """
+        await self.session.execute(insert(models.LeaderboardEntry), [entry._asdict() for entry in entries])
+        await self._record_stats([(entry.username, entry.mode, entry.score, entry.date) for entry in entries])
+        await self._record_buckets(entries)
+        await self.session.commit()
+        for mode in {entry.mode for entry in entries}:
+            self.cache.bump(mode)
+
+    async def _record_stats(self, rows: list[stats.ScoreRow]):
+        """Fold new leaderboard rows into ``user_stats``, in the caller's transaction."""
+        dialect = self.session.get_bind().dialect.name
+        await self.session.execute(stats.upsert(dialect), stats.aggregate(rows))
+
+    async def _record_buckets(self, entries: list[RankedEntry]):
+        """Copy new leaderboard rows into their day's bucket, in the caller's transaction."""
+        rows = windows.bucket_rows(entries, since=windows.week_start(windows.today()))
+        if rows:
+            await self.session.execute(insert(models.LeaderboardBucket), rows)
+
+    async def get_window_page(
+        self, mode: str | None, window: windows.Window, limit: int, after: tuple[int, str] | None = None
+    ) -> list[RankedEntry]:
+        """
+        One page of the day or week leaderboard in (score DESC, id) order:
+        the top ``limit`` of each of the window's buckets, merged.
+        """
+        days = windows.window_buckets(window, windows.today())
+        params = {f"day{i}": day for i, day in enumerate(days)}
+        params["limit"] = limit
+        if mode:
+            params["mode"] = mode
+        if after is not None:
+            params["score"], params["entry_id"] = after
+        stmt = windows.page_statement(len(days), bool(mode), after is not None)
+        return [RankedEntry(*row) for row in await self.session.execute(stmt, params)]
+
+    async def compact_leaderboard_buckets(self, keep_from: date, size: int) -> tuple[int, int]:
+        """
+        Drop buckets before ``keep_from`` and trim every other (mode, day) to
+        its best ``size`` rows. Returns (rows expired, rows trimmed).
+        """
+        bucket = models.LeaderboardBucket
+        expired = (await self.session.execute(delete(bucket).where(bucket.bucket < keep_from))).rowcount
+        trimmed = 0
+        full = await self.session.execute(
+            select(bucket.mode, bucket.bucket).group_by(bucket.mode, bucket.bucket).having(func.count() > size)
+        )
+        for mode, day in full.all():
+            # The first row past the top ``size``; it and everything after it goes
+            cutoff = (await self.session.execute(
+                select(bucket.score, bucket.entry_id)
+                .where(bucket.mode == mode, bucket.bucket == day)
+                .order_by(desc(bucket.score), bucket.entry_id)
+                .offset(size)
+                .limit(1)
+            )).one()
+            result = await self.session.execute(delete(bucket).where(
+                bucket.mode == mode,
+                bucket.bucket == day,
+                bucket.score <= cutoff.score,
+                or_(bucket.score < cutoff.score, bucket.entry_id >= cutoff.entry_id),
+            ))
+            trimmed += result.rowcount
+        await self.session.commit()
+        return expired, trimmed
+
+    async def get_user_stats(self, username: str) -> list[dict]:
+        """The player's ``user_stats`` row for each mode they have played, keyed by the API's field names."""
+        stmt = select(*STATS_COLUMNS).where(_stats.username == username).order_by(_stats.mode)
+        return [dict(zip(STATS_FIELDS, row)) for row in await self.session.execute(stmt)]
+
+    async def get_players_page(self, mode: str, limit: int, after: tuple[int, str] | None = None) -> list[dict]:
+        """
+        One row per player in (best score DESC, username) order, read from
+        ``user_stats`` rather than grouping the leaderboard. ``after`` is the
+        (best score, username) of the last row of the previous page.
+        """
+        stmt = select(*STATS_COLUMNS).where(_stats.mode == mode)
+        if after is not None:
+            best, username = after
+            stmt = stmt.where(_stats.best_score <= best, or_(_stats.best_score < best, _stats.username > username))
+        stmt = stmt.order_by(desc(_stats.best_score), _stats.username).limit(limit)
+        return [dict(zip(STATS_FIELDS, row)) for row in await self.session.execute(stmt)]
+
+    async def get_rank_sql(self, mode: str, score: int) -> int:
         stmt = select(func.count()).select_from(models.LeaderboardEntry).where(
             models.LeaderboardEntry.mode == mode,
             models.LeaderboardEntry.score > score
@@ -59,16 +272,243 @@ class DatabaseRepository:
         rank = result.scalar() + 1
         return rank
 
-    async def get_active_games(self):
-        stmt = select(models.ActiveGame).where(models.ActiveGame.is_active == True)
+    async def warm_leaderboard_index(self, chunk_size: int = 10000):
+        """Load every leaderboard row into the in-memory index, ``chunk_size`` rows at a time."""
+        stmt = select(*RANKED_COLUMNS).execution_options(yield_per=chunk_size)
+        result = await self.session.stream(stmt)
+        self.index.clear()
+        async for rows in result.partitions():
+            self.index.extend(RankedEntry(*row) for row in rows)
+        self.index.ready = True
+
+    async def get_active_games(self) -> list[dict]:
+        """
+        Current state of every active game as plain dicts in the API's JSON
+        shape (``playerId``, ``isActive``), ready for ``serialize`` or the codec.
+        """
+        stmt = select(*GAME_COLUMNS).where(models.ActiveGame.is_active == true())
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return await self._current_state(result.all())
 
-    async def get_game(self, game_id: str) -> models.ActiveGame | None:
-        stmt = select(models.ActiveGame).where(models.ActiveGame.id == game_id)
+    async def get_running_game_summaries(self) -> list[dict]:
+        """
+        Lobby summaries (id, player, mode, score, length) of every game marked
+        active, read through the partial index. Snake bodies stay in the
+        database: the length is computed there.
+        """
+        stmt = select(
+            _game.id, _game.player_name, _game.mode, _game.score, func.json_array_length(_game.snake),
+        ).where(_game.is_active == true())
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
-        
-    async def save_game_state(self, score: int, mode: str):
-        # Stub
-        pass
+        return [dict(zip(SUMMARY_FIELDS, row)) for row in result]
+
+    async def deactivate_games(self, game_ids: list[str], batch_size: int = 500) -> int:
+        """Mark games inactive, e.g. once nothing has heard from them; returns the rows changed."""
+        changed = 0
+        for start in range(0, len(game_ids), batch_size):
+            result = await self.session.execute(
+                update(_game)
+                .where(_game.is_active == true(), _game.id.in_(game_ids[start:start + batch_size]))
+                .values(is_active=False)
+            )
+            changed += result.rowcount
+        await self.session.commit()
+        return changed
+
+    async def get_game(self, game_id: str) -> schemas.ActiveGame | None:
+        stmt = select(*GAME_COLUMNS).where(models.ActiveGame.id == game_id)
+        result = await self.session.execute(stmt)
+        game = result.first()
+        if game is None:
+            return None
+        return schemas.ActiveGame.model_validate((await self._current_state([game]))[0])
+
+    async def _latest_logs(self, ids: list[str]) -> tuple[dict, dict]:
+        """Latest snapshot (tick, state) of each game and the events logged after it, in tick order."""
+        Snapshot, Event = models.GameSnapshot, models.GameEvent
+        latest = (
+            select(Snapshot.game_id, func.max(Snapshot.tick).label("tick"))
+            .where(Snapshot.game_id.in_(ids))
+            .group_by(Snapshot.game_id)
+            .subquery()
+        )
+        snapshots = await self.session.execute(
+            select(Snapshot.game_id, Snapshot.tick, Snapshot.state)
+            .join(latest, and_(Snapshot.game_id == latest.c.game_id, Snapshot.tick == latest.c.tick))
+        )
+        heads = {row.game_id: (row.tick, row.state) for row in snapshots}
+        events = await self.session.execute(
+            select(Event.game_id, Event.tick, Event.direction, Event.food)
+            .join(latest, and_(Event.game_id == latest.c.game_id, Event.tick > latest.c.tick))
+            .order_by(Event.game_id, Event.tick)
+        )
+        tails: dict[str, list] = {}
+        for event in events:
+            tails.setdefault(event.game_id, []).append(event)
+        return heads, tails
+
+    async def get_game_head(self, game_id: str, mode: str) -> tuple[int, SnakeGame] | None:
+        """The last logged tick of a game and its state after it, or None if it has no log."""
+        heads, tails = await self._latest_logs([game_id])
+        if game_id not in heads:
+            return None
+        tick, state = heads[game_id]
+        tail = tails.get(game_id, [])
+        return (tail[-1].tick if tail else tick), rebuild(mode, state, tail)
+
+    async def _current_state(self, games) -> list[dict]:
+        """
+        Bring game rows up to date from their move log: the latest snapshot
+        of each game plus the events after it. Rows without a log, or whose
+        log no longer replays, are returned as stored.
+        """
+        if not games:
+            return []
+        heads, tails = await self._latest_logs([game.id for game in games])
+
+        current = []
+        for game in games:
+            if game.id not in heads:
+                current.append(dict(zip(GAME_FIELDS, game)))
+                continue
+            try:
+                state = rebuild(game.mode, heads[game.id][1], tails.get(game.id, ())).state()
+            except ValueError:
+                # One bad log must not fail every list that includes the game
+                logger.exception("Move log of game %s does not replay; serving the stored row", game.id)
+                current.append(dict(zip(GAME_FIELDS, game)))
+                continue
+            current.append({
+                "id": game.id,
+                "playerId": game.player_id,
+                "playerName": game.player_name,
+                "isActive": game.is_active and not state["over"],
+                **game_columns(game.mode, state),
+            })
+        return current
+
+    async def get_game_log(self, game_id: str) -> GameLog | None:
+        """Opening snapshot and every move of a game, for building its replay."""
+        game = await self.session.get(models.ActiveGame, game_id)
+        if game is None:
+            return None
+        Snapshot, Event = models.GameSnapshot, models.GameEvent
+        first = await self.session.execute(
+            select(Snapshot.tick, Snapshot.state)
+            .where(Snapshot.game_id == game_id)
+            .order_by(Snapshot.tick)
+            .limit(1)
+        )
+        opening = first.first()
+        if opening is None:
+            return None
+        events = await self.session.execute(
+            select(Event.tick, Event.direction, Event.ate, Event.food)
+            .where(Event.game_id == game_id, Event.tick > opening.tick)
+            .order_by(Event.tick)
+        )
+        return GameLog(game.mode, game.seed, opening.state, [MoveEvent(game_id, *row) for row in events])
+
+    async def create_game_records(self, starts: list[GameStart]):
+        """Register new server-run games, each with its opening snapshot."""
+        self.session.add_all([
+            models.ActiveGame(
+                id=start.game_id,
+                player_id=start.player_id,
+                player_name=start.player_name,
+                is_active=True,
+                seed=start.seed,
+                **game_columns(start.mode, start.state),
+            )
+            for start in starts
+        ])
+        self.session.add_all([
+            models.GameSnapshot(game_id=start.game_id, tick=start.tick, state=start.state)
+            for start in starts
+        ])
+        await self.session.commit()
+
+    async def save_game_state(self, events: list[MoveEvent], snapshots: list[SnapshotRecord] = ()):
+        """
+        Append move events and snapshots to the log.
+
+        Events go in as one multi-row INSERT whatever the snakes' lengths.
+        The denormalised columns on ``active_games`` are refreshed only when
+        a snapshot is written, not on every move.
+        """
+        try:
+            await self._append_log(events, snapshots)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+    async def unstored_log_rows(
+        self, starts: list[GameStart], events: list[MoveEvent], snapshots: list[SnapshotRecord],
+    ) -> tuple[list[GameStart], list[MoveEvent], list[SnapshotRecord]]:
+        """The game records, events and snapshots not already stored under the same key."""
+        ids = {record.game_id for records in (starts, events, snapshots) for record in records}
+        if not ids:
+            return [], [], []
+        Event, Snapshot = models.GameEvent, models.GameSnapshot
+        games = set((await self.session.execute(
+            select(models.ActiveGame.id).where(models.ActiveGame.id.in_(ids))
+        )).scalars())
+        logged = set()
+        for model, records in ((Event, events), (Snapshot, snapshots)):
+            if records:
+                ticks = [record.tick for record in records]
+                rows = await self.session.execute(
+                    select(model.game_id, model.tick)
+                    .where(model.game_id.in_(ids), model.tick.between(min(ticks), max(ticks)))
+                )
+                logged.update((model, game_id, tick) for game_id, tick in rows)
+        return (
+            [start for start in starts if start.game_id not in games],
+            [event for event in events if (Event, event.game_id, event.tick) not in logged],
+            [snapshot for snapshot in snapshots if (Snapshot, snapshot.game_id, snapshot.tick) not in logged],
+        )
+
+    async def _append_log(self, events: list[MoveEvent], snapshots: list[SnapshotRecord]):
+        if events:
+            await self.session.execute(insert(models.GameEvent), [event._asdict() for event in events])
+        if snapshots:
+            await self.session.execute(
+                insert(models.GameSnapshot),
+                [{"game_id": s.game_id, "tick": s.tick, "state": s.state} for s in snapshots],
+            )
+            modes = dict((await self.session.execute(
+                select(models.ActiveGame.id, models.ActiveGame.mode)
+                .where(models.ActiveGame.id.in_({s.game_id for s in snapshots}))
+            )).all())
+            for snapshot in snapshots:
+                if snapshot.game_id not in modes:
+                    continue
+                await self.session.execute(
+                    update(models.ActiveGame)
+                    .where(models.ActiveGame.id == snapshot.game_id)
+                    .values(is_active=not snapshot.state["over"], **game_columns(modes[snapshot.game_id], snapshot.state))
+                )
+
+    async def compact_finished_games(self) -> int:
+        """
+        Drop the intermediate snapshots of finished games.
+
+        The opening snapshot and the full event log are kept, so the game can
+        still be replayed, along with the final snapshot so reading its end
+        state needs no replay. Returns the number of snapshots removed.
+        """
+        Snapshot = models.GameSnapshot
+        other = aliased(models.GameSnapshot)
+        finished = select(models.ActiveGame.id).where(models.ActiveGame.is_active == False)
+        # Correlated bounds keep this a plain DELETE, which every dialect accepts
+        first = select(func.min(other.tick)).where(other.game_id == Snapshot.game_id).scalar_subquery()
+        last = select(func.max(other.tick)).where(other.game_id == Snapshot.game_id).scalar_subquery()
+        stmt = delete(Snapshot).where(
+            Snapshot.game_id.in_(finished),
+            Snapshot.tick > first,
+            Snapshot.tick < last,
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount
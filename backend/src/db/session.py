@@ -1,13 +1,111 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from ..config import settings
+import time
 
-# SQLite requires check_same_thread=False
-connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
+from ..config import Settings, settings
+from ..metrics.registry import registry
+from ..metrics.sql import instrument_engine
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    connect_args=connect_args,
-    pool_pre_ping=True,
+
+def _sqlite_pragmas(config: Settings) -> list[str]:
+    pragmas = [
+        f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}",
+    ]
+    if config.SQLITE_WAL:
+        # WAL lets readers run alongside the single writer instead of queueing behind it
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+    return pragmas
+
+
+def _ping_after_idle(engine: AsyncEngine, idle: float):
+    """
+    Replace pool_pre_ping's check-every-checkout with one that only pings a
+    connection that has sat in the pool for more than ``idle`` seconds.
+    A failed ping raises DisconnectionError, so the pool discards that
+    connection and hands out a fresh one.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "checkin")
+    def record_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in"] = time.monotonic()
+
+    @event.listens_for(sync_engine, "checkout")
+    def ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in = connection_record.info.get("checked_in")
+        if checked_in is None or time.monotonic() - checked_in < idle:
+            return
+        try:
+            alive = sync_engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise exc.DisconnectionError() from e
+        if alive is False:
+            raise exc.DisconnectionError()
+
+
+def build_engine(url: str, config: Settings = settings) -> AsyncEngine:
+    """
+    Create the async engine with per-dialect tuning from ``config``.
+
+    SQLite gets WAL and connection pragmas; server databases get explicit
+    pool sizing and, on asyncpg, statement cache sizes. Every pooled
+    engine pings only connections that have been idle for a while.
+    """
+    backend = make_url(url).get_backend_name()
+    kwargs: dict = {}
+    connect_args: dict = {}
+    memory = False
+
+    if backend == "sqlite":
+        # SQLite requires check_same_thread=False
+        connect_args["check_same_thread"] = False
+        database = make_url(url).database
+        memory = not database or database == ":memory:"
+    if backend == "postgresql":
+        connect_args["statement_cache_size"] = config.DB_STATEMENT_CACHE_SIZE
+        connect_args["prepared_statement_cache_size"] = config.DB_STATEMENT_CACHE_SIZE
+
+    if not memory:
+        # In-memory SQLite lives on a single static connection; there is no pool to size
+        kwargs.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE,
+        )
+
+    engine = create_async_engine(url, connect_args=connect_args, **kwargs)
+
+    if backend == "sqlite":
+        pragmas = _sqlite_pragmas(config)
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    if not memory and config.DB_PING_AFTER_IDLE >= 0:
+        _ping_after_idle(engine, config.DB_PING_AFTER_IDLE)
+    return engine
+
+
+engine = build_engine(settings.DATABASE_URL)
+
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+# StaticPool (in-memory SQLite) has no checkout count
+registry.sampled(
+    "db_pool_connections_checked_out",
+    "Connections currently handed out by the pool",
+    "gauge",
+    lambda: getattr(engine.sync_engine.pool, "checkedout", lambda: 0)(),
 )
 
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
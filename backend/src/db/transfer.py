@@ -0,0 +1,376 @@
+"""
+Streaming export and import of the database, for moving between backends.
+
+Export reads each table in primary-key order through a server-side cursor,
+``chunk_size`` rows at a time, and writes parts of at most ``part_rows``
+rows as CSV (the dialect Postgres ``COPY ... CSV HEADER`` reads) or
+newline-delimited JSON, optionally gzipped::
+
+    <dir>/manifest.json
+    <dir>/leaderboard.00000.csv.gz
+    <dir>/leaderboard.00001.csv.gz
+    ...
+
+A part is renamed into place only once complete, and the manifest records
+it with the last key it holds. Running the export again continues after
+the last recorded part, so an interrupted export resumes where it stopped.
+
+Import loads the parts in order, one transaction each: with ``COPY`` on
+Postgres (asyncpg) for CSV, otherwise with batched multi-row inserts that
+skip rows already present. Finished parts are listed in
+``<dir>/imported.json``, so an interrupted import resumes at the first part
+not yet committed. Memory use is bounded by ``chunk_size`` rows either way.
+
+    python -m src.db.transfer export --url sqlite+aiosqlite:///./snake_royale.db --dir dump --gzip
+    python -m src.db.transfer import --url postgresql+asyncpg://... --dir dump
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, List, Optional
+
+from sqlalchemy import Boolean, DateTime, Integer, JSON, Table, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from ..config import settings
+from ..models import db as models  # noqa: F401  (registers the tables)
+from .base import Base
+from .migrations import migrate
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+IMPORTED = "imported.json"
+FORMATS = ("csv", "jsonl")
+
+
+def tables(names: Optional[Iterable[str]] = None) -> List[Table]:
+    """Tables to transfer, in dependency order."""
+    ordered = Base.metadata.sorted_tables
+    if names is None:
+        return ordered
+    known = {table.name: table for table in ordered}
+    unknown = set(names) - set(known)
+    if unknown:
+        raise ValueError(f"Unknown tables: {', '.join(sorted(unknown))}")
+    return [table for table in ordered if table.name in set(names)]
+
+
+def _write_json(path: str, document: dict):
+    """Replace ``path`` atomically, so a crash leaves the old or the new version."""
+    with open(path + ".tmp", "w") as f:
+        json.dump(document, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _read_json(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _open(path: str, mode: str, compressed: bool):
+    if compressed:
+        # Level 6 is most of level 9's ratio at a fraction of the CPU
+        return gzip.open(path, mode, compresslevel=6)
+    return open(path, mode)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands timezone-aware columns back naive; the app only stores UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _encoders(table: Table, fmt: str) -> List[Callable[[Any], Any]]:
+    """Per-column conversion from database values to what the file holds."""
+    def plain(value):
+        return value
+
+    def timestamp(value):
+        return None if value is None else _utc(value).isoformat()
+
+    def document(value):
+        return None if value is None else json.dumps(value, separators=(",", ":"))
+
+    encoders = []
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            encoders.append(timestamp)
+        elif isinstance(column.type, JSON) and fmt == "csv":
+            encoders.append(document)
+        else:
+            encoders.append(plain)
+    return encoders
+
+
+def _decoders(table: Table, fmt: str) -> List[Callable[[Any], Any]]:
+    """The reverse of ``_encoders``; CSV fields also arrive as strings."""
+    def plain(value):
+        return value
+
+    def timestamp(value):
+        return None if value in (None, "") else datetime.fromisoformat(value)
+
+    def document(value):
+        return None if value in (None, "") else json.loads(value)
+
+    def integer(value):
+        return None if value in (None, "") else int(value)
+
+    def boolean(value):
+        return None if value in (None, "") else value in ("True", "true", "t", "1")
+
+    decoders = []
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            decoders.append(timestamp)
+        elif fmt == "jsonl":
+            decoders.append(plain)
+        elif isinstance(column.type, JSON):
+            decoders.append(document)
+        elif isinstance(column.type, Integer):
+            decoders.append(integer)
+        elif isinstance(column.type, Boolean):
+            decoders.append(boolean)
+        else:
+            # CSV can't tell an empty string from NULL when read back (pre-3.13
+            # csv); only nullable text columns would care, and there are none
+            decoders.append((lambda value: value or None) if column.nullable else plain)
+    return decoders
+
+
+class _PartWriter:
+    """One part file, written under a temporary name until ``close``."""
+
+    def __init__(self, path: str, fmt: str, columns: List[str]):
+        self.path = path
+        self.fmt = fmt
+        self.columns = columns
+        self.rows = 0
+        self._file = io.TextIOWrapper(_open(path + ".tmp", "wb", path.endswith(".gz")), encoding="utf-8", newline="")
+        if fmt == "csv":
+            # QUOTE_STRINGS leaves NULL as an empty unquoted field, which is what COPY expects
+            self._csv = csv.writer(self._file, quoting=csv.QUOTE_STRINGS, lineterminator="\n")
+            self._csv.writerow(columns)
+
+    def write(self, rows: List[tuple]):
+        if self.fmt == "csv":
+            self._csv.writerows(rows)
+        else:
+            columns = self.columns
+            self._file.writelines(
+                json.dumps(dict(zip(columns, row)), separators=(",", ":")) + "\n" for row in rows
+            )
+        self.rows += len(rows)
+
+    def close(self):
+        self._file.close()
+        os.replace(self.path + ".tmp", self.path)
+
+
+async def _export_table(conn: AsyncConnection, table: Table, state: dict, directory: str, options: dict,
+                        save: Callable[[], None]):
+    key = list(table.primary_key.columns)
+    encoders = _encoders(table, options["format"])
+    suffix = options["format"] + (".gz" if options["gzip"] else "")
+    while not state["done"]:
+        stmt = select(table).order_by(*key).limit(options["part_rows"])
+        last = state["parts"][-1]["last"] if state["parts"] else None
+        if last is not None:
+            stmt = stmt.where(tuple_(*key) > tuple_(*last) if len(key) > 1 else key[0] > last[0])
+
+        name = f"{table.name}.{len(state['parts']):05d}.{suffix}"
+        writer = _PartWriter(os.path.join(directory, name), options["format"], state["columns"])
+        result = await conn.stream(stmt.execution_options(yield_per=options["chunk_size"]))
+        last_row = None
+        async for rows in result.partitions(options["chunk_size"]):
+            writer.write([tuple(encode(value) for encode, value in zip(encoders, row)) for row in rows])
+            last_row = rows[-1]
+        await result.close()
+        writer.close()
+
+        if writer.rows:
+            state["parts"].append({
+                "file": name,
+                "rows": writer.rows,
+                "last": [last_row._mapping[column] for column in key],
+            })
+        else:
+            os.remove(writer.path)
+        state["done"] = writer.rows < options["part_rows"]
+        save()
+        logger.info("%s: %d rows exported", table.name, sum(part["rows"] for part in state["parts"]))
+
+
+async def export_database(engine: AsyncEngine, directory: str, fmt: str = "csv", gzip_parts: bool = False,
+                          names: Optional[Iterable[str]] = None, chunk_size: int = 10_000,
+                          part_rows: int = 1_000_000) -> dict:
+    """
+    Export ``names`` (default: every table) into ``directory``, continuing an
+    earlier export there if one was interrupted. Returns the manifest.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, MANIFEST)
+    manifest = _read_json(path)
+    options = {"format": fmt, "gzip": gzip_parts, "part_rows": part_rows, "chunk_size": chunk_size}
+    if manifest is None:
+        manifest = {"format": fmt, "gzip": gzip_parts, "part_rows": part_rows, "tables": {}}
+    elif (manifest["format"], manifest["gzip"]) != (fmt, gzip_parts):
+        raise ValueError(f"{directory} holds a {manifest['format']} export; resume it with the same format")
+    else:
+        # Later parts must continue the numbering and size of the ones already written
+        options["part_rows"] = manifest["part_rows"]
+
+    def save():
+        _write_json(path, manifest)
+
+    async with engine.connect() as conn:
+        for table in tables(names):
+            state = manifest["tables"].setdefault(table.name, {
+                "columns": [column.name for column in table.columns],
+                "key": [column.name for column in table.primary_key.columns],
+                "parts": [],
+                "done": False,
+            })
+            if state["columns"] != [column.name for column in table.columns]:
+                raise ValueError(f"{table.name} columns changed since the export started")
+            await _export_table(conn, table, state, directory, options, save)
+    save()
+    return manifest
+
+
+def _read_part(path: str, fmt: str, columns: List[str], decoders: List[Callable], chunk_size: int):
+    """Yield lists of up to ``chunk_size`` decoded rows as dicts."""
+    with io.TextIOWrapper(_open(path, "rb", path.endswith(".gz")), encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            reader = csv.reader(f)
+            header = next(reader)
+            if header != columns:
+                raise ValueError(f"{path}: header {header} does not match {columns}")
+            values = reader
+        else:
+            values = ([line[column] for column in columns] for line in map(json.loads, f))
+        rows = ({c: decode(v) for c, decode, v in zip(columns, decoders, row)} for row in values)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _insert_ignoring_duplicates(engine: AsyncEngine, table: Table):
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(table)
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+async def _copy_part(engine: AsyncEngine, table: Table, path: str, columns: List[str]):
+    async with engine.connect() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        async with raw.transaction():
+            with _open(path, "rb", path.endswith(".gz")) as f:
+                await raw.copy_to_table(table.name, source=f, columns=columns, format="csv", header=True)
+
+
+async def _insert_part(engine: AsyncEngine, table: Table, path: str, fmt: str, columns: List[str], chunk_size: int):
+    stmt = _insert_ignoring_duplicates(engine, table)
+    decoders = _decoders(table, fmt)
+    async with engine.begin() as conn:
+        for batch in _read_part(path, fmt, columns, decoders, chunk_size):
+            await conn.execute(stmt, batch)
+
+
+async def import_database(engine: AsyncEngine, directory: str, method: str = "auto",
+                          names: Optional[Iterable[str]] = None, chunk_size: int = 5_000) -> int:
+    """
+    Load an export from ``directory`` into ``engine``'s database, migrating
+    its schema first. ``method`` is "copy", "insert" or "auto" (COPY
+    when the target is asyncpg and the export is CSV). Returns the number
+    of rows loaded by this run.
+    """
+    manifest = _read_json(os.path.join(directory, MANIFEST))
+    if manifest is None:
+        raise ValueError(f"No {MANIFEST} in {directory}")
+    fmt = manifest["format"]
+    copy_supported = engine.dialect.driver == "asyncpg" and fmt == "csv"
+    if method == "auto":
+        method = "copy" if copy_supported else "insert"
+    elif method == "copy" and not copy_supported:
+        raise ValueError("COPY needs a postgresql+asyncpg target and a CSV export")
+
+    state_path = os.path.join(directory, IMPORTED)
+    target = engine.url.render_as_string(hide_password=True)
+    state = _read_json(state_path) or {"target": target, "parts": []}
+    if state["target"] != target:
+        raise ValueError(f"{state_path} records an import into {state['target']}; remove it to import elsewhere")
+    finished = set(state["parts"])
+
+    await migrate(engine)
+
+    loaded = 0
+    for table in tables(names):
+        table_state = manifest["tables"].get(table.name)
+        if table_state is None:
+            continue
+        if not table_state["done"]:
+            logger.warning("%s: export is incomplete; importing the parts written so far", table.name)
+        for part in table_state["parts"]:
+            if part["file"] in finished:
+                continue
+            path = os.path.join(directory, part["file"])
+            if method == "copy":
+                await _copy_part(engine, table, path, table_state["columns"])
+            else:
+                await _insert_part(engine, table, path, fmt, table_state["columns"], chunk_size)
+            loaded += part["rows"]
+            state["parts"].append(part["file"])
+            _write_json(state_path, state)
+            logger.info("%s: loaded %s", table.name, part["file"])
+    return loaded
+
+
+async def main(args):
+    engine = create_async_engine(args.url)
+    try:
+        if args.command == "export":
+            manifest = await export_database(engine, args.dir, args.format, args.gzip, args.tables,
+                                             args.chunk_size, args.part_rows)
+            for name, table in manifest["tables"].items():
+                print(f"{name}: {sum(part['rows'] for part in table['parts'])} rows in {len(table['parts'])} parts")
+        else:
+            rows = await import_database(engine, args.dir, args.method, args.tables, args.chunk_size)
+            print(f"{rows} rows loaded")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("--url", default=settings.DATABASE_URL, help="database to read or load (default: DATABASE_URL)")
+    parser.add_argument("--dir", required=True, help="export directory")
+    parser.add_argument("--tables", nargs="+", help="only these tables (default: all)")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="export format")
+    parser.add_argument("--gzip", action="store_true", help="gzip each exported part")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="rows fetched or inserted per round trip")
+    parser.add_argument("--part-rows", type=int, default=1_000_000, help="rows per exported file")
+    parser.add_argument("--method", choices=("auto", "copy", "insert"), default="auto", help="how to load")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main(parser.parse_args()))
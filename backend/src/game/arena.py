@@ -0,0 +1,324 @@
+"""
+Royale: many snakes on one shared board.
+
+Every snake moves at once each tick. A head that leaves the board, or lands
+on any body segment (its own or another snake's), dies; two or more heads
+landing on the same cell all die. Dead snakes drop food along their bodies.
+
+Collision checks never scan snakes. The board keeps a bytearray occupancy
+grid of every body segment, and a tick only touches the cells that changed
+(each mover's new head and vacated tail), so a tick costs O(snakes moved)
+however large the board or the snakes get. Heads are matched against each
+other through a dict keyed by cell, built fresh each tick.
+
+Tails are vacated before heads are placed, so a head may follow any tail
+(including another snake's) into the cell it is leaving.
+"""
+import asyncio
+import logging
+import random
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from ..config import settings
+from ..db.repository import DatabaseRepository
+from ..db.session import SessionLocal
+from ..leaderboard.ingest import record_score, score_ingestor
+from ..realtime.hub import Frame, FrameHub
+from .engine import DELTAS, FOOD_SCORE, INITIAL_SNAKE_LENGTH, OPPOSITES
+from .live import tick_seconds
+
+logger = logging.getLogger(__name__)
+
+ARENA_MODE = "royale"
+ARENA_TOPIC = "arena"
+
+# Free cells required ahead of a new snake's head
+_SPAWN_CLEARANCE = 5
+_SPAWN_ATTEMPTS = 200
+
+
+class ArenaFull(Exception):
+    """Raised when no free starting spot can be found for a new snake."""
+
+
+class ArenaSnake:
+    __slots__ = ("id", "player_id", "player_name", "body", "direction", "next_direction", "score")
+
+    def __init__(self, snake_id: int, player_id: str, player_name: str, body: List[int], direction: str):
+        self.id = snake_id
+        self.player_id = player_id
+        self.player_name = player_name
+        self.body = deque(body)  # head on the left
+        self.direction = direction
+        self.next_direction = direction
+        self.score = 0
+
+
+class TickResult(NamedTuple):
+    moved: List[Tuple[int, int, bool]]  # (snake id, new head, grew)
+    died: List[ArenaSnake]
+    food_added: List[int]
+    food_removed: List[int]
+
+
+class Arena:
+    def __init__(self, grid_size: int = 500, food: int = 2000, seed: Optional[int] = None):
+        self.grid_size = grid_size
+        self.food_target = food
+        self.rng = random.Random(seed)
+        self.occupied = bytearray(grid_size * grid_size)
+        self.food: Set[int] = set()
+        self.snakes: Dict[int, ArenaSnake] = {}
+        self._next_id = 1
+        self._spawn_food([])
+
+    def point(self, cell: int) -> Tuple[int, int]:
+        return cell % self.grid_size, cell // self.grid_size
+
+    def spawn(self, player_id: str, player_name: str) -> ArenaSnake:
+        """Place a new snake on a free stretch of the board, heading into open space."""
+        size, occupied, food = self.grid_size, self.occupied, self.food
+        margin = INITIAL_SNAKE_LENGTH + _SPAWN_CLEARANCE
+        if size < 2 * margin:
+            raise ArenaFull("board too small")
+        for _ in range(_SPAWN_ATTEMPTS):
+            direction = self.rng.choice(tuple(DELTAS))
+            dx, dy = DELTAS[direction]
+            x, y = self.rng.randrange(margin, size - margin), self.rng.randrange(margin, size - margin)
+            # Body trails behind the head; keep the path ahead clear too
+            cells = [
+                (y - dy * i) * size + (x - dx * i)
+                for i in range(-_SPAWN_CLEARANCE, INITIAL_SNAKE_LENGTH)
+            ]
+            if any(occupied[cell] or cell in food for cell in cells):
+                continue
+            body = cells[_SPAWN_CLEARANCE:]
+            for cell in body:
+                occupied[cell] = 1
+            snake = ArenaSnake(self._next_id, player_id, player_name, body, direction)
+            self._next_id += 1
+            self.snakes[snake.id] = snake
+            return snake
+        raise ArenaFull("no free spot")
+
+    def set_direction(self, snake_id: int, direction: str) -> bool:
+        snake = self.snakes.get(snake_id)
+        if snake is None or direction not in DELTAS or direction == OPPOSITES[snake.direction]:
+            return False
+        snake.next_direction = direction
+        return True
+
+    def remove(self, snake_id: int) -> Optional[ArenaSnake]:
+        snake = self.snakes.pop(snake_id, None)
+        if snake is not None:
+            for cell in snake.body:
+                self.occupied[cell] = 0
+        return snake
+
+    def step(self) -> TickResult:
+        """Move every snake one cell and resolve collisions."""
+        size, occupied, food = self.grid_size, self.occupied, self.food
+        movers: List[Tuple[ArenaSnake, int, bool]] = []
+        died: List[ArenaSnake] = []
+        heads: Dict[int, int] = {}  # cell -> heads moving into it
+
+        for snake in self.snakes.values():
+            snake.direction = direction = snake.next_direction
+            dx, dy = DELTAS[direction]
+            head = snake.body[0]
+            x, y = head % size + dx, head // size + dy
+            if not (0 <= x < size and 0 <= y < size):
+                died.append(snake)
+                continue
+            cell = y * size + x
+            grows = cell in food
+            if not grows:
+                occupied[snake.body.pop()] = 0
+            heads[cell] = heads.get(cell, 0) + 1
+            movers.append((snake, cell, grows))
+
+        moved: List[Tuple[int, int, bool]] = []
+        eaten: List[int] = []
+        for snake, cell, grows in movers:
+            if heads[cell] > 1 or occupied[cell]:
+                died.append(snake)
+                continue
+            occupied[cell] = 1
+            snake.body.appendleft(cell)
+            if grows:
+                food.discard(cell)
+                eaten.append(cell)
+                snake.score += FOOD_SCORE
+            moved.append((snake.id, cell, grows))
+
+        dropped: List[int] = []
+        for snake in died:
+            self._kill(snake, dropped)
+        self._spawn_food(dropped)
+        return TickResult(moved, died, dropped, eaten)
+
+    def _kill(self, snake: ArenaSnake, dropped: List[int]):
+        del self.snakes[snake.id]
+        occupied, food = self.occupied, self.food
+        for i, cell in enumerate(snake.body):
+            occupied[cell] = 0
+            # The body becomes food on every other cell
+            if i % 2 == 0 and cell not in food:
+                food.add(cell)
+                dropped.append(cell)
+
+    def _spawn_food(self, added: List[int]):
+        """Top food back up to the target; gives up early on a crowded board."""
+        cells, occupied, food = self.grid_size * self.grid_size, self.occupied, self.food
+        attempts = 4 * max(0, self.food_target - len(food))
+        while len(food) < self.food_target and attempts:
+            attempts -= 1
+            cell = self.rng.randrange(cells)
+            if not occupied[cell] and cell not in food:
+                food.add(cell)
+                added.append(cell)
+
+    def state(self, tick: int = 0) -> dict:
+        point = self.point
+        return {
+            "type": "snapshot",
+            "tick": tick,
+            "grid": self.grid_size,
+            "snakes": [self.summary(snake) for snake in self.snakes.values()],
+            "food": [point(cell) for cell in self.food],
+        }
+
+    def summary(self, snake: ArenaSnake) -> dict:
+        point = self.point
+        return {
+            "id": snake.id,
+            "playerName": snake.player_name,
+            "score": snake.score,
+            "direction": snake.direction,
+            "body": [point(cell) for cell in snake.body],
+        }
+
+
+class LiveArena:
+    """
+    The server's arena: one snake per player, ticked by ``run`` and
+    streamed on ``ARENA_TOPIC``.
+
+    Each tick publishes a single JSON delta for the whole board::
+
+        {"type": "delta", "tick": t,
+         "moves": [[snake id, x, y, grew], ...], "died": [snake id, ...],
+         "joined": [snake, ...], "food": [[x, y], ...], "eaten": [[x, y], ...]}
+
+    with empty lists left out. A snake's score is recorded when it dies
+    through ``on_death``.
+    """
+
+    def __init__(
+        self,
+        arena: Optional[Arena] = None,
+        hub: Optional[FrameHub] = None,
+        on_death: Optional[Callable[[ArenaSnake], Awaitable[None]]] = None,
+        max_snakes: int = 500,
+    ):
+        self.arena = arena or Arena()
+        self.hub = hub or FrameHub()
+        self.on_death = on_death
+        self.max_snakes = max_snakes
+        self.tick = 0
+        self.players: Dict[str, int] = {}  # player id -> snake id
+        self._joined: List[dict] = []
+        self._snapshot: Optional[Tuple[int, Frame]] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    def join(self, player_id: str, player_name: str) -> ArenaSnake:
+        """The player's snake, spawning one if they have none alive."""
+        snake_id = self.players.get(player_id)
+        if snake_id is not None and snake_id in self.arena.snakes:
+            return self.arena.snakes[snake_id]
+        if len(self.arena.snakes) >= self.max_snakes:
+            raise ArenaFull("arena is full")
+        snake = self.arena.spawn(player_id, player_name)
+        self.players[player_id] = snake.id
+        self._joined.append(self.arena.summary(snake))
+        return snake
+
+    def turn(self, player_id: str, direction: str) -> Optional[bool]:
+        """None when the player has no snake alive."""
+        snake_id = self.players.get(player_id)
+        if snake_id is None or snake_id not in self.arena.snakes:
+            return None
+        return self.arena.set_direction(snake_id, direction)
+
+    def snake_for(self, player_id: str) -> Optional[ArenaSnake]:
+        snake_id = self.players.get(player_id)
+        return self.arena.snakes.get(snake_id) if snake_id is not None else None
+
+    def snapshot_frame(self, key: str = ARENA_TOPIC) -> Frame:
+        """The whole board; encoded at most once per tick."""
+        if self._snapshot is not None and self._snapshot[0] == self.tick:
+            return self._snapshot[1]
+        frame = Frame(self.arena.state(self.tick))
+        self._snapshot = (self.tick, frame)
+        return frame
+
+    def step(self) -> TickResult:
+        result = self.arena.step()
+        self.tick += 1
+        for snake in result.died:
+            if self.players.get(snake.player_id) == snake.id:
+                del self.players[snake.player_id]
+            if self.on_death is not None and snake.score > 0:
+                task = asyncio.ensure_future(self.on_death(snake))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+
+        if self.hub.has_subscribers(ARENA_TOPIC):
+            point = self.arena.point
+            delta = {"type": "delta", "tick": self.tick}
+            if result.moved:
+                delta["moves"] = [[snake_id, *point(cell), grew] for snake_id, cell, grew in result.moved]
+            if result.died:
+                delta["died"] = [snake.id for snake in result.died]
+            if self._joined:
+                delta["joined"] = self._joined
+            if result.food_added:
+                delta["food"] = [point(cell) for cell in result.food_added]
+            if result.food_removed:
+                delta["eaten"] = [point(cell) for cell in result.food_removed]
+            self.hub.publish(ARENA_TOPIC, self.tick, Frame(delta))
+        self._joined = []
+        return result
+
+    async def drain(self):
+        """Wait for the scores of snakes that have already died to be recorded."""
+        await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def run(self, interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                self.step()
+            except Exception:
+                logger.exception("Arena tick %d failed", self.tick)
+            tick_seconds.labels("arena").observe(loop.time() - started)
+            # Hold the tick rate: sleep only for what is left of the interval
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
+
+async def record_death(snake: ArenaSnake):
+    """Put a dead snake's score on the royale leaderboard."""
+    try:
+        async with SessionLocal() as session:
+            await record_score(DatabaseRepository(session), score_ingestor, snake.player_name, snake.score, ARENA_MODE)
+    except Exception:
+        logger.exception("Could not record arena score for %s", snake.player_name)
+
+
+live_arena = LiveArena(
+    Arena(settings.ARENA_GRID_SIZE, settings.ARENA_FOOD),
+    on_death=record_death,
+    max_snakes=settings.ARENA_MAX_SNAKES,
+)
@@ -0,0 +1,336 @@
+"""
+Compact binary encoding for game snapshots and deltas.
+
+Frames are the binary twin of the JSON payloads produced by ``live.LiveGames``
+and the REST game endpoints; ``decode`` gives back the same dict shape.
+All integers are little-endian. Every frame starts with::
+
+    u8 version | u8 frame type
+
+Snapshot (type 1)::
+
+    u32 tick | u32 score | u16 grid | u8 mode | u8 direction | u8 flags
+    str id | str playerId | str playerName
+    coord food | u16 length | u8 body encoding | coord head | body
+
+Delta (type 2)::
+
+    u32 tick | u8 flags | [str id] | [coord head] | [coord food]
+    [u32 score] | [u8 direction]
+
+Game list (type 3)::
+
+    u32 count | count x (u32 size | snapshot frame)
+
+Coordinates are u8 pairs, or u16 pairs when the COORDS16 flag is set.
+Strings are a u8 length plus UTF-8, 0xFE and a u16 length plus UTF-8 for
+254 bytes or more, or 0xFF followed by 16 raw bytes for a canonical UUID.
+The body after the head is either raw coordinates or 2-bit direction codes
+from each segment to the next: packed four per byte, or run-length encoded
+as ``code << 6 | (run - 1)``; the encoder picks the smaller.
+"""
+import struct
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from .engine import GRID_SIZE
+
+FORMAT_VERSION = 2
+MEDIA_TYPE = "application/x-snake-frame"
+SUBPROTOCOL = "snake.bin.v2"
+
+SNAPSHOT, DELTA, GAME_LIST = 1, 2, 3
+BODY_RAW, BODY_PACKED, BODY_RLE = 0, 1, 2
+
+MODES = ('passthrough', 'walls', 'royale')
+DIRECTIONS = ('up', 'down', 'left', 'right')
+
+# Snapshot flags
+ACTIVE, SNAPSHOT_COORDS16, NO_FOOD = 0x01, 0x02, 0x04
+# Delta flags
+GROW, HAS_HEAD, HAS_FOOD, HAS_SCORE, HAS_DIRECTION, OVER, HAS_ID, DELTA_COORDS16 = (
+    1 << bit for bit in range(8)
+)
+
+_UUID_MARKER = 0xFF
+_LONG_MARKER = 0xFE
+_HEADER = struct.Struct("<BB")
+_SNAPSHOT = struct.Struct("<IIHBBB")
+_U32 = struct.Struct("<I")
+_U16 = struct.Struct("<H")
+
+
+class CodecError(ValueError):
+    pass
+
+
+def _write_str(out: bytearray, value: str):
+    if len(value) == 36:
+        try:
+            uuid = UUID(value)
+        except ValueError:
+            uuid = None
+        if uuid is not None and str(uuid) == value:
+            out.append(_UUID_MARKER)
+            out += uuid.bytes
+            return
+    data = value.encode("utf-8")
+    if len(data) < _LONG_MARKER:
+        out.append(len(data))
+    elif len(data) <= 0xFFFF:
+        out.append(_LONG_MARKER)
+        out += _U16.pack(len(data))
+    else:
+        raise CodecError(f"string too long for frame: {value[:20]}...")
+    out += data
+
+
+def _read_str(data: bytes, pos: int) -> Tuple[str, int]:
+    size = data[pos]
+    if size == _UUID_MARKER:
+        return str(UUID(bytes=bytes(data[pos + 1:pos + 17]))), pos + 17
+    if size == _LONG_MARKER:
+        (size,) = _U16.unpack_from(data, pos + 1)
+        pos += 2
+    return bytes(data[pos + 1:pos + 1 + size]).decode("utf-8"), pos + 1 + size
+
+
+def _write_point(out: bytearray, point: dict, wide: bool):
+    if wide:
+        out += struct.pack("<HH", point["x"], point["y"])
+    else:
+        out += bytes((point["x"], point["y"]))
+
+
+def _read_point(data: bytes, pos: int, wide: bool) -> Tuple[dict, int]:
+    if wide:
+        x, y = struct.unpack_from("<HH", data, pos)
+        return {"x": x, "y": y}, pos + 4
+    return {"x": data[pos], "y": data[pos + 1]}, pos + 2
+
+
+def _direction_codes(snake: List[dict], grid: int) -> Optional[List[int]]:
+    """Direction from each segment to the next, or None if the body isn't contiguous."""
+    if grid < 3 or not snake:
+        return None
+    # (dx, dy) modulo grid -> direction code
+    steps = {(0, grid - 1): 0, (0, 1): 1, (grid - 1, 0): 2, (1, 0): 3}
+    codes = []
+    append = codes.append
+    prev_x, prev_y = snake[0]["x"], snake[0]["y"]
+    for point in snake[1:]:
+        x, y = point["x"], point["y"]
+        code = steps.get(((x - prev_x) % grid, (y - prev_y) % grid))
+        if code is None:
+            return None
+        append(code)
+        prev_x, prev_y = x, y
+    return codes
+
+
+def _pack(codes: List[int]) -> bytes:
+    out = bytearray((len(codes) + 3) // 4)
+    for i, code in enumerate(codes):
+        out[i >> 2] |= code << ((i & 3) * 2)
+    return bytes(out)
+
+
+def _rle(codes: List[int]) -> bytes:
+    out = bytearray()
+    i = 0
+    while i < len(codes):
+        code, run = codes[i], 1
+        while run < 64 and i + run < len(codes) and codes[i + run] == code:
+            run += 1
+        out.append(code << 6 | (run - 1))
+        i += run
+    return bytes(out)
+
+
+def _encode_body(out: bytearray, snake: List[dict], grid: int, wide: bool):
+    codes = _direction_codes(snake, grid)
+    if codes is None:
+        out.append(BODY_RAW)
+        for point in snake:
+            _write_point(out, point, wide)
+        return
+    packed, rle = _pack(codes), _rle(codes)
+    body = (BODY_RLE, rle) if len(rle) < len(packed) else (BODY_PACKED, packed)
+    out.append(body[0])
+    _write_point(out, snake[0], wide)
+    out += body[1]
+
+
+def _decode_body(data: bytes, pos: int, length: int, grid: int, wide: bool) -> Tuple[List[dict], int]:
+    encoding = data[pos]
+    pos += 1
+    if encoding == BODY_RAW:
+        snake = []
+        for _ in range(length):
+            point, pos = _read_point(data, pos, wide)
+            snake.append(point)
+        return snake, pos
+
+    head, pos = _read_point(data, pos, wide)
+    codes: List[int] = []
+    if encoding == BODY_PACKED:
+        for i in range(length - 1):
+            codes.append((data[pos + (i >> 2)] >> ((i & 3) * 2)) & 3)
+        pos += (length + 2) // 4
+    elif encoding == BODY_RLE:
+        while len(codes) < length - 1:
+            byte = data[pos]
+            codes.extend([byte >> 6] * ((byte & 0x3F) + 1))
+            pos += 1
+    else:
+        raise CodecError(f"unknown body encoding {encoding}")
+
+    snake = [head]
+    x, y = head["x"], head["y"]
+    for code in codes:
+        if code == 0:
+            y = (y - 1) % grid
+        elif code == 1:
+            y = (y + 1) % grid
+        elif code == 2:
+            x = (x - 1) % grid
+        else:
+            x = (x + 1) % grid
+        snake.append({"x": x, "y": y})
+    return snake, pos
+
+
+def encode_snapshot(state: dict, grid: int = GRID_SIZE) -> bytes:
+    """Encode an ActiveGame-shaped dict (JSON aliases, optional ``tick``)."""
+    wide = grid > 256
+    food = state.get("food")
+    flags = (ACTIVE if state["isActive"] else 0) | (SNAPSHOT_COORDS16 if wide else 0) | (0 if food else NO_FOOD)
+    out = bytearray(_HEADER.pack(FORMAT_VERSION, SNAPSHOT))
+    out += _SNAPSHOT.pack(
+        state.get("tick", 0), state["score"], grid,
+        MODES.index(state["mode"]), DIRECTIONS.index(state["direction"]), flags,
+    )
+    _write_str(out, state["id"])
+    _write_str(out, state["playerId"])
+    _write_str(out, state["playerName"])
+    _write_point(out, food or {"x": 0, "y": 0}, wide)
+    snake = state["snake"]
+    out += _U16.pack(len(snake))
+    _encode_body(out, snake, grid, wide)
+    return bytes(out)
+
+
+def _decode_snapshot(data: bytes, pos: int) -> Tuple[dict, int]:
+    tick, score, grid, mode, direction, flags = _SNAPSHOT.unpack_from(data, pos)
+    pos += _SNAPSHOT.size
+    wide = bool(flags & SNAPSHOT_COORDS16)
+    game_id, pos = _read_str(data, pos)
+    player_id, pos = _read_str(data, pos)
+    player_name, pos = _read_str(data, pos)
+    food, pos = _read_point(data, pos, wide)
+    (length,) = _U16.unpack_from(data, pos)
+    snake, pos = _decode_body(data, pos + 2, length, grid, wide)
+    return {
+        "type": "snapshot",
+        "tick": tick,
+        "id": game_id,
+        "playerId": player_id,
+        "playerName": player_name,
+        "score": score,
+        "mode": MODES[mode],
+        "snake": snake,
+        "food": None if flags & NO_FOOD else food,
+        "direction": DIRECTIONS[direction],
+        "isActive": bool(flags & ACTIVE),
+    }, pos
+
+
+def encode_delta(delta: dict, grid: int = GRID_SIZE) -> bytes:
+    wide = grid > 256
+    flags = DELTA_COORDS16 if wide else 0
+    body = bytearray()
+    if "id" in delta:
+        flags |= HAS_ID
+        _write_str(body, delta["id"])
+    if delta.get("over"):
+        flags |= OVER
+    if "head" in delta:
+        flags |= HAS_HEAD | (GROW if delta["grow"] else 0)
+        _write_point(body, delta["head"], wide)
+    if "food" in delta:
+        flags |= HAS_FOOD
+        _write_point(body, delta["food"], wide)
+    if "score" in delta:
+        flags |= HAS_SCORE
+        body += _U32.pack(delta["score"])
+    if "direction" in delta:
+        flags |= HAS_DIRECTION
+        body.append(DIRECTIONS.index(delta["direction"]))
+    return _HEADER.pack(FORMAT_VERSION, DELTA) + _U32.pack(delta["tick"]) + bytes((flags,)) + bytes(body)
+
+
+def _decode_delta(data: bytes, pos: int) -> Tuple[dict, int]:
+    (tick,) = _U32.unpack_from(data, pos)
+    flags = data[pos + 4]
+    pos += 5
+    wide = bool(flags & DELTA_COORDS16)
+    delta: dict = {"type": "delta"}
+    if flags & HAS_ID:
+        delta["id"], pos = _read_str(data, pos)
+    delta["tick"] = tick
+    if flags & OVER:
+        delta["over"] = True
+    if flags & HAS_HEAD:
+        delta["head"], pos = _read_point(data, pos, wide)
+        delta["grow"] = bool(flags & GROW)
+    if flags & HAS_FOOD:
+        delta["food"], pos = _read_point(data, pos, wide)
+    if flags & HAS_SCORE:
+        (delta["score"],) = _U32.unpack_from(data, pos)
+        pos += 4
+    if flags & HAS_DIRECTION:
+        delta["direction"] = DIRECTIONS[data[pos]]
+        pos += 1
+    return delta, pos
+
+
+def encode_game_list(states: List[dict], grid: int = GRID_SIZE) -> bytes:
+    out = bytearray(_HEADER.pack(FORMAT_VERSION, GAME_LIST))
+    out += _U32.pack(len(states))
+    for state in states:
+        frame = encode_snapshot(state, grid)
+        out += _U32.pack(len(frame))
+        out += frame
+    return bytes(out)
+
+
+def encode(payload: dict, grid: int = GRID_SIZE) -> bytes:
+    """Encode a JSON frame payload (``type`` of snapshot or delta)."""
+    if payload.get("type") == "delta":
+        return encode_delta(payload, grid)
+    return encode_snapshot(payload, grid)
+
+
+def decode(data: bytes) -> dict:
+    if len(data) < _HEADER.size:
+        raise CodecError("truncated frame")
+    version, frame_type = _HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise CodecError(f"unsupported frame version {version}")
+    try:
+        if frame_type == SNAPSHOT:
+            return _decode_snapshot(data, _HEADER.size)[0]
+        if frame_type == DELTA:
+            return _decode_delta(data, _HEADER.size)[0]
+        if frame_type == GAME_LIST:
+            (count,) = _U32.unpack_from(data, _HEADER.size)
+            pos = _HEADER.size + 4
+            games = []
+            for _ in range(count):
+                (size,) = _U32.unpack_from(data, pos)
+                games.append(decode(data[pos + 4:pos + 4 + size]))
+                pos += 4 + size
+            return {"type": "list", "games": games}
+    except (IndexError, struct.error) as e:
+        raise CodecError("truncated frame") from e
+    raise CodecError(f"unknown frame type {frame_type}")
@@ -0,0 +1,260 @@
+"""
+Server-side snake rules, ported from frontend/src/game/gameLogic.ts.
+
+Positions are stored as flat cell indices (``y * grid_size + x``). Each game
+keeps its body in a deque (head on the left) plus a bytearray occupancy
+grid, so the self-collision test is a single index lookup instead of the
+linear ``isPositionOnSnake`` scan.
+"""
+import random
+from collections import deque
+from typing import Dict, List, Literal, Optional, Union
+from uuid import uuid4
+
+Direction = Literal['up', 'down', 'left', 'right']
+GameMode = Literal['passthrough', 'walls']
+
+GRID_SIZE = 20
+INITIAL_SNAKE_LENGTH = 3
+FOOD_SCORE = 10
+
+DELTAS: Dict[str, tuple[int, int]] = {
+    'up': (0, -1),
+    'down': (0, 1),
+    'left': (-1, 0),
+    'right': (1, 0),
+}
+
+OPPOSITES: Dict[str, str] = {
+    'up': 'down',
+    'down': 'up',
+    'left': 'right',
+    'right': 'left',
+}
+
+
+def is_valid_direction_change(current: str, next_direction: str) -> bool:
+    return next_direction != OPPOSITES[current]
+
+
+class Mulberry32:
+    """
+    The seeded food RNG shared with the client (``mulberry32`` in
+    frontend/src/game/gameLogic.ts). It is tiny and uses only 32-bit integer
+    arithmetic, so both sides draw the same food cells from the same seed.
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, seed: int):
+        self.state = seed & 0xFFFFFFFF
+
+    def random(self) -> float:
+        self.state = a = (self.state + 0x6D2B79F5) & 0xFFFFFFFF
+        t = ((a ^ (a >> 15)) * (a | 1)) & 0xFFFFFFFF
+        t = ((t + (((t ^ (t >> 7)) * (t | 61)) & 0xFFFFFFFF)) & 0xFFFFFFFF) ^ t
+        return (t ^ (t >> 14)) / 4294967296
+
+    def randrange(self, n: int) -> int:
+        # Math.floor(rng() * n)
+        return int(self.random() * n)
+
+
+class SnakeGame:
+    """A single game. Mirrors the TS ``GameState`` plus ``moveSnake``."""
+
+    __slots__ = (
+        "mode", "grid_size", "body", "occupied", "food", "direction",
+        "next_direction", "score", "is_game_over", "is_paused", "rng",
+    )
+
+    def __init__(
+        self,
+        mode: GameMode,
+        grid_size: int = GRID_SIZE,
+        seed: Optional[int] = None,
+        rng: Optional[Union[random.Random, Mulberry32]] = None,
+    ):
+        self.mode = mode
+        self.grid_size = grid_size
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.occupied = bytearray(grid_size * grid_size)
+
+        center_x = grid_size // 2
+        center_y = grid_size // 2
+        self.body: deque[int] = deque()
+        for i in range(INITIAL_SNAKE_LENGTH):
+            cell = center_y * grid_size + center_x - i
+            self.body.append(cell)
+            self.occupied[cell] = 1
+
+        self.direction: str = 'right'
+        self.next_direction: str = 'right'
+        self.score = 0
+        self.is_game_over = False
+        self.is_paused = False
+        self.food = self.generate_food()
+
+    def generate_food(self) -> int:
+        """Random free cell, drawn the same way as ``generateFood`` (x, then y)."""
+        size = self.grid_size
+        if len(self.body) >= size * size:
+            # Board is full; the TS loop would never terminate here.
+            self.is_game_over = True
+            return -1
+        randrange = self.rng.randrange
+        while True:
+            x = randrange(size)
+            y = randrange(size)
+            cell = y * size + x
+            if not self.occupied[cell]:
+                return cell
+
+    def set_direction(self, direction: str) -> bool:
+        """Queue a direction change; 180-degree turns are ignored."""
+        if not is_valid_direction_change(self.direction, direction):
+            return False
+        self.next_direction = direction
+        return True
+
+    def toggle_pause(self):
+        if not self.is_game_over:
+            self.is_paused = not self.is_paused
+
+    @classmethod
+    def from_state(cls, mode: GameMode, state: dict) -> "SnakeGame":
+        """Rebuild a game from ``state()`` output. Its RNG is unseeded."""
+        game = cls.__new__(cls)
+        game.mode = mode
+        game.grid_size = size = state["grid"]
+        game.rng = random.Random()
+        game.occupied = bytearray(size * size)
+        game.body = deque(state["body"])
+        for cell in game.body:
+            game.occupied[cell] = 1
+        game.direction = game.next_direction = state["direction"]
+        game.food = state["food"]
+        game.score = state["score"]
+        game.is_game_over = state["over"]
+        game.is_paused = False
+        return game
+
+    def state(self) -> dict:
+        """Compact, JSON-friendly state: flat cell indexes, head first."""
+        return {
+            "grid": self.grid_size,
+            "body": list(self.body),
+            "direction": self.direction,
+            "food": self.food,
+            "score": self.score,
+            "over": self.is_game_over,
+        }
+
+    def move(self) -> bool:
+        """
+        Advance one tick. Returns True if the snake ate food.
+
+        Does nothing once the game is over or while paused.
+        """
+        if self.is_game_over or self.is_paused:
+            return False
+        ate_food = self._advance()
+        if ate_food:
+            self.food = self.generate_food()
+        return ate_food
+
+    def replay_move(self, direction: str, food: Optional[int]) -> bool:
+        """
+        Re-apply one logged tick. ``food`` is where food appeared after this
+        move if the snake ate (-1 for a full board), else None; it stands in
+        for the RNG draw. Raises ValueError if the move doesn't reproduce the
+        logged outcome.
+        """
+        if self.is_game_over:
+            raise ValueError("move logged after game over")
+        self.next_direction = direction
+        ate_food = self._advance()
+        if ate_food != (food is not None):
+            raise ValueError("logged food event does not match the replayed move")
+        if ate_food:
+            self.food = food
+            if food < 0:
+                self.is_game_over = True
+        return ate_food
+
+    def _advance(self) -> bool:
+        """Move one cell in ``next_direction``; the caller places new food after eating."""
+        size = self.grid_size
+        head = self.body[0]
+        dx, dy = DELTAS[self.next_direction]
+        x = head % size + dx
+        y = head // size + dy
+        self.direction = self.next_direction
+
+        if self.mode == 'passthrough':
+            x %= size
+            y %= size
+        elif x < 0 or x >= size or y < 0 or y >= size:
+            self.is_game_over = True
+            return False
+
+        new_head = y * size + x
+        # The tail moves out of the way this tick, so it doesn't count
+        if self.occupied[new_head] and new_head != self.body[-1]:
+            self.is_game_over = True
+            return False
+
+        ate_food = new_head == self.food
+        if not ate_food:
+            self.occupied[self.body.pop()] = 0
+        self.body.appendleft(new_head)
+        self.occupied[new_head] = 1
+
+        if ate_food:
+            self.score += FOOD_SCORE
+        return ate_food
+
+    def point(self, cell: int) -> dict:
+        return {"x": cell % self.grid_size, "y": cell // self.grid_size}
+
+    def snake_points(self) -> List[dict]:
+        size = self.grid_size
+        return [{"x": cell % size, "y": cell // size} for cell in self.body]
+
+
+class GameEngine:
+    """
+    Holds every running game in the process and advances them together.
+
+    ``tick_all`` steps each live game once; it is meant to be driven by a
+    fixed-rate loop, not called per request.
+    """
+
+    def __init__(self):
+        self.games: Dict[str, SnakeGame] = {}
+
+    def create_game(self, mode: GameMode, seed: Optional[int] = None, game_id: Optional[str] = None) -> str:
+        game_id = game_id or str(uuid4())
+        self.games[game_id] = SnakeGame(mode, seed=seed)
+        return game_id
+
+    def get(self, game_id: str) -> Optional[SnakeGame]:
+        return self.games.get(game_id)
+
+    def remove(self, game_id: str) -> Optional[SnakeGame]:
+        return self.games.pop(game_id, None)
+
+    def set_direction(self, game_id: str, direction: str) -> bool:
+        game = self.games.get(game_id)
+        return game is not None and game.set_direction(direction)
+
+    def tick_all(self) -> List[str]:
+        """Advance every live game by one tick. Returns ids of games that ended."""
+        ended = []
+        for game_id, game in self.games.items():
+            if game.is_game_over or game.is_paused:
+                continue
+            game.move()
+            if game.is_game_over:
+                ended.append(game_id)
+        return ended
@@ -0,0 +1,321 @@
+"""
+Server-run games and their spectator feeds.
+
+Every tick, ``LiveGames.step`` advances the engine and publishes one delta
+frame per watched game (new head, whether the tail was kept, plus food,
+score and direction only when they changed) and one batched lobby frame.
+Frames are encoded once per wire format (JSON or ``codec`` binary) and
+fanned out through the ``FrameHub``.
+
+When a ``GameRecorder`` is running, each move is also appended to the
+game's move log, with a full snapshot every ``snapshot_interval`` ticks and
+when the game ends.
+
+A game also ends when its player abandons it or sends no turn for
+``idle_timeout`` seconds; it stops where it is, without a last move.
+"""
+import asyncio
+import secrets
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..metrics.registry import registry
+from ..models import schemas
+from ..realtime.hub import Frame, FrameHub
+from . import codec
+from .engine import GameEngine, GameMode, SnakeGame
+from .movelog import GameStart, SnapshotRecord, event_for
+from .recorder import GameRecorder, game_recorder
+
+LOBBY_TOPIC = "lobby"
+
+tick_seconds = registry.histogram(
+    "game_tick_duration_seconds",
+    "Time one tick of an in-process game loop took",
+    ["loop"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+
+def game_topic(game_id: str) -> str:
+    return f"game:{game_id}"
+
+
+class LiveGames:
+    def __init__(
+        self,
+        engine: Optional[GameEngine] = None,
+        hub: Optional[FrameHub] = None,
+        recorder: Optional[GameRecorder] = None,
+        idle_timeout: Optional[float] = None,
+        clock=time.monotonic,
+    ):
+        self.engine = engine or GameEngine()
+        self.hub = hub or FrameHub()
+        # Games that get no turn for this many seconds are ended (None: never)
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        # Persists every move while its writer is running
+        self.recorder = recorder
+        self._snapshot_ticks: Dict[str, int] = {}
+        self.tick = 0
+        self.players: Dict[str, Tuple[str, str]] = {}  # game id -> (player id, player name)
+        self.playing: Dict[str, str] = {}  # player id -> their running game
+        # Time of each game's last turn, least recent first, so idle games are found from the front
+        self._turned: Dict[str, float] = {}
+        self._abandoned: List[str] = []
+        # Last published head/length/food/score/direction per game, to build deltas
+        self._last: Dict[str, Tuple[int, int, int, int, str]] = {}
+        self._added: List[dict] = []
+        self._snapshots: Dict[str, Tuple[int, Frame]] = {}
+
+    def clear(self):
+        self.engine.games.clear()
+        self.players.clear()
+        self.playing.clear()
+        self._turned.clear()
+        self._abandoned.clear()
+        self._last.clear()
+        self._added.clear()
+        self._snapshots.clear()
+        self._snapshot_ticks.clear()
+        self.tick = 0
+
+    def start_game(
+        self,
+        player_id: str,
+        player_name: str,
+        mode: GameMode,
+        seed: Optional[int] = None,
+        game_id: Optional[str] = None,
+    ) -> str:
+        if seed is None:
+            # An explicit seed is recorded with the game so its replay can be re-simulated
+            seed = secrets.randbits(63)
+        game_id = self.engine.create_game(mode, seed=seed, game_id=game_id)
+        game = self.engine.get(game_id)
+        self.players[game_id] = (player_id, player_name)
+        self.playing[player_id] = game_id
+        self._turned[game_id] = self.clock()
+        self._last[game_id] = self._state(game)
+        self._added.append(self.summary(game_id))
+        if self._recording:
+            self._snapshot_ticks[game_id] = self.tick
+            self.recorder.game_started(GameStart(game_id, player_id, player_name, mode, self.tick, game.state(), seed))
+        return game_id
+
+    async def open_game(self, player_id: str, player_name: str, mode: GameMode) -> str:
+        # Same interface as shards.ShardedRooms, where starting a game waits on a worker
+        return self.start_game(player_id, player_name, mode)
+
+    def owner(self, game_id: str) -> Optional[str]:
+        player = self.players.get(game_id)
+        return player[0] if player is not None else None
+
+    def game_of(self, player_id: str) -> Optional[str]:
+        """The player's running game, if any."""
+        return self.playing.get(player_id)
+
+    def abandon(self, game_id: str) -> bool:
+        """End a game at the next tick; its player can start another straight away."""
+        player = self.players.get(game_id)
+        if player is None:
+            return False
+        if self.playing.get(player[0]) == game_id:
+            del self.playing[player[0]]
+        self._abandoned.append(game_id)
+        return True
+
+    def detach(self, game_id: str) -> Optional[Tuple[Tuple[str, str], SnakeGame]]:
+        """Take a game out without ending it, to be ``attach``ed elsewhere."""
+        game = self.engine.remove(game_id)
+        if game is None:
+            return None
+        self._last.pop(game_id, None)
+        self._snapshots.pop(game_id, None)
+        self._snapshot_ticks.pop(game_id, None)
+        self._turned.pop(game_id, None)
+        player = self.players.pop(game_id)
+        if self.playing.get(player[0]) == game_id:
+            del self.playing[player[0]]
+        return player, game
+
+    def attach(self, game_id: str, player: Tuple[str, str], game: SnakeGame):
+        """Resume a ``detach``ed game here; spectators see no gap in its deltas."""
+        self.engine.games[game_id] = game
+        self.players[game_id] = player
+        self.playing[player[0]] = game_id
+        self._turned[game_id] = self.clock()
+        self._last[game_id] = self._state(game)
+
+    @property
+    def _recording(self) -> bool:
+        return self.recorder is not None and self.recorder.running
+
+    @staticmethod
+    def _state(game) -> Tuple[int, int, int, int, str]:
+        return (game.body[0], len(game.body), game.food, game.score, game.direction)
+
+    def set_direction(self, game_id: str, direction: str) -> bool:
+        if game_id in self._turned:
+            # Any turn, accepted or not, shows the player is still there
+            del self._turned[game_id]
+            self._turned[game_id] = self.clock()
+        return self.engine.set_direction(game_id, direction)
+
+    def _stop_abandoned(self) -> List[str]:
+        """End abandoned and idle games before they move again; returns their ids."""
+        stopped = self._abandoned
+        self._abandoned = []
+        if self.idle_timeout is not None:
+            cutoff = self.clock() - self.idle_timeout
+            for game_id, turned in self._turned.items():
+                if turned > cutoff:
+                    break
+                stopped.append(game_id)
+        ended = []
+        for game_id in dict.fromkeys(stopped):
+            game = self.engine.get(game_id)
+            if game is not None and not game.is_game_over:
+                game.is_game_over = True
+                ended.append(game_id)
+        return ended
+
+    def summary(self, game_id: str) -> dict:
+        game = self.engine.get(game_id)
+        _, player_name = self.players[game_id]
+        return {
+            "id": game_id,
+            "playerName": player_name,
+            "mode": game.mode,
+            "score": game.score,
+            "length": len(game.body),
+        }
+
+    def lobby(self) -> List[dict]:
+        return [self.summary(game_id) for game_id in self.engine.games]
+
+    def lobby_frame(self) -> Frame:
+        # Lobby frames are small summaries and only ever go out as JSON
+        return Frame({"type": "snapshot", "tick": self.tick, "games": self.lobby()})
+
+    def snapshot(self, game_id: str) -> Optional[schemas.ActiveGame]:
+        game = self.engine.get(game_id)
+        if game is None:
+            return None
+        player_id, player_name = self.players[game_id]
+        return schemas.ActiveGame(
+            id=game_id,
+            player_id=player_id,
+            player_name=player_name,
+            score=game.score,
+            mode=game.mode,
+            snake=game.snake_points(),
+            food=game.point(game.food),
+            direction=game.direction,
+            is_active=not game.is_game_over,
+        )
+
+    def snapshot_frame(self, game_id: str) -> Optional[Frame]:
+        """Full state of one game; encoded at most once per tick."""
+        cached = self._snapshots.get(game_id)
+        if cached is not None and cached[0] == self.tick:
+            return cached[1]
+        state = self.snapshot(game_id)
+        if state is None:
+            return None
+        payload = {"type": "snapshot", "tick": self.tick, **state.model_dump(mode="json", by_alias=True)}
+        frame = Frame(payload, codec.encode)
+        self._snapshots[game_id] = (self.tick, frame)
+        return frame
+
+    async def fetch_lobby_frame(self) -> Frame:
+        return self.lobby_frame()
+
+    async def fetch_snapshot_frame(self, game_id: str) -> Optional[Frame]:
+        # Same interface as shards.ShardedRooms, where the state lives in another process
+        return self.snapshot_frame(game_id)
+
+    def step(self) -> List[str]:
+        """Advance every game one tick and publish the resulting frames."""
+        stopped = self._stop_abandoned()
+        ended = stopped + self.engine.tick_all()
+        stopped = set(stopped)
+        finished = set(ended)
+        self.tick += 1
+        tick, hub = self.tick, self.hub
+        recording = self._recording
+        updated = []
+
+        for game_id, game in self.engine.games.items():
+            last = self._last[game_id]
+            new_state = self._state(game)
+            if new_state == last and game_id not in finished:
+                # Paused: nothing moved
+                continue
+            self._last[game_id] = new_state
+            _, length, food, score, direction = last
+            if score != game.score:
+                updated.append({"id": game_id, "score": game.score, "length": len(game.body)})
+            if recording and game_id in self._snapshot_ticks:
+                self._log(game_id, game, len(game.body) > length, game_id in finished, game_id not in stopped)
+
+            topic = game_topic(game_id)
+            if not hub.has_subscribers(topic):
+                continue
+            delta = {"type": "delta", "id": game_id, "tick": tick}
+            if game_id in finished:
+                delta["over"] = True
+            else:
+                delta["head"] = game.point(game.body[0])
+                delta["grow"] = len(game.body) > length
+            if game.food != food and game.food >= 0:
+                delta["food"] = game.point(game.food)
+            if game.score != score:
+                delta["score"] = game.score
+            if game.direction != direction:
+                delta["direction"] = game.direction
+            hub.publish(topic, tick, Frame(delta, codec.encode))
+
+        for game_id in ended:
+            self.engine.remove(game_id)
+            player_id, _ = self.players.pop(game_id, (None, None))
+            if self.playing.get(player_id) == game_id:
+                del self.playing[player_id]
+            self._turned.pop(game_id, None)
+            self._last.pop(game_id, None)
+            self._snapshots.pop(game_id, None)
+            self._snapshot_ticks.pop(game_id, None)
+
+        if self._added or updated or ended:
+            if hub.has_subscribers(LOBBY_TOPIC):
+                frame = {"type": "lobby", "tick": tick}
+                if self._added:
+                    frame["added"] = self._added
+                if updated:
+                    frame["updated"] = updated
+                if ended:
+                    frame["ended"] = ended
+                hub.publish(LOBBY_TOPIC, tick, Frame(frame))
+            self._added = []
+        return ended
+
+    def _log(self, game_id: str, game, ate: bool, finished: bool, moved: bool = True):
+        """Append this tick's move, plus a snapshot when one is due or the game just ended."""
+        tick = self.tick
+        if moved:
+            self.recorder.record(event_for(game_id, tick, game, ate))
+        if finished or tick - self._snapshot_ticks[game_id] >= self.recorder.snapshot_interval:
+            self._snapshot_ticks[game_id] = tick
+            self.recorder.snapshot(SnapshotRecord(game_id, tick, game.state()))
+
+    async def run(self, interval: float):
+        while True:
+            started = time.perf_counter()
+            self.step()
+            tick_seconds.labels("games").observe(time.perf_counter() - started)
+            await asyncio.sleep(interval)
+
+
+live_games = LiveGames(recorder=game_recorder, idle_timeout=settings.GAME_IDLE_TIMEOUT)
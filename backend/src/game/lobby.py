@@ -0,0 +1,239 @@
+"""
+Registry of running games, for the lobby list.
+
+The lobby used to be ``SELECT * FROM active_games WHERE is_active``: a full
+scan that loaded every snake body to show a name and a score, and that
+listed a game forever once the process running it was gone, because
+nothing cleared ``is_active``.
+
+``GameRegistry`` holds one summary per running game (id, player name,
+mode, score, length) keyed by id, ranked per mode by score, and stamped
+with when it was last heard from. It follows the rooms' lobby feed like any
+spectator: ``added`` and ``updated`` refresh a game, ``ended`` drops it,
+and every ``heartbeat_interval`` seconds a lobby snapshot refreshes every
+game still running. Games not heard from for ``ttl`` seconds are expired
+and marked inactive in the database.
+
+The database is only read at startup, to warm the registry with summary
+columns of the rows marked active, and written when games expire; both go
+through the partial index on running games.
+
+A lobby page is a skip-list seek plus ``limit`` steps, however many games
+are running.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from itertools import islice
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..config import settings
+from ..db.repository import DatabaseRepository
+from ..db.session import SessionLocal
+from ..leaderboard.index import SortKey, sort_key
+from ..leaderboard.skiplist import IndexedSkipList
+from ..realtime.hub import Subscription
+from .live import LOBBY_TOPIC, LiveGames
+from .shards import ShardedRooms
+
+logger = logging.getLogger(__name__)
+
+
+class GameRegistry:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        ttl: float = 30.0,
+        heartbeat_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.clock = clock
+        self.games: Dict[str, dict] = {}
+        self._modes: Dict[str, IndexedSkipList] = {}
+        # Game id -> when it was last heard from, oldest first, so expiry
+        # stops at the first game still fresh
+        self._seen: Dict[str, float] = {}
+        self.expired = 0
+        # Expired games whose rows are still marked active, retried on the next sweep
+        self._unsynced: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def clear(self):
+        self.games.clear()
+        self._modes.clear()
+        self._seen.clear()
+        self._unsynced = []
+
+    def count(self, mode: Optional[str] = None) -> int:
+        if mode:
+            ranked = self._modes.get(mode)
+            return len(ranked) if ranked is not None else 0
+        return len(self.games)
+
+    def touch(self, game_id: str):
+        """Record a heartbeat: the game is still running."""
+        self._seen.pop(game_id, None)
+        self._seen[game_id] = self.clock()
+
+    def upsert(self, summary: dict):
+        """Add a game or replace its summary, and count it as a heartbeat."""
+        game_id = summary["id"]
+        current = self.games.get(game_id)
+        if current is not None:
+            if current["score"] == summary["score"] and current["length"] == summary["length"]:
+                self.touch(game_id)
+                return
+            self._unrank(current)
+        # Summaries are never mutated once stored, so a page can hand them out as they are
+        entry = {
+            "id": game_id,
+            "playerName": summary["playerName"],
+            "mode": summary["mode"],
+            "score": summary["score"],
+            "length": summary["length"],
+        }
+        self.games[game_id] = entry
+        self._rank(entry)
+        self.touch(game_id)
+
+    def update(self, game_id: str, score: int, length: int) -> bool:
+        current = self.games.get(game_id)
+        if current is None:
+            return False
+        self.upsert({**current, "score": score, "length": length})
+        return True
+
+    def remove(self, game_id: str) -> bool:
+        entry = self.games.pop(game_id, None)
+        if entry is None:
+            return False
+        self._unrank(entry)
+        self._seen.pop(game_id, None)
+        return True
+
+    def _rank(self, entry: dict):
+        ranked = self._modes.get(entry["mode"])
+        if ranked is None:
+            ranked = self._modes[entry["mode"]] = IndexedSkipList()
+        ranked.insert(sort_key(entry["score"], entry["id"]), entry)
+
+    def _unrank(self, entry: dict):
+        ranked = self._modes[entry["mode"]]
+        ranked.remove(sort_key(entry["score"], entry["id"]))
+        if not len(ranked):
+            del self._modes[entry["mode"]]
+
+    def expire(self) -> List[str]:
+        """Drop every game not heard from within ``ttl``; returns their ids."""
+        deadline = self.clock() - self.ttl
+        stale = []
+        for game_id, seen in self._seen.items():
+            if seen > deadline:
+                break
+            stale.append(game_id)
+        for game_id in stale:
+            self.remove(game_id)
+        self.expired += len(stale)
+        return stale
+
+    def page(self, mode: Optional[str] = None, limit: int = 50, after: Optional[SortKey] = None) -> List[dict]:
+        """Up to ``limit`` summaries, highest score first, strictly after the ``after`` key."""
+        if mode:
+            lists = [self._modes[mode]] if mode in self._modes else []
+        else:
+            lists = list(self._modes.values())
+        iterators = [
+            ranked.items(ranked.count_less(after, inclusive=True) if after is not None else 0)
+            for ranked in lists
+        ]
+        return [entry for _, entry in islice(heapq.merge(*iterators), limit)]
+
+    def apply(self, payload: dict):
+        """Follow one lobby frame: a snapshot of every running game, or one tick's changes."""
+        if payload["type"] == "snapshot":
+            for summary in payload["games"]:
+                self.upsert(summary)
+            return
+        for summary in payload.get("added", ()):
+            self.upsert(summary)
+        for change in payload.get("updated", ()):
+            self.update(change["id"], change["score"], change["length"])
+        for game_id in payload.get("ended", ()):
+            self.remove(game_id)
+
+    async def warm(self) -> int:
+        """Load the games the database has marked active; those no room vouches for expire after ``ttl``."""
+        async with self.session_factory() as session:
+            summaries = await DatabaseRepository(session).get_running_game_summaries()
+        for summary in summaries:
+            self.upsert(summary)
+        return len(summaries)
+
+    async def sweep(self) -> List[str]:
+        """Expire stale games and mark them inactive in the database."""
+        stale = self._unsynced + self.expire()
+        self._unsynced = []
+        if stale:
+            try:
+                async with self.session_factory() as session:
+                    await DatabaseRepository(session).deactivate_games(stale)
+            except BaseException:
+                self._unsynced = stale
+                raise
+        return stale
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, rooms: LiveGames | ShardedRooms):
+        self._task = asyncio.create_task(self._run(rooms))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, rooms: LiveGames | ShardedRooms):
+        # Deep enough for a few seconds of ticks; a backlog beyond it is
+        # replaced by a snapshot like any lagging spectator's
+        subscription = Subscription(maxsize=1024)
+        rooms.hub.subscribe(subscription, LOBBY_TOPIC)
+        loop = asyncio.get_running_loop()
+        next_heartbeat = loop.time()
+        try:
+            while True:
+                timeout = max(0.0, next_heartbeat - loop.time())
+                try:
+                    _, _, frame = await asyncio.wait_for(subscription.get(), timeout)
+                    self.apply(frame.payload)
+                except asyncio.TimeoutError:
+                    pass
+                if loop.time() < next_heartbeat and LOBBY_TOPIC not in subscription.resync:
+                    continue
+                subscription.resync.discard(LOBBY_TOPIC)
+                next_heartbeat = loop.time() + self.heartbeat_interval
+                try:
+                    self.apply((await rooms.fetch_lobby_frame()).payload)
+                    await self.sweep()
+                except Exception:
+                    logger.exception("Refreshing the game registry failed; will retry")
+        finally:
+            rooms.hub.unsubscribe(subscription)
+
+
+game_registry = GameRegistry(
+    SessionLocal,
+    ttl=settings.GAME_REGISTRY_TTL,
+    heartbeat_interval=settings.GAME_REGISTRY_HEARTBEAT_INTERVAL,
+)
@@ -0,0 +1,72 @@
+"""
+Append-only move log records and state reconstruction.
+
+A game is stored as periodic snapshots (``SnakeGame.state()``) plus one
+``MoveEvent`` per tick. Each event has a fixed size however long the snake
+is, and replaying the events after the latest snapshot reproduces the
+current state exactly, including food placement, without the game's RNG.
+"""
+from typing import Iterable, List, NamedTuple, Optional
+
+from .engine import GameMode, SnakeGame
+
+
+class MoveEvent(NamedTuple):
+    game_id: str
+    tick: int
+    direction: str
+    ate: bool
+    food: Optional[int]  # next food cell after eating (-1: board full), else None
+
+
+class SnapshotRecord(NamedTuple):
+    game_id: str
+    tick: int
+    state: dict
+
+
+class GameStart(NamedTuple):
+    game_id: str
+    player_id: str
+    player_name: str
+    mode: GameMode
+    tick: int
+    state: dict
+    seed: Optional[int] = None
+
+
+class GameLog(NamedTuple):
+    """A game's full history: its opening snapshot and every move since."""
+    mode: GameMode
+    seed: Optional[int]
+    start: dict
+    events: List[MoveEvent]
+
+
+def event_for(game_id: str, tick: int, game: SnakeGame, ate: bool) -> MoveEvent:
+    """The log entry for a move ``game`` has just made."""
+    return MoveEvent(game_id, tick, game.direction, ate, game.food if ate else None)
+
+
+def rebuild(mode: GameMode, state: dict, events: Iterable) -> SnakeGame:
+    """
+    Game state after applying ``events`` (anything with ``direction`` and
+    ``food`` attributes, in tick order) to a snapshot.
+    """
+    game = SnakeGame.from_state(mode, state)
+    for event in events:
+        game.replay_move(event.direction, event.food)
+    return game
+
+
+def game_columns(mode: GameMode, state: dict) -> dict:
+    """``active_games`` column values (points rather than cells) for a snapshot state."""
+    size = state["grid"]
+    food = state["food"] if state["food"] >= 0 else state["body"][0]
+    return {
+        "mode": mode,
+        "score": state["score"],
+        "snake": [{"x": cell % size, "y": cell // size} for cell in state["body"]],
+        "food": {"x": food % size, "y": food // size},
+        "direction": state["direction"],
+    }
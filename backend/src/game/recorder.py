@@ -0,0 +1,178 @@
+"""
+Background writer for the move log of server-run games.
+
+``LiveGames`` hands the recorder a ``GameStart`` when a game begins, a
+``MoveEvent`` for every tick it moves and a snapshot every
+``snapshot_interval`` ticks and when it ends. The recorder buffers them and
+writes each buffer with multi-row INSERTs every ``flush_interval`` seconds,
+so persisting a tick costs one small row per game. Finished games are
+compacted every ``compact_interval`` seconds.
+
+Once a game's final snapshot is written, its log is encoded as a replay
+and saved to the ``ReplayStore``. A replay that fails to build or save is
+retried on the next flush; the log it comes from is already durable.
+
+A flush that fails is retried on the next one. Buffered rows that
+conflict with rows already stored can never be written; they are dropped
+and logged, and the rest of the batch is written without them.
+"""
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..config import settings
+from ..db.repository import DatabaseRepository
+from ..db.session import SessionLocal
+from .movelog import GameStart, MoveEvent, SnapshotRecord
+from .replay import ReplayStore, encode_replay, replay_store
+
+logger = logging.getLogger(__name__)
+
+
+class GameRecorder:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        snapshot_interval: int = 200,
+        flush_interval: float = 1.0,
+        compact_interval: float = 300.0,
+        replays: Optional[ReplayStore] = None,
+        keyframe_interval: int = 256,
+    ):
+        self.session_factory = session_factory
+        self.snapshot_interval = snapshot_interval
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.replays = replays
+        self.keyframe_interval = keyframe_interval
+        self.events_written = 0
+        self.snapshots_written = 0
+        self.replays_written = 0
+        self.rows_dropped = 0
+        self._unarchived: Set[str] = set()
+        self._started: List[GameStart] = []
+        self._events: List[MoveEvent] = []
+        self._snapshots: List[SnapshotRecord] = []
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background loop and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def game_started(self, start: GameStart):
+        self._started.append(start)
+
+    def record(self, event: MoveEvent):
+        self._events.append(event)
+
+    def snapshot(self, snapshot: SnapshotRecord):
+        self._snapshots.append(snapshot)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._started) + len(self._events) + len(self._snapshots)
+
+    async def flush(self):
+        async with self._lock:
+            if not self.buffered:
+                return
+            started, events, snapshots = self._started, self._events, self._snapshots
+            self._started, self._events, self._snapshots = [], [], []
+            try:
+                try:
+                    await self._write(started, events, snapshots)
+                except IntegrityError:
+                    # Rows already stored under the same key, which retrying can never write
+                    started, events, snapshots = await self._without_stored(started, events, snapshots)
+                    await self._write(started, events, snapshots)
+            except BaseException:
+                # Put the batch back in front of anything buffered meanwhile and retry next flush
+                self._requeue(started, events, snapshots)
+                raise
+            self.events_written += len(events)
+            self.snapshots_written += len(snapshots)
+            if self.replays is not None:
+                self._unarchived.update(s.game_id for s in snapshots if s.state["over"])
+            if self._unarchived:
+                await self._archive()
+
+    async def _write(self, started: List[GameStart], events: List[MoveEvent], snapshots: List[SnapshotRecord]):
+        async with self.session_factory() as session:
+            repo = DatabaseRepository(session)
+            if started:
+                await repo.create_game_records(started)
+            await repo.save_game_state(events, snapshots)
+
+    def _requeue(self, started: List[GameStart], events: List[MoveEvent], snapshots: List[SnapshotRecord]):
+        self._started[:0], self._events[:0], self._snapshots[:0] = started, events, snapshots
+
+    async def _without_stored(
+        self, started: List[GameStart], events: List[MoveEvent], snapshots: List[SnapshotRecord],
+    ) -> Tuple[List[GameStart], List[MoveEvent], List[SnapshotRecord]]:
+        async with self.session_factory() as session:
+            kept = await DatabaseRepository(session).unstored_log_rows(started, events, snapshots)
+        dropped = len(started) + len(events) + len(snapshots) - sum(map(len, kept))
+        self.rows_dropped += dropped
+        logger.error("Dropping %d buffered log rows already stored under the same game and tick", dropped)
+        return kept
+
+    async def _archive(self):
+        for game_id in list(self._unarchived):
+            try:
+                async with self.session_factory() as session:
+                    log = await DatabaseRepository(session).get_game_log(game_id)
+                if log is not None:
+                    data = await asyncio.to_thread(
+                        encode_replay, log.mode, log.start, log.events, log.seed, self.keyframe_interval,
+                    )
+                    await asyncio.to_thread(self.replays.save, game_id, data)
+                    self.replays_written += 1
+            except Exception:
+                logger.exception("Archiving the replay of game %s failed; will retry", game_id)
+                continue
+            self._unarchived.discard(game_id)
+
+    async def compact(self) -> int:
+        async with self.session_factory() as session:
+            return await DatabaseRepository(session).compact_finished_games()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_compaction = loop.time() + self.compact_interval
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if loop.time() >= next_compaction:
+                    next_compaction = loop.time() + self.compact_interval
+                    await self.compact()
+            except Exception:
+                logger.exception("Writing the move log failed; will retry")
+
+
+game_recorder = GameRecorder(
+    SessionLocal,
+    snapshot_interval=settings.GAME_SNAPSHOT_INTERVAL,
+    flush_interval=settings.GAME_LOG_FLUSH_INTERVAL,
+    compact_interval=settings.GAME_LOG_COMPACT_INTERVAL,
+    replays=replay_store,
+    keyframe_interval=settings.REPLAY_KEYFRAME_INTERVAL,
+)
@@ -0,0 +1,249 @@
+"""
+Compressed, seekable replays of finished games.
+
+A replay is the game's seed and mode plus, for every tick, only what can't
+be recomputed: the direction changes, and where food appeared after each
+meal (so playback doesn't depend on the RNG implementation). Ticks count
+moves from the start of the game; tick 0 is the opening state.
+
+The ticks are cut into chunks of ``keyframe_interval`` moves. Each chunk
+starts with a keyframe, the full state at its first tick, and is
+zlib-compressed on its own, so showing tick ``t`` means reading and
+inflating one chunk and replaying at most ``keyframe_interval`` moves.
+All integers are little-endian::
+
+    header  4s magic | u8 version | u8 mode | u8 flags | u16 grid | u64 seed
+            u32 ticks | u32 score | u16 keyframe interval | u32 chunk count
+    index   chunk count x u32 end offset (relative to the first chunk)
+    chunk   zlib(keyframe | u16 turns | turns x (u16 offset, u8 direction)
+                 | u16 meals | meals x (u16 offset, i32 food))
+    keyframe u32 score | u8 direction | u8 over | i32 food | u32 length
+             | length x cell (u16, or u32 on grids over 256x256)
+
+Chunk offsets are moves after the keyframe, minus one.
+"""
+import os
+import re
+import struct
+import zlib
+from array import array
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from ..config import settings
+from .codec import DIRECTIONS, MODES
+from .engine import GameMode, SnakeGame
+
+MAGIC = b"SNRP"
+FORMAT_VERSION = 1
+MEDIA_TYPE = "application/x-snake-replay"
+
+HAS_SEED = 0x01
+
+_HEADER = struct.Struct("<4sBBBHQIIHI")
+_KEYFRAME = struct.Struct("<IBBiI")
+_TURN = struct.Struct("<HB")
+_MEAL = struct.Struct("<Hi")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+# Game ids become file names; anything else is treated as unknown
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ReplayError(ValueError):
+    pass
+
+
+class ReplayHeader(NamedTuple):
+    mode: GameMode
+    grid: int
+    seed: Optional[int]
+    ticks: int
+    score: int
+    keyframe_interval: int
+    chunk_ends: List[int]
+
+    @property
+    def size(self) -> int:
+        """Bytes before the first chunk."""
+        return _HEADER.size + _U32.size * len(self.chunk_ends)
+
+    def chunk_span(self, index: int) -> Tuple[int, int]:
+        """File offset and length of chunk ``index``."""
+        start = self.chunk_ends[index - 1] if index else 0
+        return self.size + start, self.chunk_ends[index] - start
+
+    def chunk_for(self, tick: int) -> int:
+        return min(tick // self.keyframe_interval, len(self.chunk_ends) - 1)
+
+
+def _cells(grid: int) -> str:
+    return "H" if grid * grid <= 0x10000 else "I"
+
+
+def _keyframe(game: SnakeGame) -> bytes:
+    cells = array(_cells(game.grid_size), game.body)
+    return _KEYFRAME.pack(
+        game.score, DIRECTIONS.index(game.direction), game.is_game_over, game.food, len(cells),
+    ) + cells.tobytes()
+
+
+def encode_replay(
+    mode: GameMode,
+    start: dict,
+    events: Iterable,
+    seed: Optional[int] = None,
+    keyframe_interval: int = 256,
+) -> bytes:
+    """
+    Build a replay from an opening ``SnakeGame.state()`` and the game's move
+    log (anything with ``direction`` and ``food`` attributes, in order).
+    Every move is re-applied while encoding, so an inconsistent log raises
+    ``ValueError`` instead of producing a replay that can't be played.
+    """
+    if not 0 < keyframe_interval <= 0xFFFF:
+        raise ReplayError("keyframe interval must be between 1 and 65535")
+    game = SnakeGame.from_state(mode, start)
+    events = list(events)
+    chunks = []
+    for first in range(0, max(len(events), 1), keyframe_interval):
+        out = bytearray(_keyframe(game))
+        turns, meals = bytearray(), bytearray()
+        turn_count = meal_count = 0
+        direction = game.direction
+        for offset, event in enumerate(events[first:first + keyframe_interval]):
+            if event.direction != direction:
+                direction = event.direction
+                turns += _TURN.pack(offset, DIRECTIONS.index(direction))
+                turn_count += 1
+            if event.food is not None:
+                meals += _MEAL.pack(offset, event.food)
+                meal_count += 1
+            game.replay_move(event.direction, event.food)
+        out += _U16.pack(turn_count) + turns + _U16.pack(meal_count) + meals
+        chunks.append(zlib.compress(bytes(out), 9))
+
+    ends, total = [], 0
+    for chunk in chunks:
+        total += len(chunk)
+        ends.append(total)
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, MODES.index(mode), HAS_SEED if seed is not None else 0,
+        game.grid_size, seed or 0, len(events), game.score, keyframe_interval, len(chunks),
+    )
+    return header + array("I", ends).tobytes() + b"".join(chunks)
+
+
+def read_header(data: bytes) -> ReplayHeader:
+    """Parse the header and chunk index; ``data`` needs only the leading bytes."""
+    if len(data) < _HEADER.size:
+        raise ReplayError("truncated replay header")
+    magic, version, mode, flags, grid, seed, ticks, score, interval, count = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ReplayError("not a replay")
+    if version != FORMAT_VERSION:
+        raise ReplayError(f"unsupported replay version {version}")
+    end = _HEADER.size + _U32.size * count
+    if len(data) < end:
+        raise ReplayError("truncated chunk index")
+    ends = array("I")
+    ends.frombytes(bytes(data[_HEADER.size:end]))
+    return ReplayHeader(
+        MODES[mode], grid, seed if flags & HAS_SEED else None, ticks, score, interval, ends.tolist(),
+    )
+
+
+def seek(header: ReplayHeader, chunk: bytes, tick: int) -> SnakeGame:
+    """
+    The game after ``tick`` moves, from the compressed chunk that holds it
+    (``header.chunk_for(tick)``). Replays at most one keyframe interval.
+    """
+    index = header.chunk_for(tick)
+    try:
+        data = zlib.decompress(chunk)
+        score, direction, over, food, length = _KEYFRAME.unpack_from(data)
+        pos = _KEYFRAME.size
+        cells = array(_cells(header.grid))
+        cells.frombytes(data[pos:pos + length * cells.itemsize])
+        pos += length * cells.itemsize
+        game = SnakeGame.from_state(header.mode, {
+            "grid": header.grid, "body": cells.tolist(), "direction": DIRECTIONS[direction],
+            "food": food, "score": score, "over": bool(over),
+        })
+
+        (turn_count,) = _U16.unpack_from(data, pos)
+        pos += 2
+        turns = dict(_TURN.iter_unpack(data[pos:pos + turn_count * _TURN.size]))
+        pos += turn_count * _TURN.size
+        (meal_count,) = _U16.unpack_from(data, pos)
+        pos += 2
+        meals = dict(_MEAL.iter_unpack(data[pos:pos + meal_count * _MEAL.size]))
+    except (zlib.error, struct.error, IndexError) as e:
+        raise ReplayError("corrupt replay chunk") from e
+
+    direction = game.direction
+    moves = min(tick, header.ticks) - index * header.keyframe_interval
+    for offset in range(moves):
+        if offset in turns:
+            direction = DIRECTIONS[turns[offset]]
+        game.replay_move(direction, meals.get(offset))
+    return game
+
+
+class ReplayStore:
+    """
+    Replays as one file per game under ``directory``.
+
+    ``seek`` reads only the header and the one chunk it needs, so the cost
+    of showing a tick doesn't grow with the length of the game.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, game_id: str) -> Optional[str]:
+        if not _SAFE_ID.match(game_id):
+            return None
+        return os.path.join(self.directory, f"{game_id}.replay")
+
+    def exists(self, game_id: str) -> bool:
+        path = self.path(game_id)
+        return path is not None and os.path.isfile(path)
+
+    def save(self, game_id: str, data: bytes):
+        path = self.path(game_id)
+        if path is None:
+            raise ReplayError(f"invalid game id {game_id!r}")
+        os.makedirs(self.directory, exist_ok=True)
+        # Readers never see a half-written file
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+
+    def load(self, game_id: str) -> bytes:
+        with open(self.path(game_id), "rb") as f:
+            return f.read()
+
+    def header(self, game_id: str) -> ReplayHeader:
+        with open(self.path(game_id), "rb") as f:
+            return self._read_header(f)
+
+    def seek(self, game_id: str, tick: int) -> Tuple[ReplayHeader, SnakeGame]:
+        with open(self.path(game_id), "rb") as f:
+            header = self._read_header(f)
+            offset, size = header.chunk_span(header.chunk_for(tick))
+            f.seek(offset)
+            return header, seek(header, f.read(size), tick)
+
+    @staticmethod
+    def _read_header(f) -> ReplayHeader:
+        fixed = f.read(_HEADER.size)
+        try:
+            count = _HEADER.unpack(fixed)[-1]
+        except struct.error as e:
+            raise ReplayError("truncated replay header") from e
+        return read_header(fixed + f.read(_U32.size * count))
+
+
+replay_store = ReplayStore(settings.REPLAY_DIR)
@@ -0,0 +1,566 @@
+"""
+Server-run games spread over worker processes.
+
+``ShardedRooms`` starts one worker process per shard. A game lives on the
+shard its id hashes to, unless the rebalancer has moved it since. Each
+worker runs an ordinary ``LiveGames`` on a fixed-rate ``TickClock``. The
+API process keeps only the placement of each game, and:
+
+  * sends commands (start, turn, watch, snapshot requests, moves) to the
+    owning shard over a pipe;
+  * reads each tick's frames out of the shard's shared-memory
+    ``FrameRing`` and publishes them to its own ``FrameHub``. The pipe
+    carries only a short "tick n is ready" note per tick.
+
+Workers only build deltas for games someone is watching. The hub tells
+the owning shard when a game gains its first spectator or loses its last.
+
+Every ``run`` interval the rebalancer compares shard load (the share of the
+tick interval spent ticking). Games move from a shard over
+``overload`` to the least loaded one by detaching them between two ticks
+on the source and attaching them on the target, so spectators see no gap.
+A turn sent to a game while it is moving may be dropped.
+
+Games on shards are not written to the move log; ``GameRecorder`` only
+follows the in-process ``live_games``.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import queue
+import struct
+import threading
+import time
+import zlib
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from ..config import settings
+from ..realtime.hub import Frame, FrameHub
+from . import codec
+from .engine import GameMode
+from .live import LOBBY_TOPIC, LiveGames, game_topic
+
+logger = logging.getLogger(__name__)
+
+_RING_HEADER = struct.Struct("<Q")  # newest sequence number
+_SLOT_HEADER = struct.Struct("<QI")  # sequence number, payload length
+_TOO_BIG = 0xFFFFFFFF
+
+# Seconds to wait for a shard to answer a request
+_REQUEST_TIMEOUT = 5.0
+
+
+def shard_for(game_id: str, shards: int) -> int:
+    """Stable across processes and restarts, unlike ``hash()``."""
+    return zlib.crc32(game_id.encode()) % shards
+
+
+class FrameRing:
+    """
+    Fixed-size slots in shared memory, written by one shard worker and read
+    by the API process. Slot ``seq % slots`` holds batch ``seq``; a tick's
+    frames take as many consecutive batches as they need.
+
+    The writer fills the payload before stamping the slot header. The reader
+    checks the stamp before and after copying, so a slot overwritten while
+    being read (a reader more than ``slots`` ticks behind) reads as lost
+    instead of torn.
+    """
+
+    def __init__(self, shm: SharedMemory, slots: int, slot_size: int, owner: bool):
+        self.shm = shm
+        self.slots = slots
+        self.slot_size = slot_size
+        self.owner = owner
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(cls, slots: int, slot_size: int) -> "FrameRing":
+        shm = SharedMemory(create=True, size=_RING_HEADER.size + slots * slot_size)
+        shm.buf[:_RING_HEADER.size] = bytes(_RING_HEADER.size)
+        return cls(shm, slots, slot_size, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, slots: int, slot_size: int) -> "FrameRing":
+        # Spawned workers report to the creator's resource tracker, and the
+        # creator's unlink() is what releases the segment
+        return cls(SharedMemory(name=name), slots, slot_size, owner=False)
+
+    @property
+    def payload_size(self) -> int:
+        return self.slot_size - _SLOT_HEADER.size
+
+    def _offset(self, seq: int) -> int:
+        return _RING_HEADER.size + (seq % self.slots) * self.slot_size
+
+    def latest(self) -> int:
+        return _RING_HEADER.unpack_from(self.shm.buf)[0]
+
+    def write(self, seq: int, payload: bytes) -> bool:
+        """False when the payload doesn't fit a slot; readers then see the tick as lost."""
+        buf, offset = self.shm.buf, self._offset(seq)
+        fits = len(payload) <= self.payload_size
+        if fits:
+            start = offset + _SLOT_HEADER.size
+            buf[start:start + len(payload)] = payload
+        _SLOT_HEADER.pack_into(buf, offset, seq, len(payload) if fits else _TOO_BIG)
+        _RING_HEADER.pack_into(buf, 0, seq)
+        return fits
+
+    def read(self, seq: int) -> Optional[bytes]:
+        buf, offset = self.shm.buf, self._offset(seq)
+        stamp, length = _SLOT_HEADER.unpack_from(buf, offset)
+        if stamp != seq or length == _TOO_BIG:
+            return None
+        start = offset + _SLOT_HEADER.size
+        payload = bytes(buf[start:start + length])
+        if _SLOT_HEADER.unpack_from(buf, offset)[0] != seq:
+            return None
+        return payload
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class TickClock:
+    """
+    Fixed-rate tick deadlines. Each tick falls due ``interval`` after the
+    previous one was due, not after it finished, so tick time and sleep
+    overshoot don't add up to drift. A loop more than ``max_lag`` ticks
+    behind skips the missed ticks rather than bursting through them.
+    """
+
+    def __init__(self, interval: float, max_lag: int = 5):
+        self.interval = interval
+        self.max_lag = max_lag
+        self.due = time.perf_counter() + interval
+        self.skipped = 0
+
+    def remaining(self) -> float:
+        return self.due - time.perf_counter()
+
+    def advance(self):
+        self.due += self.interval
+        behind = time.perf_counter() - self.due
+        if behind > self.max_lag * self.interval:
+            missed = int(behind // self.interval)
+            self.skipped += missed
+            self.due += missed * self.interval
+
+
+class _BatchHub(FrameHub):
+    """Worker side: collects one tick's frames for the ring instead of delivering them."""
+
+    def __init__(self):
+        super().__init__()
+        self.watched = set()
+        self.batch: List[tuple] = []
+
+    def has_subscribers(self, topic: str) -> bool:
+        # Lobby frames also tell the API process which games ended
+        return topic == LOBBY_TOPIC or topic in self.watched
+
+    def publish(self, topic: str, tick: int, frame: Frame):
+        self.batch.append((topic, frame.payload))
+
+
+def _pack(frames: List[tuple], limit: int) -> List[bytes]:
+    """JSON arrays of (topic, payload) pairs, each at most ``limit`` bytes unless a single frame is bigger."""
+    batches, parts, size = [], [], 2
+    for frame in frames:
+        part = json.dumps(frame, separators=(",", ":")).encode()
+        if parts and size + len(part) + 1 > limit:
+            batches.append(b"[" + b",".join(parts) + b"]")
+            parts, size = [], 2
+        parts.append(part)
+        size += len(part) + 1
+    if parts:
+        batches.append(b"[" + b",".join(parts) + b"]")
+    return batches
+
+
+def _handle(live: LiveGames, hub: _BatchHub, clock: TickClock, conn, message: tuple, stats: dict):
+    kind = message[0]
+    if kind == "turn":
+        live.set_direction(message[1], message[2])
+    elif kind == "abandon":
+        live.abandon(message[1])
+    elif kind == "watch":
+        (hub.watched.add if message[2] else hub.watched.discard)(message[1])
+    else:
+        request_id, args = message[1], message[2:]
+        result: Any = None
+        if kind == "start":
+            game_id, player_id, player_name, mode, seed = args
+            result = live.start_game(player_id, player_name, mode, seed=seed, game_id=game_id)
+        elif kind == "snapshot":
+            frame = live.snapshot_frame(args[0])
+            if frame is not None:
+                # A snapshot is fetched right before subscribing; start the deltas now so none are missed
+                hub.watched.add(game_topic(args[0]))
+                result = frame.payload
+        elif kind == "lobby":
+            result = live.lobby()
+        elif kind == "detach":
+            result = []
+            for game_id in list(live.engine.games)[:args[0]]:
+                player, game = live.detach(game_id)
+                hub.watched.discard(game_topic(game_id))
+                result.append((game_id, player, game))
+        elif kind == "attach":
+            for game_id, player, game in args[0]:
+                live.attach(game_id, player, game)
+        elif kind == "stats":
+            result = {**stats, "games": len(live.engine.games), "skipped": clock.skipped}
+        conn.send(("reply", request_id, result))
+
+
+def _serve(conn, ring_name: str, slots: int, slot_size: int, interval: float, idle_timeout: Optional[float]):
+    """Shard worker: tick on a fixed clock, answering commands in between."""
+    ring = FrameRing.attach(ring_name, slots, slot_size)
+    hub = _BatchHub()
+    live = LiveGames(hub=hub, idle_timeout=idle_timeout)
+    clock = TickClock(interval)
+    stats = {"ticks": 0, "load": 0.0, "tick_ms": 0.0, "oversized": 0}
+    seq = 0
+    try:
+        while True:
+            while True:
+                remaining = clock.remaining()
+                if remaining <= 0 or not conn.poll(remaining):
+                    break
+                message = conn.recv()
+                if message[0] == "stop":
+                    return
+                _handle(live, hub, clock, conn, message, stats)
+
+            started = time.perf_counter()
+            live.step()
+            if hub.batch:
+                for payload in _pack(hub.batch, ring.payload_size):
+                    seq += 1
+                    if not ring.write(seq, payload):
+                        stats["oversized"] += 1
+                hub.batch = []
+                conn.send(("tick", seq))
+            elapsed = time.perf_counter() - started
+            stats["ticks"] += 1
+            # Smoothed over roughly the last 20 ticks
+            stats["tick_ms"] += (elapsed * 1000 - stats["tick_ms"]) * 0.05
+            stats["load"] = stats["tick_ms"] / (interval * 1000)
+            clock.advance()
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        ring.close()
+
+
+class _Shard:
+    __slots__ = ("index", "process", "conn", "ring", "last_seq", "pending", "alive", "outbox", "writer")
+
+    def __init__(self, index: int, process, conn, ring: FrameRing):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.ring = ring
+        self.last_seq = 0
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.alive = True
+        # Sends go through a thread. A worker blocked writing to a full pipe
+        # only reads commands again once its frames are read, so the event
+        # loop (the reader) must never block on a write itself.
+        self.outbox: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+        self.writer = threading.Thread(target=self._write, name=f"game-shard-{index}-writer", daemon=True)
+        self.writer.start()
+
+    def _write(self):
+        while True:
+            message = self.outbox.get()
+            if message is None:
+                return
+            try:
+                self.conn.send(message)
+            except OSError:
+                # The reader sees the pipe close and marks the shard lost
+                return
+
+
+class ShardedRooms:
+    def __init__(
+        self,
+        shards: int = 2,
+        interval: float = 0.15,
+        ring_slots: int = 256,
+        slot_size: int = 256 * 1024,
+        overload: float = 0.75,
+        max_moves: int = 200,
+        hub: Optional[FrameHub] = None,
+        idle_timeout: Optional[float] = None,
+    ):
+        self.shards = shards
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.ring_slots = ring_slots
+        self.slot_size = slot_size
+        self.overload = overload
+        self.max_moves = max_moves
+        self.hub = hub or FrameHub()
+        self.hub.on_watch = self._on_watch
+        # Tick batches received from all shards; spectator resyncs are measured against it
+        self.tick = 0
+        self.placement: Dict[str, int] = {}  # game id -> shard
+        self.owners: Dict[str, str] = {}  # game id -> player id, to authorise turns without asking a shard
+        self.playing: Dict[str, str] = {}  # player id -> their running game
+        self.frames_lost = 0
+        self.moved = 0
+        # Per-shard stats from the last rebalance check, for /metrics
+        self.last_stats: List[dict] = []
+        self._shards: List[_Shard] = []
+        self._request_ids = itertools.count()
+
+    @property
+    def running(self) -> bool:
+        return any(shard.alive for shard in self._shards)
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        # spawn: workers must not inherit the event loop or the server's threads
+        context = multiprocessing.get_context("spawn")
+        for index in range(self.shards):
+            ring = FrameRing.create(self.ring_slots, self.slot_size)
+            conn, child = context.Pipe()
+            process = context.Process(
+                target=_serve, args=(child, ring.name, self.ring_slots, self.slot_size, self.interval, self.idle_timeout),
+                name=f"game-shard-{index}", daemon=True,
+            )
+            process.start()
+            child.close()
+            shard = _Shard(index, process, conn, ring)
+            self._shards.append(shard)
+            loop.add_reader(conn.fileno(), self._receive, shard)
+
+    async def stop(self):
+        for shard in self._shards:
+            if shard.alive:
+                shard.outbox.put(("stop",))
+            shard.outbox.put(None)
+            self._lost(shard)
+        for shard in self._shards:
+            await asyncio.to_thread(shard.writer.join, _REQUEST_TIMEOUT)
+            await asyncio.to_thread(shard.process.join, _REQUEST_TIMEOUT)
+            if shard.process.is_alive():
+                shard.process.terminate()
+            shard.conn.close()
+            shard.ring.close()
+        self._shards = []
+        self.placement.clear()
+        self.owners.clear()
+        self.playing.clear()
+
+    async def start_game(
+        self,
+        player_id: str,
+        player_name: str,
+        mode: GameMode,
+        seed: Optional[int] = None,
+        game_id: Optional[str] = None,
+    ) -> str:
+        game_id = game_id or str(uuid4())
+        index = shard_for(game_id, len(self._shards))
+        await self._request(self._shards[index], "start", game_id, player_id, player_name, mode, seed)
+        self.placement[game_id] = index
+        self.owners[game_id] = player_id
+        self.playing[player_id] = game_id
+        return game_id
+
+    async def open_game(self, player_id: str, player_name: str, mode: GameMode) -> str:
+        return await self.start_game(player_id, player_name, mode)
+
+    def owner(self, game_id: str) -> Optional[str]:
+        return self.owners.get(game_id)
+
+    def game_of(self, player_id: str) -> Optional[str]:
+        """The player's running game, if any."""
+        return self.playing.get(player_id)
+
+    def abandon(self, game_id: str) -> bool:
+        """Forwarded without waiting; the game ends at its shard's next tick."""
+        shard = self._owner(game_id)
+        if shard is None:
+            return False
+        player_id = self.owners.get(game_id)
+        if self.playing.get(player_id) == game_id:
+            del self.playing[player_id]
+        self._send(shard, ("abandon", game_id))
+        return True
+
+    def set_direction(self, game_id: str, direction: str) -> bool:
+        """Forwarded without waiting; False only when the game isn't running here."""
+        shard = self._owner(game_id)
+        if shard is None:
+            return False
+        self._send(shard, ("turn", game_id, direction))
+        return True
+
+    async def fetch_snapshot_frame(self, game_id: str) -> Optional[Frame]:
+        shard = self._owner(game_id)
+        if shard is None:
+            return None
+        payload = await self._request(shard, "snapshot", game_id)
+        return Frame(payload, codec.encode) if payload is not None else None
+
+    async def fetch_lobby_frame(self) -> Frame:
+        shards = [shard for shard in self._shards if shard.alive]
+        lobbies = await asyncio.gather(*(self._request(shard, "lobby") for shard in shards))
+        return Frame({"type": "snapshot", "tick": self.tick, "games": [g for lobby in lobbies for g in lobby]})
+
+    async def stats(self) -> List[dict]:
+        shards = [shard for shard in self._shards if shard.alive]
+        results = await asyncio.gather(*(self._request(shard, "stats") for shard in shards))
+        return [{"shard": shard.index, **result} for shard, result in zip(shards, results)]
+
+    async def rebalance(self) -> int:
+        """Move games off the busiest shard if it is over ``overload``; returns how many moved."""
+        stats = self.last_stats = await self.stats()
+        if len(stats) < 2:
+            return 0
+        busiest = max(stats, key=lambda s: s["load"])
+        idlest = min(stats, key=lambda s: s["load"])
+        gap = busiest["load"] - idlest["load"]
+        # Everyone busy: moving games around would not help
+        if busiest["load"] < self.overload or gap <= self.overload / 4:
+            return 0
+        # Enough to even the two out
+        count = min(self.max_moves, int(busiest["games"] * gap / (2 * busiest["load"])))
+        if count == 0:
+            return 0
+        return await self.move(busiest["shard"], idlest["shard"], count)
+
+    async def move(self, source_index: int, target_index: int, count: int) -> int:
+        """Move up to ``count`` games between shards, oldest first."""
+        source, target = self._shards[source_index], self._shards[target_index]
+        games = await self._request(source, "detach", count)
+        await self._request(target, "attach", games)
+        for game_id, _, _ in games:
+            self.placement[game_id] = target.index
+            if self.hub.has_subscribers(game_topic(game_id)):
+                self._send(target, ("watch", game_topic(game_id), True))
+        self.moved += len(games)
+        logger.info("Moved %d games from shard %d to shard %d", len(games), source.index, target.index)
+        return len(games)
+
+    async def run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.rebalance()
+            except Exception:
+                logger.exception("Shard rebalancing failed")
+
+    def _owner(self, game_id: str) -> Optional[_Shard]:
+        index = self.placement.get(game_id)
+        if index is None or not self._shards[index].alive:
+            return None
+        return self._shards[index]
+
+    def _send(self, shard: _Shard, message: tuple):
+        if shard.alive:
+            shard.outbox.put(message)
+
+    async def _request(self, shard: _Shard, kind: str, *args):
+        if not shard.alive:
+            raise ConnectionError(f"shard {shard.index} is down")
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        shard.pending[request_id] = future
+        self._send(shard, (kind, request_id, *args))
+        try:
+            return await asyncio.wait_for(future, _REQUEST_TIMEOUT)
+        finally:
+            shard.pending.pop(request_id, None)
+
+    def _on_watch(self, topic: str, watched: bool):
+        if topic == LOBBY_TOPIC:
+            return
+        shard = self._owner(topic.removeprefix("game:"))
+        if shard is not None:
+            self._send(shard, ("watch", topic, watched))
+
+    def _receive(self, shard: _Shard):
+        # One message per call: after a reply, the awaiting request resumes
+        # (and e.g. subscribes) before the next tick's frames are published
+        try:
+            message = shard.conn.recv()
+        except (EOFError, OSError):
+            logger.error("Game shard %d exited; its games are gone", shard.index)
+            self._lost(shard)
+            return
+        if message[0] == "tick":
+            self._drain(shard, message[1])
+        elif message[0] == "reply":
+            future = shard.pending.get(message[1])
+            if future is not None and not future.done():
+                future.set_result(message[2])
+
+    def _drain(self, shard: _Shard, seq: int):
+        """Publish one worker tick: ring batches up to ``seq``."""
+        hub = self.hub
+        self.tick += 1
+        for batch in range(shard.last_seq + 1, seq + 1):
+            data = shard.ring.read(batch)
+            if data is None:
+                self.frames_lost += 1
+                for topic in hub.topics():
+                    if self.placement.get(topic.removeprefix("game:")) == shard.index:
+                        hub.resync(topic)
+                continue
+            for topic, payload in json.loads(data):
+                if topic == LOBBY_TOPIC:
+                    for game_id in payload.get("ended", ()):
+                        self._forget(game_id)
+                    hub.publish(topic, self.tick, Frame(payload))
+                elif hub.has_subscribers(topic):
+                    hub.publish(topic, self.tick, Frame(payload, codec.encode))
+                else:
+                    # Fetched a snapshot but never subscribed
+                    self._send(shard, ("watch", topic, False))
+        shard.last_seq = seq
+
+    def _lost(self, shard: _Shard):
+        if not shard.alive:
+            return
+        shard.alive = False
+        try:
+            asyncio.get_running_loop().remove_reader(shard.conn.fileno())
+        except (RuntimeError, OSError, ValueError):
+            pass
+        for future in shard.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"shard {shard.index} is down"))
+        for game_id in [g for g, index in self.placement.items() if index == shard.index]:
+            self._forget(game_id)
+
+    def _forget(self, game_id: str):
+        self.placement.pop(game_id, None)
+        player_id = self.owners.pop(game_id, None)
+        if self.playing.get(player_id) == game_id:
+            del self.playing[player_id]
+
+
+room_scheduler = ShardedRooms(
+    settings.GAME_SHARDS,
+    interval=settings.GAME_TICK_INTERVAL,
+    ring_slots=settings.GAME_SHARD_RING_SLOTS,
+    slot_size=settings.GAME_SHARD_SLOT_SIZE,
+    overload=settings.GAME_SHARD_OVERLOAD,
+    idle_timeout=settings.GAME_IDLE_TIMEOUT,
+)
@@ -0,0 +1,69 @@
+"""
+Re-simulation of client-played games.
+
+The browser plays under the rules in gameLogic.ts with food drawn from
+``Mulberry32(seed)``, and logs every accepted direction change as
+``(tick, direction)``, where ``tick`` is the number of moves made before the
+change. Feeding the same seed and log through ``SnakeGame`` must end the
+game after exactly the reported number of moves, with the reported score.
+
+``simulate`` only depends on the engine so it is cheap to import in
+process-pool workers.
+"""
+import time
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+from .engine import GameMode, Mulberry32, SnakeGame
+
+# How often the time budget is checked, in moves
+_BUDGET_CHECK = 1024
+
+
+class Verdict(NamedTuple):
+    score: int
+    reason: Optional[str]  # None when the claim holds
+
+    @property
+    def ok(self) -> bool:
+        return self.reason is None
+
+
+def simulate(
+    mode: GameMode,
+    seed: int,
+    inputs: Sequence[Tuple[int, str]],
+    ticks: int,
+    score: int,
+    budget: float = 1.0,
+) -> Verdict:
+    """
+    Replay a submitted game and check it against the claimed ``ticks`` and
+    ``score``. Gives up with reason ``"timeout"`` after ``budget`` seconds.
+    """
+    game = SnakeGame(mode, rng=Mulberry32(seed))
+    deadline = time.perf_counter() + budget
+    pending = iter(inputs)
+    upcoming = next(pending, None)
+    set_direction, move = game.set_direction, game.move
+
+    for tick in range(ticks):
+        while upcoming is not None and upcoming[0] <= tick:
+            if upcoming[0] < tick:
+                return Verdict(game.score, "inputs out of order")
+            set_direction(upcoming[1])
+            upcoming = next(pending, None)
+        move()
+        if game.is_game_over:
+            if tick != ticks - 1:
+                return Verdict(game.score, "game ended early")
+            break
+        if tick % _BUDGET_CHECK == 0 and time.perf_counter() > deadline:
+            return Verdict(game.score, "timeout")
+
+    if upcoming is not None:
+        return Verdict(game.score, "inputs after the end of the game")
+    if not game.is_game_over:
+        return Verdict(game.score, "game did not end")
+    if game.score != score:
+        return Verdict(game.score, "score mismatch")
+    return Verdict(game.score, None)
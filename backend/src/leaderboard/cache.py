@@ -0,0 +1,104 @@
+"""
+Serialized leaderboard responses, reused until the leaderboard changes.
+
+Every write path (``add_score``, batched inserts, the ingestor's index
+update) calls ``bump(mode)``, which advances that mode's version and the
+all-modes version. An entry is served only while the version it was built
+at is still current, so a read after a submission can never see the old
+bytes.
+"""
+import hashlib
+from typing import Dict, Hashable, NamedTuple, Optional
+
+ALL_MODES = None
+
+
+class CachedResponse(NamedTuple):
+    version: int
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the bytes, so it survives restarts and never collides across versions."""
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """``If-None-Match`` uses weak comparison: ``W/"x"`` matches ``"x"``, and ``*`` matches anything."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._versions: Dict[Optional[str], int] = {}
+        self._entries: Dict[Hashable, CachedResponse] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        # Serialized bytes reused instead of rebuilt, and body bytes never sent thanks to 304s
+        self.bytes_reused = 0
+        self.bytes_saved = 0
+
+    def version(self, mode: Optional[str]) -> int:
+        return self._versions.get(mode, 0)
+
+    def bump(self, mode: Optional[str] = ALL_MODES):
+        """Invalidate cached reads of ``mode`` (and of all modes together)."""
+        if mode is not ALL_MODES:
+            self._versions[mode] = self._versions.get(mode, 0) + 1
+        self._versions[ALL_MODES] = self._versions.get(ALL_MODES, 0) + 1
+
+    def get(self, mode: Optional[str], key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.version != self.version(mode):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.bytes_reused += len(entry.body)
+        return entry
+
+    def put(self, key: Hashable, version: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """
+        Store ``body`` as built from data at ``version``; read the version
+        *before* querying, so a write that lands mid-query leaves the entry
+        already stale rather than wrongly current.
+        """
+        entry = CachedResponse(version, body, make_etag(body), headers or {})
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        while len(self._entries) > self.maxsize:
+            del self._entries[next(iter(self._entries))]
+        return entry
+
+    def record_not_modified(self, entry: CachedResponse):
+        self.not_modified += 1
+        self.bytes_saved += len(entry.body)
+
+    def clear(self):
+        self._versions.clear()
+        self._entries.clear()
+        self.hits = self.misses = self.not_modified = self.bytes_reused = self.bytes_saved = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / lookups if lookups else 0.0,
+            "notModified": self.not_modified,
+            "bytesReused": self.bytes_reused,
+            "bytesSaved": self.bytes_saved,
+        }
+
+
+leaderboard_cache = ResponseCache()
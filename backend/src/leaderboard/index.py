@@ -0,0 +1,131 @@
+import heapq
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .skiplist import IndexedSkipList
+
+
+class RankedEntry(NamedTuple):
+    """Lightweight leaderboard row; validates into schemas.LeaderboardEntry."""
+    id: str
+    username: str
+    score: int
+    mode: str
+    date: datetime
+
+
+SortKey = Tuple[int, str]
+
+
+def sort_key(score: int, entry_id: str) -> SortKey:
+    """
+    Leaderboard order: highest score first, ties broken by id.
+
+    Matches ``ORDER BY score DESC, id`` in SQL, so keyset cursors are
+    interchangeable between the index and the database.
+    """
+    return (-score, entry_id)
+
+
+class LeaderboardIndex:
+    """
+    Per-mode ranked view of the leaderboard kept in process memory.
+
+    Warmed once from the database at startup and updated by every
+    ``add_score``, so top-N reads and rank lookups never touch SQL.
+    Until ``load`` has been called the index reports ``ready = False``
+    and callers are expected to use the SQL path instead.
+
+    The index only sees writes made through this process, so it assumes
+    a single API worker (which is how we deploy).
+    """
+
+    def __init__(self):
+        self._modes: Dict[str, IndexedSkipList] = {}
+        self.ready = False
+
+    def clear(self):
+        self._modes = {}
+        self.ready = False
+
+    def load(self, entries: Iterable[RankedEntry]):
+        """Replace the index contents with ``entries`` and mark it ready."""
+        self._modes = {}
+        self.extend(entries)
+        self.ready = True
+
+    def extend(self, entries: Iterable[RankedEntry]):
+        """Add ``entries`` without marking the index ready, to ``load`` it piece by piece."""
+        for entry in entries:
+            self._insert(entry)
+
+    def _insert(self, entry: RankedEntry):
+        ranked = self._modes.get(entry.mode)
+        if ranked is None:
+            ranked = self._modes[entry.mode] = IndexedSkipList()
+        ranked.insert(sort_key(entry.score, entry.id), entry)
+
+    def add(self, entry: RankedEntry):
+        self._insert(entry)
+
+    def remove(self, entry: RankedEntry) -> bool:
+        ranked = self._modes.get(entry.mode)
+        return ranked is not None and ranked.remove(sort_key(entry.score, entry.id))
+
+    def modes(self) -> List[str]:
+        return list(self._modes)
+
+    def count(self, mode: Optional[str] = None) -> int:
+        if mode:
+            ranked = self._modes.get(mode)
+            return len(ranked) if ranked is not None else 0
+        return sum(len(ranked) for ranked in self._modes.values())
+
+    def rank_of_score(self, mode: str, score: int) -> int:
+        """1-based rank a score would have: one more than the number of higher scores."""
+        ranked = self._modes.get(mode)
+        if ranked is None:
+            return 1
+        return ranked.count_less((-score,)) + 1
+
+    def top(self, mode: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> List[RankedEntry]:
+        """Entries in leaderboard order, optionally restricted to one mode."""
+        if mode:
+            ranked = self._modes.get(mode)
+            if ranked is None:
+                return []
+            rows = (entry for _, entry in ranked.items(offset))
+        else:
+            # Merge the per-mode lists; each is already sorted by key.
+            rows = heapq.merge(*(ranked.items() for ranked in self._modes.values()))
+            rows = islice((entry for _, entry in rows), offset, None)
+        if limit is not None:
+            rows = islice(rows, limit)
+        return list(rows)
+
+    def _lists(self, mode: Optional[str]) -> List[IndexedSkipList]:
+        if mode:
+            ranked = self._modes.get(mode)
+            return [ranked] if ranked is not None else []
+        return list(self._modes.values())
+
+    def after(self, mode: Optional[str], key: SortKey, limit: int) -> List[RankedEntry]:
+        """Up to ``limit`` entries that sort strictly after ``key``."""
+        iterators = [
+            ranked.items(ranked.count_less(key, inclusive=True)) for ranked in self._lists(mode)
+        ]
+        return [entry for _, entry in islice(heapq.merge(*iterators), limit)]
+
+    def before(self, mode: Optional[str], key: SortKey, limit: int) -> List[RankedEntry]:
+        """Up to ``limit`` entries that sort immediately before ``key``, in order."""
+        windows = []
+        for ranked in self._lists(mode):
+            end = ranked.count_less(key)
+            start = max(0, end - limit)
+            windows.append(islice(ranked.items(start), end - start))
+        rows = list(heapq.merge(*windows))
+        return [entry for _, entry in rows[-limit:]] if limit else []
+
+
+leaderboard_index = LeaderboardIndex()
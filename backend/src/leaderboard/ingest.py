@@ -0,0 +1,273 @@
+"""
+Write-behind ingestion for leaderboard submissions.
+
+``POST /leaderboard`` hands scores to ``ScoreIngestor.submit``, which queues
+them for a background flusher. The flusher writes one multi-row INSERT per
+batch, cut when ``batch_size`` rows are waiting or ``flush_interval``
+seconds after the first one arrived, whichever comes first.
+
+Each submission carries a rank estimate (from the in-memory index, when it
+is warm) and a future that resolves to the reconciled rank once its batch
+has committed. Under ``ack="flush"`` the API waits for that future; under
+``ack="enqueue"`` it answers with the estimate straight away and the row is
+durable a moment later. ``stop`` drains everything still queued before it
+returns, so a clean shutdown never drops an acknowledged score.
+
+A batch that fails on a lost connection or similar is retried up to
+``max_retries`` times. Any other failure is taken to be caused by some of
+its rows: the batch is split in half until the rows that can't be written
+are alone, and only those are dropped, failing their ``flushed`` futures.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Literal, Optional
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..config import settings
+from ..db.repository import DatabaseRepository
+from ..db.session import SessionLocal
+from .cache import ResponseCache, leaderboard_cache
+from .index import LeaderboardIndex, RankedEntry, leaderboard_index
+
+logger = logging.getLogger(__name__)
+
+AckMode = Literal["flush", "enqueue"]
+
+# Failures worth retrying as they are; anything else is blamed on the rows
+TRANSIENT_ERRORS = (exc.OperationalError, exc.InterfaceError, exc.TimeoutError, OSError)
+
+
+class ScoreDropped(Exception):
+    """The score could not be written and was dropped."""
+
+
+class Submission:
+    __slots__ = ("entry", "estimate", "flushed")
+
+    def __init__(self, entry: RankedEntry, flushed: asyncio.Future):
+        self.entry = entry
+        self.estimate: Optional[int] = None
+        self.flushed = flushed
+
+
+class ScoreIngestor:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        index: LeaderboardIndex = leaderboard_index,
+        cache: ResponseCache = leaderboard_cache,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        ack: AckMode = "flush",
+        max_queue: int = 10000,
+        retry_delay: float = 1.0,
+        max_retries: int = 5,
+    ):
+        self.session_factory = session_factory
+        self.index = index
+        self.cache = cache
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ack = ack
+        self.max_queue = max_queue
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.batches_flushed = 0
+        self.rows_flushed = 0
+        self.flush_failures = 0
+        self.rows_dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._unflushed: Dict[str, Submission] = {}
+        # Held from a batch's insert until it leaves _unflushed, so no rank read sees
+        # it both committed and queued; only taken with a connection already checked out
+        self._flushing = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return len(self._unflushed)
+
+    def start(self):
+        self._queue = asyncio.Queue(self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything queued so far, then stop the flusher."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, username: str, score: int, mode: str) -> Submission:
+        entry = RankedEntry(str(uuid4()), username, score, mode, datetime.now(timezone.utc))
+        submission = Submission(entry, asyncio.get_running_loop().create_future())
+        if self.index.ready:
+            # Visible to reads and ranks immediately; the database catches up on flush
+            self.index.add(entry)
+            self.cache.bump(mode)
+            submission.estimate = self.index.rank_of_score(mode, score)
+        self._unflushed[entry.id] = submission
+        await self._queue.put(submission)
+        return submission
+
+    def pending_above(self, mode: str, score: int) -> int:
+        """Queued scores that will rank above ``score`` once written."""
+        return sum(
+            1 for s in self._unflushed.values()
+            if s.entry.mode == mode and s.entry.score > score
+        )
+
+    async def rank_sql(self, repo: DatabaseRepository, mode: str, score: int) -> int:
+        """Committed plus still-queued scores above ``score``, read while no batch is being written."""
+        await repo.session.connection()
+        async with self._flushing:
+            return await repo.get_rank_sql(mode, score) + self.pending_above(mode, score)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        stopping = False
+        while not stopping:
+            first = await queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+        # Anything that slipped in behind the stop marker still gets written
+        rest = []
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not None:
+                rest.append(item)
+        for start in range(0, len(rest), self.batch_size):
+            await self._flush(rest[start:start + self.batch_size])
+
+    async def _flush(self, batch: List[Submission]):
+        batch = await self._write(batch)
+        if not batch:
+            return
+        self.batches_flushed += 1
+        self.rows_flushed += len(batch)
+        try:
+            async with self.session_factory() as session:
+                ranks = await self._ranks(session, batch)
+        except Exception:
+            # The rows are safe; callers fall back to their estimate
+            logger.exception("Rank reconciliation failed")
+            ranks = [s.estimate for s in batch]
+        for submission, rank in zip(batch, ranks):
+            if not submission.flushed.done():
+                submission.flushed.set_result(rank)
+
+    async def _write(self, batch: List[Submission]) -> List[Submission]:
+        """Insert the batch; returns the submissions written, having dropped any that can't be."""
+        attempts = 0
+        while True:
+            try:
+                async with self.session_factory() as session:
+                    # Connect before taking the lock: whoever holds it never waits on the pool
+                    await session.connection()
+                    async with self._flushing:
+                        await DatabaseRepository(session, self.index, self.cache).insert_scores([s.entry for s in batch])
+                        for submission in batch:
+                            self._unflushed.pop(submission.entry.id, None)
+                return batch
+            except TRANSIENT_ERRORS as e:
+                self.flush_failures += 1
+                attempts += 1
+                if attempts > self.max_retries:
+                    logger.exception("Score flush of %d rows failed %d times; dropping them", len(batch), attempts)
+                    self._drop(batch, e)
+                    return []
+                logger.exception("Score flush of %d rows failed; retrying", len(batch))
+                await asyncio.sleep(self.retry_delay)
+            except Exception as e:
+                self.flush_failures += 1
+                if len(batch) == 1:
+                    logger.exception("Dropping score that can't be written: %r", batch[0].entry)
+                    self._drop(batch, e)
+                    return []
+                # Find the offending rows without losing the rest
+                middle = len(batch) // 2
+                return await self._write(batch[:middle]) + await self._write(batch[middle:])
+
+    def _drop(self, batch: List[Submission], error: Exception):
+        self.rows_dropped += len(batch)
+        for submission in batch:
+            entry = submission.entry
+            self._unflushed.pop(entry.id, None)
+            if self.index.ready and self.index.remove(entry):
+                self.cache.bump(entry.mode)
+            if not submission.flushed.done():
+                dropped = ScoreDropped(entry.id)
+                dropped.__cause__ = error
+                submission.flushed.set_exception(dropped)
+                if self.ack == "enqueue":
+                    # Nobody waits on it; don't warn that the failure went unseen
+                    submission.flushed.exception()
+
+    async def _ranks(self, session, batch: List[Submission]) -> List[Optional[int]]:
+        if self.index.ready:
+            return [self.index.rank_of_score(s.entry.mode, s.entry.score) for s in batch]
+        # One COUNT per distinct (mode, score) in the batch
+        repo = DatabaseRepository(session, self.index, self.cache)
+        ranks: Dict[tuple, int] = {}
+        for s in batch:
+            key = (s.entry.mode, s.entry.score)
+            if key not in ranks:
+                ranks[key] = await repo.get_rank_sql(*key) + self.pending_above(*key)
+        return [ranks[(s.entry.mode, s.entry.score)] for s in batch]
+
+
+async def record_score(repo: DatabaseRepository, ingestor: ScoreIngestor, username: str, score: int, mode: str) -> int:
+    """Add a score through the ingestor when it is running, else directly; returns its rank."""
+    if not ingestor.running:
+        return await repo.add_score(username, score, mode)
+
+    queued = await ingestor.submit(username, score, mode)
+    if ingestor.ack == "flush":
+        # The flush needs a pooled connection of its own; waiting while holding
+        # ours deadlocks once every connection belongs to a waiting request
+        await repo.release()
+        rank = await queued.flushed
+    else:
+        rank = queued.estimate
+    if rank is None:
+        # No warm index to estimate from: count committed and still-queued higher scores
+        rank = await ingestor.rank_sql(repo, mode, score)
+    return rank
+
+
+score_ingestor = ScoreIngestor(
+    SessionLocal,
+    batch_size=settings.SCORE_BATCH_SIZE,
+    flush_interval=settings.SCORE_FLUSH_INTERVAL,
+    ack=settings.SCORE_ACK,
+    max_queue=settings.SCORE_QUEUE_SIZE,
+)
@@ -0,0 +1,136 @@
+import random
+from typing import Any, Iterator, Optional, Tuple
+
+MAX_LEVEL = 32
+
+
+class _Node:
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key: Any, value: Any, level: int):
+        self.key = key
+        self.value = value
+        self.next: list[Optional["_Node"]] = [None] * level
+        # width[i] = number of level-0 steps from this node to next[i]
+        self.width: list[int] = [0] * level
+
+
+class IndexedSkipList:
+    """
+    Skip list that also tracks how many entries each link spans.
+
+    Keys are kept in ascending order. Besides O(log n) inserts this gives
+    O(log n) rank queries (how many keys sort before a given key) and
+    O(log n) positional access, which is what a leaderboard needs for
+    "rank of this score" and "page starting at position N".
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._head = _Node(None, None, MAX_LEVEL)
+        self._level = 1
+        self._size = 0
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVEL and self._rng.random() < 0.25:
+            level += 1
+        return level
+
+    def insert(self, key: Any, value: Any = None) -> int:
+        """
+        Insert a key and return its 0-based position.
+
+        Keys must be unique; inserting a duplicate key places it after
+        the existing one.
+        """
+        update: list[_Node] = [self._head] * MAX_LEVEL
+        rank = [0] * MAX_LEVEL
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            rank[i] = rank[i + 1] if i + 1 < self._level else 0
+            while node.next[i] is not None and node.next[i].key <= key:
+                rank[i] += node.width[i]
+                node = node.next[i]
+            update[i] = node
+
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                rank[i] = 0
+                update[i] = self._head
+                self._head.width[i] = self._size
+            self._level = level
+
+        new = _Node(key, value, level)
+        for i in range(level):
+            prev = update[i]
+            new.next[i] = prev.next[i]
+            prev.next[i] = new
+            new.width[i] = prev.width[i] - (rank[0] - rank[i])
+            prev.width[i] = rank[0] - rank[i] + 1
+        for i in range(level, self._level):
+            update[i].width[i] += 1
+
+        self._size += 1
+        return rank[0]
+
+    def remove(self, key: Any) -> bool:
+        """Remove a key. Returns False if it was not present."""
+        update: list[_Node] = [self._head] * MAX_LEVEL
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            while node.next[i] is not None and node.next[i].key < key:
+                node = node.next[i]
+            update[i] = node
+
+        target = node.next[0]
+        if target is None or target.key != key:
+            return False
+
+        for i in range(self._level):
+            prev = update[i]
+            if prev.next[i] is target:
+                prev.width[i] += target.width[i] - 1
+                prev.next[i] = target.next[i]
+            else:
+                prev.width[i] -= 1
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
+        return True
+
+    def count_less(self, key: Any, inclusive: bool = False) -> int:
+        """Number of keys strictly less than ``key`` (or equal too, if ``inclusive``)."""
+        count = 0
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            while node.next[i] is not None and (
+                node.next[i].key < key or (inclusive and node.next[i].key == key)
+            ):
+                count += node.width[i]
+                node = node.next[i]
+        return count
+
+    def _node_at(self, position: int) -> Optional[_Node]:
+        if position < 0 or position >= self._size:
+            return None
+        traversed = 0
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            while node.next[i] is not None and traversed + node.width[i] <= position + 1:
+                traversed += node.width[i]
+                node = node.next[i]
+            if traversed == position + 1:
+                return node
+        return None
+
+    def items(self, start: int = 0) -> Iterator[Tuple[Any, Any]]:
+        """Iterate (key, value) pairs in order, beginning at ``start``."""
+        node = self._node_at(start)
+        while node is not None:
+            yield node.key, node.value
+            node = node.next[0]
@@ -0,0 +1,117 @@
+"""
+Per-player aggregates of the leaderboard: best score, games played, total
+score and when they last played, one ``user_stats`` row per (username, mode).
+
+The leaderboard keeps a row per submission, so "each player's best" or "my
+stats" would otherwise be a GROUP BY over the whole table on every request.
+Instead every score write folds its rows into ``user_stats`` in the same
+transaction: the rows are grouped per player and mode by ``aggregate``,
+then written with the ``upsert`` statement, which keeps the higher best and
+the later date and adds to the counts.
+
+``rebuild_user_stats`` recomputes the table from ``leaderboard`` in keyset
+chunks of ``chunk_size`` rows, folding each chunk in with the same upsert,
+so memory stays flat however long the history. It runs as a schema
+migration when the table is created, and on demand:
+
+    python -m src.leaderboard.stats rebuild
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import Connection, case, delete, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..models import db as models
+
+# (username, mode, score, date) of one leaderboard row
+ScoreRow = Tuple[str, str, int, datetime]
+
+
+def aggregate(rows: Iterable[ScoreRow]) -> List[dict]:
+    """Fold leaderboard rows into one ``user_stats`` row per player and mode, in key order."""
+    totals: Dict[Tuple[str, str], dict] = {}
+    for username, mode, score, date in rows:
+        stats = totals.get((username, mode))
+        if stats is None:
+            totals[(username, mode)] = {
+                "username": username, "mode": mode, "best_score": score,
+                "games_played": 1, "total_score": score, "last_played": date,
+            }
+            continue
+        stats["best_score"] = max(stats["best_score"], score)
+        stats["games_played"] += 1
+        stats["total_score"] += score
+        stats["last_played"] = max(stats["last_played"], date)
+    # Concurrent writers lock rows in the same order, so Postgres can't deadlock them
+    return [totals[key] for key in sorted(totals)]
+
+
+@lru_cache
+def upsert(dialect: str):
+    """INSERT ... ON CONFLICT that merges ``aggregate`` rows into the stored ones."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"user_stats needs PostgreSQL or SQLite, not {dialect}")
+    table = models.UserStats.__table__
+    stmt = insert(table)
+    new = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.username, table.c.mode],
+        set_={
+            "best_score": case((new.best_score > table.c.best_score, new.best_score), else_=table.c.best_score),
+            "games_played": table.c.games_played + new.games_played,
+            "total_score": table.c.total_score + new.total_score,
+            "last_played": case((new.last_played > table.c.last_played, new.last_played), else_=table.c.last_played),
+        },
+    )
+
+
+def rebuild_user_stats(conn: Connection, chunk_size: int = 10_000) -> int:
+    """Replace ``user_stats`` with aggregates of the whole leaderboard; returns the rows read."""
+    if conn.dialect.name == "postgresql":
+        # Score writes wait for the rebuild to commit, so none is missed or counted twice
+        conn.execute(text(f"LOCK TABLE {models.LeaderboardEntry.__tablename__} IN SHARE MODE"))
+    conn.execute(delete(models.UserStats))
+    entry = models.LeaderboardEntry
+    statement = upsert(conn.dialect.name)
+    rows, last = 0, None
+    while True:
+        stmt = select(entry.id, entry.username, entry.mode, entry.score, entry.date).order_by(entry.id).limit(chunk_size)
+        if last is not None:
+            stmt = stmt.where(entry.id > last)
+        chunk = conn.execute(stmt).all()
+        if not chunk:
+            return rows
+        conn.execute(statement, aggregate(row[1:] for row in chunk))
+        rows += len(chunk)
+        last = chunk[-1].id
+
+
+async def rebuild(engine: AsyncEngine, chunk_size: int = 10_000) -> int:
+    """``rebuild_user_stats`` in one transaction."""
+    async with engine.begin() as conn:
+        return await conn.run_sync(rebuild_user_stats, chunk_size)
+
+
+async def main(args):
+    from ..db.session import engine
+
+    try:
+        rows = await rebuild(engine, args.chunk_size)
+    finally:
+        await engine.dispose()
+    print(f"Rebuilt user_stats from {rows} leaderboard rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("rebuild",))
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    asyncio.run(main(parser.parse_args()))
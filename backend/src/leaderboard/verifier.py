@@ -0,0 +1,198 @@
+"""
+Queued, out-of-process verification of submitted games.
+
+``POST /leaderboard`` hands a game (mode, seed, input log, claimed ticks
+and score) to ``ScoreVerifier.submit`` and answers 202 with a verification
+id. A fixed set of dispatcher tasks takes games off the queue and runs
+``game.verify.simulate`` in a process pool, one game per worker process, so
+re-simulation never holds the event loop or the GIL. A game that passes is
+recorded like any other score; one that fails, or runs past the time
+budget, never reaches the leaderboard. Clients poll
+``GET /leaderboard/verifications/{id}`` for the outcome.
+"""
+import asyncio
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Literal, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..config import settings
+from ..db.repository import DatabaseRepository
+from ..db.session import SessionLocal
+from ..game.verify import Verdict, simulate
+from .cache import ResponseCache, leaderboard_cache
+from .index import LeaderboardIndex, leaderboard_index
+from .ingest import ScoreIngestor, record_score, score_ingestor
+
+logger = logging.getLogger(__name__)
+
+Status = Literal["pending", "verified", "rejected"]
+
+# Slack on top of the in-worker budget before the dispatcher stops waiting
+_GRACE = 1.0
+
+
+class VerifierBusy(Exception):
+    """Raised when the verification queue is full."""
+
+
+class Verification:
+    __slots__ = ("id", "username", "mode", "score", "seed", "ticks", "inputs", "status", "rank", "reason")
+
+    def __init__(self, username: str, mode: str, score: int, seed: int, ticks: int, inputs: List[Tuple[int, str]]):
+        self.id = str(uuid4())
+        self.username = username
+        self.mode = mode
+        self.score = score
+        self.seed = seed
+        self.ticks = ticks
+        self.inputs = inputs
+        self.status: Status = "pending"
+        self.rank: Optional[int] = None
+        self.reason: Optional[str] = None
+
+    def result(self) -> dict:
+        return {"id": self.id, "status": self.status, "rank": self.rank, "reason": self.reason}
+
+
+class ScoreVerifier:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        ingestor: ScoreIngestor = score_ingestor,
+        index: LeaderboardIndex = leaderboard_index,
+        cache: ResponseCache = leaderboard_cache,
+        required: bool = True,
+        workers: int = 2,
+        max_pending: int = 1000,
+        timeout: float = 2.0,
+        max_ticks: int = 100_000,
+        keep: int = 10000,
+    ):
+        self.session_factory = session_factory
+        self.ingestor = ingestor
+        self.index = index
+        self.cache = cache
+        self.required = required
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.max_ticks = max_ticks
+        self.keep = keep
+        self.verified = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._results: "OrderedDict[str, Verification]" = OrderedDict()
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Finish every queued verification, then shut the worker processes down."""
+        if self.running:
+            for _ in self._tasks:
+                await self._queue.put(None)
+            await asyncio.gather(*self._tasks)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def check(self, mode: str, seed: int, inputs: List[Tuple[int, str]], ticks: int, score: int) -> Verdict:
+        """Re-simulate one game in a worker process."""
+        if ticks > self.max_ticks:
+            return Verdict(0, "game too long")
+        if self._executor is None:
+            # spawn: workers must not inherit the event loop or the server's threads
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, simulate, mode, seed, inputs, ticks, score, self.timeout,
+        )
+        try:
+            verdict = await asyncio.wait_for(future, self.timeout + _GRACE)
+        except asyncio.TimeoutError:
+            verdict = Verdict(0, "timeout")
+        if verdict.reason == "timeout":
+            self.timeouts += 1
+        return verdict
+
+    def submit(
+        self, username: str, mode: str, score: int, seed: int, ticks: int, inputs: List[Tuple[int, str]],
+    ) -> Verification:
+        if self.saturated:
+            raise VerifierBusy()
+        verification = Verification(username, mode, score, seed, ticks, inputs)
+        self._remember(verification)
+        self._queue.put_nowait(verification)
+        return verification
+
+    def get(self, verification_id: str) -> Optional[Verification]:
+        return self._results.get(verification_id)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+    def _remember(self, verification: Verification):
+        self._results[verification.id] = verification
+        while len(self._results) > self.keep:
+            self._results.popitem(last=False)
+
+    async def _dispatch(self):
+        while True:
+            verification = await self._queue.get()
+            if verification is None:
+                return
+            try:
+                await self._verify(verification)
+            except Exception:
+                logger.exception("Verification %s failed", verification.id)
+                verification.status, verification.reason = "rejected", "internal error"
+
+    async def _verify(self, v: Verification):
+        verdict = await self.check(v.mode, v.seed, v.inputs, v.ticks, v.score)
+        # Only the outcome is kept for polling
+        v.inputs = []
+        if not verdict.ok:
+            self.rejected += 1
+            v.status, v.reason = "rejected", verdict.reason
+            return
+        async with self.session_factory() as session:
+            repo = DatabaseRepository(session, self.index, self.cache)
+            v.rank = await record_score(repo, self.ingestor, v.username, v.score, v.mode)
+        self.verified += 1
+        v.status = "verified"
+
+
+score_verifier = ScoreVerifier(
+    SessionLocal,
+    required=settings.SCORE_VERIFICATION_REQUIRED,
+    workers=settings.SCORE_VERIFY_WORKERS,
+    max_pending=settings.SCORE_VERIFY_MAX_PENDING,
+    timeout=settings.SCORE_VERIFY_TIMEOUT,
+    max_ticks=settings.SCORE_VERIFY_MAX_TICKS,
+)
@@ -0,0 +1,185 @@
+"""
+Day and week leaderboards from per-day rollups.
+
+Every score write also copies its rows into ``leaderboard_buckets`` under
+their UTC day, in the same transaction. A window is a handful of those
+buckets (today's for ``day``, Monday's through today's for ``week``), and
+a window page reads the top ``limit`` rows of each bucket through the
+(mode, bucket, score) index and merges them, all in one statement. Its
+cost depends on the page size and the number of days in the window, never
+on how much history the leaderboard holds.
+
+``BucketCompactor`` runs every ``compact_interval`` seconds: it drops the
+buckets from before the current week, which no window reaches, and trims
+each remaining (mode, day) to its best ``bucket_size`` rows. A window
+therefore ranks at least the top ``bucket_size`` of its period exactly;
+rows past that may go once the compactor has run.
+
+Windows follow calendar days and ISO weeks in UTC, so they reset at
+midnight UTC and on Mondays.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, List, Literal, Optional, Tuple
+
+from sqlalchemy import Connection, bindparam, delete, desc, insert, or_, select, union_all
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..config import settings
+from ..db.session import SessionLocal
+from ..models import db as models
+
+logger = logging.getLogger(__name__)
+
+Window = Literal["day", "week", "all"]
+
+
+def bucket_of(moment: datetime) -> date:
+    """UTC day of a score; naive datetimes are already UTC (that is how SQLite hands them back)."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+
+def today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def window_buckets(window: Window, day: date) -> List[date]:
+    """The buckets making up ``window`` on ``day``, most recent first."""
+    if window == "day":
+        return [day]
+    if window == "week":
+        return [day - timedelta(days=i) for i in range(day.weekday() + 1)]
+    raise ValueError(f"{window!r} is not a bucketed window")
+
+
+@lru_cache
+def page_statement(days: int, by_mode: bool, paged: bool):
+    """
+    SELECT of one window page over ``days`` buckets: the top ``limit`` of
+    each bucket as its own index range, unioned and sorted again. Binds
+    ``day0``..``dayN``, ``limit`` and, as asked for, ``mode`` and the
+    ``score``/``entry_id`` cursor. Built once per shape; composing the
+    union is most of the cost of a page otherwise.
+    """
+    bucket = models.LeaderboardBucket.__table__.c
+    tops = []
+    for i in range(days):
+        stmt = select(bucket.entry_id, bucket.username, bucket.score, bucket.mode, bucket.date)
+        stmt = stmt.where(bucket.bucket == bindparam(f"day{i}"))
+        if by_mode:
+            stmt = stmt.where(bucket.mode == bindparam("mode"))
+        if paged:
+            score = bindparam("score")
+            stmt = stmt.where(bucket.score <= score, or_(bucket.score < score, bucket.entry_id > bindparam("entry_id")))
+        tops.append(select(stmt.order_by(desc(bucket.score), bucket.entry_id).limit(bindparam("limit")).subquery()))
+    merged = union_all(*tops).subquery()
+    return select(merged).order_by(desc(merged.c.score), merged.c.entry_id).limit(bindparam("limit"))
+
+
+def bucket_rows(rows: Iterable[Tuple[str, str, int, str, datetime]], since: Optional[date] = None) -> List[dict]:
+    """``leaderboard_buckets`` rows for (id, username, score, mode, date) entries on or after ``since``."""
+    bucketed = []
+    for entry_id, username, score, mode, moment in rows:
+        bucket = bucket_of(moment)
+        if since is not None and bucket < since:
+            continue
+        bucketed.append({
+            "entry_id": entry_id, "bucket": bucket, "username": username,
+            "score": score, "mode": mode, "date": moment,
+        })
+    return bucketed
+
+
+def rebuild_buckets(conn: Connection, day: date, chunk_size: int = 10_000) -> int:
+    """
+    Refill ``leaderboard_buckets`` with the leaderboard rows of ``day``'s
+    week, reading in keyset chunks; returns the rows bucketed.
+    """
+    since = week_start(day)
+    conn.execute(delete(models.LeaderboardBucket))
+    entry = models.LeaderboardEntry
+    rows, last = 0, None
+    while True:
+        stmt = (
+            select(entry.id, entry.username, entry.score, entry.mode, entry.date)
+            .where(entry.date >= datetime.combine(since, time(), timezone.utc))
+            .order_by(entry.id)
+            .limit(chunk_size)
+        )
+        if last is not None:
+            stmt = stmt.where(entry.id > last)
+        chunk = conn.execute(stmt).all()
+        if not chunk:
+            return rows
+        bucketed = bucket_rows(chunk, since)
+        if bucketed:
+            conn.execute(insert(models.LeaderboardBucket), bucketed)
+        rows += len(bucketed)
+        last = chunk[-1].id
+
+
+class BucketCompactor:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        bucket_size: int = 1000,
+        compact_interval: float = 600.0,
+    ):
+        self.session_factory = session_factory
+        self.bucket_size = bucket_size
+        self.compact_interval = compact_interval
+        self.rows_expired = 0
+        self.rows_trimmed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def compact(self, day: Optional[date] = None) -> Tuple[int, int]:
+        """Expire buckets older than this week and trim the rest; returns (rows expired, rows trimmed)."""
+        # Imported here: the repository imports this module for its bucket helpers
+        from ..db.repository import DatabaseRepository
+
+        async with self.session_factory() as session:
+            expired, trimmed = await DatabaseRepository(session).compact_leaderboard_buckets(
+                week_start(day or today()), self.bucket_size,
+            )
+        self.rows_expired += expired
+        self.rows_trimmed += trimmed
+        return expired, trimmed
+
+    async def _run(self):
+        while True:
+            try:
+                await self.compact()
+            except Exception:
+                logger.exception("Compacting leaderboard buckets failed; will retry")
+            await asyncio.sleep(self.compact_interval)
+
+
+bucket_compactor = BucketCompactor(
+    SessionLocal,
+    bucket_size=settings.LEADERBOARD_BUCKET_SIZE,
+    compact_interval=settings.LEADERBOARD_COMPACT_INTERVAL,
+)
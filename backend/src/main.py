@@ -1,19 +1,78 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 import os
 from .api.routes import router
-from .db.session import engine
-from .db.base import Base
+from .api.ws import router as ws_router
+from .game.arena import live_arena
+from .game.live import live_games
+from .game.lobby import game_registry
+from .game.shards import room_scheduler
+from .leaderboard.ingest import score_ingestor
+from .leaderboard.verifier import score_verifier
+from .leaderboard.windows import bucket_compactor
+from .game.recorder import game_recorder
+from .db.session import engine, SessionLocal
+from .db.migrations import migrate
+from .db.repository import DatabaseRepository
+from .config import settings
+from .utils.password import password_hasher
+from .metrics import collect
+from .metrics.asgi import MetricsMiddleware
+from .metrics.registry import CONTENT_TYPE, registry
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create tables on startup
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if "SECRET_KEY" not in settings.model_fields_set:
+        logger.warning("SECRET_KEY is not set; using a random key, so sessions end when this process does")
+    # One version read when the schema is current; DDL only when it is not
+    await migrate(engine)
+    if settings.LEADERBOARD_INDEX_ENABLED:
+        async with SessionLocal() as session:
+            await DatabaseRepository(session).warm_leaderboard_index()
+    if settings.SCORE_INGEST_ENABLED:
+        score_ingestor.start()
+    score_verifier.start()
+    bucket_compactor.start()
+    if settings.GAME_LOG_ENABLED:
+        game_recorder.start()
+    if settings.GAME_SHARDS:
+        if settings.GAME_LOG_ENABLED:
+            logger.warning("GAME_SHARDS is set: server-run games are ticked in worker processes "
+                           "and are NOT written to the move log (no replays, nothing to resume)")
+        room_scheduler.start()
+        ticker = asyncio.create_task(room_scheduler.run(settings.GAME_SHARD_REBALANCE_INTERVAL))
+    else:
+        ticker = asyncio.create_task(live_games.run(settings.GAME_TICK_INTERVAL))
+    # Rows left marked active by a previous run are listed until they expire
+    await game_registry.warm()
+    game_registry.start(room_scheduler if settings.GAME_SHARDS else live_games)
+    arena_ticker = None
+    if settings.ARENA_ENABLED:
+        arena_ticker = asyncio.create_task(live_arena.run(settings.ARENA_TICK_INTERVAL))
     yield
+    ticker.cancel()
+    # Make sure it has stopped before its rooms are torn down
+    await asyncio.gather(ticker, return_exceptions=True)
+    await game_registry.stop()
+    if arena_ticker is not None:
+        arena_ticker.cancel()
+        await asyncio.gather(arena_ticker, return_exceptions=True)
+    if settings.GAME_SHARDS:
+        await room_scheduler.stop()
+    await game_recorder.stop()
+    await bucket_compactor.stop()
+    # Verified scores feed the ingestor, so finish verifying before draining it
+    await score_verifier.stop()
+    # Arena deaths are recorded through the ingestor too
+    await live_arena.drain()
+    await score_ingestor.stop()
+    password_hasher.shutdown()
 
 app = FastAPI(title="Snake Royale API", version="1.0.0", lifespan=lifespan)
 
@@ -25,33 +84,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(router, prefix="/api")
+app.include_router(ws_router, prefix="/api")
+
+if settings.METRICS_ENABLED:
+    # Outermost, so the timing includes CORS and error handling
+    app.add_middleware(MetricsMiddleware)
+    collect.register()
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(registry.render(), media_type=CONTENT_TYPE)
 
 # Serve React App
 # We expect the frontend build to be in a 'static' directory
-static_dir = "static"
+static_dir = settings.STATIC_DIR
 
 if os.path.exists(static_dir):
-    # Mount assets specifically if they exist to let StaticFiles handle them (better performance/caching)
-    if os.path.exists(os.path.join(static_dir, "assets")):
-        app.mount("/assets", StaticFiles(directory=os.path.join(static_dir, "assets")), name="assets")
+    # Imported only when there is a frontend to serve
+    from fastapi import Request
+    from .web.static import StaticSite
+
+    # Indexed once: requests are a dict lookup, never a filesystem probe
+    static_site = StaticSite.scan(static_dir, settings.STATIC_MEMORY_MAX_BYTES)
 
     # Catch-all for SPA
     @app.get("/{full_path:path}")
-    async def serve_react_app(full_path: str):
+    async def serve_react_app(full_path: str, request: Request):
         # Allow API calls to pass through (though they should match above)
         if full_path.startswith("api/"):
             raise HTTPException(status_code=404, detail="Not Found")
-            
-        # Check if a specific file exists in static (e.g. vite.svg, robots.txt)
-        file_path = os.path.join(static_dir, full_path)
-        if os.path.isfile(file_path):
-            return FileResponse(file_path)
-            
-        # Otherwise return index.html for client-side routing
-        return FileResponse(os.path.join(static_dir, "index.html"))
+        headers = request.headers
+        return static_site.respond(full_path, headers.get("accept-encoding"), headers.get("if-none-match"))
 else:
     @app.get("/")
     def read_root():
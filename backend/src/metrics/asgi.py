@@ -0,0 +1,44 @@
+import time
+
+from .registry import Histogram, registry
+
+request_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ["method", "handler", "status"],
+)
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request into ``request_seconds``.
+
+    A plain ASGI wrapper rather than BaseHTTPMiddleware, which would add a
+    task and a pair of streams to each request. Requests are labelled with
+    the matched route's name (``get_game`` for ``/api/games/{game_id}``), not
+    the raw path, so the number of series stays bounded; anything that
+    matched no route is counted as "unmatched".
+    """
+
+    def __init__(self, app, histogram: Histogram = request_seconds):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            # Routing fills in scope["route"] on the way down
+            handler = getattr(scope.get("route"), "name", None) or "unmatched"
+            self.histogram.labels(scope["method"], handler, str(status)).observe(time.perf_counter() - started)
@@ -0,0 +1,80 @@
+"""
+Scrape-time readings of counters the app already keeps.
+
+The caches, the verifier, the ingestor and the live game loops count hits
+and work as plain attributes; these read them when ``/metrics`` is
+rendered instead of recording anything extra on the hot path.
+"""
+from ..auth.sessions import user_cache
+from ..game.arena import live_arena
+from ..game.live import live_games
+from ..game.shards import room_scheduler
+from ..leaderboard.cache import leaderboard_cache
+from ..leaderboard.ingest import score_ingestor
+from ..leaderboard.verifier import score_verifier
+from ..utils.password import password_hasher
+from .registry import Registry, registry
+
+
+def register(target: Registry = registry):
+    target.sampled(
+        "leaderboard_cache_lookups_total",
+        "Leaderboard response cache lookups",
+        "counter",
+        lambda: {("hit",): leaderboard_cache.hits, ("miss",): leaderboard_cache.misses},
+        ["result"],
+    )
+    target.sampled(
+        "leaderboard_cache_not_modified_total",
+        "Leaderboard reads answered 304 from the cached ETag",
+        "counter",
+        lambda: leaderboard_cache.not_modified,
+    )
+    target.sampled(
+        "user_cache_lookups_total",
+        "Session user cache lookups",
+        "counter",
+        lambda: {("hit",): user_cache.hits, ("miss",): user_cache.misses},
+        ["result"],
+    )
+    target.sampled("bcrypt_pending", "bcrypt calls running or queued", "gauge", lambda: password_hasher.pending)
+    target.sampled(
+        "bcrypt_rejected_total", "bcrypt calls refused because the pool was full", "counter",
+        lambda: password_hasher.rejected,
+    )
+    target.sampled(
+        "score_verifications_total",
+        "Finished score verifications",
+        "counter",
+        lambda: {
+            ("verified",): score_verifier.verified,
+            ("rejected",): score_verifier.rejected,
+            ("timeout",): score_verifier.timeouts,
+        },
+        ["outcome"],
+    )
+    target.sampled("score_verifications_pending", "Scores waiting to be re-simulated", "gauge", lambda: score_verifier.pending)
+    target.sampled(
+        "score_ingest_rows_flushed_total", "Scores written by the batched ingestor", "counter",
+        lambda: score_ingestor.rows_flushed,
+    )
+    target.sampled(
+        "score_ingest_flush_failures_total", "Ingestor batches that failed to write", "counter",
+        lambda: score_ingestor.flush_failures,
+    )
+    target.sampled("live_games", "Server-run games ticking in this process", "gauge", lambda: len(live_games.engine.games))
+    target.sampled("arena_snakes", "Snakes alive in the royale arena", "gauge", lambda: len(live_arena.arena.snakes))
+    target.sampled(
+        "game_shard_games",
+        "Games on each shard at the last rebalance check",
+        "gauge",
+        lambda: {(str(s["shard"]),): s["games"] for s in room_scheduler.last_stats},
+        ["shard"],
+    )
+    target.sampled(
+        "game_shard_load",
+        "Share of the tick interval each shard spent ticking, at the last rebalance check",
+        "gauge",
+        lambda: {(str(s["shard"]),): s["load"] for s in room_scheduler.last_stats},
+        ["shard"],
+    )
@@ -0,0 +1,82 @@
+import re
+import time
+from typing import Callable, Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .registry import registry
+
+query_seconds = registry.histogram(
+    "db_query_duration_seconds",
+    "Time spent executing each SQL statement, by query name",
+    ["query"],
+)
+checkout_seconds = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+)
+
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE|INDEX)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?"?(\w+)', re.IGNORECASE)
+# Statements are reused verbatim (SQLAlchemy's compiled cache), so a handful of names covers them
+_MAX_NAMES = 1024
+_names: Dict[str, str] = {}
+
+
+def query_name(statement: str) -> str:
+    """
+    A short, bounded label for a statement: its verb and first table,
+    e.g. "select leaderboard" or "insert users".
+    """
+    name = _names.get(statement)
+    if name is None:
+        words = statement.split(None, 1)
+        verb = words[0].lower() if words else "empty"
+        table = _TABLE.search(statement)
+        name = f"{verb} {table.group(1).lower()}" if table else verb
+        if len(_names) < _MAX_NAMES:
+            _names[statement] = name
+    return name
+
+
+def instrument_engine(engine: AsyncEngine) -> Callable[[], None]:
+    """
+    Time every statement ``engine`` runs and every wait for one of its
+    pooled connections. Returns a function that removes the hooks again.
+
+    The pool has no "before checkout" event, so the wait is timed by
+    wrapping the pool's own ``_do_get``; a pool recreated by ``dispose``
+    is not timed until the engine is instrumented again.
+    """
+    sync_engine = engine.sync_engine
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        context.metrics_started = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "metrics_started", None)
+        if started is not None:
+            query_seconds.labels(query_name(statement)).observe(time.perf_counter() - started)
+
+    event.listen(sync_engine, "before_cursor_execute", before)
+    event.listen(sync_engine, "after_cursor_execute", after)
+
+    pool = sync_engine.pool
+    do_get = pool._do_get
+
+    def timed_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            checkout_seconds.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_get
+
+    def remove():
+        event.remove(sync_engine, "before_cursor_execute", before)
+        event.remove(sync_engine, "after_cursor_execute", after)
+        if pool.__dict__.get("_do_get") is timed_get:
+            del pool._do_get
+
+    return remove
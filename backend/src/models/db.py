@@ -1,6 +1,7 @@
-from sqlalchemy import String, Integer, DateTime, Boolean, JSON
+from sqlalchemy import BigInteger, String, Integer, Date, DateTime, Boolean, JSON, Index, true
 from sqlalchemy.orm import Mapped, mapped_column
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from typing import Optional
 from uuid import uuid4
 from ..db.base import Base
 
@@ -17,11 +18,67 @@ class LeaderboardEntry(Base):
     __tablename__ = "leaderboard"
     
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
-    username: Mapped[str] = mapped_column(String, nullable=False)
+    username: Mapped[str] = mapped_column(String, nullable=False, index=True)
     score: Mapped[int] = mapped_column(Integer, nullable=False)
     mode: Mapped[str] = mapped_column(String, nullable=False)
     date: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+# Serves ORDER BY score DESC, id per mode and the keyset page predicates
+Index(
+    "ix_leaderboard_mode_score_id",
+    LeaderboardEntry.mode,
+    LeaderboardEntry.score.desc(),
+    LeaderboardEntry.id,
+)
+
+class UserStats(Base):
+    """
+    Per-player, per-mode aggregate of the leaderboard, kept in step with it
+    by every score write. Players are identified by username, as on the
+    leaderboard itself.
+    """
+    __tablename__ = "user_stats"
+
+    username: Mapped[str] = mapped_column(String, primary_key=True)
+    mode: Mapped[str] = mapped_column(String, primary_key=True)
+    best_score: Mapped[int] = mapped_column(Integer, nullable=False)
+    games_played: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_score: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    last_played: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+# One row per player: the deduplicated leaderboard and its keyset pages
+Index("ix_user_stats_mode_best", UserStats.mode, UserStats.best_score.desc(), UserStats.username)
+
+class LeaderboardBucket(Base):
+    """
+    Copy of a leaderboard row in its UTC day's bucket, for the day and week
+    leaderboards. Compaction keeps the best rows of each (mode, day) and
+    drops days that no window reaches any more.
+    """
+    __tablename__ = "leaderboard_buckets"
+
+    entry_id: Mapped[str] = mapped_column(String, primary_key=True)
+    bucket: Mapped[date] = mapped_column(Date, nullable=False)
+    username: Mapped[str] = mapped_column(String, nullable=False)
+    score: Mapped[int] = mapped_column(Integer, nullable=False)
+    mode: Mapped[str] = mapped_column(String, nullable=False)
+    date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+# A window read takes the top of each day's bucket, per mode or across modes
+Index(
+    "ix_leaderboard_buckets_mode_rank",
+    LeaderboardBucket.mode,
+    LeaderboardBucket.bucket,
+    LeaderboardBucket.score.desc(),
+    LeaderboardBucket.entry_id,
+)
+Index(
+    "ix_leaderboard_buckets_rank",
+    LeaderboardBucket.bucket,
+    LeaderboardBucket.score.desc(),
+    LeaderboardBucket.entry_id,
+)
+
 class ActiveGame(Base):
     __tablename__ = "active_games"
     
@@ -34,3 +91,39 @@ class ActiveGame(Base):
     food: Mapped[dict] = mapped_column(JSON, nullable=False)
     direction: Mapped[str] = mapped_column(String, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # RNG seed of a server-run game, kept for its replay
+    seed: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+
+# Running games only: the lobby's warm-up read and expiry update never scan
+# finished rows. Queries must say ``is_active == true()`` for the planner to
+# match the predicate.
+Index(
+    "ix_active_games_running",
+    ActiveGame.mode,
+    ActiveGame.score.desc(),
+    ActiveGame.id,
+    postgresql_where=ActiveGame.is_active == true(),
+    sqlite_where=ActiveGame.is_active == true(),
+)
+
+class GameEvent(Base):
+    """
+    One tick of a game: the direction moved and, if the snake ate, where
+    the next food appeared. Append-only; together with a snapshot it
+    rebuilds the game at any later tick.
+    """
+    __tablename__ = "game_events"
+
+    game_id: Mapped[str] = mapped_column(String, primary_key=True)
+    tick: Mapped[int] = mapped_column(Integer, primary_key=True)
+    direction: Mapped[str] = mapped_column(String(5), nullable=False)
+    ate: Mapped[bool] = mapped_column(Boolean, default=False)
+    food: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+class GameSnapshot(Base):
+    """Full game state (``SnakeGame.state()``) at a tick, written every few hundred ticks."""
+    __tablename__ = "game_snapshots"
+
+    game_id: Mapped[str] = mapped_column(String, primary_key=True)
+    tick: Mapped[int] = mapped_column(Integer, primary_key=True)
+    state: Mapped[dict] = mapped_column(JSON, nullable=False)
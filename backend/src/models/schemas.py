@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import List, Optional, Literal
+from typing import List, Optional, Literal, Tuple
 from datetime import datetime
 from uuid import UUID, uuid4
 
@@ -13,7 +13,7 @@ class User(BaseModel):
 
 class UserCreate(BaseModel):
     email: EmailStr
-    username: str
+    username: str = Field(min_length=1, max_length=32)
     password: str
 
 class UserLogin(BaseModel):
@@ -24,14 +24,31 @@ class LeaderboardEntry(BaseModel):
     id: str
     username: str
     score: int
-    mode: Literal['passthrough', 'walls']
+    mode: Literal['passthrough', 'walls', 'royale']
     date: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
+class PlayerStats(BaseModel):
+    """One player's aggregate over every score they submitted in a mode."""
+    username: str
+    mode: Literal['passthrough', 'walls', 'royale']
+    best_score: int = Field(alias="bestScore")
+    games_played: int = Field(alias="gamesPlayed")
+    total_score: int = Field(alias="totalScore")
+    last_played: datetime = Field(alias="lastPlayed")
+
+    model_config = ConfigDict(populate_by_name=True)
+
 class ScoreSubmission(BaseModel):
     score: int
     mode: Literal['passthrough', 'walls']
+    # Food RNG seed, moves played and accepted direction changes as
+    # (moves made before the change, direction); required for verification
+    seed: Optional[int] = Field(None, ge=0, le=0xFFFFFFFF)
+    # Capped at the verifier's max ticks by the route, before anything is queued
+    ticks: int = Field(0, ge=0)
+    inputs: List[Tuple[int, Literal['up', 'down', 'left', 'right']]] = []
 
 class Point(BaseModel):
     x: int
@@ -42,7 +59,7 @@ class ActiveGame(BaseModel):
     player_id: str = Field(alias="playerId")
     player_name: str = Field(alias="playerName")
     score: int
-    mode: Literal['passthrough', 'walls']
+    mode: Literal['passthrough', 'walls', 'royale']
     snake: List[Point]
     food: Point
     direction: Literal['up', 'down', 'left', 'right']
@@ -50,6 +67,59 @@ class ActiveGame(BaseModel):
 
     model_config = ConfigDict(populate_by_name=True, from_attributes=True)
 
+class LobbyGame(BaseModel):
+    """A running game as the lobby lists it: no board state."""
+    id: str
+    player_name: str = Field(alias="playerName")
+    mode: Literal['passthrough', 'walls', 'royale']
+    score: int
+    length: int
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class MoveEventSave(BaseModel):
+    tick: int
+    direction: Literal['up', 'down', 'left', 'right']
+    ate: bool = False
+    food: Optional[Point] = None  # where the next food appeared, when ate is true
+
 class GameStateSave(BaseModel):
     score: int
     mode: Literal['passthrough', 'walls']
+    game_id: Optional[str] = Field(None, alias="gameId")
+    events: List[MoveEventSave] = []
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class ReplayFrame(BaseModel):
+    id: str
+    mode: Literal['passthrough', 'walls']
+    seed: Optional[int] = None
+    tick: int
+    ticks: int
+    keyframe_interval: int = Field(alias="keyframeInterval")
+    final_score: int = Field(alias="finalScore")
+    score: int
+    snake: List[Point]
+    food: Optional[Point] = None
+    direction: Literal['up', 'down', 'left', 'right']
+    is_over: bool = Field(alias="isOver")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class LiveGameStart(BaseModel):
+    mode: Literal['passthrough', 'walls']
+
+class GameTurn(BaseModel):
+    direction: Literal['up', 'down', 'left', 'right']
+
+class ArenaJoin(BaseModel):
+    snake_id: int = Field(alias="snakeId")
+    grid: int
+    snake: List[Tuple[int, int]]
+    direction: Literal['up', 'down', 'left', 'right']
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class ArenaTurn(BaseModel):
+    direction: Literal['up', 'down', 'left', 'right']
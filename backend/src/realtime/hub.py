@@ -0,0 +1,120 @@
+import asyncio
+import json
+from typing import Callable, Dict, Optional, Set, Tuple
+
+
+class Frame:
+    """
+    A payload plus its wire encodings, each produced at most once.
+
+    JSON is always available; the binary form exists only when the
+    publisher supplies an encoder for it.
+    """
+
+    __slots__ = ("payload", "_binary_encoder", "_text", "_binary")
+
+    def __init__(self, payload: dict, binary_encoder: Optional[Callable[[dict], bytes]] = None):
+        self.payload = payload
+        self._binary_encoder = binary_encoder
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    @property
+    def has_binary(self) -> bool:
+        return self._binary_encoder is not None
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.payload, separators=(",", ":"))
+        return self._text
+
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = self._binary_encoder(self.payload)
+        return self._binary
+
+
+Queued = Tuple[str, int, Frame]  # (topic, tick, frame)
+
+
+class Subscription:
+    """
+    One connection's inbox. Frames are shared by reference, never copied
+    or re-encoded.
+
+    The queue is bounded; a consumer that falls behind has its backlog
+    dropped and the affected topics flagged in ``resync`` so the sender can
+    replace the missed deltas with a fresh snapshot.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.queue: asyncio.Queue[Queued] = asyncio.Queue(maxsize)
+        self.topics: Set[str] = set()
+        self.resync: Set[str] = set()
+
+    def push(self, topic: str, tick: int, frame: Frame):
+        try:
+            self.queue.put_nowait((topic, tick, frame))
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.resync |= self.topics
+
+    async def get(self) -> Queued:
+        return await self.queue.get()
+
+
+class FrameHub:
+    """
+    Topic-based fan-out. Every subscriber of a topic receives the same
+    ``Frame`` object, so each encoding is computed once however many
+    connections are watching.
+
+    ``on_watch(topic, watched)`` is told when a topic gets its first
+    subscriber and when it loses its last one.
+    """
+
+    def __init__(self, on_watch: Optional[Callable[[str, bool], None]] = None):
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self.on_watch = on_watch
+        self.frames_published = 0
+        self.frames_delivered = 0
+
+    def subscribe(self, subscription: Subscription, topic: str):
+        if topic not in self._topics and self.on_watch is not None:
+            self.on_watch(topic, True)
+        self._topics.setdefault(topic, set()).add(subscription)
+        subscription.topics.add(topic)
+
+    def unsubscribe(self, subscription: Subscription, topic: str | None = None):
+        topics = [topic] if topic else list(subscription.topics)
+        for name in topics:
+            subscribers = self._topics.get(name)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[name]
+                    if self.on_watch is not None:
+                        self.on_watch(name, False)
+            subscription.topics.discard(name)
+            subscription.resync.discard(name)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._topics
+
+    def topics(self) -> Set[str]:
+        return set(self._topics)
+
+    def resync(self, topic: str):
+        """Flag every subscriber of ``topic`` for a fresh snapshot, e.g. after frames were lost upstream."""
+        for subscription in self._topics.get(topic, ()):
+            subscription.resync.add(topic)
+
+    def publish(self, topic: str, tick: int, frame: Frame):
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return
+        self.frames_published += 1
+        self.frames_delivered += len(subscribers)
+        for subscription in subscribers:
+            subscription.push(topic, tick, frame)
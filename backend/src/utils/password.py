@@ -1,17 +1,33 @@
-import bcrypt
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
 
+from ..config import settings
+from ..metrics.registry import registry
 
-def hash_password(password: str) -> str:
+T = TypeVar("T")
+
+bcrypt_calls = registry.counter("bcrypt_calls_total", "bcrypt hashes and verifications run", ["function"])
+bcrypt_seconds = registry.histogram(
+    "bcrypt_duration_seconds", "Time a bcrypt call took, including its wait for a pool thread", ["function"]
+)
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """
     Hash a password using bcrypt.
-    
+
     Args:
         password: Plain text password to hash
-        
+        rounds: bcrypt work factor (defaults to bcrypt's own default)
+
     Returns:
         Hashed password as a string
     """
-    salt = bcrypt.gensalt()
+    import bcrypt  # deferred: not needed until the first signup or login
+
+    salt = bcrypt.gensalt(rounds) if rounds else bcrypt.gensalt()
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -19,15 +35,89 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain password against a hashed password.
-    
+
     Args:
         plain_password: Plain text password to verify
         hashed_password: Hashed password to compare against
-        
+
     Returns:
         True if password matches, False otherwise
     """
+    import bcrypt
+
     return bcrypt.checkpw(
         plain_password.encode('utf-8'),
         hashed_password.encode('utf-8')
     )
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Work factor encoded in a bcrypt hash ("$2b$12$..."), or None if unparseable."""
+    parts = hashed_password.split("$")
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool already has its maximum amount of queued work."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool.
+
+    bcrypt releases the GIL while hashing, so worker threads keep the event
+    loop free. At most ``max_pending`` calls may be running or queued; beyond
+    that ``HasherBusy`` is raised immediately so callers can shed load instead
+    of piling up behind a login storm.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_pending: int):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self.saturated:
+            self.rejected += 1
+            raise HasherBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self.pending += 1
+        bcrypt_calls.labels(fn.__name__).inc()
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            bcrypt_seconds.labels(fn.__name__).observe(time.perf_counter() - started)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return hash_rounds(hashed_password) != self.rounds
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.BCRYPT_WORKERS,
+    max_pending=settings.BCRYPT_MAX_PENDING,
+)
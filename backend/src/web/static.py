@@ -0,0 +1,209 @@
+"""
+The built frontend, indexed once and served from memory where it can be.
+
+``StaticSite.scan`` walks the static directory at startup and records, per
+URL path, the content type, caching policy and every encoding available:
+the file itself plus ``.br``/``.gz`` siblings written at build time by
+
+    python -m src.web.static compress static
+
+A request is then one dict lookup: pick the best encoding the client
+accepts, answer 304 if its ETag matches, and send bytes already in memory
+(files up to ``memory_max_bytes``) or stream the file with the stat taken
+at scan time. Vite's hashed ``assets/`` are cached as immutable; anything
+else (``index.html`` above all) is revalidated on every load.
+
+Unknown paths get ``index.html`` so client-side routes work, except under
+``assets/``, where a missing file is a real 404.
+"""
+import argparse
+import gzip
+import mimetypes
+import os
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import FileResponse, Response
+
+from ..leaderboard.cache import etag_matches
+
+IMMUTABLE_PREFIX = "assets/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Preferred first; identity is always available
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".xml", ".map", ".webmanifest", ".wasm", ".ico"}
+MIN_COMPRESS_BYTES = 1024
+
+
+class Variant:
+    """One encoding of a file: where it is, its validator and, if small, its bytes."""
+
+    __slots__ = ("encoding", "path", "stat", "etag", "body")
+
+    def __init__(self, encoding: str, path: str, stat: os.stat_result, etag: str, body: Optional[bytes]):
+        self.encoding = encoding
+        self.path = path
+        self.stat = stat
+        self.etag = etag
+        self.body = body
+
+
+class StaticFile:
+    __slots__ = ("media_type", "cache_control", "variants", "vary")
+
+    def __init__(self, media_type: str, cache_control: str, variants: Dict[str, Variant]):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.variants = variants
+        self.vary = len(variants) > 1
+
+    def choose(self, accept_encoding: Optional[str]) -> Variant:
+        if self.vary and accept_encoding:
+            accepted = _accepted(accept_encoding)
+            for encoding, _ in ENCODINGS:
+                if encoding in self.variants and encoding in accepted:
+                    return self.variants[encoding]
+        return self.variants["identity"]
+
+
+_accepted_cache: Dict[str, frozenset] = {}
+
+
+def _accepted(header: str) -> frozenset:
+    """Encodings an ``Accept-Encoding`` header allows (q > 0); browsers send a handful of distinct headers."""
+    accepted = _accepted_cache.get(header)
+    if accepted is None:
+        names = set()
+        for item in header.split(","):
+            name, _, params = item.strip().partition(";")
+            q = params.strip().removeprefix("q=")
+            try:
+                allowed = not params or float(q) > 0
+            except ValueError:
+                allowed = False
+            if allowed:
+                names.add(name.strip().lower())
+        if "*" in names:
+            names.update(encoding for encoding, _ in ENCODINGS)
+        accepted = frozenset(names)
+        if len(_accepted_cache) < 256:
+            _accepted_cache[header] = accepted
+    return accepted
+
+
+def _media_type(path: str) -> str:
+    media_type, _ = mimetypes.guess_type(path)
+    if path.endswith((".js", ".mjs")):
+        # Some platforms' mimetypes tables still say application/javascript or nothing at all
+        media_type = "text/javascript"
+    return media_type or "application/octet-stream"
+
+
+def _etag(stat: os.stat_result, suffix: str = "") -> str:
+    # Size and mtime survive into every replica of the same image, so the validator agrees across them
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{suffix}"'
+
+
+class StaticSite:
+    def __init__(self, files: Dict[str, StaticFile]):
+        self.files = files
+        self.index = files.get("index.html")
+
+    @classmethod
+    def scan(cls, directory: str, memory_max_bytes: int = 64 * 1024) -> "StaticSite":
+        files: Dict[str, StaticFile] = {}
+        for root, _, names in os.walk(directory):
+            present = set(names)
+            for name in names:
+                if any(name.endswith(suffix) and name[: -len(suffix)] in present for _, suffix in ENCODINGS):
+                    continue  # a precompressed variant, picked up with its original
+                path = os.path.join(root, name)
+                url = os.path.relpath(path, directory).replace(os.sep, "/")
+                stat = os.stat(path)
+                variants = {"identity": _load("identity", path, stat, _etag(stat), memory_max_bytes)}
+                for encoding, suffix in ENCODINGS:
+                    if name + suffix not in present:
+                        continue
+                    encoded = os.stat(path + suffix)
+                    if encoded.st_size < stat.st_size:
+                        variants[encoding] = _load(encoding, path + suffix, encoded, _etag(stat, "-" + suffix[1:]),
+                                                   memory_max_bytes)
+                cache_control = IMMUTABLE if url.startswith(IMMUTABLE_PREFIX) else REVALIDATE
+                files[url] = StaticFile(_media_type(name), cache_control, variants)
+        return cls(files)
+
+    def lookup(self, path: str) -> Optional[StaticFile]:
+        found = self.files.get(path)
+        if found is None and not path.startswith(IMMUTABLE_PREFIX):
+            return self.index
+        return found
+
+    def respond(self, path: str, accept_encoding: Optional[str] = None, if_none_match: Optional[str] = None) -> Response:
+        found = self.lookup(path)
+        if found is None:
+            return Response(status_code=404)
+        variant = found.choose(accept_encoding)
+        headers = {"ETag": variant.etag, "Cache-Control": found.cache_control}
+        if found.vary:
+            headers["Vary"] = "Accept-Encoding"
+        if etag_matches(if_none_match, variant.etag):
+            return Response(status_code=304, headers=headers)
+        if variant.encoding != "identity":
+            headers["Content-Encoding"] = variant.encoding
+        if variant.body is not None:
+            return Response(variant.body, media_type=found.media_type, headers=headers)
+        return FileResponse(variant.path, media_type=found.media_type, headers=headers, stat_result=variant.stat)
+
+
+def _load(encoding: str, path: str, stat: os.stat_result, etag: str, memory_max_bytes: int) -> Variant:
+    body = None
+    if stat.st_size <= memory_max_bytes:
+        with open(path, "rb") as f:
+            body = f.read()
+    return Variant(encoding, path, stat, etag, body)
+
+
+def compress(directory: str, min_bytes: int = MIN_COMPRESS_BYTES) -> List[Tuple[str, int, Dict[str, int]]]:
+    """
+    Write ``.gz`` (and, with the ``brotli`` package installed, ``.br``)
+    next to every compressible file, keeping only variants that are smaller.
+    Returns (path, size, {encoding: size}) per file compressed.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    written = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if os.path.splitext(name)[1] not in COMPRESSIBLE:
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < min_bytes:
+                continue
+            encoded = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                encoded["br"] = brotli.compress(data, quality=11)
+            sizes = {}
+            for encoding, suffix in ENCODINGS:
+                body = encoded.get(encoding)
+                if body is None or len(body) >= len(data):
+                    continue
+                with open(path + suffix, "wb") as f:
+                    f.write(body)
+                sizes[encoding] = len(body)
+            written.append((path, len(data), sizes))
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("compress",))
+    parser.add_argument("directory", nargs="?", default="static")
+    args = parser.parse_args()
+    for path, size, sizes in compress(args.directory):
+        variants = ", ".join(f"{encoding} {encoded}" for encoding, encoded in sizes.items())
+        print(f"{path}: {size} -> {variants or 'kept uncompressed'}")
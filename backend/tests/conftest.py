@@ -1,3 +1,8 @@
+import os
+
+# Most tests post bare scores; test_score_verify turns verification on explicitly
+os.environ.setdefault("SCORE_VERIFICATION_REQUIRED", "false")
+
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
@@ -5,6 +10,8 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from src.main import app
 from src.db.session import get_db
 from src.db.base import Base
+from src.auth.sessions import revoked_tokens, user_cache
+from src.leaderboard.cache import leaderboard_cache
 
 # Use in-memory SQLite for tests
 TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
@@ -38,3 +45,6 @@ async def client(test_db_session):
         yield ac
     
     app.dependency_overrides.clear()
+    user_cache.clear()
+    revoked_tokens.clear()
+    leaderboard_cache.clear()
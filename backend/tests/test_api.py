@@ -18,6 +18,11 @@ async def test_auth_flow(client: AsyncClient):
     })
     assert response.status_code == 201
     assert response.json()["success"] is True
+    # Names travel in binary game frames; keep them short
+    response = await client.post("/api/auth/signup", json={
+        "email": "long@snake.game", "username": "x" * 33, "password": "password123"
+    })
+    assert response.status_code == 422
     
     # Login
     response = await client.post("/api/auth/login", json={
@@ -26,13 +31,10 @@ async def test_auth_flow(client: AsyncClient):
     })
     assert response.status_code == 200
     assert response.json()["success"] is True
+    token = response.json()["token"]
     
-    # Check Me (with mocked behavior - needs header in real app, but we stubbed header check logic)
-    # The current routes.py stubbed 'me' to rely on header or demo user.
-    # But we want to test REAL auth flow if possible?
-    # Our `get_current_user_dep` implementation accepts "Bearer <email>" as a hack.
-    # Let's use that hack.
-    response = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {email}"})
+    # Check Me with the session token issued at login
+    response = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
     assert response.json()["email"] == email
 
@@ -40,15 +42,16 @@ async def test_auth_flow(client: AsyncClient):
 async def test_leaderboard(client: AsyncClient):
     # Submit score
     email = "leader@snake.game"
-    await client.post("/api/auth/signup", json={
+    response = await client.post("/api/auth/signup", json={
         "email": email,
         "username": "Leader",
         "password": "pwd"
     })
+    token = response.json()["token"]
     
     response = await client.post("/api/leaderboard", 
         json={"score": 500, "mode": "walls"},
-        headers={"Authorization": f"Bearer {email}"}
+        headers={"Authorization": f"Bearer {token}"}
     )
     assert response.status_code == 200
     assert response.json()["rank"] == 1
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import random
+
+import pytest
+from httpx import AsyncClient
+
+from src.api.routes import get_arena
+from src.game.arena import ARENA_TOPIC, Arena, ArenaFull, ArenaSnake, LiveArena
+from src.main import app
+from src.realtime.hub import Subscription
+
+
+def place(arena: Arena, points: list, direction: str) -> ArenaSnake:
+    """Put a snake on the board at exact (x, y) points, head first."""
+    size = arena.grid_size
+    body = [y * size + x for x, y in points]
+    snake = ArenaSnake(arena._next_id, f"p{arena._next_id}", f"Player {arena._next_id}", body, direction)
+    arena._next_id += 1
+    for cell in body:
+        arena.occupied[cell] = 1
+    arena.snakes[snake.id] = snake
+    return snake
+
+
+def check_occupancy(arena: Arena):
+    """The incremental grid must match the bodies exactly, with no shared cells."""
+    cells = [cell for snake in arena.snakes.values() for cell in snake.body]
+    assert len(cells) == len(set(cells))
+    expected = bytearray(len(arena.occupied))
+    for cell in cells:
+        expected[cell] = 1
+    assert arena.occupied == expected
+    assert not any(arena.occupied[cell] for cell in arena.food)
+
+
+def test_head_into_body_kills_only_the_mover():
+    arena = Arena(grid_size=20, food=0)
+    wall = place(arena, [(5, 5), (5, 6), (5, 7), (5, 8)], "up")
+    mover = place(arena, [(3, 6), (2, 6), (1, 6)], "right")
+    arena.step()
+    assert mover.id in arena.snakes
+    result = arena.step()
+    # (4, 6) -> (5, 6), still part of the other body after it moved up
+    assert [snake.id for snake in result.died] == [mover.id]
+    assert wall.id in arena.snakes
+    check_occupancy(arena)
+
+
+def test_head_to_head_kills_both_and_drops_food():
+    arena = Arena(grid_size=20, food=0)
+    left = place(arena, [(4, 10), (3, 10), (2, 10)], "right")
+    right = place(arena, [(6, 10), (7, 10), (8, 10)], "left")
+    result = arena.step()
+    assert {snake.id for snake in result.died} == {left.id, right.id}
+    assert arena.snakes == {}
+    # Both tails already moved on; the cells left become food on alternate segments
+    assert set(result.food_added) == set(arena.food) == {10 * 20 + 4, 10 * 20 + 6}
+    check_occupancy(arena)
+
+
+def test_heads_may_follow_a_moving_tail():
+    arena = Arena(grid_size=20, food=0)
+    leader = place(arena, [(5, 5), (4, 5), (3, 5)], "right")
+    follower = place(arena, [(3, 4), (3, 3), (3, 2)], "down")
+    result = arena.step()
+    assert result.died == []
+    assert follower.body[0] == 5 * 20 + 3 and leader.body[-1] == 5 * 20 + 4
+    check_occupancy(arena)
+
+
+def test_leaving_the_board_is_fatal():
+    arena = Arena(grid_size=20, food=0)
+    snake = place(arena, [(19, 0), (18, 0), (17, 0)], "right")
+    assert arena.step().died == [snake]
+    assert not any(arena.occupied)
+
+
+def test_food_grows_and_is_topped_up():
+    arena = Arena(grid_size=30, food=5, seed=1)
+    snake = place(arena, [(10, 10), (9, 10), (8, 10)], "right")
+    arena.food.discard(10 * 30 + 11)
+    arena.food.add(10 * 30 + 11)
+    result = arena.step()
+    assert snake.score == 10 and len(snake.body) == 4
+    assert result.moved == [(snake.id, 10 * 30 + 11, True)]
+    assert result.food_removed == [10 * 30 + 11]
+    assert len(arena.food) == 5
+
+
+def test_set_direction_rejects_reversal():
+    arena = Arena(grid_size=20, food=0)
+    snake = place(arena, [(5, 5), (4, 5), (3, 5)], "right")
+    assert not arena.set_direction(snake.id, "left")
+    assert arena.set_direction(snake.id, "up")
+    assert not arena.set_direction(999, "up")
+
+
+def test_spawn_fails_on_a_tiny_board():
+    with pytest.raises(ArenaFull):
+        Arena(grid_size=10, food=0).spawn("p", "P")
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_crowded_board_stays_consistent(seed):
+    arena = Arena(grid_size=80, food=100, seed=seed)
+    turns = random.Random(seed)
+    for i in range(80):
+        arena.spawn(f"p{i}", f"P{i}")
+    check_occupancy(arena)
+    for _ in range(300):
+        for snake in list(arena.snakes.values()):
+            if turns.random() < 0.3:
+                arena.set_direction(snake.id, turns.choice(["up", "down", "left", "right"]))
+        arena.step()
+        check_occupancy(arena)
+        while len(arena.snakes) < 80:
+            arena.spawn("again", "Again")
+
+
+def test_deltas_rebuild_the_board():
+    live = LiveArena(Arena(grid_size=60, food=50, seed=3))
+    for i in range(20):
+        live.join(f"p{i}", f"P{i}")
+    subscription = Subscription(maxsize=1000)
+    live.hub.subscribe(subscription, ARENA_TOPIC)
+    state = json.loads(live.snapshot_frame().text())
+    snakes = {snake["id"]: [tuple(p) for p in snake["body"]] for snake in state["snakes"]}
+    food = {tuple(p) for p in state["food"]}
+
+    turns = random.Random(3)
+    for tick in range(200):
+        for player in list(live.players):
+            if turns.random() < 0.2:
+                live.turn(player, turns.choice(["up", "down", "left", "right"]))
+        if tick % 10 == 0:
+            live.join(f"late{tick}", "Late")
+        live.step()
+        _, _, frame = subscription.queue.get_nowait()
+        delta = json.loads(frame.text())
+        for snake in delta.get("joined", []):
+            snakes[snake["id"]] = [tuple(p) for p in snake["body"]]
+        for snake_id, x, y, grew in delta.get("moves", []):
+            body = [(x, y)] + snakes[snake_id]
+            snakes[snake_id] = body if grew else body[:-1]
+        for snake_id in delta.get("died", []):
+            del snakes[snake_id]
+        food -= {tuple(p) for p in delta.get("eaten", [])}
+        food |= {tuple(p) for p in delta.get("food", [])}
+
+        assert snakes == {
+            snake.id: [live.arena.point(cell) for cell in snake.body] for snake in live.arena.snakes.values()
+        }
+        assert food == {live.arena.point(cell) for cell in live.arena.food}
+
+
+@pytest.mark.asyncio
+async def test_scores_are_recorded_on_death():
+    recorded = []
+
+    async def on_death(snake):
+        await asyncio.sleep(0.01)
+        recorded.append((snake.player_name, snake.score))
+
+    live = LiveArena(Arena(grid_size=20, food=0), on_death=on_death)
+    snake = place(live.arena, [(18, 5), (17, 5), (16, 5)], "right")
+    snake.score = 30
+    live.players[snake.player_id] = snake.id
+    live.step()
+    live.step()
+    await live.drain()
+    assert recorded == [(snake.player_name, 30)]
+    assert live.snake_for(snake.player_id) is None
+
+
+@pytest.mark.asyncio
+async def test_arena_api(client: AsyncClient):
+    live = LiveArena(Arena(grid_size=40, food=10, seed=5), max_snakes=1)
+    app.dependency_overrides[get_arena] = lambda: live
+    response = await client.post("/api/auth/signup", json={"email": "a@snake.game", "username": "Arena", "password": "pwd"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    assert (await client.post("/api/arena/join")).status_code == 401
+    assert (await client.post("/api/arena/turn", json={"direction": "up"}, headers=headers)).status_code == 404
+
+    response = await client.post("/api/arena/join", headers=headers)
+    assert response.status_code == 200
+    joined = response.json()
+    assert joined["grid"] == 40 and len(joined["snake"]) == 3
+    # Joining again returns the same snake
+    assert (await client.post("/api/arena/join", headers=headers)).json()["snakeId"] == joined["snakeId"]
+
+    turn = next(d for d in ("up", "down", "left", "right") if d != joined["direction"])
+    response = await client.post("/api/arena/turn", json={"direction": turn}, headers=headers)
+    assert response.status_code == 200
+
+    state = (await client.get("/api/arena")).json()
+    assert [snake["playerName"] for snake in state["snakes"]] == ["Arena"]
+    assert len(state["food"]) == 10
+
+    response = await client.post("/api/auth/signup", json={"email": "b@snake.game", "username": "Late", "password": "pwd"})
+    response = await client.post("/api/arena/join", headers={"Authorization": f"Bearer {response.json()['token']}"})
+    assert response.status_code == 503
@@ -0,0 +1,135 @@
+import random
+
+import pytest
+from httpx import AsyncClient
+from starlette.testclient import TestClient
+
+from src.game import codec
+from src.game.engine import DELTAS
+from src.game.live import live_games
+from src.main import app
+from src.models import db as models
+from src.models import schemas
+
+
+def random_game(rng: random.Random, grid: int = 20, contiguous: bool = True) -> dict:
+    x, y = rng.randrange(grid), rng.randrange(grid)
+    snake = [{"x": x, "y": y}]
+    for _ in range(rng.randrange(0, 300)):
+        if contiguous:
+            dx, dy = DELTAS[rng.choice(list(DELTAS))]
+            x, y = (x + dx) % grid, (y + dy) % grid
+        else:
+            x, y = rng.randrange(grid), rng.randrange(grid)
+        snake.append({"x": x, "y": y})
+    return {
+        "id": str(rng.getrandbits(64)) if rng.random() < 0.3 else f"{rng.getrandbits(128):032x}",
+        "playerId": f"player-{rng.randrange(1000)}",
+        "playerName": rng.choice(["Ann", "Bob", "Zoë 🐍", ""]),
+        "score": rng.randrange(10 ** 6),
+        "mode": rng.choice(["walls", "passthrough"]),
+        "snake": snake,
+        "food": {"x": rng.randrange(grid), "y": rng.randrange(grid)},
+        "direction": rng.choice(["up", "down", "left", "right"]),
+        "isActive": rng.random() < 0.5,
+    }
+
+
+def as_schema_json(state: dict) -> dict:
+    return schemas.ActiveGame.model_validate(state).model_dump(mode="json", by_alias=True)
+
+
+@pytest.mark.parametrize("grid,contiguous", [(20, True), (20, False), (500, True), (500, False)])
+def test_snapshot_round_trip(grid, contiguous):
+    rng = random.Random(grid + contiguous)
+    for _ in range(200):
+        state = random_game(rng, grid, contiguous)
+        state["id"] = state["id"] if rng.random() < 0.5 else "7e481f5e-84c8-4d23-b694-f78cf15b46b3"
+        decoded = codec.decode(codec.encode_snapshot({**state, "tick": 42}, grid))
+        assert decoded.pop("type") == "snapshot"
+        assert decoded.pop("tick") == 42
+        assert decoded == as_schema_json(state)
+
+
+def test_delta_round_trip():
+    rng = random.Random(1)
+    for _ in range(500):
+        delta = {"type": "delta", "id": "game-1", "tick": rng.randrange(2 ** 32)}
+        if rng.random() < 0.2:
+            delta["over"] = True
+        else:
+            delta["head"] = {"x": rng.randrange(20), "y": rng.randrange(20)}
+            delta["grow"] = rng.random() < 0.5
+        if rng.random() < 0.3:
+            delta["food"] = {"x": rng.randrange(20), "y": rng.randrange(20)}
+        if rng.random() < 0.3:
+            delta["score"] = rng.randrange(10 ** 6)
+        if rng.random() < 0.3:
+            delta["direction"] = rng.choice(["up", "down", "left", "right"])
+        assert codec.decode(codec.encode_delta(delta)) == delta
+
+
+def test_frames_are_much_smaller_than_json():
+    # Serpentine body, as a long snake on a small board tends to be
+    snake = [{"x": 10 - (i % 10 if (i // 10) % 2 == 0 else 9 - i % 10), "y": i // 10} for i in range(100)]
+    state = {"id": "7e481f5e-84c8-4d23-b694-f78cf15b46b3", "playerId": "3caf8ff1-1251-4802-95a5-ce355d5391d0",
+             "playerName": "user1", "score": 990, "mode": "walls", "snake": snake,
+             "food": {"x": 1, "y": 1}, "direction": "left", "isActive": True}
+    json_size = len(schemas.ActiveGame.model_validate(state).model_dump_json(by_alias=True))
+    assert len(codec.encode_snapshot(state)) * 10 <= json_size
+
+
+def test_long_names_and_lists_round_trip():
+    state = {**random_game(random.Random(5)), "playerName": "é" * 300}
+    assert codec.decode(codec.encode_snapshot(state))["playerName"] == state["playerName"]
+    small = {**state, "snake": state["snake"][:1]}
+    games = codec.decode(codec.encode_game_list([small] * 70_000))["games"]
+    assert len(games) == 70_000
+    with pytest.raises(codec.CodecError):
+        codec.encode_snapshot({**state, "playerName": "x" * 70_000})
+
+
+def test_rejects_bad_frames():
+    with pytest.raises(codec.CodecError):
+        codec.decode(b"\x09\x01")
+    with pytest.raises(codec.CodecError):
+        codec.decode(codec.encode_snapshot(random_game(random.Random(3)))[:12])
+
+
+@pytest.mark.asyncio
+async def test_rest_endpoints_negotiate_binary(client: AsyncClient, test_db_session):
+    rng = random.Random(9)
+    for _ in range(3):
+        state = random_game(rng)
+        state["isActive"] = True
+        test_db_session.add(models.ActiveGame(
+            id=state["id"], player_id=state["playerId"], player_name=state["playerName"],
+            score=state["score"], mode=state["mode"], snake=state["snake"], food=state["food"],
+            direction=state["direction"], is_active=True,
+        ))
+    await test_db_session.commit()
+
+    as_json = (await client.get("/api/games/active")).json()
+    response = await client.get("/api/games/active", headers={"Accept": codec.MEDIA_TYPE})
+    assert response.headers["content-type"] == codec.MEDIA_TYPE
+    decoded = codec.decode(response.content)["games"]
+    assert [{k: v for k, v in game.items() if k not in ("type", "tick")} for game in decoded] == as_json
+
+    game_id = as_json[0]["id"]
+    response = await client.get(f"/api/games/{game_id}", headers={"Accept": codec.MEDIA_TYPE})
+    single = codec.decode(response.content)
+    assert single["snake"] == as_json[0]["snake"]
+
+
+def test_websocket_binary_subprotocol():
+    game_id = live_games.start_game("p1", "Binary", "walls", seed=5)
+    try:
+        with TestClient(app).websocket_connect(f"/api/ws/games/{game_id}", subprotocols=[codec.SUBPROTOCOL]) as ws:
+            assert ws.accepted_subprotocol == codec.SUBPROTOCOL
+            snapshot = codec.decode(ws.receive_bytes())
+            assert snapshot["playerName"] == "Binary"
+            ws.portal.call(live_games.step)
+            delta = codec.decode(ws.receive_bytes())
+            assert delta["type"] == "delta" and delta["id"] == game_id
+    finally:
+        live_games.clear()
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+
+from src.config import Settings
+from src.db.session import build_engine
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}"
+
+
+def count_pings(engine, alive: bool = True) -> list:
+    pings = []
+
+    def do_ping(dbapi_connection):
+        pings.append(dbapi_connection)
+        if not alive:
+            raise OSError("connection reset")
+        return True
+
+    engine.sync_engine.dialect.do_ping = do_ping
+    return pings
+
+
+async def pragma(engine, name: str):
+    async with engine.connect() as conn:
+        return (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas(db_url):
+    engine = build_engine(db_url, Settings(SQLITE_CACHE_SIZE_KB=1024, SQLITE_MMAP_SIZE=1 << 20))
+    try:
+        assert await pragma(engine, "journal_mode") == "wal"
+        assert await pragma(engine, "synchronous") == 1  # NORMAL
+        assert await pragma(engine, "cache_size") == -1024
+        assert await pragma(engine, "mmap_size") == 1 << 20
+    finally:
+        await engine.dispose()
+
+    engine = build_engine(db_url.replace("tuned", "plain"), Settings(SQLITE_WAL=False, SQLITE_SYNCHRONOUS="FULL"))
+    try:
+        assert await pragma(engine, "journal_mode") == "delete"
+        assert await pragma(engine, "synchronous") == 2
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_settings(db_url):
+    engine = build_engine(db_url, Settings(DB_POOL_SIZE=3, DB_MAX_OVERFLOW=1, DB_POOL_RECYCLE=60))
+    try:
+        pool = engine.sync_engine.pool
+        assert (pool.size(), pool._max_overflow, pool._recycle) == (3, 1, 60)
+    finally:
+        await engine.dispose()
+
+    memory = build_engine("sqlite+aiosqlite:///:memory:")
+    assert isinstance(memory.sync_engine.pool, StaticPool)
+    await memory.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pings_only_after_idle(db_url):
+    engine = build_engine(db_url, Settings(DB_POOL_SIZE=1, DB_PING_AFTER_IDLE=0.08))
+    pings = count_pings(engine)
+    try:
+        for _ in range(5):
+            await pragma(engine, "user_version")
+        assert pings == []
+
+        await asyncio.sleep(0.1)
+        await pragma(engine, "user_version")
+        assert len(pings) == 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failed_ping_replaces_connection(db_url):
+    engine = build_engine(db_url, Settings(DB_POOL_SIZE=1, DB_PING_AFTER_IDLE=0))
+    try:
+        await pragma(engine, "user_version")
+        pings = count_pings(engine, alive=False)
+        # The dead connection is discarded and a fresh one serves the query
+        assert await pragma(engine, "journal_mode") == "wal"
+        assert len(pings) == 1
+    finally:
+        await engine.dispose()
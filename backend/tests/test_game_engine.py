@@ -0,0 +1,140 @@
+import random
+
+import pytest
+
+from src.game.engine import GRID_SIZE, GameEngine, SnakeGame
+
+
+def reference_move(state: dict, rng: random.Random) -> dict:
+    """Line-by-line port of moveSnake from gameLogic.ts, used as the oracle."""
+    if state["over"]:
+        return state
+    snake, food, size = state["snake"], state["food"], GRID_SIZE
+    x, y = snake[0]
+    dx, dy = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}[state["next"]]
+    x, y = x + dx, y + dy
+    if state["mode"] == "passthrough":
+        if x < 0: x = size - 1
+        if x >= size: x = 0
+        if y < 0: y = size - 1
+        if y >= size: y = 0
+    elif x < 0 or x >= size or y < 0 or y >= size:
+        return {**state, "over": True, "direction": state["next"]}
+    if (x, y) in snake[:-1]:
+        return {**state, "over": True, "direction": state["next"]}
+
+    score = state["score"]
+    if (x, y) == food:
+        snake = [(x, y)] + snake
+        while True:
+            food = (rng.randrange(size), rng.randrange(size))
+            if food not in snake:
+                break
+        score += 10
+    else:
+        snake = [(x, y)] + snake[:-1]
+    return {**state, "snake": snake, "food": food, "direction": state["next"], "score": score}
+
+
+def as_state(game: SnakeGame) -> tuple:
+    return (
+        [(p["x"], p["y"]) for p in game.snake_points()],
+        (game.food % GRID_SIZE, game.food // GRID_SIZE),
+        game.direction,
+        game.score,
+        game.is_game_over,
+    )
+
+
+@pytest.mark.parametrize("mode", ["walls", "passthrough"])
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_reference_rules(mode, seed):
+    moves = random.Random(seed + 1000)
+    game = SnakeGame(mode, seed=seed)
+
+    # The reference draws its initial food from the same seeded stream
+    rng = random.Random(seed)
+    snake = [(10, 10), (9, 10), (8, 10)]
+    while True:
+        food = (rng.randrange(GRID_SIZE), rng.randrange(GRID_SIZE))
+        if food not in snake:
+            break
+    state = {"snake": snake, "food": food, "direction": "right", "next": "right",
+             "score": 0, "over": False, "mode": mode}
+
+    for _ in range(500):
+        # Steer towards food most of the time so snakes grow long enough to bite themselves
+        if moves.random() < 0.3:
+            direction = moves.choice(["up", "down", "left", "right"])
+        else:
+            hx, hy = state["snake"][0]
+            fx, fy = state["food"]
+            direction = ("right" if fx > hx else "left") if fx != hx else ("down" if fy > hy else "up")
+        game.set_direction(direction)
+        if direction != {"up": "down", "down": "up", "left": "right", "right": "left"}[state["direction"]]:
+            state["next"] = direction
+
+        game.move()
+        state = reference_move(state, rng)
+        assert as_state(game) == (state["snake"], state["food"], state["direction"], state["score"], state["over"])
+        if state["over"]:
+            break
+
+
+def test_reverse_direction_ignored():
+    game = SnakeGame("walls", seed=1)
+    assert not game.set_direction("left")
+    assert game.set_direction("up")
+    game.move()
+    assert game.snake_points()[0] == {"x": 10, "y": 9}
+
+
+def test_walls_end_game_passthrough_wraps():
+    walls = SnakeGame("walls", seed=1)
+    walls.food = 0
+    for _ in range(10):
+        walls.move()
+    assert walls.is_game_over
+    assert walls.snake_points()[0] == {"x": 19, "y": 10}
+
+    wrap = SnakeGame("passthrough", seed=1)
+    wrap.food = 0
+    for _ in range(10):
+        wrap.move()
+    assert not wrap.is_game_over
+    assert wrap.snake_points()[0] == {"x": 0, "y": 10}
+
+
+def test_moving_into_vacated_tail_is_allowed():
+    game = SnakeGame("walls", seed=3)
+    game.food = 0
+    # 2x2 loop: head (10,10), then (11,10), (11,11), tail (10,11), heading left
+    game.occupied = bytearray(GRID_SIZE * GRID_SIZE)
+    game.body.clear()
+    for x, y in ((10, 10), (11, 10), (11, 11), (10, 11)):
+        game.body.append(y * GRID_SIZE + x)
+        game.occupied[y * GRID_SIZE + x] = 1
+    game.direction = game.next_direction = "left"
+
+    assert game.set_direction("down")
+    game.move()
+    assert not game.is_game_over
+    assert game.snake_points() == [{"x": 10, "y": 11}, {"x": 10, "y": 10}, {"x": 11, "y": 10}, {"x": 11, "y": 11}]
+
+
+def test_tick_all_reports_finished_games():
+    engine = GameEngine()
+    walls = engine.create_game("walls", seed=1)
+    wrap = engine.create_game("passthrough", seed=1)
+    paused = engine.create_game("walls", seed=1)
+    engine.get(paused).toggle_pause()
+    for game in engine.games.values():
+        game.food = 0
+
+    ended = []
+    for _ in range(10):
+        ended += engine.tick_all()
+
+    assert ended == [walls]
+    assert not engine.get(wrap).is_game_over
+    assert engine.get(paused).snake_points()[0] == {"x": 10, "y": 10}
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+from httpx import AsyncClient
+
+from src.leaderboard.cache import ResponseCache, etag_matches, leaderboard_cache
+
+
+async def player(client: AsyncClient, name: str = "Cache") -> dict:
+    response = await client.post("/api/auth/signup", json={
+        "email": f"{name.lower()}@snake.game", "username": name, "password": "pwd"
+    })
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_entry_built_before_a_write_is_never_served():
+    cache = ResponseCache()
+    version = cache.version("walls")
+    cache.bump("walls")  # a score lands while the response is being built
+    cache.put(("walls",), version, b"[]")
+    assert cache.get("walls", ("walls",)) is None
+
+
+@pytest.mark.asyncio
+async def test_conditional_get(client: AsyncClient):
+    headers = await player(client)
+    await client.post("/api/leaderboard", json={"score": 10, "mode": "walls"}, headers=headers)
+
+    first = await client.get("/api/leaderboard?mode=walls")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith('"')
+
+    second = await client.get("/api/leaderboard?mode=walls", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+    stats = (await client.get("/api/leaderboard/cache")).json()
+    assert (stats["hits"], stats["misses"], stats["notModified"]) == (1, 1, 1)
+    assert stats["bytesSaved"] == len(first.content)
+
+    await client.post("/api/leaderboard", json={"score": 20, "mode": "walls"}, headers=headers)
+    third = await client.get("/api/leaderboard?mode=walls", headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
+    assert [row["score"] for row in third.json()] == [20, 10]
+
+
+@pytest.mark.asyncio
+async def test_invalidation_is_per_mode(client: AsyncClient):
+    headers = await player(client)
+    await client.get("/api/leaderboard?mode=walls")
+    await client.get("/api/leaderboard")
+
+    await client.post("/api/leaderboard", json={"score": 5, "mode": "passthrough"}, headers=headers)
+    assert (await client.get("/api/leaderboard?mode=walls")).json() == []
+    assert leaderboard_cache.hits == 1
+    # The all-modes view depends on every mode
+    assert [row["score"] for row in (await client.get("/api/leaderboard")).json()] == [5]
+    assert leaderboard_cache.hits == 1
+    # Only real modes get cache entries: no other key is ever invalidated
+    for query in ("?mode=", "?mode=bogus"):
+        assert (await client.get(f"/api/leaderboard{query}")).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_never_stale_after_submission(client: AsyncClient):
+    headers = await player(client)
+    rng = random.Random(7)
+    submitted = {"walls": [], "passthrough": []}
+    for _ in range(30):
+        mode = rng.choice(["walls", "passthrough"])
+        score = rng.randrange(1000)
+        await client.post("/api/leaderboard", json={"score": score, "mode": mode}, headers=headers)
+        submitted[mode].append(score)
+        for query, expected in (
+            ("?mode=walls", submitted["walls"]),
+            ("?mode=passthrough", submitted["passthrough"]),
+            ("", submitted["walls"] + submitted["passthrough"]),
+            ("?mode=walls&limit=3", submitted["walls"]),
+        ):
+            rows = (await client.get(f"/api/leaderboard{query}")).json()
+            assert [row["score"] for row in rows] == sorted(expected, reverse=True)[:len(rows)]
+            assert len(rows) == min(len(expected), 3 if "limit" in query else len(expected))
+    # Reads of the mode that wasn't just written were served from cache, and still matched
+    assert leaderboard_cache.hits > 0
+
+
+@pytest.mark.asyncio
+async def test_cached_pages_keep_cursor_header(client: AsyncClient):
+    headers = await player(client)
+    for score in (30, 20, 10):
+        await client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+    first = await client.get("/api/leaderboard?mode=walls&limit=2")
+    again = await client.get("/api/leaderboard?mode=walls&limit=2")
+    assert again.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+    assert again.content == first.content
+    assert leaderboard_cache.hits == 1
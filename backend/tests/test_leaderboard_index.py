@@ -0,0 +1,94 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from src.db.repository import DatabaseRepository
+from src.leaderboard.index import LeaderboardIndex, RankedEntry, leaderboard_index
+from src.leaderboard.skiplist import IndexedSkipList
+
+
+def test_skiplist_matches_sorted_list():
+    rng = random.Random(7)
+    ranked = IndexedSkipList(seed=7)
+    reference = []
+    for _ in range(2000):
+        if reference and rng.random() < 0.3:
+            key = rng.choice(reference)
+            assert ranked.remove(key)
+            reference.remove(key)
+        else:
+            key = rng.randint(0, 500)
+            position = ranked.insert(key)
+            reference.append(key)
+            reference.sort()
+            assert reference[position] == key
+
+        probe = rng.randint(-1, 501)
+        assert ranked.count_less(probe) == sum(1 for k in reference if k < probe)
+
+    assert len(ranked) == len(reference)
+    assert [k for k, _ in ranked.items()] == reference
+    assert [k for k, _ in ranked.items(10)] == reference[10:]
+
+
+def test_index_orders_and_ranks():
+    base = datetime(2024, 1, 1)
+    index = LeaderboardIndex()
+    index.load([
+        RankedEntry("a", "Ann", 100, "walls", base),
+        RankedEntry("b", "Bob", 300, "walls", base),
+        RankedEntry("c", "Cat", 100, "walls", base - timedelta(days=1)),
+        RankedEntry("d", "Dan", 500, "passthrough", base),
+    ])
+
+    assert [e.id for e in index.top("walls")] == ["b", "a", "c"]
+    assert [e.id for e in index.top()] == ["d", "b", "a", "c"]
+    assert [e.id for e in index.top(limit=2, offset=1)] == ["b", "a"]
+    assert [e.id for e in index.after("walls", (-300, "b"), 5)] == ["a", "c"]
+    assert [e.id for e in index.before("walls", (-100, "c"), 5)] == ["b", "a"]
+    assert [e.id for e in index.after(None, (-500, "d"), 2)] == ["b", "a"]
+    assert index.rank_of_score("walls", 300) == 1
+    assert index.rank_of_score("walls", 100) == 2
+    assert index.rank_of_score("walls", 50) == 4
+    assert index.rank_of_score("passthrough", 1) == 2
+
+
+@pytest_asyncio.fixture
+async def indexed_repo(test_db_session):
+    repo = DatabaseRepository(test_db_session)
+    await repo.warm_leaderboard_index()
+    yield repo
+    leaderboard_index.clear()
+
+
+@pytest.mark.asyncio
+async def test_index_serves_leaderboard(client: AsyncClient, indexed_repo):
+    email = "ranked@snake.game"
+    response = await client.post("/api/auth/signup", json={"email": email, "username": "Ranked", "password": "pwd"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    ranks = []
+    for score in (200, 500, 300):
+        response = await client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+        ranks.append(response.json()["rank"])
+    assert ranks == [1, 1, 2]
+
+    response = await client.get("/api/leaderboard?mode=walls")
+    assert [row["score"] for row in response.json()] == [500, 300, 200]
+    assert leaderboard_index.count("walls") == 3
+    sql_top = [row.id for row in await indexed_repo.get_leaderboard_sql("walls", limit=10)]
+    assert [entry.id for entry in leaderboard_index.top("walls")] == sql_top
+
+
+@pytest.mark.asyncio
+async def test_index_warms_in_chunks(test_db_session):
+    index = LeaderboardIndex()
+    repo = DatabaseRepository(test_db_session, index)
+    for score in range(5):
+        await repo.add_score("Ann", score, "walls")
+    await repo.warm_leaderboard_index(chunk_size=2)
+    assert index.ready
+    assert [entry.score for entry in index.top("walls")] == [4, 3, 2, 1, 0]
@@ -0,0 +1,77 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from src.db.repository import DatabaseRepository
+from src.leaderboard.index import leaderboard_index
+
+
+async def seed(client: AsyncClient, players: dict[str, list[int]], mode: str = "walls") -> dict[str, dict]:
+    """Sign players up and submit their scores; returns auth headers by name."""
+    headers = {}
+    for name, scores in players.items():
+        email = f"{name.lower()}@snake.game"
+        response = await client.post("/api/auth/signup", json={"email": email, "username": name, "password": "pwd"})
+        headers[name] = {"Authorization": f"Bearer {response.json()['token']}"}
+        for score in scores:
+            await client.post("/api/leaderboard", json={"score": score, "mode": mode}, headers=headers[name])
+    return headers
+
+
+async def walk_pages(client: AsyncClient, limit: int) -> list[int]:
+    scores = []
+    url = f"/api/leaderboard?mode=walls&limit={limit}"
+    while True:
+        response = await client.get(url)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        scores.extend(row["score"] for row in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return scores
+        url = f"/api/leaderboard?mode=walls&limit={limit}&after={cursor}"
+
+
+@pytest_asyncio.fixture(params=["sql", "index"])
+async def backend(request, test_db_session):
+    if request.param == "index":
+        await DatabaseRepository(test_db_session).warm_leaderboard_index()
+    yield request.param
+    leaderboard_index.clear()
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_leaderboard(client: AsyncClient, backend):
+    await seed(client, {"Ann": [50, 70, 70, 10], "Bob": [70, 90], "Cat": [30, 70]})
+
+    full = [row["score"] for row in (await client.get("/api/leaderboard?mode=walls")).json()]
+    assert full == [90, 70, 70, 70, 70, 50, 30, 10]
+    assert await walk_pages(client, 3) == full
+    assert await walk_pages(client, 8) == full
+
+
+@pytest.mark.asyncio
+async def test_around_me(client: AsyncClient, backend):
+    headers = await seed(client, {"Ann": [100, 90, 80], "Bob": [60], "Cat": [40, 20]})
+
+    response = await client.get(
+        "/api/leaderboard?mode=walls&around=me&limit=3",
+        headers=headers["Bob"],
+    )
+    assert response.status_code == 200
+    assert [(row["username"], row["score"]) for row in response.json()] == [
+        ("Ann", 80), ("Bob", 60), ("Cat", 40)
+    ]
+
+    response = await client.get(
+        "/api/leaderboard?mode=walls&around=me&limit=4",
+        headers=headers["Ann"],
+    )
+    assert [row["score"] for row in response.json()] == [100, 90, 80, 60]
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor(client: AsyncClient):
+    response = await client.get("/api/leaderboard?limit=5&after=not-a-cursor")
+    assert response.status_code == 400
@@ -0,0 +1,123 @@
+import random
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.db.migrations import migrate
+from src.db.repository import DatabaseRepository
+from src.leaderboard.index import RankedEntry
+from src.leaderboard.windows import BucketCompactor, rebuild_buckets, today, week_start, window_buckets
+from src.models import db as models
+
+
+def at(day: date, hour: int = 12) -> datetime:
+    return datetime.combine(day, time(hour), timezone.utc)
+
+
+def test_window_buckets():
+    wednesday = date(2025, 3, 12)
+    assert week_start(wednesday) == date(2025, 3, 10)
+    assert window_buckets("day", wednesday) == [wednesday]
+    assert window_buckets("week", wednesday) == [date(2025, 3, 12), date(2025, 3, 11), date(2025, 3, 10)]
+    assert window_buckets("week", date(2025, 3, 10)) == [date(2025, 3, 10)]
+    with pytest.raises(ValueError):
+        window_buckets("all", wednesday)
+
+
+@pytest.mark.asyncio
+async def test_window_pages_match_filtering_the_leaderboard(test_db_session):
+    repo = DatabaseRepository(test_db_session)
+    rng = random.Random(4)
+    now = today()
+    days = window_buckets("week", now) + [week_start(now) - timedelta(days=1)]
+    entries = [
+        RankedEntry(f"e{i:04d}", f"p{rng.randrange(30)}", rng.randrange(100), rng.choice(("walls", "passthrough")),
+                    at(rng.choice(days), rng.randrange(24)))
+        for i in range(600)
+    ]
+    await repo.insert_scores(entries)
+
+    for window, since in (("day", now), ("week", week_start(now))):
+        for mode in ("walls", None):
+            expected = sorted(
+                (e for e in entries if at(since, 0) <= e.date and (mode is None or e.mode == mode)),
+                key=lambda e: (-e.score, e.id),
+            )
+            pages, cursor = [], None
+            while True:
+                page = await repo.get_window_page(mode, window, 25, cursor)
+                pages += [entry.id for entry in page]
+                if len(page) < 25:
+                    break
+                cursor = (page[-1].score, page[-1].id)
+            assert pages == [e.id for e in expected]
+
+
+@pytest.mark.asyncio
+async def test_compaction_expires_old_buckets_and_trims_the_rest(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'windows.db'}")
+    await migrate(engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    monday = week_start(today())
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.LeaderboardBucket), [
+            {"entry_id": f"e{i:03d}", "bucket": monday - timedelta(days=i % 2), "username": "p",
+             "score": i % 40, "mode": "walls", "date": at(monday - timedelta(days=i % 2))}
+            for i in range(200)
+        ])
+    async with sessions() as session:
+        before = await DatabaseRepository(session).get_window_page("walls", "week", 10)
+
+    compactor = BucketCompactor(sessions, bucket_size=10)
+    assert await compactor.compact() == (100, 90)
+    assert await compactor.compact() == (0, 0)
+    async with sessions() as session:
+        assert await DatabaseRepository(session).get_window_page("walls", "week", 10) == before
+        assert (await session.execute(select(func.count()).select_from(models.LeaderboardBucket))).scalar() == 10
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_rebuild_buckets_only_this_week(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'windows.db'}")
+    await migrate(engine)
+    monday = week_start(today())
+    async with engine.begin() as conn:
+        # Written before the buckets existed
+        await conn.execute(insert(models.LeaderboardEntry), [
+            {"id": f"e{i:03d}", "username": "p", "score": i, "mode": "walls", "date": at(monday - timedelta(days=i % 3))}
+            for i in range(90)
+        ])
+        assert await conn.run_sync(rebuild_buckets, today(), 16) == 30
+        buckets = await conn.execute(select(models.LeaderboardBucket.bucket).distinct())
+        assert buckets.scalars().all() == [monday]
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_window_param(client: AsyncClient, test_db_session):
+    await DatabaseRepository(test_db_session).insert_scores([
+        RankedEntry("old", "Ann", 900, "walls", at(today() - timedelta(days=8))),
+        RankedEntry("new", "Bob", 50, "walls", at(today(), 0)),
+    ])
+    response = await client.post(
+        "/api/auth/signup", json={"email": "cy@snake.game", "username": "Cy", "password": "pwd"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    await client.post("/api/leaderboard", json={"score": 70, "mode": "walls"}, headers=headers)
+
+    everything = await client.get("/api/leaderboard?mode=walls")
+    assert [row["username"] for row in everything.json()] == ["Ann", "Cy", "Bob"]
+    week = await client.get("/api/leaderboard?mode=walls&window=week&limit=1")
+    assert [row["username"] for row in week.json()] == ["Cy"]
+    rest = await client.get(f"/api/leaderboard?mode=walls&window=week&limit=1&after={week.headers['x-next-cursor']}")
+    assert [row["username"] for row in rest.json()] == ["Bob"]
+    day = await client.get("/api/leaderboard?mode=walls&window=day", headers={"If-None-Match": week.headers["etag"]})
+    assert day.status_code == 200 and [row["username"] for row in day.json()] == ["Cy", "Bob"]
+
+    assert (await client.get("/api/leaderboard?window=month")).status_code == 422
+    mine = await client.get("/api/leaderboard?around=me&window=day", headers=headers)
+    assert mine.status_code == 400
@@ -0,0 +1,152 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.db.migrations import migrate
+from src.db.repository import DatabaseRepository
+from src.game.engine import SnakeGame
+from src.game.live import LOBBY_TOPIC, LiveGames
+from src.game.lobby import GameRegistry, game_registry
+from src.game.movelog import GameStart
+from src.models import db as models
+from src.realtime.hub import Subscription
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def summary(game_id: str, score: int, mode: str = "walls") -> dict:
+    return {"id": game_id, "playerName": f"P{game_id}", "mode": mode, "score": score, "length": 3 + score // 10}
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'lobby.db'}")
+    await migrate(engine)
+    yield engine
+    await engine.dispose()
+
+
+def test_pages_follow_score_order_per_mode_and_overall():
+    registry = GameRegistry(None)
+    for i in range(30):
+        registry.upsert(summary(f"g{i:02d}", (i * 7) % 50, "walls" if i % 3 else "passthrough"))
+
+    everything = sorted(registry.games.values(), key=lambda g: (-g["score"], g["id"]))
+    pages, after = [], None
+    while True:
+        page = registry.page(None, 7, after)
+        if not page:
+            break
+        pages.extend(page)
+        after = (-page[-1]["score"], page[-1]["id"])
+    assert pages == everything
+
+    walls = registry.page("walls", 100)
+    assert [g["id"] for g in walls] == [g["id"] for g in everything if g["mode"] == "walls"]
+    assert registry.count("walls") == len(walls)
+    assert registry.page("royale", 10) == []
+
+    # A new score moves the game without leaving a stale copy behind
+    assert registry.update("g00", 999, 40)
+    assert registry.page("passthrough", 1)[0] == {**summary("g00", 999, "passthrough"), "length": 40}
+    assert registry.count() == 30
+    assert not registry.update("missing", 1, 1)
+
+
+def test_games_not_heard_from_expire():
+    clock = Clock()
+    registry = GameRegistry(None, ttl=30, clock=clock)
+    registry.apply({"type": "snapshot", "games": [summary("a", 1), summary("b", 2), summary("c", 3)]})
+
+    clock.now += 20
+    registry.apply({"type": "lobby", "updated": [{"id": "a", "score": 5, "length": 4}], "ended": ["c"]})
+    clock.now += 15
+    assert registry.expire() == ["b"]
+
+    # A heartbeat snapshot keeps a game alive even when nothing about it changed
+    registry.apply({"type": "snapshot", "games": [summary("a", 5)]})
+    clock.now += 29
+    assert registry.expire() == []
+    clock.now += 2
+    assert registry.expire() == ["a"]
+    assert registry.count() == 0 and registry.expired == 2
+
+
+def test_registry_follows_the_lobby_feed():
+    live = LiveGames()
+    registry = GameRegistry(None)
+    subscription = Subscription(maxsize=1000)
+    live.hub.subscribe(subscription, LOBBY_TOPIC)
+    ids = [live.start_game(f"p{i}", f"Player {i}", "walls", seed=i) for i in range(5)]
+
+    for _ in range(200):
+        live.step()
+        while not subscription.queue.empty():
+            registry.apply(subscription.queue.get_nowait()[2].payload)
+        assert sorted(registry.page(None, 100), key=lambda g: g["id"]) == sorted(live.lobby(), key=lambda g: g["id"])
+    # Walls games run into one eventually; ended games leave the registry
+    assert registry.count() == len(live.engine.games) < len(ids)
+
+
+@pytest.mark.asyncio
+async def test_warm_reads_summaries_through_the_partial_index(engine):
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as session:
+        repo = DatabaseRepository(session)
+        starts = [
+            GameStart(f"g{i}", f"p{i}", f"P{i}", "walls", 0, SnakeGame("walls", seed=i).state())
+            for i in range(4)
+        ]
+        await repo.create_game_records(starts)
+        await repo.deactivate_games(["g3"])
+
+    clock = Clock()
+    registry = GameRegistry(sessions, ttl=30, clock=clock)
+    seen = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: seen.append(args[2]))
+
+    assert await registry.warm() == 3
+    assert registry.games["g0"] == {"id": "g0", "playerName": "P0", "mode": "walls", "score": 0, "length": 3}
+    # Only the length of each body is read, never the body
+    assert "active_games.snake," not in seen[0] and "json_array_length(active_games.snake)" in seen[0]
+
+    registry.apply({"type": "lobby", "added": [summary("g1", 0)]})
+    clock.now += 31
+    registry.upsert(summary("g1", 10))
+    assert sorted(await registry.sweep()) == ["g0", "g2"]
+
+    async with engine.connect() as conn:
+        active = (await conn.execute(
+            select(models.ActiveGame.id).where(models.ActiveGame.is_active).order_by(models.ActiveGame.id)
+        )).scalars().all()
+        assert active == ["g1"]
+        # Finished games are never scanned to find the running ones
+        plan = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {seen[0]}")
+        assert "ix_active_games_running" in str(plan.all())
+
+
+@pytest.mark.asyncio
+async def test_lobby_endpoint_pages_from_the_registry(client: AsyncClient):
+    for i in range(5):
+        game_registry.upsert(summary(f"g{i}", i * 10, "walls" if i % 2 else "passthrough"))
+    try:
+        first = await client.get("/api/games/lobby?limit=3")
+        assert [g["id"] for g in first.json()] == ["g4", "g3", "g2"]
+        assert first.json()[0] == summary("g4", 40, "passthrough")
+        rest = await client.get(f"/api/games/lobby?limit=3&after={first.headers['x-next-cursor']}")
+        assert [g["id"] for g in rest.json()] == ["g1", "g0"]
+        assert "x-next-cursor" not in rest.headers
+
+        walls = await client.get("/api/games/lobby?mode=walls")
+        assert [g["id"] for g in walls.json()] == ["g3", "g1"]
+        assert (await client.get("/api/games/lobby?after=oops")).status_code == 400
+    finally:
+        game_registry.clear()
@@ -0,0 +1,101 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.metrics.registry import Registry, registry
+from src.metrics.sql import instrument_engine, query_name
+
+
+def sample(text: str, line: str) -> float:
+    """Value of the exposition line starting with ``line``."""
+    for row in text.splitlines():
+        if row.startswith(line + " "):
+            return float(row.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_render_text_exposition():
+    metrics = Registry()
+    requests = metrics.counter("requests_total", "Requests served", ["code"])
+    latency = metrics.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    metrics.sampled("queue_depth", "Queued items", "gauge", lambda: 7)
+    requests.labels("200").inc()
+    requests.labels("200").inc(2)
+    requests.labels('a"b').inc()
+    for value in (0.05, 0.5, 0.1, 5.0):
+        latency.observe(value)
+
+    assert metrics.render().splitlines() == [
+        "# HELP requests_total Requests served",
+        "# TYPE requests_total counter",
+        'requests_total{code="200"} 3',
+        'requests_total{code="a\\"b"} 1',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 5.65",
+        "latency_seconds_count 4",
+        "# HELP queue_depth Queued items",
+        "# TYPE queue_depth gauge",
+        "queue_depth 7",
+    ]
+    with pytest.raises(ValueError):
+        metrics.counter("requests_total", "again")
+    with pytest.raises(ValueError):
+        requests.labels("200", "extra")
+
+
+def test_query_names_are_verb_and_table():
+    assert query_name("SELECT users.id, users.email \nFROM users \nWHERE users.email = ?") == "select users"
+    assert query_name('INSERT INTO "leaderboard" (username, score) VALUES (?, ?)') == "insert leaderboard"
+    assert query_name("UPDATE active_games SET score=? WHERE active_games.id = ?") == "update active_games"
+    assert query_name("CREATE INDEX IF NOT EXISTS ix_scores ON leaderboard (score)") == "create ix_scores"
+    assert query_name("PRAGMA journal_mode=WAL") == "pragma"
+
+
+@pytest.mark.asyncio
+async def test_engine_statements_and_checkouts_are_timed(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}")
+    remove = instrument_engine(engine)
+    before = registry.render()
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE metric_probe (id INTEGER PRIMARY KEY)"))
+        for _ in range(3):
+            await conn.execute(text("SELECT id FROM metric_probe"))
+    after = registry.render()
+    remove()
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT id FROM metric_probe"))
+    await engine.dispose()
+
+    count = 'db_query_duration_seconds_count{query="select metric_probe"}'
+    assert sample(after, count) - sample(before, count) == 3
+    checkouts = "db_pool_checkout_wait_seconds_count"
+    assert sample(after, checkouts) > sample(before, checkouts)
+    # Removed hooks record nothing more
+    assert sample(registry.render(), count) == sample(after, count)
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_times_requests_by_handler(client: AsyncClient):
+    before = (await client.get("/metrics")).text
+    await client.get("/api/games/active")
+    await client.get("/api/games/missing")
+    await client.get("/api/games/missing")
+    await client.post("/api/auth/signup", json={"email": "m@snake.game", "username": "Metric", "password": "pwd"})
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = response.text
+
+    def grew(line: str) -> float:
+        return sample(after, line) - sample(before, line)
+
+    assert grew('http_request_duration_seconds_count{method="GET",handler="get_active_games",status="200"}') == 1
+    assert grew('http_request_duration_seconds_count{method="GET",handler="get_game",status="404"}') == 2
+    assert grew('bcrypt_calls_total{function="hash_password"}') == 1
+    assert "# TYPE leaderboard_cache_lookups_total counter" in after
@@ -0,0 +1,98 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db.base import Base
+from src.db.migrations import HEAD, STEPS, current_version, migrate, schema_version
+
+# The schema as first deployed, before any migration existed
+BASELINE = [
+    "CREATE TABLE users (id VARCHAR NOT NULL, username VARCHAR NOT NULL, email VARCHAR NOT NULL, "
+    "password VARCHAR NOT NULL, created_at DATETIME NOT NULL, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    "CREATE TABLE leaderboard (id VARCHAR NOT NULL, username VARCHAR NOT NULL, score INTEGER NOT NULL, "
+    "mode VARCHAR NOT NULL, date DATETIME NOT NULL, PRIMARY KEY (id))",
+    "CREATE TABLE active_games (id VARCHAR NOT NULL, player_id VARCHAR NOT NULL, player_name VARCHAR NOT NULL, "
+    "score INTEGER NOT NULL, mode VARCHAR NOT NULL, snake JSON NOT NULL, food JSON NOT NULL, "
+    "direction VARCHAR NOT NULL, is_active BOOLEAN NOT NULL, PRIMARY KEY (id))",
+    "INSERT INTO leaderboard VALUES ('s1', 'old', 40, 'walls', '2024-01-01 00:00:00')",
+]
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    await engine.dispose()
+
+
+def statements(engine) -> list:
+    seen = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: seen.append(args[2]))
+    return seen
+
+
+def schema(conn) -> dict:
+    inspector = inspect(conn)
+    return {
+        name: (
+            sorted(column["name"] for column in inspector.get_columns(name)),
+            sorted(index["name"] for index in inspector.get_indexes(name)),
+        )
+        for name in inspector.get_table_names()
+    }
+
+
+@pytest.mark.asyncio
+async def test_empty_database_is_created_at_head(engine, tmp_path):
+    assert await migrate(engine) is None
+    assert await current_version(engine) == HEAD
+
+    reference = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'reference.db'}")
+    async with reference.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(schema_version.create)
+        expected = await conn.run_sync(schema)
+    await reference.dispose()
+    async with engine.connect() as conn:
+        assert await conn.run_sync(schema) == expected
+        rows = (await conn.execute(schema_version.select())).all()
+    assert [row.version for row in rows] == [version for version, _, _ in STEPS]
+
+
+@pytest.mark.asyncio
+async def test_current_schema_costs_one_read(engine):
+    await migrate(engine)
+    seen = statements(engine)
+    assert await migrate(engine) == HEAD
+    assert len(seen) == 1 and seen[0].lstrip().upper().startswith("SELECT")
+
+
+@pytest.mark.asyncio
+async def test_baseline_database_is_upgraded_in_place(engine, tmp_path):
+    async with engine.begin() as conn:
+        for statement in BASELINE:
+            await conn.execute(text(statement))
+
+    assert await migrate(engine) is None
+    assert await current_version(engine) == HEAD
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(schema)
+        assert "seed" in tables["active_games"][0]
+        assert "ix_active_games_running" in tables["active_games"][1]
+        assert {"ix_leaderboard_username", "ix_leaderboard_mode_score_id"} <= set(tables["leaderboard"][1])
+        assert {"game_events", "game_snapshots"} <= set(tables)
+        assert (await conn.execute(text("SELECT username, score FROM leaderboard"))).all() == [("old", 40)]
+        stats = await conn.execute(text("SELECT username, mode, best_score, games_played FROM user_stats"))
+        assert stats.all() == [("old", "walls", 40, 1)]
+        assert "ix_leaderboard_buckets_mode_rank" in tables["leaderboard_buckets"][1]
+
+
+@pytest.mark.asyncio
+async def test_newer_schema_is_refused(engine):
+    await migrate(engine)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"INSERT INTO schema_version VALUES ({HEAD + 1}, 'future', '2030-01-01')"))
+    with pytest.raises(RuntimeError):
+        await migrate(engine)
@@ -0,0 +1,256 @@
+import random
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.api.routes import get_live_games
+from src.db.mock_db import MockDatabase
+from src.db.repository import DatabaseRepository
+from src.game.engine import SnakeGame
+from src.game.live import LiveGames
+from src.game.movelog import GameStart, MoveEvent, SnapshotRecord, event_for, rebuild
+from src.game.recorder import GameRecorder
+from src.main import app
+from src.models import db as models
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+
+def play(game: SnakeGame, rng: random.Random, game_id: str = "g", limit: int = 2000) -> list:
+    events = []
+    for tick in range(1, limit):
+        if rng.random() < 0.3:
+            game.set_direction(rng.choice(DIRECTIONS))
+        ate = game.move()
+        events.append(event_for(game_id, tick, game, ate))
+        if game.is_game_over:
+            break
+    return events
+
+
+@pytest.mark.parametrize("mode", ["walls", "passthrough"])
+@pytest.mark.parametrize("seed", range(20))
+def test_log_replays_to_identical_state(mode, seed):
+    game = SnakeGame(mode, seed=seed)
+    start = game.state()
+    events = play(game, random.Random(seed))
+
+    assert rebuild(mode, start, events).state() == game.state()
+    # Any snapshot plus the tail after it gives the same answer
+    middle = len(events) // 2
+    halfway = rebuild(mode, start, events[:middle]).state()
+    assert rebuild(mode, halfway, events[middle:]).state() == game.state()
+
+
+def test_replay_rejects_inconsistent_log():
+    game = SnakeGame("passthrough", seed=1)
+    game.food = 0
+    with pytest.raises(ValueError):
+        # Claims food was eaten on a move that can't reach it
+        game.replay_move("right", 5)
+
+
+@pytest_asyncio.fixture
+async def recorder(test_db_session):
+    recorder = GameRecorder(async_sessionmaker(test_db_session.bind, expire_on_commit=False),
+                            snapshot_interval=50, flush_interval=3600)
+    recorder.start()
+    yield recorder
+    await recorder.stop()
+
+
+async def count(session, model, **where) -> int:
+    stmt = select(func.count()).select_from(model).filter_by(**where)
+    return (await session.execute(stmt)).scalar()
+
+
+@pytest.mark.asyncio
+async def test_live_games_persist_through_log(test_db_session, recorder):
+    live = LiveGames(recorder=recorder)
+    rng = random.Random(3)
+    game_ids = [live.start_game(f"p{i}", f"Player{i}", "passthrough", seed=i) for i in range(3)]
+    repo = DatabaseRepository(test_db_session)
+
+    for _ in range(120):
+        for game_id in game_ids:
+            if rng.random() < 0.2:
+                live.set_direction(game_id, rng.choice(DIRECTIONS))
+        live.step()
+        if live.tick % 40 == 0:
+            await recorder.flush()
+    await recorder.flush()
+
+    for game_id in live.engine.games:
+        stored = await repo.get_game(game_id)
+        assert stored.model_dump() == live.snapshot(game_id).model_dump()
+
+    moved = await count(test_db_session, models.GameEvent)
+    assert moved == recorder.events_written
+    # One every 50 ticks per game; the opening snapshot is written when the game starts
+    assert recorder.snapshots_written == 3 * 2
+    assert {g["id"] for g in await repo.get_active_games()} == set(live.engine.games)
+
+
+@pytest.mark.asyncio
+async def test_abandoned_games_end_with_a_snapshot_and_no_move(test_db_session, recorder):
+    live = LiveGames(recorder=recorder)
+    game_id = live.start_game("p1", "Player1", "passthrough", seed=1)
+    live.step()
+    live.abandon(game_id)
+    assert live.step() == [game_id]
+    await recorder.flush()
+    assert await count(test_db_session, models.GameEvent, game_id=game_id) == 1
+    assert await count(test_db_session, models.GameSnapshot, game_id=game_id, tick=live.tick) == 1
+
+
+@pytest.mark.asyncio
+async def test_only_conflicting_rows_are_dropped(test_db_session, recorder):
+    live = LiveGames(recorder=recorder)
+    clash, other = (live.start_game(f"p{i}", f"Player{i}", "passthrough", seed=i) for i in range(2))
+    await recorder.flush()
+    repo = DatabaseRepository(test_db_session)
+    # The next tick of one game is already stored, as a client save once could
+    await repo.save_game_state([MoveEvent(clash, live.tick + 1, "up", False, None)])
+
+    live.step()
+    live.step()
+    await recorder.flush()
+    assert recorder.buffered == 0 and recorder.rows_dropped == 1
+    # The clashing game's next tick still went in alongside the stored one
+    assert await count(test_db_session, models.GameEvent, game_id=clash) == 2
+    assert await count(test_db_session, models.GameEvent, game_id=other) == 2
+
+    live.step()
+    await recorder.flush()
+    assert await count(test_db_session, models.GameEvent, game_id=clash) == 3
+    assert recorder.rows_dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_finished_games_are_compacted(test_db_session):
+    recorder = GameRecorder(async_sessionmaker(test_db_session.bind, expire_on_commit=False),
+                            snapshot_interval=3, flush_interval=3600)
+    recorder.start()
+    live = LiveGames(recorder=recorder)
+    game_id = live.start_game("p1", "Walls", "walls", seed=0)
+    live.engine.games[game_id].food = 0
+    repo = DatabaseRepository(test_db_session)
+    # Head starts mid-board heading right, so the wall ends the game within a grid width
+    while game_id in live.engine.games:
+        live.step()
+    await recorder.stop()
+
+    final = await repo.get_game(game_id)
+    assert final.is_active is False
+    snapshots = await count(test_db_session, models.GameSnapshot, game_id=game_id)
+    assert snapshots > 2
+
+    assert await repo.compact_finished_games() == snapshots - 2
+    assert await count(test_db_session, models.GameSnapshot, game_id=game_id) == 2
+    assert (await repo.get_game(game_id)).model_dump() == final.model_dump()
+
+
+@pytest.mark.asyncio
+async def test_compaction_leaves_running_games_alone(test_db_session):
+    repo = DatabaseRepository(test_db_session)
+    game = SnakeGame("passthrough", seed=2)
+    await repo.create_game_records([GameStart("live", "p", "P", "passthrough", 0, game.state())])
+    events = play(game, random.Random(2), game_id="live", limit=30)
+    await repo.save_game_state(events, [SnapshotRecord("live", t, game.state()) for t in (10, 20)])
+    assert await repo.compact_finished_games() == 0
+    assert await count(test_db_session, models.GameSnapshot, game_id="live") == 3
+
+
+@pytest.mark.asyncio
+async def test_save_endpoint_appends_to_owned_game(client: AsyncClient, test_db_session):
+    response = await client.post("/api/auth/signup", json={"email": "log@snake.game", "username": "Log", "password": "pwd"})
+    user, token = response.json()["user"], response.json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    repo = DatabaseRepository(test_db_session)
+    game = SnakeGame("passthrough", seed=8)
+    await repo.create_game_records([GameStart("mine", user["id"], "Log", "passthrough", 0, game.state())])
+
+    game.move()
+    body = {"score": 0, "mode": "passthrough", "gameId": "mine",
+            "events": [{"tick": 1, "direction": "right", "ate": False}]}
+    assert (await client.post("/api/games/save", json=body, headers=headers)).status_code == 200
+    assert (await client.get("/api/games/mine")).json()["snake"][0] == game.point(game.body[0])
+    assert (await client.post("/api/games/save", json=body, headers=headers)).status_code == 409
+
+    body["gameId"] = "someone-elses"
+    assert (await client.post("/api/games/save", json=body, headers=headers)).status_code == 404
+    # Score-only saves from client-side games still succeed
+    response = await client.post("/api/games/save", json={"score": 10, "mode": "walls"}, headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_save_endpoint_rejects_moves_that_do_not_replay(client: AsyncClient, test_db_session):
+    response = await client.post("/api/auth/signup", json={"email": "bad@snake.game", "username": "Bad", "password": "pwd"})
+    user, token = response.json()["user"], response.json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    repo = DatabaseRepository(test_db_session)
+    game = SnakeGame("walls", seed=8)
+    await repo.create_game_records([GameStart("mine", user["id"], "Bad", "walls", 0, game.state())])
+
+    def save(*events):
+        return client.post("/api/games/save", headers=headers, json={
+            "score": 0, "mode": "walls", "gameId": "mine", "events": list(events)})
+
+    # Eating where the move can't reach food, skipping a tick, food off the grid
+    assert (await save({"tick": 1, "direction": "up", "ate": True, "food": {"x": 1, "y": 1}})).status_code == 422
+    assert (await save({"tick": 2, "direction": "up"})).status_code == 422
+    assert (await save({"tick": 1, "direction": "up"}, {"tick": 3, "direction": "up"})).status_code == 422
+    far = {"tick": 1, "direction": "up", "ate": True, "food": {"x": 20, "y": 0}}
+    assert (await save(far)).status_code == 422
+    assert await count(test_db_session, models.GameEvent, game_id="mine") == 0
+
+    assert (await save({"tick": 1, "direction": "up"}, {"tick": 2, "direction": "up"})).status_code == 200
+    assert (await save({"tick": 3, "direction": "up"})).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_save_endpoint_leaves_server_run_games_to_the_recorder(client: AsyncClient, recorder):
+    response = await client.post("/api/auth/signup", json={"email": "run@snake.game", "username": "Run", "password": "pwd"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    live = LiveGames(recorder=recorder)
+    app.dependency_overrides[get_live_games] = lambda: live
+    game_id = (await client.post("/api/games/start", json={"mode": "walls"}, headers=headers)).json()["gameId"]
+    await recorder.flush()
+
+    body = {"score": 0, "mode": "walls", "gameId": game_id, "events": [{"tick": 1, "direction": "up"}]}
+    assert (await client.post("/api/games/save", json=body, headers=headers)).status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_corrupt_log_does_not_fail_game_lists(client: AsyncClient, test_db_session):
+    repo = DatabaseRepository(test_db_session)
+    game = SnakeGame("walls", seed=4)
+    await repo.create_game_records([GameStart("bad", "p", "P", "walls", 0, game.state())])
+    # Written around the endpoint's checks: a food event the move can't produce
+    await repo.save_game_state([MoveEvent("bad", 1, "up", True, 3)])
+
+    response = await client.get("/api/games/active")
+    assert response.status_code == 200
+    assert [g["id"] for g in response.json()] == ["bad"]
+    assert (await client.get("/api/games/bad")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_mock_database_keeps_a_log():
+    db = MockDatabase()
+    game = db.active_games[0]
+    await db.save_game_state(
+        [MoveEvent(game.id, 1, "right", False, None)],
+        [SnapshotRecord(game.id, 1, {"grid": 20, "body": [45, 44], "direction": "right",
+                                     "food": 0, "score": 30, "over": True})],
+    )
+    assert len(db.game_events[game.id]) == 1
+    updated = await db.get_game(game.id)
+    assert updated.score == 30 and updated.is_active is False
+    with pytest.raises(ValueError):
+        await db.save_game_state([MoveEvent(game.id, 1, "up", False, None)])
+    db.__class__._instance = None
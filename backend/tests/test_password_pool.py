@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from src.api.routes import get_password_hasher
+from src.main import app
+from src.models import db as models
+from src.utils.password import HasherBusy, PasswordHasher, hash_rounds
+
+
+@pytest.fixture
+def hasher():
+    # Minimum bcrypt cost keeps the tests fast
+    pool = PasswordHasher(rounds=4, workers=2, max_pending=8)
+    app.dependency_overrides[get_password_hasher] = lambda: pool
+    yield pool
+    pool.shutdown()
+
+
+async def signup(client: AsyncClient, email: str = "pool@example.com"):
+    return await client.post("/api/auth/signup", json={
+        "username": "pool", "email": email, "password": "password123"
+    })
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_loop():
+    pool = PasswordHasher(rounds=4, workers=1, max_pending=4)
+    try:
+        hashed = await pool.hash("secret")
+        assert hash_rounds(hashed) == 4
+        assert await pool.verify("secret", hashed)
+        assert not await pool.verify("wrong", hashed)
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_beyond_max_pending():
+    pool = PasswordHasher(rounds=4, workers=1, max_pending=2)
+    try:
+        results = await asyncio.gather(*(pool.hash("secret") for _ in range(5)), return_exceptions=True)
+        assert sum(isinstance(r, HasherBusy) for r in results) == 3
+        assert pool.rejected == 3
+        # Capacity comes back once the queue drains
+        assert hash_rounds(await pool.hash("secret")) == 4
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_signup_and_login_return_503_when_saturated(client: AsyncClient, hasher):
+    assert (await signup(client)).status_code == 201
+    hasher.max_pending = 0
+
+    response = await client.post("/api/auth/login", json={"email": "pool@example.com", "password": "password123"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert (await signup(client, "other@example.com")).status_code == 503
+
+    hasher.max_pending = 8
+    assert (await signup(client, "other@example.com")).status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_when_work_factor_changes(client: AsyncClient, test_db_session, hasher):
+    await signup(client)
+    hasher.rounds = 5
+
+    response = await client.post("/api/auth/login", json={"email": "pool@example.com", "password": "password123"})
+    assert response.status_code == 200
+
+    user = (await test_db_session.execute(
+        select(models.User).where(models.User.email == "pool@example.com")
+    )).scalar_one()
+    assert hash_rounds(user.password) == 5
+
+    # Old password still works against the upgraded hash; a wrong one doesn't
+    response = await client.post("/api/auth/login", json={"email": "pool@example.com", "password": "password123"})
+    assert response.status_code == 200
+    response = await client.post("/api/auth/login", json={"email": "pool@example.com", "password": "nope"})
+    assert response.status_code == 401
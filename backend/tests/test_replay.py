@@ -0,0 +1,145 @@
+import random
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.api.routes import get_replay_store
+from src.game.engine import SnakeGame
+from src.game.live import LiveGames
+from src.game.movelog import event_for
+from src.game.recorder import GameRecorder
+from src.game.replay import (
+    MEDIA_TYPE, ReplayError, ReplayStore, encode_replay, read_header, seek,
+)
+from src.main import app
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+
+def play(mode: str, seed: int, limit: int = 3000):
+    """A seeded game with random turns; returns its opening state, log and state after every tick."""
+    game = SnakeGame(mode, seed=seed)
+    rng = random.Random(seed)
+    start, events, states = game.state(), [], [game.state()]
+    for tick in range(1, limit):
+        if rng.random() < 0.25:
+            game.set_direction(rng.choice(DIRECTIONS))
+        ate = game.move()
+        events.append(event_for("g", tick, game, ate))
+        states.append(game.state())
+        if game.is_game_over:
+            break
+    return start, events, states
+
+
+def chunk(data: bytes, header, tick: int) -> bytes:
+    offset, size = header.chunk_span(header.chunk_for(tick))
+    return data[offset:offset + size]
+
+
+@pytest.mark.parametrize("mode", ["walls", "passthrough"])
+@pytest.mark.parametrize("interval", [1, 7, 64])
+def test_seek_matches_the_original_game_at_every_tick(mode, interval):
+    start, events, states = play(mode, seed=interval)
+    data = encode_replay(mode, start, events, seed=interval, keyframe_interval=interval)
+    header = read_header(data)
+
+    assert (header.mode, header.seed, header.ticks) == (mode, interval, len(events))
+    assert header.score == states[-1]["score"]
+    for tick, expected in enumerate(states):
+        assert seek(header, chunk(data, header, tick), tick).state() == expected
+    # Seeking past the end shows the final state
+    assert seek(header, chunk(data, header, 10 ** 6), 10 ** 6).state() == states[-1]
+
+
+def test_game_without_moves_has_one_chunk():
+    game = SnakeGame("walls", seed=0)
+    header = read_header(encode_replay("walls", game.state(), []))
+    assert header.seed is None and header.ticks == 0 and len(header.chunk_ends) == 1
+
+
+def test_inconsistent_log_is_rejected():
+    start, events, _ = play("passthrough", seed=3)
+    missing_meal = [e._replace(food=None) if e.ate else e for e in events]
+    with pytest.raises(ValueError):
+        encode_replay("passthrough", start, missing_meal)
+
+
+def test_corrupt_data_raises_replay_error():
+    start, events, _ = play("walls", seed=4)
+    data = encode_replay("walls", start, events)
+    with pytest.raises(ReplayError):
+        read_header(b"NOPE" + data[4:])
+    with pytest.raises(ReplayError):
+        read_header(data[:10])
+    header = read_header(data)
+    with pytest.raises(ReplayError):
+        seek(header, b"\x00" * 20, 0)
+
+
+def test_store_reads_one_chunk_per_seek(tmp_path):
+    store = ReplayStore(str(tmp_path))
+    start, events, states = play("passthrough", seed=5)
+    store.save("game-1", encode_replay("passthrough", start, events, keyframe_interval=16))
+
+    header, game = store.seek("game-1", 40)
+    assert game.state() == states[40]
+    assert store.header("game-1") == header
+    assert not store.exists("../game-1") and store.path("../game-1") is None
+    with pytest.raises(ReplayError):
+        store.save("a/b", b"")
+
+
+@pytest_asyncio.fixture
+async def archived(test_db_session, tmp_path):
+    """A finished server-run game archived by the recorder."""
+    store = ReplayStore(str(tmp_path))
+    recorder = GameRecorder(async_sessionmaker(test_db_session.bind, expire_on_commit=False),
+                            snapshot_interval=10, flush_interval=3600, replays=store, keyframe_interval=8)
+    recorder.start()
+    live = LiveGames(recorder=recorder)
+    game_id = live.start_game("p1", "Replayer", "walls", seed=9)
+    game = live.engine.get(game_id)
+    states = [game.state()]
+    while game_id in live.engine.games:
+        live.step()
+        states.append(game.state())
+    await recorder.stop()
+    assert recorder.replays_written == 1
+    return store, game_id, states
+
+
+@pytest.mark.asyncio
+async def test_recorder_archives_finished_games(archived):
+    store, game_id, states = archived
+    header = store.header(game_id)
+    assert header.seed == 9 and header.ticks == len(states) - 1
+    for tick, expected in enumerate(states):
+        assert store.seek(game_id, tick)[1].state() == expected
+
+
+@pytest.mark.asyncio
+async def test_replay_endpoint(client: AsyncClient, archived):
+    store, game_id, states = archived
+    app.dependency_overrides[get_replay_store] = lambda: store
+
+    response = await client.get(f"/api/games/{game_id}/replay", params={"tick": 3})
+    assert response.status_code == 200
+    frame = response.json()
+    assert frame["tick"] == 3 and frame["ticks"] == len(states) - 1 and frame["seed"] == 9
+    assert frame["keyframeInterval"] == 8 and frame["finalScore"] == states[-1]["score"]
+    head = states[3]["body"][0]
+    assert frame["snake"][0] == {"x": head % 20, "y": head // 20}
+    assert (await client.get(f"/api/games/{game_id}/replay", params={"tick": 10 ** 6})).json()["isOver"] is True
+
+    response = await client.get(f"/api/games/{game_id}/replay")
+    assert response.headers["content-type"] == MEDIA_TYPE
+    assert response.content == store.load(game_id)
+    # Clients can fetch just the header, then single chunks
+    response = await client.get(f"/api/games/{game_id}/replay", headers={"Range": "bytes=0-31"})
+    assert response.status_code == 206 and response.content == store.load(game_id)[:32]
+
+    assert (await client.get("/api/games/unknown/replay")).status_code == 404
+    assert (await client.get(f"/api/games/{game_id}/replay", params={"tick": -1})).status_code == 422
@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import exc, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.api.routes import get_score_ingestor
+from src.db.base import Base
+from src.db.repository import DatabaseRepository
+from src.leaderboard.index import LeaderboardIndex
+from src.leaderboard.ingest import ScoreDropped, ScoreIngestor, record_score
+from src.main import app
+from src.models import db as models
+
+
+@pytest.fixture
+def session_factory(test_db_session):
+    return async_sessionmaker(test_db_session.bind, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def ingestor(session_factory):
+    ingestor = ScoreIngestor(session_factory, index=LeaderboardIndex(), batch_size=100, flush_interval=0.01)
+    ingestor.start()
+    yield ingestor
+    await ingestor.stop()
+
+
+async def stored_scores(test_db_session, mode: str = "walls") -> list[int]:
+    stmt = select(models.LeaderboardEntry.score).where(models.LeaderboardEntry.mode == mode)
+    return sorted((await test_db_session.execute(stmt)).scalars().all(), reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_share_a_batch(ingestor, test_db_session):
+    submissions = await asyncio.gather(*(ingestor.submit("p", score, "walls") for score in (10, 30, 20)))
+    ranks = await asyncio.gather(*(s.flushed for s in submissions))
+
+    assert ranks == [3, 1, 2]
+    assert ingestor.batches_flushed == 1
+    assert ingestor.pending == 0
+    assert await stored_scores(test_db_session) == [30, 20, 10]
+
+
+@pytest.mark.asyncio
+async def test_batch_size_triggers_flush(session_factory, test_db_session):
+    ingestor = ScoreIngestor(session_factory, index=LeaderboardIndex(), batch_size=2, flush_interval=60)
+    ingestor.start()
+    submissions = [await ingestor.submit("p", score, "walls") for score in range(5)]
+    # Two full batches go out without waiting for the (huge) interval
+    await asyncio.wait_for(asyncio.gather(submissions[0].flushed, submissions[3].flushed), 5)
+    assert ingestor.batches_flushed == 2
+    assert not submissions[4].flushed.done()
+
+    await ingestor.stop()
+    assert ingestor.rows_flushed == 5
+    assert await stored_scores(test_db_session) == [4, 3, 2, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_stop_loses_nothing(session_factory, test_db_session):
+    ingestor = ScoreIngestor(session_factory, index=LeaderboardIndex(), batch_size=7, flush_interval=60)
+    ingestor.start()
+    submissions = [await ingestor.submit("p", score, "walls") for score in range(50)]
+    await ingestor.stop()
+
+    assert not ingestor.running
+    assert all(s.flushed.done() for s in submissions)
+    assert len(await stored_scores(test_db_session)) == 50
+
+
+@pytest.mark.asyncio
+async def test_only_rows_that_cannot_be_written_are_dropped(session_factory, test_db_session, monkeypatch):
+    insert_scores = DatabaseRepository.insert_scores
+
+    async def reject_13(self, entries):
+        if any(entry.score == 13 for entry in entries):
+            raise exc.IntegrityError("INSERT", {}, Exception("bad row"))
+        await insert_scores(self, entries)
+
+    monkeypatch.setattr(DatabaseRepository, "insert_scores", reject_13)
+    index = LeaderboardIndex()
+    index.load([])
+    ingestor = ScoreIngestor(session_factory, index=index, batch_size=100, flush_interval=60)
+    ingestor.start()
+    submissions = [await ingestor.submit("p", score, "walls") for score in range(10, 20)]
+    await ingestor.stop()
+
+    with pytest.raises(ScoreDropped):
+        submissions[3].flushed.result()
+    assert ingestor.rows_dropped == 1 and ingestor.pending == 0
+    assert await stored_scores(test_db_session) == [19, 18, 17, 16, 15, 14, 12, 11, 10]
+    assert index.count("walls") == 9
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried_a_few_times(session_factory, monkeypatch):
+    calls = []
+
+    async def offline(self, entries):
+        calls.append(len(entries))
+        raise exc.OperationalError("INSERT", {}, Exception("connection lost"))
+
+    monkeypatch.setattr(DatabaseRepository, "insert_scores", offline)
+    ingestor = ScoreIngestor(session_factory, index=LeaderboardIndex(), flush_interval=0.01,
+                             retry_delay=0, max_retries=2)
+    ingestor.start()
+    submissions = [await ingestor.submit("p", score, "walls") for score in (1, 2)]
+    with pytest.raises(ScoreDropped):
+        await asyncio.wait_for(submissions[0].flushed, 5)
+    await ingestor.stop()
+    # Retried whole, never split
+    assert calls == [2, 2, 2]
+    assert ingestor.rows_dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_index_estimate_matches_reconciled_rank(session_factory):
+    index = LeaderboardIndex()
+    index.load([])
+    ingestor = ScoreIngestor(session_factory, index=index, flush_interval=0.01)
+    ingestor.start()
+    try:
+        first = await ingestor.submit("p", 50, "walls")
+        second = await ingestor.submit("p", 80, "walls")
+        # Estimates are available before anything is written
+        assert (first.estimate, second.estimate) == (1, 1)
+        assert index.count("walls") == 2
+        assert await second.flushed == 1
+        assert await first.flushed == 2
+    finally:
+        await ingestor.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ack", ["flush", "enqueue"])
+async def test_api_submissions_go_through_ingestor(client: AsyncClient, ingestor, test_db_session, ack):
+    ingestor.ack = ack
+    app.dependency_overrides[get_score_ingestor] = lambda: ingestor
+    response = await client.post("/api/auth/signup", json={"email": "ing@snake.game", "username": "Ing", "password": "pwd"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    ranks = []
+    for score in (100, 300, 200):
+        response = await client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+        assert response.status_code == 200
+        ranks.append(response.json()["rank"])
+    assert ranks == [1, 1, 2]
+
+    await ingestor.stop()
+    assert await stored_scores(test_db_session) == [300, 200, 100]
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_a_flush_does_not_hold_a_connection(tmp_path):
+    # One pooled connection: a request still holding it would starve the flush
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0, pool_timeout=2)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    ingestor = ScoreIngestor(factory, index=LeaderboardIndex(), flush_interval=0.01, ack="flush")
+    ingestor.start()
+
+    async def submit(score: int) -> int:
+        async with factory() as session:
+            repo = DatabaseRepository(session, LeaderboardIndex())
+            # Check out the connection, as resolving the user does
+            await repo.get_user_by_email("nobody@snake.game")
+            return await record_score(repo, ingestor, "p", score, "walls")
+
+    try:
+        assert await asyncio.wait_for(submit(10), 5) == 1
+    finally:
+        await ingestor.stop()
+        await engine.dispose()
@@ -0,0 +1,165 @@
+import asyncio
+import random
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.api.routes import get_score_verifier
+from src.game.engine import Mulberry32, SnakeGame
+from src.game.verify import simulate
+from src.leaderboard.cache import ResponseCache
+from src.leaderboard.index import LeaderboardIndex
+from src.leaderboard.ingest import ScoreIngestor
+from src.leaderboard.verifier import ScoreVerifier, VerifierBusy
+from src.main import app
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+
+def client_game(mode: str, seed: int) -> dict:
+    """Play like the browser: seeded food, logging each accepted turn with the moves made so far."""
+    game = SnakeGame(mode, rng=Mulberry32(seed))
+    turns = random.Random(seed)
+    inputs, ticks = [], 0
+    while not game.is_game_over:
+        if turns.random() < 0.2:
+            direction = turns.choice(DIRECTIONS)
+            if game.set_direction(direction):
+                inputs.append([ticks, direction])
+        game.move()
+        ticks += 1
+    return {"mode": mode, "score": game.score, "seed": seed, "ticks": ticks, "inputs": inputs}
+
+
+def test_food_rng_matches_the_client():
+    # First draws of mulberry32 in gameLogic.ts
+    rng = Mulberry32(42)
+    assert [rng.random() for _ in range(2)] == [0.6011037519201636, 0.44829055899754167]
+    assert Mulberry32(0).randrange(20) == 5
+
+
+@pytest.mark.parametrize("mode", ["walls", "passthrough"])
+@pytest.mark.parametrize("seed", range(10))
+def test_honest_games_verify(mode, seed):
+    game = client_game(mode, seed)
+    verdict = simulate(game["mode"], game["seed"], game["inputs"], game["ticks"], game["score"])
+    assert verdict.ok and verdict.score == game["score"]
+
+
+def test_tampered_games_are_rejected():
+    game = client_game("passthrough", 7)
+    args = game["mode"], game["seed"], game["inputs"]
+    assert simulate(*args, game["ticks"], game["score"] + 10).reason == "score mismatch"
+    assert simulate(*args, game["ticks"] + 5, game["score"]).reason == "game ended early"
+    assert simulate(*args, game["ticks"] - 1, game["score"]).reason == "game did not end"
+    assert simulate(game["mode"], game["seed"] + 1, game["inputs"], game["ticks"], game["score"]).reason is not None
+    shuffled = list(reversed(game["inputs"]))
+    if len(shuffled) > 1 and shuffled != game["inputs"]:
+        assert simulate(game["mode"], game["seed"], shuffled, game["ticks"], game["score"]).reason is not None
+
+
+def test_time_budget_is_enforced():
+    # A passthrough snake that never turns circles forever; the claim is never reached in time
+    assert simulate("passthrough", 1, [], 10 ** 9, 0, budget=0.01).reason == "timeout"
+
+
+@pytest_asyncio.fixture
+async def verifier(test_db_session):
+    session_factory = async_sessionmaker(test_db_session.bind, expire_on_commit=False)
+    index, cache = LeaderboardIndex(), ResponseCache()
+    verifier = ScoreVerifier(
+        session_factory, ingestor=ScoreIngestor(session_factory, index, cache),
+        index=index, cache=cache, workers=1, max_pending=50,
+    )
+    yield verifier
+    await verifier.stop()
+
+
+async def signup(client: AsyncClient) -> dict:
+    response = await client.post("/api/auth/signup", json={"email": "v@snake.game", "username": "Verified", "password": "pwd"})
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+@pytest.mark.asyncio
+async def test_inline_verification_when_queue_is_not_running(client: AsyncClient, verifier):
+    app.dependency_overrides[get_score_verifier] = lambda: verifier
+    headers = await signup(client)
+    game = client_game("walls", 3)
+
+    response = await client.post("/api/leaderboard", json=game, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "verified" and response.json()["rank"] == 1
+
+    response = await client.post("/api/leaderboard", json={**game, "score": game["score"] + 100}, headers=headers)
+    assert response.status_code == 422
+    assert [e["score"] for e in (await client.get("/api/leaderboard?mode=walls")).json()] == [game["score"]]
+
+    # Unverifiable submissions are refused outright when verification is required
+    verifier.required = True
+    response = await client.post("/api/leaderboard", json={"score": 50, "mode": "walls"}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_queued_verification(client: AsyncClient, verifier):
+    app.dependency_overrides[get_score_verifier] = lambda: verifier
+    headers = await signup(client)
+    verifier.start()
+    honest, cheat = client_game("passthrough", 11), client_game("passthrough", 12)
+    cheat["score"] += 500
+
+    ids = []
+    for game in (honest, cheat):
+        response = await client.post("/api/leaderboard", json=game, headers=headers)
+        assert response.status_code == 202 and response.json()["status"] == "pending"
+        ids.append(response.json()["verificationId"])
+
+    async def outcome(verification_id):
+        while True:
+            result = (await client.get(f"/api/leaderboard/verifications/{verification_id}", headers=headers)).json()
+            if result["status"] != "pending":
+                return result
+            await asyncio.sleep(0.05)
+
+    honest_result, cheat_result = [await asyncio.wait_for(outcome(i), 30) for i in ids]
+    assert honest_result["status"] == "verified" and honest_result["rank"] == 1
+    assert cheat_result == {"id": ids[1], "status": "rejected", "rank": None, "reason": "score mismatch"}
+    assert [e["score"] for e in (await client.get("/api/leaderboard?mode=passthrough")).json()] == [honest["score"]]
+    assert verifier.stats() == {"pending": 0, "verified": 1, "rejected": 1, "timeouts": 0}
+
+    # Other users can't see the outcome
+    assert (await client.get(f"/api/leaderboard/verifications/{ids[0]}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_oversized_submissions_are_refused_before_queueing(client: AsyncClient, verifier):
+    app.dependency_overrides[get_score_verifier] = lambda: verifier
+    headers = await signup(client)
+    verifier.start()
+    game = client_game("walls", 5)
+    for body in (
+        {**game, "ticks": verifier.max_ticks + 1},
+        {**game, "inputs": [[0, "up"]] * (verifier.max_ticks + 1)},
+    ):
+        response = await client.post("/api/leaderboard", json=body, headers=headers)
+        assert response.status_code == 422
+    assert verifier.stats()["pending"] == 0
+
+    # Key repeat from older clients logs each turn several times: long logs alone are not refused
+    repeated = {**game, "inputs": [turn for turn in game["inputs"] for _ in range(4)]}
+    assert len(repeated["inputs"]) > repeated["ticks"]
+    assert (await client.post("/api/leaderboard", json=repeated, headers=headers)).status_code == 202
+
+
+@pytest.mark.asyncio
+async def test_full_queue_answers_503(client: AsyncClient, verifier):
+    app.dependency_overrides[get_score_verifier] = lambda: verifier
+    headers = await signup(client)
+    verifier.max_pending = 0
+    verifier.start()
+    response = await client.post("/api/leaderboard", json=client_game("walls", 1), headers=headers)
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    with pytest.raises(VerifierBusy):
+        verifier.submit("x", "walls", 0, 1, 1, [])
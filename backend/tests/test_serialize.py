@@ -0,0 +1,49 @@
+import json
+from datetime import datetime, timezone
+from typing import List
+
+import pytest
+from httpx import AsyncClient
+from pydantic import TypeAdapter
+
+from src.api.serialize import active_games_json, leaderboard_json
+from src.leaderboard.index import RankedEntry
+from src.models import db as models
+from src.models import schemas
+
+
+def test_leaderboard_bytes_match_the_response_model():
+    entries = [
+        RankedEntry("a", 'quote "me"', 30, "walls", datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)),
+        RankedEntry("b", "naive", 20, "passthrough", datetime(2024, 5, 1, 12, 30, 0, 1500)),
+    ]
+    adapter = TypeAdapter(List[schemas.LeaderboardEntry])
+    assert leaderboard_json(entries) == adapter.dump_json(adapter.validate_python(entries, from_attributes=True))
+    assert leaderboard_json([]) == b"[]"
+
+
+def test_game_bytes_match_the_response_model():
+    games = [{
+        "id": "g1", "playerId": "u1", "playerName": "p", "score": 3, "mode": "walls",
+        "snake": [{"x": 1, "y": 2}, {"x": 1, "y": 3}], "food": {"x": 5, "y": 5},
+        "direction": "up", "isActive": True,
+    }]
+    adapter = TypeAdapter(List[schemas.ActiveGame])
+    assert active_games_json(games) == adapter.dump_json(adapter.validate_python(games), by_alias=True)
+
+
+@pytest.mark.asyncio
+async def test_active_games_keep_their_aliases(client: AsyncClient, test_db_session):
+    test_db_session.add(models.ActiveGame(
+        id="g1", player_id="u1", player_name="p", score=3, mode="walls",
+        snake=[{"x": 1, "y": 2}], food={"x": 5, "y": 5}, direction="up", is_active=True,
+    ))
+    await test_db_session.commit()
+
+    response = await client.get("/api/games/active")
+    assert response.headers["content-type"] == "application/json"
+    assert "Accept" in response.headers["vary"]
+    assert json.loads(response.content) == [{
+        "id": "g1", "playerId": "u1", "playerName": "p", "score": 3, "mode": "walls",
+        "snake": [{"x": 1, "y": 2}], "food": {"x": 5, "y": 5}, "direction": "up", "isActive": True,
+    }]
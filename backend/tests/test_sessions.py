@@ -0,0 +1,107 @@
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from src.auth.sessions import TokenError, UserCache, issue_token, read_token, user_cache
+from src.models import schemas
+
+
+async def signup(client: AsyncClient, email: str = "session@snake.game") -> dict:
+    response = await client.post("/api/auth/signup", json={"email": email, "username": "Session", "password": "pwd"})
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def test_token_round_trip_and_tampering():
+    token = issue_token("user-1")
+    claims = read_token(token)
+    assert claims["sub"] == "user-1"
+    assert claims["exp"] > time.time()
+
+    payload, _, signature = token.partition(".")
+    forged = issue_token("user-2").partition(".")[0]
+    for bad in (f"{forged}.{signature}", f"{payload}.{signature[:-2]}xx", payload, "", "a.b.c"):
+        with pytest.raises(TokenError):
+            read_token(bad)
+    with pytest.raises(TokenError):
+        read_token(token, key="another-secret")
+    with pytest.raises(TokenError):
+        read_token(issue_token("user-1", ttl=-1))
+
+
+def test_user_cache_lru_and_ttl():
+    cache = UserCache(maxsize=2, ttl=60)
+    users = [schemas.User(id=str(i), username=f"u{i}", email=f"u{i}@snake.game", createdAt="2024-01-01T00:00:00")
+             for i in range(3)]
+    cache.put("0", users[0])
+    cache.put("1", users[1])
+    assert cache.get("0") is users[0]  # "1" is now least recently used
+    cache.put("2", users[2])
+    assert cache.get("1") is None
+    assert cache.get("2") is users[2]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    cache.invalidate("2")
+    assert cache.get("2") is None
+
+    expired = UserCache(maxsize=2, ttl=0)
+    expired.put("0", users[0])
+    assert expired.get("0") is None
+
+
+@pytest.mark.asyncio
+async def test_hot_path_makes_no_user_queries(client: AsyncClient, test_db_session):
+    headers = await signup(client)
+    statements = []
+    engine = test_db_session.bind.sync_engine
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        for score in (10, 20):
+            response = await client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+            assert response.status_code == 200
+        response = await client.post("/api/games/save", json={"score": 20, "mode": "walls"}, headers=headers)
+        assert response.status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert statements
+    assert not [s for s in statements if "FROM users" in s]
+    assert user_cache.hits >= 3
+
+
+@pytest.mark.asyncio
+async def test_cache_miss_falls_back_to_database(client: AsyncClient):
+    headers = await signup(client)
+    user_cache.clear()
+
+    response = await client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "session@snake.game"
+    assert (user_cache.hits, user_cache.misses) == (0, 1)
+
+    await client.get("/api/auth/me", headers=headers)
+    assert user_cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_token(client: AsyncClient):
+    headers = await signup(client)
+    login = await client.post("/api/auth/login", json={"email": "session@snake.game", "password": "pwd"})
+    other = {"Authorization": f"Bearer {login.json()['token']}"}
+
+    assert (await client.post("/api/auth/logout", headers=headers)).status_code == 200
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 401
+    # Other sessions of the same user stay valid
+    assert (await client.get("/api/auth/me", headers=other)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_email_is_not_a_token(client: AsyncClient):
+    await signup(client)
+    response = await client.get("/api/auth/me", headers={"Authorization": "Bearer session@snake.game"})
+    assert response.status_code == 401
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.game.live import LOBBY_TOPIC, game_topic
+from src.game.shards import FrameRing, ShardedRooms, TickClock, _pack, shard_for
+from src.realtime.hub import FrameHub, Subscription
+
+
+def test_frame_ring_round_trip_and_overwrite():
+    ring = FrameRing.create(slots=4, slot_size=64)
+    try:
+        for seq in range(1, 4):
+            assert ring.write(seq, f"tick {seq}".encode())
+        assert ring.latest() == 3
+        assert ring.read(2) == b"tick 2"
+        # Slot 1 is reused by batch 5: a reader that far behind gets nothing, not batch 5
+        ring.write(4, b"tick 4")
+        ring.write(5, b"tick 5")
+        assert ring.read(1) is None
+        assert ring.read(5) == b"tick 5"
+        assert not ring.write(6, b"x" * 100)
+        assert ring.read(6) is None
+    finally:
+        ring.close()
+
+
+def test_large_ticks_are_split_across_slots():
+    frames = [(f"game:{i}", {"type": "delta", "tick": 1, "head": {"x": i, "y": i}}) for i in range(500)]
+    batches = _pack(frames, 1024)
+    assert len(batches) > 1 and all(len(batch) <= 1024 for batch in batches)
+    assert [tuple(frame) for batch in batches for frame in json.loads(batch)] == frames
+
+
+def test_tick_clock_keeps_the_rate_and_skips_when_far_behind():
+    clock = TickClock(0.01, max_lag=2)
+    first = clock.due
+    for _ in range(5):
+        clock.advance()
+    # Deadlines follow the schedule, not the time the ticks took
+    assert clock.due == pytest.approx(first + 0.05)
+    time.sleep(0.2)
+    clock.advance()
+    assert clock.skipped >= 10
+    assert clock.remaining() > -0.03
+
+
+def test_games_spread_over_shards():
+    counts = [0, 0, 0, 0]
+    for i in range(4000):
+        counts[shard_for(f"game-{i}", 4)] += 1
+    assert min(counts) > 900
+    assert shard_for("abc", 4) == shard_for("abc", 4)
+
+
+def test_hub_reports_first_and_last_watcher():
+    events = []
+    hub = FrameHub(on_watch=lambda topic, watched: events.append((topic, watched)))
+    a, b = Subscription(), Subscription()
+    hub.subscribe(a, "t")
+    hub.subscribe(b, "t")
+    hub.unsubscribe(a)
+    hub.unsubscribe(b)
+    assert events == [("t", True), ("t", False)]
+
+
+def apply_delta(snake: list, delta: dict) -> list:
+    if "head" not in delta:
+        return snake
+    snake = [delta["head"]] + snake
+    return snake if delta["grow"] else snake[:-1]
+
+
+async def drain(subscription: Subscription, topic: str, snake: list) -> list:
+    while not subscription.queue.empty():
+        got, _, frame = subscription.queue.get_nowait()
+        if got == topic:
+            snake = apply_delta(snake, json.loads(frame.text()))
+    return snake
+
+
+@pytest.mark.asyncio
+async def test_sharded_rooms_stream_and_move_games():
+    rooms = ShardedRooms(shards=2, interval=0.01)
+    rooms.start()
+    try:
+        lobby = Subscription(maxsize=1000)
+        rooms.hub.subscribe(lobby, LOBBY_TOPIC)
+        game_ids = [await rooms.start_game(f"p{i}", f"Player {i}", "passthrough", seed=i) for i in range(12)]
+        assert {rooms.placement[g] for g in game_ids} == {0, 1}
+        assert rooms.owner(game_ids[3]) == "p3" and rooms.game_of("p3") == game_ids[3]
+
+        watched = game_ids[0]
+        topic = game_topic(watched)
+        snapshot = (await rooms.fetch_snapshot_frame(watched)).payload
+        subscription = Subscription(maxsize=1000)
+        rooms.hub.subscribe(subscription, topic)
+        snake = snapshot["snake"]
+
+        for direction in ("up", "left", "down"):
+            assert rooms.set_direction(watched, direction)
+            await asyncio.sleep(0.1)
+        snake = await drain(subscription, topic, snake)
+        # Everything published before the reply is already queued
+        current = (await rooms.fetch_snapshot_frame(watched)).payload
+        snake = await drain(subscription, topic, snake)
+        assert snake == current["snake"]
+
+        # Move every game off the watched game's shard; its deltas carry on from the other one
+        source = rooms.placement[watched]
+        on_source = [g for g, index in rooms.placement.items() if index == source]
+        assert await rooms.move(source, 1 - source, 100) == len(on_source)
+        assert rooms.placement[watched] == 1 - source
+        assert rooms.owner(watched) == "p0"
+        assert all(index == 1 - source for index in rooms.placement.values())
+        assert rooms.set_direction(watched, "right")
+        await asyncio.sleep(0.1)
+        current = (await rooms.fetch_snapshot_frame(watched)).payload
+        snake = await drain(subscription, topic, snake)
+        assert snake == current["snake"]
+        assert current["direction"] == "right"
+
+        games = (await rooms.fetch_lobby_frame()).payload["games"]
+        assert {game["id"] for game in games} == set(rooms.placement)
+        stats = await rooms.stats()
+        assert [s["games"] for s in stats if s["shard"] == source] == [0]
+        assert all(s["ticks"] > 0 for s in stats)
+        assert await rooms.fetch_snapshot_frame("missing") is None
+        assert not rooms.set_direction("missing", "up")
+    finally:
+        await rooms.stop()
+    assert not rooms.running
+
+
+@pytest.mark.asyncio
+async def test_rebalance_evens_out_an_overloaded_shard():
+    rooms = ShardedRooms(shards=3, overload=0.5)
+    loads = {0: (100, 0.9), 1: (20, 0.1), 2: (60, 0.6)}
+    moves = []
+
+    async def stats():
+        return [{"shard": shard, "games": games, "load": load} for shard, (games, load) in loads.items()]
+
+    async def move(source, target, count):
+        moves.append((source, target, count))
+        return count
+
+    rooms.stats, rooms.move = stats, move
+    assert await rooms.rebalance() == 44
+    assert moves == [(0, 1, 44)]
+
+    # Every shard busy: nowhere better to put the games
+    loads.update({1: (90, 0.85), 2: (90, 0.85)})
+    assert await rooms.rebalance() == 0
@@ -0,0 +1,180 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.api.routes import get_repository
+from src.game.live import LOBBY_TOPIC, LiveGames, game_topic, live_games
+from src.main import app
+from src.realtime.hub import Frame, FrameHub, Subscription
+
+
+@pytest.fixture
+def live():
+    yield live_games
+    live_games.clear()
+
+
+def apply_delta(snake: list, delta: dict) -> list:
+    if "head" not in delta:
+        return snake
+    snake = [delta["head"]] + snake
+    return snake if delta["grow"] else snake[:-1]
+
+
+def test_deltas_rebuild_full_state():
+    live = LiveGames()
+    game_id = live.start_game("p1", "Player", "passthrough", seed=4)
+    subscription = Subscription(maxsize=1000)
+    live.hub.subscribe(subscription, game_topic(game_id))
+
+    snake = live.snapshot_frame(game_id).payload["snake"]
+    for i in range(200):
+        live.set_direction(game_id, ["up", "left", "down", "right"][(i // 7) % 4])
+        live.step()
+        _, tick, frame = subscription.queue.get_nowait()
+        delta = json.loads(frame.text())
+        assert tick == delta["tick"] == live.tick
+        snake = apply_delta(snake, delta)
+        assert snake == live.engine.get(game_id).snake_points()
+        # O(1) frames: no body in the delta
+        assert "snake" not in delta
+
+
+def test_frames_are_encoded_once_for_all_subscribers():
+    hub = FrameHub()
+    live = LiveGames(hub=hub)
+    game_id = live.start_game("p1", "Player", "walls", seed=1)
+    subscriptions = [Subscription() for _ in range(50)]
+    for subscription in subscriptions:
+        hub.subscribe(subscription, game_topic(game_id))
+
+    live.step()
+    frames = [subscription.queue.get_nowait()[2] for subscription in subscriptions]
+    assert all(frame is frames[0] for frame in frames)
+    assert all(frame.text() is frames[0].text() for frame in frames)
+    assert hub.frames_published == 1
+    assert hub.frames_delivered == 50
+
+
+def test_slow_subscriber_is_flagged_for_resync():
+    hub = FrameHub()
+    subscription = Subscription(maxsize=2)
+    hub.subscribe(subscription, "game:x")
+    for tick in range(3):
+        hub.publish("game:x", tick, Frame({"tick": tick}))
+    assert subscription.resync == {"game:x"}
+    assert subscription.queue.empty()
+
+
+def test_lobby_frames_batch_changes():
+    live = LiveGames()
+    subscription = Subscription()
+    live.hub.subscribe(subscription, LOBBY_TOPIC)
+    game_id = live.start_game("p1", "Player", "walls", seed=1)
+    live.step()
+    frame = subscription.queue.get_nowait()[2].payload
+    assert [game["id"] for game in frame["added"]] == [game_id]
+
+    # Run into the right-hand wall
+    for _ in range(10):
+        live.step()
+    frames = [subscription.queue.get_nowait()[2].payload for _ in range(subscription.queue.qsize())]
+    assert frames[-1]["ended"] == [game_id]
+    assert live.lobby() == []
+
+
+def test_websocket_snapshot_then_deltas(live):
+    game_id = live.start_game("p1", "Watcher", "passthrough", seed=2)
+    client = TestClient(app)
+    with client.websocket_connect(f"/api/ws/games/{game_id}") as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["playerName"] == "Watcher"
+        snake = snapshot["snake"]
+
+        for _ in range(3):
+            ws.portal.call(live.step)
+            delta = ws.receive_json()
+            assert delta["type"] == "delta"
+            snake = apply_delta(snake, delta)
+        assert snake == live.engine.get(game_id).snake_points()
+
+
+def test_lobby_websocket_can_follow_games(live):
+    game_id = live.start_game("p1", "Watcher", "walls", seed=2)
+    client = TestClient(app)
+    with client.websocket_connect("/api/ws/games") as ws:
+        lobby = ws.receive_json()
+        assert [game["id"] for game in lobby["games"]] == [game_id]
+
+        ws.send_json({"subscribe": game_id})
+        assert ws.receive_json()["type"] == "snapshot"
+        ws.portal.call(live.step)
+        frames = {frame["type"]: frame for frame in (ws.receive_json(), ws.receive_json())}
+        assert set(frames) == {"lobby", "delta"}
+
+
+def test_unknown_game_is_rejected(live):
+    class NoGames:
+        async def get_game(self, game_id):
+            return None
+
+    app.dependency_overrides[get_repository] = NoGames
+    client = TestClient(app)
+    try:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with client.websocket_connect("/api/ws/games/missing") as ws:
+                ws.receive_json()
+        assert exc.value.code == 4404
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_players_start_and_steer_server_games(client, live):
+    tokens = []
+    for name in ("Ann", "Bob"):
+        response = await client.post(
+            "/api/auth/signup", json={"email": f"{name.lower()}@snake.game", "username": name, "password": "pwd"}
+        )
+        tokens.append({"Authorization": f"Bearer {response.json()['token']}"})
+    ann, bob = tokens
+
+    response = await client.post("/api/games/start", json={"mode": "walls"}, headers=ann)
+    assert response.status_code == 200
+    game_id = response.json()["gameId"]
+    assert [game["playerName"] for game in live.lobby()] == ["Ann"]
+    assert (await client.post("/api/games/start", json={"mode": "walls"}, headers=ann)).status_code == 409
+    assert (await client.post("/api/games/start", json={"mode": "walls"})).status_code == 401
+
+    turn = await client.post(f"/api/games/{game_id}/turn", json={"direction": "up"}, headers=ann)
+    assert turn.json() == {"accepted": True}
+    live.step()
+    assert live.engine.get(game_id).direction == "up"
+    # Only the owner steers
+    assert (await client.post(f"/api/games/{game_id}/turn", json={"direction": "down"}, headers=bob)).status_code == 404
+
+    assert (await client.post(f"/api/games/{game_id}/abandon", headers=bob)).status_code == 404
+    response = await client.post(f"/api/games/{game_id}/abandon", headers=ann)
+    assert response.json() == {"success": True}
+    # Free to start again before the abandoned game has even ticked out
+    assert (await client.post("/api/games/start", json={"mode": "walls"}, headers=ann)).status_code == 200
+    assert live.step() == [game_id]
+
+
+def test_games_without_turns_end():
+    now = [0.0]
+    live = LiveGames(idle_timeout=30, clock=lambda: now[0])
+    idle = live.start_game("p1", "Idle", "passthrough", seed=1)
+    now[0] = 10
+    busy = live.start_game("p2", "Busy", "passthrough", seed=2)
+    now[0] = 25
+    live.set_direction(idle, "up")
+    now[0] = 45
+    assert live.step() == [busy]
+    assert live.game_of("p2") is None and live.game_of("p1") == idle
+    now[0] = 60
+    assert live.step() == [idle]
+    assert not live.engine.games and not live.playing
@@ -0,0 +1,75 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from src.web.static import IMMUTABLE, StaticSite, compress
+
+INDEX = b"<!doctype html><div id=root></div>" + b" " * 2000
+BUNDLE = b"console.log('snake');\n" * 500
+
+
+@pytest.fixture
+def site_dir(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_bytes(INDEX)
+    (tmp_path / "assets" / "index-3f2a9c.js").write_bytes(BUNDLE)
+    (tmp_path / "robots.txt").write_bytes(b"User-agent: *\n")
+    compress(str(tmp_path))
+    return tmp_path
+
+
+def client_for(site: StaticSite) -> AsyncClient:
+    app = FastAPI()
+
+    @app.get("/{full_path:path}")
+    async def serve(full_path: str, request: Request):
+        return site.respond(full_path, request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_compress_keeps_only_smaller_variants(site_dir):
+    assert gzip.decompress((site_dir / "assets" / "index-3f2a9c.js.gz").read_bytes()) == BUNDLE
+    assert (site_dir / "index.html.gz").exists()
+    # Too small to be worth it
+    assert not (site_dir / "robots.txt.gz").exists()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("memory_max_bytes", [64 * 1024, 0])
+async def test_encoding_follows_accept_encoding(site_dir, memory_max_bytes):
+    site = StaticSite.scan(str(site_dir), memory_max_bytes)
+    async with client_for(site) as client:
+        plain = await client.get("/assets/index-3f2a9c.js", headers={"Accept-Encoding": "identity"})
+        packed = await client.get("/assets/index-3f2a9c.js", headers={"Accept-Encoding": "br;q=0, gzip"})
+
+    assert plain.content == BUNDLE
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["content-type"].startswith("text/javascript")
+    assert plain.headers["cache-control"] == IMMUTABLE
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    assert packed.headers["content-encoding"] == "gzip"
+    assert packed.content == BUNDLE  # httpx decodes it
+    assert int(packed.headers["content-length"]) < len(BUNDLE)
+    assert packed.headers["etag"] != plain.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_spa_fallback_revalidation_and_missing_assets(site_dir):
+    site = StaticSite.scan(str(site_dir))
+    async with client_for(site) as client:
+        page = await client.get("/games/123", headers={"Accept-Encoding": "gzip"})
+        assert page.content == INDEX
+        assert page.headers["cache-control"] == "no-cache"
+
+        again = await client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": page.headers["etag"]})
+        assert again.status_code == 304
+        assert again.content == b""
+
+        assert (await client.get("/robots.txt")).content == b"User-agent: *\n"
+        assert (await client.get("/assets/missing-000000.js")).status_code == 404
+    # Only indexed files are served, so a path can't climb out of the directory
+    assert site.lookup("../secret.txt") is site.index
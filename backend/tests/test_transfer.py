@@ -0,0 +1,134 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db.base import Base
+from src.db.transfer import IMPORTED, MANIFEST, export_database, import_database
+from src.models import db as models
+
+CREATED = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def source(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'source.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(models.User), [
+            {"id": "u1", "username": 'Quote "me", ok', "email": "a@snake.game", "password": "h", "created_at": CREATED},
+            {"id": "u2", "username": "line\nbreak", "email": "b@snake.game", "password": "", "created_at": CREATED},
+        ])
+        await conn.execute(insert(models.LeaderboardEntry), [
+            {"id": f"s{i:03d}", "username": "p", "score": i, "mode": "walls", "date": CREATED} for i in range(25)
+        ])
+        await conn.execute(insert(models.ActiveGame), [{
+            "id": "g1", "player_id": "u1", "player_name": "p", "score": 3, "mode": "walls",
+            "snake": [{"x": 1, "y": 2}], "food": {"x": 5, "y": 5}, "direction": "up", "is_active": False, "seed": None,
+        }])
+        await conn.execute(insert(models.GameEvent), [
+            {"game_id": "g1", "tick": 1, "direction": "up", "ate": True, "food": 17},
+            {"game_id": "g1", "tick": 2, "direction": "left", "ate": False, "food": None},
+        ])
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def target(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'target.db'}")
+    yield engine
+    await engine.dispose()
+
+
+async def contents(engine) -> dict:
+    tables = {}
+    async with engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            rows = (await conn.execute(select(table).order_by(*table.primary_key.columns))).mappings().all()
+            tables[table.name] = [dict(row) for row in rows]
+    for row in tables["users"] + tables["leaderboard"]:
+        for column in ("created_at", "date"):
+            if column in row:
+                row[column] = row[column].replace(tzinfo=None)
+    return tables
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt,compressed", [("csv", False), ("csv", True), ("jsonl", True)])
+async def test_round_trip(source, target, tmp_path, fmt, compressed):
+    directory = str(tmp_path / "dump")
+    manifest = await export_database(source, directory, fmt, compressed, chunk_size=4, part_rows=10)
+
+    leaderboard = manifest["tables"]["leaderboard"]
+    assert [part["rows"] for part in leaderboard["parts"]] == [10, 10, 5]
+    assert leaderboard["parts"][0]["file"] == f"leaderboard.00000.{fmt}" + (".gz" if compressed else "")
+    assert all(table["done"] for table in manifest["tables"].values())
+
+    assert await import_database(target, directory, chunk_size=3) == 25 + 2 + 1 + 2
+    assert await contents(target) == await contents(source)
+
+
+@pytest.mark.asyncio
+async def test_csv_parts_are_copy_compatible(source, tmp_path):
+    directory = str(tmp_path / "dump")
+    await export_database(source, directory, "csv", names=["users", "game_events"])
+
+    with open(os.path.join(directory, "users.00000.csv")) as f:
+        assert f.readline() == '"id","username","email","password","created_at"\n'
+        assert f.readline() == '"u1","Quote ""me"", ok","a@snake.game","h","2024-05-01T12:30:00+00:00"\n'
+    with open(os.path.join(directory, "game_events.00000.csv")) as f:
+        # NULL is an empty unquoted field, as COPY ... CSV reads it
+        assert f.read().splitlines()[1:] == ['"g1",1,"up",True,17', '"g1",2,"left",False,']
+
+
+@pytest.mark.asyncio
+async def test_export_resumes_after_the_last_recorded_part(source, tmp_path):
+    directory = str(tmp_path / "dump")
+    await export_database(source, directory, names=["leaderboard"], part_rows=10)
+    path = os.path.join(directory, MANIFEST)
+    with open(path) as f:
+        manifest = json.load(f)
+    # Interrupted after the first part
+    state = manifest["tables"]["leaderboard"]
+    os.remove(os.path.join(directory, state["parts"][2]["file"]))
+    state["parts"] = state["parts"][:1]
+    state["done"] = False
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+
+    manifest = await export_database(source, directory, names=["leaderboard"], part_rows=50)
+    parts = manifest["tables"]["leaderboard"]["parts"]
+    assert [part["rows"] for part in parts] == [10, 10, 5]
+    assert parts[-1]["last"] == ["s024"]
+
+    with pytest.raises(ValueError):
+        await export_database(source, directory, "jsonl", names=["leaderboard"])
+
+
+@pytest.mark.asyncio
+async def test_import_resumes_at_the_first_unfinished_part(source, target, tmp_path):
+    directory = str(tmp_path / "dump")
+    await export_database(source, directory, names=["leaderboard"], part_rows=10)
+    await import_database(target, directory)
+
+    state_path = os.path.join(directory, IMPORTED)
+    with open(state_path) as f:
+        state = json.load(f)
+    assert state["parts"] == ["leaderboard.00000.csv", "leaderboard.00001.csv", "leaderboard.00002.csv"]
+
+    # Interrupted before the last part was recorded, though its rows were committed
+    state["parts"] = state["parts"][:1]
+    with open(state_path, "w") as f:
+        json.dump(state, f)
+    assert await import_database(target, directory) == 15
+    assert len((await contents(target))["leaderboard"]) == 25
+
+    elsewhere = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'other.db'}")
+    with pytest.raises(ValueError):
+        await import_database(elsewhere, directory)
+    await elsewhere.dispose()
@@ -0,0 +1,121 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db.migrations import migrate
+from src.db.repository import DatabaseRepository
+from src.leaderboard.index import RankedEntry
+from src.leaderboard.stats import rebuild
+from src.models import db as models
+
+
+async def seed(client: AsyncClient, players: dict[str, list[int]]) -> dict[str, dict]:
+    """Sign players up and submit their walls scores; returns auth headers by name."""
+    headers = {}
+    for name, scores in players.items():
+        response = await client.post(
+            "/api/auth/signup", json={"email": f"{name.lower()}@snake.game", "username": name, "password": "pwd"}
+        )
+        headers[name] = {"Authorization": f"Bearer {response.json()['token']}"}
+        for score in scores:
+            await client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers[name])
+    return headers
+
+
+async def stats_table(conn) -> list:
+    rows = await conn.execute(
+        select(models.UserStats.username, models.UserStats.mode, models.UserStats.best_score,
+               models.UserStats.games_played, models.UserStats.total_score)
+        .order_by(models.UserStats.username, models.UserStats.mode)
+    )
+    return [tuple(row) for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_every_score_write_updates_the_aggregate(test_db_session):
+    repo = DatabaseRepository(test_db_session)
+    await repo.add_score("ann", 150, "walls")
+    await repo.add_score("ann", 310, "walls")
+    await repo.add_score("ann", 20, "passthrough")
+    start = datetime(2025, 1, 1)
+    await repo.insert_scores([
+        RankedEntry("b1", "bob", 90, "walls", start),
+        RankedEntry("b2", "ann", 100, "walls", start + timedelta(days=1)),
+        RankedEntry("b3", "bob", 95, "walls", start + timedelta(days=2)),
+    ])
+
+    assert await stats_table(test_db_session) == [
+        ("ann", "passthrough", 20, 1, 20),
+        ("ann", "walls", 310, 3, 560),
+        ("bob", "walls", 95, 2, 185),
+    ]
+    [walls] = await repo.get_user_stats("bob")
+    assert walls["lastPlayed"] == start + timedelta(days=2)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_grouping_the_leaderboard(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    await migrate(engine)
+    rng = random.Random(9)
+    rows = [
+        {"id": f"{i:05d}", "username": f"p{rng.randrange(40)}", "score": rng.randrange(1000),
+         "mode": rng.choice(("walls", "passthrough")), "date": datetime(2025, 1, 1) + timedelta(minutes=rng.randrange(10**5))}
+        for i in range(2000)
+    ]
+    async with engine.begin() as conn:
+        # History written before user_stats existed: only a rebuild can account for it
+        await conn.execute(insert(models.LeaderboardEntry), rows)
+    async with engine.connect() as conn:
+        assert await stats_table(conn) == []
+
+    assert await rebuild(engine, chunk_size=128) == len(rows)
+    async with engine.connect() as conn:
+        rebuilt = await stats_table(conn)
+        grouped = await conn.execute(text(
+            "SELECT username, mode, MAX(score), COUNT(*), SUM(score) FROM leaderboard "
+            "GROUP BY username, mode ORDER BY username, mode"
+        ))
+        assert rebuilt == [tuple(row) for row in grouped]
+        last = await conn.execute(select(models.UserStats.last_played).where(
+            models.UserStats.username == rows[0]["username"], models.UserStats.mode == rows[0]["mode"]))
+        assert last.scalar() == max(
+            r["date"] for r in rows if (r["username"], r["mode"]) == (rows[0]["username"], rows[0]["mode"]))
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_players_leaderboard_lists_each_player_once(client: AsyncClient):
+    headers = await seed(client, {"Ann": [150, 310], "Bob": [300, 40, 280], "Cy": [310], "Di": [5]})
+
+    first = await client.get("/api/leaderboard/players?mode=walls&limit=2")
+    assert [(p["username"], p["bestScore"]) for p in first.json()] == [("Ann", 310), ("Cy", 310)]
+    rest = await client.get(f"/api/leaderboard/players?mode=walls&limit=2&after={first.headers['x-next-cursor']}")
+    assert [(p["username"], p["gamesPlayed"], p["totalScore"]) for p in rest.json()] == [("Bob", 3, 620), ("Di", 1, 5)]
+
+    again = await client.get("/api/leaderboard/players?mode=walls&limit=2",
+                             headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    # A new personal best moves the player up and invalidates the cached page
+    await client.post("/api/leaderboard", json={"score": 400, "mode": "walls"}, headers=headers["Di"])
+    moved = await client.get("/api/leaderboard/players?mode=walls&limit=2")
+    assert [p["username"] for p in moved.json()] == ["Di", "Ann"]
+    assert (await client.get("/api/leaderboard/players")).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_my_stats(client: AsyncClient):
+    headers = await seed(client, {"Ann": [150, 310]})
+    await client.post("/api/leaderboard", json={"score": 70, "mode": "passthrough"}, headers=headers["Ann"])
+
+    response = await client.get("/api/users/me/stats", headers=headers["Ann"])
+    assert response.status_code == 200
+    stats = {row["mode"]: row for row in response.json()}
+    assert stats["walls"]["bestScore"] == 310 and stats["walls"]["gamesPlayed"] == 2
+    assert stats["walls"]["totalScore"] == 460
+    assert stats["passthrough"]["gamesPlayed"] == 1
+    assert (await client.get("/api/users/me/stats", headers={"Authorization": "Bearer nope"})).status_code == 401
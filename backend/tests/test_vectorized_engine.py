@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.game.engine import GRID_SIZE, SnakeGame
+from src.game.vectorized import VectorizedEngine
+
+
+def test_matches_scalar_engine():
+    """Lock-step against SnakeGame; food positions are copied across since the samplers differ."""
+    rng = random.Random(5)
+    engine = VectorizedEngine(capacity=8, seed=5)
+    games = {}
+    for i in range(64):
+        mode = "walls" if i % 2 else "passthrough"
+        game_id = engine.create_game(mode)
+        scalar = SnakeGame(mode, seed=i)
+        scalar.food = int(engine.food[engine.slots[game_id]])
+        games[game_id] = scalar
+    assert engine.capacity == 64
+
+    for _ in range(400):
+        for game_id, scalar in games.items():
+            if scalar.is_game_over:
+                continue
+            if rng.random() < 0.3:
+                direction = rng.choice(["up", "down", "left", "right"])
+            else:
+                head, food = scalar.body[0], scalar.food
+                hx, hy, fx, fy = head % GRID_SIZE, head // GRID_SIZE, food % GRID_SIZE, food // GRID_SIZE
+                direction = ("right" if fx > hx else "left") if fx != hx else ("down" if fy > hy else "up")
+            assert engine.set_direction(game_id, direction) == scalar.set_direction(direction)
+
+        ended = set(engine.tick_all())
+        for game_id, scalar in games.items():
+            was_over = scalar.is_game_over
+            if scalar.move():
+                scalar.food = int(engine.food[engine.slots[game_id]])
+            slot = engine.slots[game_id]
+            assert engine.snake_cells(game_id) == list(scalar.body)
+            assert engine.is_game_over(game_id) == scalar.is_game_over
+            assert (game_id in ended) == (scalar.is_game_over and not was_over)
+            assert engine.score[slot] == scalar.score
+            if not scalar.is_game_over:
+                assert engine.food[slot] == scalar.food
+
+    assert any(scalar.score for scalar in games.values())
+    assert any(scalar.is_game_over for scalar in games.values())
+
+
+def test_food_never_lands_on_snake_near_full_board():
+    engine = VectorizedEngine(capacity=4, grid_size=4, seed=1)
+    game_id = engine.create_game("passthrough")
+    slot = engine.slots[game_id]
+    # Fill all but two cells, then re-place food many times
+    engine.occupied[slot] = True
+    engine.occupied[slot, [3, 9]] = False
+    engine.length[slot] = 14
+    seen = set()
+    for _ in range(200):
+        engine._place_food(np.array([slot]))
+        seen.add(int(engine.food[slot]))
+    assert seen == {3, 9}
+
+
+def test_removed_slots_are_reused():
+    engine = VectorizedEngine(capacity=2)
+    first = engine.create_game("walls")
+    engine.create_game("walls")
+    slot = engine.slots[first]
+    assert engine.remove(first)
+    replacement = engine.create_game("passthrough")
+    assert engine.slots[replacement] == slot
+    assert engine.capacity == 2
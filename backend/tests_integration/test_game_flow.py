@@ -1,5 +1,29 @@
 import pytest
 from httpx import AsyncClient
+from src.game.engine import DELTAS, OPPOSITES, Mulberry32, SnakeGame
+
+
+def play_seeded_game(seed: int, meals: int) -> dict:
+    """Steer towards food for a few meals, then into the wall, logging turns like the client does."""
+    game = SnakeGame("walls", rng=Mulberry32(seed))
+    size = game.grid_size
+    inputs, ticks = [], 0
+    while not game.is_game_over:
+        if game.score < meals * 10:
+            hx, hy = game.body[0] % size, game.body[0] // size
+            fx, fy = game.food % size, game.food // size
+            for direction in sorted(DELTAS, key=lambda d: abs(hx + DELTAS[d][0] - fx) + abs(hy + DELTAS[d][1] - fy)):
+                x, y = hx + DELTAS[direction][0], hy + DELTAS[direction][1]
+                if direction == OPPOSITES[game.direction] or not (0 <= x < size and 0 <= y < size):
+                    continue
+                if game.occupied[y * size + x] and y * size + x != game.body[-1]:
+                    continue
+                if direction != game.next_direction and game.set_direction(direction):
+                    inputs.append([ticks, direction])
+                break
+        game.move()
+        ticks += 1
+    return {"mode": "walls", "score": game.score, "seed": seed, "ticks": ticks, "inputs": inputs}
 
 @pytest.mark.asyncio
 async def test_full_game_lifecycle(client: AsyncClient):
@@ -34,9 +58,8 @@ async def test_full_game_lifecycle(client: AsyncClient):
     assert resp_login.status_code == 200
     assert resp_login.json()["success"] is True
     
-    # Simulate Auth Header (Standard Bearer since we don't have real JWT yet)
-    # The current impl treats the token as the email in the mock logic.
-    headers = {"Authorization": f"Bearer {email}"}
+    # Authenticate with the session token returned by login
+    headers = {"Authorization": f"Bearer {resp_login.json()['token']}"}
     
     # 3. Check Profile
     resp_me = await client.get("/api/auth/me", headers=headers)
@@ -48,13 +71,12 @@ async def test_full_game_lifecycle(client: AsyncClient):
     assert resp_lb_empty.status_code == 200
     assert len(resp_lb_empty.json()) == 0
     
-    # 5. Submit Score
-    score = 1500
+    # 5. Submit Score, with the seed and inputs the server re-simulates
+    game = play_seeded_game(seed=2024, meals=5)
+    score = game["score"]
     mode = "walls"
-    resp_submit = await client.post("/api/leaderboard", json={
-        "score": score,
-        "mode": mode
-    }, headers=headers)
+    assert score == 50
+    resp_submit = await client.post("/api/leaderboard", json=game, headers=headers)
     assert resp_submit.status_code == 200
     
     # 6. Check Leaderboard (Populated)
@@ -9,7 +9,7 @@ export interface LeaderboardEntry {
     id: string;
     username: string;
     score: number;
-    mode: 'passthrough' | 'walls';
+    mode: 'passthrough' | 'walls' | 'royale';
     date: Date;
 }
 
@@ -25,7 +25,17 @@ export interface ActiveGame {
     isActive: boolean;
 }
 
+export interface ScoreSubmission {
+    score: number;
+    mode: 'passthrough' | 'walls';
+    seed: number;
+    ticks: number;
+    inputs: [number, 'up' | 'down' | 'left' | 'right'][];
+}
+
 const STORAGE_KEY = 'snake_royale_token';
+const VERIFY_POLL_ATTEMPTS = 20;
+const VERIFY_POLL_INTERVAL_MS = 500;
 
 const getHeaders = () => {
     const token = localStorage.getItem(STORAGE_KEY);
@@ -77,8 +87,7 @@ export const authApi = {
 
             const data = await response.json();
             if (data.success && data.user) {
-                // Mock token behavior: store email as token
-                localStorage.setItem(STORAGE_KEY, data.user.email);
+                localStorage.setItem(STORAGE_KEY, data.token);
                 return { success: true, user: data.user };
             }
             return { success: false, error: data.error || 'Login failed' };
@@ -105,7 +114,7 @@ export const authApi = {
 
             const data = await response.json();
             if (data.success && data.user) {
-                localStorage.setItem(STORAGE_KEY, data.user.email);
+                localStorage.setItem(STORAGE_KEY, data.token);
                 return { success: true, user: data.user };
             }
             return { success: false, error: data.error || 'Signup failed' };
@@ -152,9 +161,10 @@ export const authApi = {
 };
 
 export const leaderboardApi = {
-    async getLeaderboard(mode?: 'passthrough' | 'walls'): Promise<LeaderboardEntry[]> {
+    async getLeaderboard(mode?: LeaderboardEntry['mode'], limit?: number): Promise<LeaderboardEntry[]> {
         const params = new URLSearchParams();
         if (mode) params.append('mode', mode);
+        if (limit) params.append('limit', String(limit));
 
         try {
             const response = await fetch(`/api/leaderboard?${params.toString()}`);
@@ -165,14 +175,29 @@ export const leaderboardApi = {
         }
     },
 
-    async submitScore(score: number, mode: 'passthrough' | 'walls'): Promise<{ success: boolean; rank?: number }> {
+    async submitScore(game: ScoreSubmission): Promise<{ success: boolean; rank?: number }> {
         try {
             const response = await fetch('/api/leaderboard', {
                 method: 'POST',
                 headers: getHeaders(),
-                body: JSON.stringify({ score, mode }),
+                body: JSON.stringify(game),
             });
-            return await handleResponse(response);
+            const result = await handleResponse<{ success: boolean; rank?: number; verificationId?: string }>(response);
+            if (response.status !== 202) {
+                return result;
+            }
+            // Queued for re-simulation; the rank arrives once the game checks out
+            for (let attempt = 0; attempt < VERIFY_POLL_ATTEMPTS; attempt++) {
+                await new Promise(resolve => setTimeout(resolve, VERIFY_POLL_INTERVAL_MS));
+                const check = await fetch(`/api/leaderboard/verifications/${result.verificationId}`, {
+                    headers: getHeaders(),
+                });
+                const verification = await handleResponse<{ status: string; rank: number | null }>(check);
+                if (verification.status !== 'pending') {
+                    return { success: verification.status === 'verified', rank: verification.rank ?? undefined };
+                }
+            }
+            return { success: false };
         } catch (error) {
             console.error("Score submit error:", error);
             return { success: false };
@@ -4,18 +4,18 @@ import { Trophy, Medal, Award } from 'lucide-react';
 import { cn } from '@/lib/utils';
 
 interface LeaderboardProps {
-  filterMode?: 'passthrough' | 'walls' | 'all';
+  filterMode?: 'passthrough' | 'walls' | 'royale' | 'all';
 }
 
 export function Leaderboard({ filterMode = 'all' }: LeaderboardProps) {
   const [entries, setEntries] = useState<LeaderboardEntry[]>([]);
-  const [selectedMode, setSelectedMode] = useState<'passthrough' | 'walls' | 'all'>(filterMode);
+  const [selectedMode, setSelectedMode] = useState<'passthrough' | 'walls' | 'royale' | 'all'>(filterMode);
   const [isLoading, setIsLoading] = useState(true);
 
   useEffect(() => {
     setIsLoading(true);
     const mode = selectedMode === 'all' ? undefined : selectedMode;
-    leaderboardApi.getLeaderboard(mode).then(data => {
+    leaderboardApi.getLeaderboard(mode, 10).then(data => {
       setEntries(data);
       setIsLoading(false);
     });
@@ -36,7 +36,7 @@ export function Leaderboard({ filterMode = 'all' }: LeaderboardProps) {
 
       {/* Mode Filter */}
       <div className="flex gap-2 mb-6 justify-center">
-        {(['all', 'passthrough', 'walls'] as const).map((mode) => (
+        {(['all', 'passthrough', 'walls', 'royale'] as const).map((mode) => (
           <button
             key={mode}
             onClick={() => setSelectedMode(mode)}
@@ -56,13 +56,14 @@ export function SnakeGame({ initialMode = 'passthrough' }: SnakeGameProps) {
   useEffect(() => {
     if (gameState.isGameOver && user && !hasSubmittedScore.current && gameState.score > 0) {
       hasSubmittedScore.current = true;
-      leaderboardApi.submitScore(gameState.score, gameState.mode).then(result => {
+      const { score, mode, seed, tick, inputs } = gameState;
+      leaderboardApi.submitScore({ score, mode, seed, ticks: tick, inputs }).then(result => {
         if (result.success && result.rank) {
-          toast.success(`Score submitted! You ranked #${result.rank} in ${gameState.mode} mode`);
+          toast.success(`Score submitted! You ranked #${result.rank} in ${mode} mode`);
         }
       });
     }
-  }, [gameState.isGameOver, gameState.score, gameState.mode, user]);
+  }, [gameState, user]);
 
   // Keyboard controls
   useEffect(() => {
@@ -87,6 +88,8 @@ export function SnakeGame({ initialMode = 'passthrough' }: SnakeGameProps) {
 
       if (directionMap[e.key]) {
         e.preventDefault();
+        // Held keys repeat several times a tick; only the first press turns
+        if (e.repeat) return;
         setGameState(prev => setDirection(prev, directionMap[e.key]));
       } else if (e.key === ' ') {
         e.preventDefault();
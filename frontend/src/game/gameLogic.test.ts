@@ -9,6 +9,7 @@ import {
   togglePause,
   restartGame,
   calculateAIMove,
+  mulberry32,
   GRID_SIZE,
   INITIAL_SNAKE_LENGTH,
   type GameState,
@@ -455,4 +456,48 @@ describe('Game Logic', () => {
       expect(currentState.snake.length).toBe(initialLength);
     });
   });
+
+  describe('seeded games', () => {
+    it('matches the server food RNG', () => {
+      // Same values are asserted for Mulberry32 in backend/tests/test_score_verify.py
+      const rng = mulberry32(42);
+      expect([rng.next(), rng.next()]).toEqual([0.6011037519201636, 0.44829055899754167]);
+    });
+
+    it('places the same food for the same seed', () => {
+      const a = createInitialState('passthrough', 7);
+      const b = createInitialState('passthrough', 7);
+      expect(a.food).toEqual(b.food);
+      expect(a.rngState).toBe(b.rngState);
+    });
+
+    it('logs accepted turns with the moves made so far', () => {
+      let state = createInitialState('passthrough', 1);
+      state = moveSnake(moveSnake(state));
+      state = setDirection(state, 'left'); // reversal, ignored
+      state = setDirection(state, 'up');
+      state = moveSnake(state);
+      expect(state.tick).toBe(3);
+      expect(state.inputs).toEqual([[2, 'up']]);
+    });
+
+    it('logs at most one turn per tick and skips presses that change nothing', () => {
+      let state = createInitialState('passthrough', 1);
+      state = setDirection(state, 'right'); // already heading right
+      expect(state.inputs).toEqual([]);
+      state = setDirection(state, 'up');
+      state = setDirection(state, 'up');
+      state = setDirection(state, 'left'); // reverses the current direction, ignored
+      state = setDirection(state, 'right');
+      expect(state.inputs).toEqual([[0, 'right']]);
+      state = moveSnake(setDirection(state, 'up'));
+      state = setDirection(state, 'left');
+      expect(state.inputs).toEqual([[0, 'up'], [1, 'left']]);
+    });
+
+    it('ignores input after game over', () => {
+      const state = { ...createInitialState('walls', 1), isGameOver: true };
+      expect(setDirection(state, 'up')).toBe(state);
+    });
+  });
 });
@@ -8,6 +8,9 @@ export interface Position {
   y: number;
 }
 
+// Accepted direction changes as [moves made before the change, direction]
+export type InputLog = [number, Direction][];
+
 export interface GameState {
   snake: Position[];
   food: Position;
@@ -18,12 +21,38 @@ export interface GameState {
   isPaused: boolean;
   mode: GameMode;
   gridSize: number;
+  // Seed, moves and inputs are submitted with the score; the server replays
+  // them (backend/src/game/verify.py) before the score counts
+  seed: number;
+  rngState: number;
+  tick: number;
+  inputs: InputLog;
 }
 
 export const GRID_SIZE = 20;
 export const INITIAL_SNAKE_LENGTH = 3;
 
-export function createInitialState(mode: GameMode): GameState {
+// Seeded food RNG, mirrored by Mulberry32 in backend/src/game/engine.py
+export function mulberry32(seed: number) {
+  let a = seed >>> 0;
+  return {
+    next(): number {
+      a = (a + 0x6D2B79F5) | 0;
+      let t = Math.imul(a ^ (a >>> 15), 1 | a);
+      t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+      return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    },
+    get state(): number {
+      return a >>> 0;
+    },
+  };
+}
+
+export function randomSeed(): number {
+  return Math.floor(Math.random() * 0x100000000);
+}
+
+export function createInitialState(mode: GameMode, seed: number = randomSeed()): GameState {
   const centerX = Math.floor(GRID_SIZE / 2);
   const centerY = Math.floor(GRID_SIZE / 2);
   
@@ -32,9 +61,10 @@ export function createInitialState(mode: GameMode): GameState {
     snake.push({ x: centerX - i, y: centerY });
   }
 
+  const rng = mulberry32(seed);
   return {
     snake,
-    food: generateFood(snake, GRID_SIZE),
+    food: generateFood(snake, GRID_SIZE, rng.next),
     direction: 'right',
     nextDirection: 'right',
     score: 0,
@@ -42,15 +72,19 @@ export function createInitialState(mode: GameMode): GameState {
     isPaused: false,
     mode,
     gridSize: GRID_SIZE,
+    seed,
+    rngState: rng.state,
+    tick: 0,
+    inputs: [],
   };
 }
 
-export function generateFood(snake: Position[], gridSize: number): Position {
+export function generateFood(snake: Position[], gridSize: number, random: () => number = Math.random): Position {
   let food: Position;
   do {
     food = {
-      x: Math.floor(Math.random() * gridSize),
-      y: Math.floor(Math.random() * gridSize),
+      x: Math.floor(random() * gridSize),
+      y: Math.floor(random() * gridSize),
     };
   } while (isPositionOnSnake(food, snake));
   return food;
@@ -75,10 +109,21 @@ export function isValidDirectionChange(current: Direction, next: Direction): boo
 }
 
 export function setDirection(state: GameState, newDirection: Direction): GameState {
-  if (!isValidDirectionChange(state.direction, newDirection)) {
+  if (
+    state.isGameOver ||
+    newDirection === state.nextDirection ||
+    !isValidDirectionChange(state.direction, newDirection)
+  ) {
     return state;
   }
-  return { ...state, nextDirection: newDirection };
+  // One entry per tick: only the last change before a move takes effect
+  const last = state.inputs[state.inputs.length - 1];
+  const earlier = last && last[0] === state.tick ? state.inputs.slice(0, -1) : state.inputs;
+  return {
+    ...state,
+    nextDirection: newDirection,
+    inputs: [...earlier, [state.tick, newDirection]],
+  };
 }
 
 export function moveSnake(state: GameState): GameState {
@@ -87,6 +132,7 @@ export function moveSnake(state: GameState): GameState {
   }
 
   const { snake, food, nextDirection, mode, gridSize } = state;
+  const tick = state.tick + 1;
   const head = snake[0];
   
   // Calculate new head position
@@ -116,14 +162,14 @@ export function moveSnake(state: GameState): GameState {
   } else {
     // Walls mode - check collision
     if (newHead.x < 0 || newHead.x >= gridSize || newHead.y < 0 || newHead.y >= gridSize) {
-      return { ...state, isGameOver: true, direction: nextDirection };
+      return { ...state, isGameOver: true, direction: nextDirection, tick };
     }
   }
 
   // Check self collision (excluding tail which will move)
   const bodyWithoutTail = snake.slice(0, -1);
   if (isPositionOnSnake(newHead, bodyWithoutTail)) {
-    return { ...state, isGameOver: true, direction: nextDirection };
+    return { ...state, isGameOver: true, direction: nextDirection, tick };
   }
 
   // Check if eating food
@@ -132,10 +178,13 @@ export function moveSnake(state: GameState): GameState {
   let newSnake: Position[];
   let newFood = food;
   let newScore = state.score;
+  let rngState = state.rngState;
 
   if (ateFood) {
     newSnake = [newHead, ...snake];
-    newFood = generateFood(newSnake, gridSize);
+    const rng = mulberry32(rngState);
+    newFood = generateFood(newSnake, gridSize, rng.next);
+    rngState = rng.state;
     newScore += 10;
   } else {
     newSnake = [newHead, ...snake.slice(0, -1)];
@@ -147,6 +196,8 @@ export function moveSnake(state: GameState): GameState {
     food: newFood,
     direction: nextDirection,
     score: newScore,
+    rngState,
+    tick,
   };
 }
 
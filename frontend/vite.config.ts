@@ -14,6 +14,7 @@ export default defineConfig(({ mode }) => ({
         target: "http://localhost:8000",
         changeOrigin: true,
         secure: false,
+        ws: true,
       },
     },
   },